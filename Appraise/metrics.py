@@ -0,0 +1,403 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+Lightweight per-view and per-phase instrumentation.
+
+MetricsMiddleware records wall time, database query count and database
+time for every request, labelled with the resolved view name. Within a
+request, checkpoint(phase) attributes everything since the previous
+checkpoint to the given phase; measure(phase) is a context manager doing
+the same for a block of code, also usable from model methods.
+
+Values are aggregated into in-process histograms. If METRICS_DIR is set,
+each process periodically writes a JSON snapshot there, so that metrics
+of all worker processes can be merged by the metrics view and the
+DumpMetrics management command.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from contextlib import ExitStack
+from contextvars import ContextVar
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+from time import time
+
+from django.db import connections
+
+from Appraise.settings import METRICS_DIR
+from Appraise.settings import METRICS_FLUSH_INTERVAL
+from Appraise.utils import _get_logger
+
+LOGGER = _get_logger(name=__name__)
+
+# Histogram bucket upper bounds, in seconds and number of queries
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERIES_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Metric name suffix => (bucket bounds, help text)
+METRIC_KINDS = {
+    'seconds': (SECONDS_BUCKETS, 'Wall time in seconds'),
+    'queries': (QUERIES_BUCKETS, 'Number of database queries'),
+    'db_seconds': (SECONDS_BUCKETS, 'Database time in seconds'),
+}
+
+# Time after the last checkpoint of a request is recorded as this phase
+REMAINDER_PHASE = 'render'
+
+_CURRENT_REQUEST = ContextVar('appraise_metrics_request', default=None)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket bounds.
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Adds value to histogram.
+        """
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, data):
+        """
+        Adds histogram data as returned by to_dict() to this histogram.
+        """
+        if tuple(data['bounds']) != self.bounds:
+            raise ValueError('Cannot merge histograms with different buckets')
+
+        for index, count in enumerate(data['counts']):
+            self.counts[index] += count
+        self.count += data['count']
+        self.sum += data['sum']
+
+    def to_dict(self):
+        """
+        Returns JSON serializable representation of this histogram.
+        """
+        return {
+            'bounds': list(self.bounds),
+            'counts': list(self.counts),
+            'count': self.count,
+            'sum': self.sum,
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of histograms keyed by metric name and labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._last_flush = time()
+
+    def observe(self, name, labels, value, bounds):
+        """
+        Adds value to histogram for name and labels, a tuple of pairs.
+        """
+        key = (name, tuple(labels))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(bounds)
+            self._histograms[key].observe(value)
+
+    def snapshot(self):
+        """
+        Returns list of JSON serializable metrics in this registry.
+        """
+        with self._lock:
+            return [
+                {'name': name, 'labels': [list(x) for x in labels], **hist.to_dict()}
+                for (name, labels), hist in sorted(self._histograms.items())
+            ]
+
+    def reset(self):
+        """
+        Removes all metrics from this registry.
+        """
+        with self._lock:
+            self._histograms = {}
+
+    def maybe_flush(self, directory=METRICS_DIR, interval=METRICS_FLUSH_INTERVAL):
+        """
+        Writes snapshot to directory at most once per interval seconds.
+
+        Only the thread claiming the interval writes the snapshot. It goes
+        to a unique temporary file first, which then replaces the snapshot
+        of this process atomically.
+        """
+        if not directory:
+            return
+
+        with self._lock:
+            if time() - self._last_flush < interval:
+                return
+            self._last_flush = time()
+
+        snapshot_path = os.path.join(directory, 'metrics-{0}.json'.format(os.getpid()))
+        out_file = NamedTemporaryFile(
+            mode='w',
+            encoding='utf-8',
+            dir=directory,
+            prefix='metrics-',
+            suffix='.tmp',
+            delete=False,
+        )
+        try:
+            with out_file:
+                json.dump(self.snapshot(), out_file)
+            os.replace(out_file.name, snapshot_path)
+        except Exception:
+            os.remove(out_file.name)
+            raise
+
+
+REGISTRY = MetricsRegistry()
+
+
+def merge_snapshots(snapshots):
+    """
+    Merges metrics snapshots into a single list of metrics.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for metric in snapshot:
+            key = (metric['name'], tuple(tuple(x) for x in metric['labels']))
+            if key not in merged:
+                merged[key] = Histogram(metric['bounds'])
+            merged[key].merge(metric)
+
+    return [
+        {'name': name, 'labels': [list(x) for x in labels], **hist.to_dict()}
+        for (name, labels), hist in sorted(merged.items())
+    ]
+
+
+def load_snapshots(directory=METRICS_DIR, exclude_pid=None):
+    """
+    Loads metrics snapshots written by all processes into directory.
+    """
+    snapshots = []
+    if not directory or not os.path.isdir(directory):
+        return snapshots
+
+    for file_name in sorted(os.listdir(directory)):
+        if not (file_name.startswith('metrics-') and file_name.endswith('.json')):
+            continue
+
+        if file_name == 'metrics-{0}.json'.format(exclude_pid):
+            continue
+
+        with open(os.path.join(directory, file_name), encoding='utf-8') as in_file:
+            snapshots.append(json.load(in_file))
+
+    return snapshots
+
+
+def collect_metrics():
+    """
+    Returns metrics for this process merged with snapshots of all others.
+    """
+    others = load_snapshots(exclude_pid=os.getpid())
+    return merge_snapshots([REGISTRY.snapshot()] + others)
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{0}="{1}"'.format(key, _escape_label_value(value)) for key, value in pairs
+    ) + '}'
+
+
+def render_prometheus_text(metrics):
+    """
+    Renders list of metrics in Prometheus text exposition format.
+    """
+    lines = []
+    described = set()
+    for metric in metrics:
+        name, labels = metric['name'], metric['labels']
+        if name not in described:
+            _help = name
+            for suffix in sorted(METRIC_KINDS, key=len, reverse=True):
+                if name.endswith('_' + suffix):
+                    _help = METRIC_KINDS[suffix][1]
+                    break
+            lines.append('# HELP {0} {1}'.format(name, _help))
+            lines.append('# TYPE {0} histogram'.format(name))
+            described.add(name)
+
+        for bound, count in zip(metric['bounds'], metric['counts']):
+            _labels = _format_labels(labels, ('le', repr(float(bound))))
+            lines.append('{0}_bucket{1} {2}'.format(name, _labels, count))
+
+        _labels = _format_labels(labels, ('le', '+Inf'))
+        lines.append('{0}_bucket{1} {2}'.format(name, _labels, metric['count']))
+        _labels = _format_labels(labels)
+        lines.append('{0}_sum{1} {2!r}'.format(name, _labels, float(metric['sum'])))
+        lines.append('{0}_count{1} {2}'.format(name, _labels, metric['count']))
+
+    return '\n'.join(lines) + '\n'
+
+
+class QueryCollector:
+    """
+    Database execute wrapper counting queries and database time.
+
+    Also tracks wall time since creation or last call of lap().
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.started = perf_counter()
+        self._lap = (self.started, 0, 0.0)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += perf_counter() - started
+
+    def totals(self):
+        """
+        Returns (seconds, queries, db_seconds) since creation.
+        """
+        return (perf_counter() - self.started, self.queries, self.db_seconds)
+
+    def lap(self):
+        """
+        Returns (seconds, queries, db_seconds) since last lap and restarts it.
+        """
+        now = perf_counter()
+        last_time, last_queries, last_db_seconds = self._lap
+        self._lap = (now, self.queries, self.db_seconds)
+        return (
+            now - last_time,
+            self.queries - last_queries,
+            self.db_seconds - last_db_seconds,
+        )
+
+
+@contextmanager
+def _collect_queries():
+    """
+    Installs a QueryCollector on all database connections of this thread.
+    """
+    collector = QueryCollector()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+
+
+def _observe(prefix, labels, values):
+    for suffix, value in zip(('seconds', 'queries', 'db_seconds'), values):
+        bounds = METRIC_KINDS[suffix][0]
+        REGISTRY.observe('{0}_{1}'.format(prefix, suffix), labels, value, bounds)
+
+
+def _current_view():
+    state = _CURRENT_REQUEST.get()
+    return state.view if state is not None else 'none'
+
+
+def checkpoint(phase):
+    """
+    Records everything since previous checkpoint as phase of current view.
+
+    Does nothing outside of requests handled by MetricsMiddleware.
+    """
+    state = _CURRENT_REQUEST.get()
+    if state is None:
+        return
+
+    state.checkpoints += 1
+    labels = (('view', state.view), ('phase', phase))
+    _observe('appraise_phase', labels, state.collector.lap())
+
+
+@contextmanager
+def measure(phase):
+    """
+    Records wall time and queries of the wrapped block as phase.
+
+    The phase is labelled with the current view, or 'none' if used
+    outside of a request, e.g., from management commands.
+    """
+    with _collect_queries() as collector:
+        yield collector
+    labels = (('view', _current_view()), ('phase', phase))
+    _observe('appraise_phase', labels, collector.totals())
+
+
+class _RequestState:
+    __slots__ = ('view', 'collector', 'checkpoints')
+
+    def __init__(self, collector):
+        self.view = 'unresolved'
+        self.collector = collector
+        self.checkpoints = 0
+
+
+class MetricsMiddleware:
+    """
+    Records latency and database usage for every request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with _collect_queries() as collector:
+            state = _RequestState(collector)
+            token = _CURRENT_REQUEST.set(state)
+            try:
+                response = self.get_response(request)
+            finally:
+                _CURRENT_REQUEST.reset(token)
+
+        if state.checkpoints:
+            labels = (('view', state.view), ('phase', REMAINDER_PHASE))
+            _observe('appraise_phase', labels, collector.lap())
+
+        _observe('appraise_view', (('view', state.view),), collector.totals())
+        try:
+            REGISTRY.maybe_flush()
+        except OSError:
+            LOGGER.exception('Writing metrics snapshot failed')
+        return response
+
+    # pylint: disable=unused-argument
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Labels metrics for current request with the resolved view name.
+        """
+        state = _CURRENT_REQUEST.get()
+        if state is not None and request.resolver_match is not None:
+            state.view = request.resolver_match.view_name or view_func.__name__
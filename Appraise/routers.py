@@ -0,0 +1,123 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+Database routers sending read-only reporting workloads to a replica and
+reads of archived campaigns to the archive database.
+
+If a 'reporting' database is configured, see APPRAISE_REPORTING_DB_* in
+settings.py, reads of code wrapped in reporting_reads() or decorated with
+use_reporting_database go to that database. Everything else, including
+all writes, stays on the primary 'default' database, so annotation views
+always read their own writes.
+
+If an 'archive' database is configured, see APPRAISE_ARCHIVE_DB_*, reads
+of code wrapped in archive_reads() go to that database instead. It holds
+campaigns moved there by the ArchiveCampaign command.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS
+
+REPORTING_DB_ALIAS = 'reporting'
+ARCHIVE_DB_ALIAS = 'archive'
+
+_REPORTING_READS = ContextVar('appraise_reporting_reads', default=False)
+_ARCHIVE_READS = ContextVar('appraise_archive_reads', default=False)
+
+
+@contextmanager
+def reporting_reads():
+    """
+    Sends reads of the wrapped block to the reporting database.
+    """
+    token = _REPORTING_READS.set(True)
+    try:
+        yield
+    finally:
+        _REPORTING_READS.reset(token)
+
+
+@contextmanager
+def archive_reads():
+    """
+    Sends reads of the wrapped block to the archive database.
+    """
+    token = _ARCHIVE_READS.set(True)
+    try:
+        yield
+    finally:
+        _ARCHIVE_READS.reset(token)
+
+
+def use_reporting_database(func):
+    """
+    Decorator sending reads of a view or command handler to reporting.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with reporting_reads():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReportingRouter:
+    """
+    Routes reads inside reporting_reads() to the reporting database.
+
+    Only installed if the reporting database is configured.
+    """
+
+    # pylint: disable=unused-argument
+    def db_for_read(self, model, **hints):
+        """
+        Returns reporting database for reporting reads, None otherwise.
+        """
+        if _REPORTING_READS.get():
+            return REPORTING_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        """
+        Returns primary database, also for instances read from reporting.
+        """
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Allows relations as reporting is a replica of the primary database.
+        """
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Prevents migrations on reporting, which is replicated from primary.
+        """
+        if db == REPORTING_DB_ALIAS:
+            return False
+        return None
+
+
+class ArchiveRouter:
+    """
+    Routes reads inside archive_reads() to the archive database.
+
+    Only installed if the archive database is configured, before the
+    reporting router, so that archive reads take precedence. Migrations
+    are allowed, as the archive database has the same schema.
+    """
+
+    # pylint: disable=unused-argument
+    def db_for_read(self, model, **hints):
+        """
+        Returns archive database for archive reads, None otherwise.
+        """
+        if _ARCHIVE_READS.get():
+            return ARCHIVE_DB_ALIAS
+        return None
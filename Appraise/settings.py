@@ -71,18 +71,113 @@ if all((DB_ENGINE, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT)):
     }
 
 else:
+    # Path to the SQLite database can be changed, e.g., for regression tests
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'NAME': os.environ.get(
+                'APPRAISE_SQLITE_DB', os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
         }
     }
 
+# Optional read-only replica for reporting workloads, e.g., analysis
+# commands and campaign status, see Appraise/routers.py. For local testing,
+# point it to a copy of the SQLite database:
+#
+#   APPRAISE_REPORTING_DB_ENGINE=django.db.backends.sqlite3
+#   APPRAISE_REPORTING_DB_NAME=/path/to/reporting.sqlite3
+REPORTING_DB_ENGINE = os.environ.get('APPRAISE_REPORTING_DB_ENGINE')
+REPORTING_DB_NAME = os.environ.get('APPRAISE_REPORTING_DB_NAME')
+
+if REPORTING_DB_ENGINE and REPORTING_DB_NAME:
+    DATABASES['reporting'] = {
+        'ENGINE': REPORTING_DB_ENGINE,
+        'NAME': REPORTING_DB_NAME,
+        'USER': os.environ.get('APPRAISE_REPORTING_DB_USER', ''),
+        'PASSWORD': os.environ.get('APPRAISE_REPORTING_DB_PASSWORD', ''),
+        'HOST': os.environ.get('APPRAISE_REPORTING_DB_HOST', ''),
+        'PORT': os.environ.get('APPRAISE_REPORTING_DB_PORT', ''),
+        # Tests read from the primary test database
+        'TEST': {'MIRROR': 'default'},
+    }
+    if not REPORTING_DB_ENGINE.endswith('sqlite3'):
+        DATABASES['reporting']['OPTIONS'] = {'sslmode': 'require'}
+
+# Optional archive database for finished campaigns, see ArchiveCampaign and
+# Appraise/routers.py. It needs the same schema as the primary database:
+#
+#   APPRAISE_ARCHIVE_DB_ENGINE=django.db.backends.sqlite3
+#   APPRAISE_ARCHIVE_DB_NAME=/path/to/archive.sqlite3
+#   python manage.py migrate --database archive
+ARCHIVE_DB_ENGINE = os.environ.get('APPRAISE_ARCHIVE_DB_ENGINE')
+ARCHIVE_DB_NAME = os.environ.get('APPRAISE_ARCHIVE_DB_NAME')
+
+if ARCHIVE_DB_ENGINE and ARCHIVE_DB_NAME:
+    DATABASES['archive'] = {
+        'ENGINE': ARCHIVE_DB_ENGINE,
+        'NAME': ARCHIVE_DB_NAME,
+        'USER': os.environ.get('APPRAISE_ARCHIVE_DB_USER', ''),
+        'PASSWORD': os.environ.get('APPRAISE_ARCHIVE_DB_PASSWORD', ''),
+        'HOST': os.environ.get('APPRAISE_ARCHIVE_DB_HOST', ''),
+        'PORT': os.environ.get('APPRAISE_ARCHIVE_DB_PORT', ''),
+    }
+    if not ARCHIVE_DB_ENGINE.endswith('sqlite3'):
+        DATABASES['archive']['OPTIONS'] = {'sslmode': 'require'}
+
+DATABASE_ROUTERS = []
+if 'archive' in DATABASES:
+    DATABASE_ROUTERS.append('Appraise.routers.ArchiveRouter')
+if 'reporting' in DATABASES:
+    DATABASE_ROUTERS.append('Appraise.routers.ReportingRouter')
+
+# SQLite production profile and group-commit result writer, see
+# Appraise/sqlite.py. Recommended for campaigns running on SQLite.
+SQLITE_PRODUCTION = os.environ.get('APPRAISE_SQLITE_PRODUCTION', '').lower() in (
+    '1',
+    'true',
+    'yes',
+)
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('APPRAISE_SQLITE_BUSY_TIMEOUT', 20))
+if SQLITE_PRODUCTION and DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    DATABASES['default']['OPTIONS'] = {'timeout': SQLITE_BUSY_TIMEOUT}
+
+GROUP_COMMIT = os.environ.get('APPRAISE_GROUP_COMMIT', '').lower() in (
+    '1',
+    'true',
+    'yes',
+)
+GROUP_COMMIT_INTERVAL = (
+    float(os.environ.get('APPRAISE_GROUP_COMMIT_INTERVAL_MS', 5)) / 1000
+)
+GROUP_COMMIT_MAX_BATCH = int(os.environ.get('APPRAISE_GROUP_COMMIT_MAX_BATCH', 200))
+
+# Content-addressed text store, see EvalData.models.TextContent. Importers
+# store each distinct segment text once, items reference it by ID.
+TEXT_STORE = os.environ.get('APPRAISE_TEXT_STORE', '').lower() in ('1', 'true', 'yes')
+
+# Lifetime of signed login links in seconds, see Dashboard.utils.
+LOGIN_TOKEN_MAX_AGE = int(
+    os.environ.get('APPRAISE_LOGIN_TOKEN_MAX_AGE', 90 * 24 * 60 * 60)
+)
+
 FILE_UPLOAD_PERMISSIONS = 0o644
 
 # Logging settings for this Django project.
-LOG_LEVEL = logging.DEBUG
-LOG_FILENAME = os.path.join(BASE_DIR, 'appraise.log')
+#
+# Log records are written by a background thread via QueueHandler and
+# QueueListener, see Appraise.utils._get_log_handler(). Set
+# APPRAISE_LOG_QUEUE=0 to write synchronously from the calling thread.
+LOG_LEVEL = logging.getLevelName(os.environ.get('APPRAISE_LOG_LEVEL', 'INFO').upper())
+if not isinstance(LOG_LEVEL, int):
+    raise ImproperlyConfigured('Unknown APPRAISE_LOG_LEVEL {0!r}'.format(LOG_LEVEL))
+
+LOG_FILENAME = os.environ.get(
+    'APPRAISE_LOG_FILENAME', os.path.join(BASE_DIR, 'appraise.log')
+)
+LOG_MAX_BYTES = int(os.environ.get('APPRAISE_LOG_MAX_BYTES', 50 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('APPRAISE_LOG_BACKUP_COUNT', 5))
+LOG_QUEUE = os.environ.get('APPRAISE_LOG_QUEUE', '1').lower() in ('1', 'true', 'yes')
 LOG_FORMAT = "[%(asctime)s] %(name)s::%(levelname)s %(message)s"
 LOG_DATE = "%m/%d/%Y @ %H:%M:%S"
 LOG_FORMATTER = logging.Formatter(LOG_FORMAT, LOG_DATE)
@@ -91,12 +186,18 @@ LOG_FORMATTER = logging.Formatter(LOG_FORMAT, LOG_DATE)
 LOG_HANDLER = RotatingFileHandler(
     filename=LOG_FILENAME,
     mode="a",
-    maxBytes=50 * 1024 * 1024,
-    backupCount=5,
+    maxBytes=LOG_MAX_BYTES,
+    backupCount=LOG_BACKUP_COUNT,
     encoding="utf-8",
+    delay=True,
 )
 LOG_HANDLER.setFormatter(LOG_FORMATTER)
 
+# Per-view latency and query count metrics, see Appraise/metrics.py.
+# If set, each process writes metrics snapshots into this directory.
+METRICS_DIR = os.environ.get('APPRAISE_METRICS_DIR')
+METRICS_FLUSH_INTERVAL = int(os.environ.get('APPRAISE_METRICS_FLUSH_INTERVAL', 10))
+
 LOGIN_URL = '/dashboard/sign-in/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/'
@@ -134,6 +235,7 @@ if DEBUG:
 
 MIDDLEWARE.extend(
     [
+        'Appraise.metrics.MetricsMiddleware',
         'django.middleware.security.SecurityMiddleware',
         'whitenoise.middleware.WhiteNoiseMiddleware',
         'django.contrib.sessions.middleware.SessionMiddleware',
@@ -0,0 +1,195 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+SQLite production profile and group-commit result writer.
+
+With SQLITE_PRODUCTION enabled, every new SQLite connection switches to
+WAL journal mode, synchronous=NORMAL and waits up to SQLITE_BUSY_TIMEOUT
+seconds for locks instead of failing with "database is locked".
+
+With GROUP_COMMIT enabled, create_result() hands result inserts to a
+writer thread, which saves all inserts queued within GROUP_COMMIT_INTERVAL
+seconds in a single transaction. The calling request blocks until that
+transaction is committed, so a saved result is still acknowledged only
+once it is in the database.
+"""
+import os
+import threading
+from concurrent.futures import Future
+from queue import Empty
+from queue import SimpleQueue
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.db import router
+from django.db import transaction
+
+from Appraise.utils import _get_logger
+
+LOGGER = _get_logger(name=__name__)
+
+
+# pylint: disable=unused-argument
+def configure_connection(sender, connection, **kwargs):
+    """
+    Applies SQLite production profile to new connections.
+
+    Connected to the connection_created signal in EvalData.apps.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRODUCTION:
+        return
+
+    busy_timeout_ms = int(settings.SQLITE_BUSY_TIMEOUT * 1000)
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout={0}'.format(busy_timeout_ms))
+
+
+class GroupCommitWriter:
+    """
+    Saves model instances from many threads in shared transactions.
+    """
+
+    def __init__(self, interval, max_batch):
+        self.interval = interval
+        self.max_batch = max_batch
+        self._queue = SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(), so restart in child processes
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = SimpleQueue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='appraise-group-commit', daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, instance):
+        """
+        Queues unsaved instance, returns Future resolved once committed.
+        """
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((instance, future))
+        return future
+
+    def save(self, instance):
+        """
+        Saves instance in the next group commit and waits for it.
+        """
+        return self.submit(instance).result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = perf_counter() + self.interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            self._write(batch)
+
+    def _write(self, batch):
+        """
+        Saves batch in one transaction, then resolves futures.
+
+        Instances are inserted with one bulk_create() per model. If that
+        fails, each instance is saved in its own savepoint instead, so that
+        a failing instance does not prevent the others from being committed.
+        """
+        by_model = {}
+        for index, (instance, _) in enumerate(batch):
+            by_model.setdefault(type(instance), []).append(index)
+
+        errors = {}
+        try:
+            with transaction.atomic():
+                for model, indices in by_model.items():
+                    instances = [batch[index][0] for index in indices]
+                    try:
+                        with transaction.atomic():
+                            model.objects.bulk_create(instances)
+                    # pylint: disable=broad-except
+                    except Exception:
+                        errors.update(self._save_each(batch, indices))
+
+        # pylint: disable=broad-except
+        except Exception as exc:
+            LOGGER.exception('Group commit of %s instances failed', len(batch))
+            errors = {index: exc for index in range(len(batch))}
+
+            # The writer thread keeps its connection, unless it is broken
+            for conn in connections.all(initialized_only=True):
+                conn.close()
+
+        for index, (instance, future) in enumerate(batch):
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(instance)
+
+    @staticmethod
+    def _save_each(batch, indices):
+        """
+        Saves instances one by one, returns {index: exception}.
+        """
+        errors = {}
+        for index in indices:
+            instance = batch[index][0]
+            instance.pk = None
+            try:
+                with transaction.atomic():
+                    instance.save(force_insert=True)
+            # pylint: disable=broad-except
+            except Exception as exc:
+                errors[index] = exc
+        return errors
+
+
+_WRITER = None
+_WRITER_LOCK = threading.Lock()
+
+
+def _get_writer():
+    # pylint: disable=global-statement
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _WRITER = GroupCommitWriter(
+                settings.GROUP_COMMIT_INTERVAL, settings.GROUP_COMMIT_MAX_BATCH
+            )
+    return _WRITER
+
+
+def create_result(result_cls, **kwargs):
+    """
+    Creates result instance like result_cls.objects.create(**kwargs).
+
+    Uses the group-commit writer if enabled, which inserts results with
+    bulk_create(), so no save() method or signals are run; results do not
+    define any for new instances. Falls back to saving in the
+    calling thread inside transactions, as the writer thread could not
+    see uncommitted data, and for non-SQLite databases.
+    """
+    conn = connections[router.db_for_write(result_cls)]
+    if not settings.GROUP_COMMIT or conn.vendor != 'sqlite' or conn.in_atomic_block:
+        return result_cls.objects.create(**kwargs)
+
+    return _get_writer().save(result_cls(**kwargs))
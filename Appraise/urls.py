@@ -53,6 +53,11 @@ urlpatterns = [
         ),
         dashboard_views.sso_login,
     ),
+    re_path(
+        r'^dashboard/login/(?P<token>[a-zA-Z0-9_:-]+)/$',
+        dashboard_views.token_login,
+        name='token-login',
+    ),
     re_path(
         r'^dashboard/sign-out/$',
         auth_views.LogoutView.as_view(
@@ -76,6 +81,7 @@ urlpatterns = [
         name='update-profile',
     ),  # TODO: remove?
     re_path(r'^dashboard/$', dashboard_views.dashboard, name='dashboard'),
+    re_path(r'^metrics/$', dashboard_views.metrics, name='metrics'),
     re_path(
         r'^data-assessment/$',
         evalview_views.data_assessment,
@@ -229,12 +235,34 @@ urlpatterns = [
         evalview_views.pairwise_assessment_document,
         name='pairwise-assessment-document',
     ),
+    re_path(
+        r'^api/(?P<task_type>direct|multimodal|pairwise)/'
+        r'(?P<task_id>[0-9]+)/next-items/$',
+        evalview_views.next_items_api,
+        name='api-next-items',
+    ),
+    re_path(
+        r'^api/(?P<task_type>direct|multimodal|pairwise)/'
+        r'(?P<task_id>[0-9]+)/results/$',
+        evalview_views.submit_results_api,
+        name='api-submit-results',
+    ),
+    re_path(
+        r'^api/results/import/(?P<result_type>[a-zA-Z]+)/$',
+        evaldata_views.import_results_api,
+        name='api-import-results',
+    ),
     re_path(
         r'^campaign-status/(?P<campaign_name>[a-zA-Z0-9]+)/'
         r'(?P<sort_key>[0123456])?/?$',
         campaign_views.campaign_status,
         name='campaign_status',
     ),
+    re_path(
+        r'^api/campaign-status/(?P<campaign_name>[a-zA-Z0-9]+)/$',
+        campaign_views.campaign_status_json,
+        name='api-campaign-status',
+    ),
 ]
 
 if DEBUG:
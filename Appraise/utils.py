@@ -3,19 +3,74 @@ Appraise evaluation framework
 
 See LICENSE for usage details
 """
+import atexit
 import logging
+import os
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from queue import SimpleQueue
 
 from Appraise.settings import LOG_HANDLER
 from Appraise.settings import LOG_LEVEL
+from Appraise.settings import LOG_QUEUE
+
+_LOG_QUEUE = SimpleQueue()  # type: SimpleQueue
+_LOG_QUEUE_HANDLER = QueueHandler(_LOG_QUEUE)
+_LOG_QUEUE_LISTENER = None
+
+
+def _start_log_queue_listener():
+    """
+    Starts thread writing queued log records to LOG_HANDLER.
+
+    Threads do not survive fork(), so this is called again in child
+    processes, e.g., for pre-forking WSGI servers.
+    """
+    # pylint: disable=global-statement
+    global _LOG_QUEUE_LISTENER
+    _LOG_QUEUE_LISTENER = QueueListener(_LOG_QUEUE, LOG_HANDLER)
+    _LOG_QUEUE_LISTENER.start()
+
+
+def _stop_log_queue_listener():
+    """
+    Flushes queued log records and stops listener thread, if running.
+    """
+    if _LOG_QUEUE_LISTENER is not None and _LOG_QUEUE_LISTENER._thread:
+        _LOG_QUEUE_LISTENER.stop()
+
+
+def _get_log_handler():
+    """
+    Returns handler shared by all Appraise loggers.
+
+    With LOG_QUEUE enabled, request threads only put records into a queue
+    and never block on file I/O; a background thread writes them out.
+    """
+    if not LOG_QUEUE:
+        return LOG_HANDLER
+
+    if _LOG_QUEUE_LISTENER is None:
+        _start_log_queue_listener()
+        atexit.register(_stop_log_queue_listener)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_start_log_queue_listener)
+
+    return _LOG_QUEUE_HANDLER
 
 
 def _get_logger(name):
     """
     Initialises and returns named Django logger instance.
+
+    Use lazy %-style arguments, e.g., LOGGER.debug('item=%s', item), so that
+    messages below LOG_LEVEL cost nothing to format.
     """
     named_logger = logging.getLogger(name=name)
     named_logger.setLevel(LOG_LEVEL)
-    named_logger.addHandler(LOG_HANDLER)
+    _handler = _get_log_handler()
+    if _handler not in named_logger.handlers:
+        named_logger.addHandler(_handler)
     return named_logger
 
 
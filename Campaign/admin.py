@@ -9,6 +9,7 @@ from Campaign.models import Campaign
 from Campaign.models import CampaignData
 from Campaign.models import CampaignTeam
 from Campaign.models import TrustedUser
+from Dashboard.admin import queue_jobs
 from EvalData.admin import BaseMetadataAdmin
 
 
@@ -34,6 +35,7 @@ class CampaignTeamAdmin(BaseMetadataAdmin):
         'completionStatus',
     ] + BaseMetadataAdmin.list_display  # type: ignore
     list_filter = ['owner'] + BaseMetadataAdmin.list_filter  # type: ignore
+    list_select_related = ['owner'] + BaseMetadataAdmin.list_select_related  # type: ignore
     search_fields = [
         'teamName',
         'owner__username',
@@ -58,6 +60,13 @@ class CampaignTeamAdmin(BaseMetadataAdmin):
         ),
     ) + BaseMetadataAdmin.fieldsets  # type: ignore
 
+    def get_queryset(self, request):
+        """
+        Annotates completion status for all teams on the current page.
+        """
+        queryset = super(CampaignTeamAdmin, self).get_queryset(request)
+        return queryset.with_completion_status()
+
 
 class CampaignDataAdmin(BaseMetadataAdmin):
     """
@@ -99,6 +108,12 @@ class CampaignAdmin(BaseMetadataAdmin):
 
     filter_horizontal = ['batches']
 
+    actions = [
+        'queue_export_system_scores',
+        'queue_compute_zscores',
+        'revoke_login_tokens',
+    ]
+
     fieldsets = (
         (
             None,
@@ -114,6 +129,44 @@ class CampaignAdmin(BaseMetadataAdmin):
         ),
     ) + BaseMetadataAdmin.fieldsets  # type: ignore
 
+    def _queue_command_jobs(self, request, queryset, command_name):
+        campaign_names = queryset.values_list('campaignName', flat=True)
+        arguments_list = [{'args': [_name]} for _name in campaign_names]
+        queue_jobs(self, request, command_name, arguments_list)
+
+    def queue_export_system_scores(self, request, queryset):
+        """
+        Queues ExportSystemScoresToCSV job for each selected campaign.
+        """
+        self._queue_command_jobs(request, queryset, 'ExportSystemScoresToCSV')
+
+    queue_export_system_scores.short_description = (  # type: ignore
+        "Export system scores to CSV in background"
+    )
+
+    def queue_compute_zscores(self, request, queryset):
+        """
+        Queues ComputeZScores job for each selected campaign.
+        """
+        self._queue_command_jobs(request, queryset, 'ComputeZScores')
+
+    queue_compute_zscores.short_description = (  # type: ignore
+        "Compute z-scores in background"
+    )
+
+    def revoke_login_tokens(self, request, queryset):
+        """
+        Revokes login tokens of each selected campaign.
+        """
+        for campaign in queryset:
+            campaign.revoke_login_tokens()
+
+        self.message_user(
+            request, 'Revoked login tokens of {0} campaigns'.format(queryset.count())
+        )
+
+    revoke_login_tokens.short_description = "Revoke login tokens"  # type: ignore
+
 
 class TrustedUserAdmin(admin.ModelAdmin):
     """
@@ -121,6 +174,7 @@ class TrustedUserAdmin(admin.ModelAdmin):
     """
 
     list_display = ['user', 'campaign']
+    list_select_related = ['user', 'campaign']
     list_filter = [
         ('campaign__campaignName', DropdownFilter),
         #      'campaign'
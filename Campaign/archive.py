@@ -0,0 +1,334 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+Moves finished campaigns between the primary and the archive database.
+
+Archiving copies a campaign's tasks, items, results and task agendas into
+the archive database, see APPRAISE_ARCHIVE_DB_* in settings.py, and then
+deletes them from the primary database, so that live annotation tables
+only hold campaigns in use. Rows these depend on, e.g., users, markets,
+metadata and the campaign itself, are copied as well but stay in the
+primary database. Primary keys are kept, so restoring moves the same rows
+back. Analysis commands read archived campaigns with --include-archived.
+"""
+
+from collections import defaultdict
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from types import SimpleNamespace
+
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.db import transaction
+from django.db.models.constants import OnConflict
+
+from Appraise.routers import ARCHIVE_DB_ALIAS
+from Appraise.routers import archive_reads
+from Appraise.utils import _get_logger
+from Campaign.models import ArchivedCampaign
+from EvalData.models import DocumentIndexEntry
+from EvalData.models import ObjectID
+from EvalData.models import TASK_DEFINITIONS
+from EvalData.models import TaskAgenda
+from EvalData.models import WorkAgenda
+
+LOGGER = _get_logger(name=__name__)
+
+# Maximum number of primary keys per lookup, below SQLite's limit
+LOOKUP_BATCH_SIZE = 500
+
+# Task, result and item classes, once per task type
+_TASK_MODELS = OrderedDict((tup[1], (tup[2], tup[4])) for tup in TASK_DEFINITIONS)
+
+
+class ArchiveError(Exception):
+    """
+    Raised if a campaign cannot be archived or restored.
+    """
+
+
+def _chunks(values, size=LOOKUP_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _pks(queryset):
+    return set(queryset.values_list('pk', flat=True))
+
+
+class _RowCopier:
+    """
+    Copies rows by primary key from one database to another.
+
+    Rows referenced by foreign keys are copied first, including parent
+    rows of multi-table inheritance. Existing rows are left unchanged, so
+    shared rows are copied once and interrupted moves can be repeated.
+    """
+
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.copied = defaultdict(set)
+        self.counts = defaultdict(int)
+
+    def copy(self, model, pks):
+        model = model._meta.concrete_model
+        pks = set(pks) - self.copied[model]
+        if not pks:
+            return
+        self.copied[model].update(pks)
+
+        fields = model._meta.local_concrete_fields
+        attnames = [field.attname for field in fields]
+        rows = []
+        for chunk in _chunks(sorted(pks)):
+            rows.extend(
+                model._base_manager.using(self.source)
+                .filter(pk__in=chunk)
+                .values_list(*attnames)
+            )
+
+        for pos, field in enumerate(fields):
+            if field.is_relation:
+                self.copy(
+                    field.related_model,
+                    {row[pos] for row in rows if row[pos] is not None},
+                )
+
+        # Plain objects, so that values are inserted as they were read,
+        # bypassing model descriptors and auto_now fields
+        objs = [SimpleNamespace(**dict(zip(attnames, row))) for row in rows]
+        batch_size = connections[self.target].ops.bulk_batch_size(fields, objs)
+        manager = model._base_manager.using(self.target)
+        for batch in _chunks(objs, max(1, batch_size)):
+            # pylint: disable=protected-access
+            manager._insert(
+                batch,
+                fields=fields,
+                raw=True,
+                using=self.target,
+                on_conflict=OnConflict.IGNORE,
+            )
+        self.counts[model._meta.label] += len(rows)
+
+
+def _campaign_rows(campaign_id, using):
+    """
+    Returns rows owned by the given campaign, and the campaign's items.
+
+    Owned rows are a list of (model, primary keys), ordered such that
+    results are deleted before their tasks. Items are (item class, task
+    class, through model, item field name, primary keys) tuples, as items
+    may be used by other campaigns, too.
+    """
+    owned = []
+    items = []
+    for task_cls, (result_cls, item_cls) in _TASK_MODELS.items():
+        tasks = task_cls._base_manager.using(using).filter(campaign_id=campaign_id)
+        task_ids = _pks(tasks)
+        if not task_ids:
+            continue
+
+        results = result_cls._base_manager.using(using).filter(
+            task__campaign_id=campaign_id
+        )
+        owned.append((result_cls, _pks(results)))
+        owned.append((task_cls, task_ids))
+        for field_name in ('items', 'assignedTo'):
+            field = task_cls._meta.get_field(field_name)
+            through = field.remote_field.through
+            links = through._base_manager.using(using).filter(
+                **{field.m2m_field_name() + '__campaign_id': campaign_id}
+            )
+            owned.append((through, _pks(links)))
+            if field_name == 'items':
+                target = field.m2m_reverse_field_name()
+                item_ids = set(links.values_list(target, flat=True))
+                items.append((item_cls, task_cls, through, target, item_ids))
+
+        object_ids = set()
+        index_entries = set()
+        for chunk in _chunks(sorted(task_ids)):
+            object_ids.update(
+                _pks(
+                    ObjectID._base_manager.using(using).filter(
+                        typeName=task_cls.__name__,
+                        primaryID__in=[str(x) for x in chunk],
+                    )
+                )
+            )
+            index_entries.update(
+                _pks(
+                    DocumentIndexEntry._base_manager.using(using).filter(
+                        taskType=task_cls.__name__, taskID__in=chunk
+                    )
+                )
+            )
+        owned.append((ObjectID, object_ids))
+        owned.append((DocumentIndexEntry, index_entries))
+
+    for agenda_cls in (TaskAgenda, WorkAgenda):
+        agendas = agenda_cls._base_manager.using(using).filter(campaign_id=campaign_id)
+        owned.append((agenda_cls, _pks(agendas)))
+        for field in agenda_cls._meta.local_many_to_many:
+            through = field.remote_field.through
+            links = through._base_manager.using(using).filter(
+                **{field.m2m_field_name() + '__campaign_id': campaign_id}
+            )
+            owned.append((through, _pks(links)))
+
+    return [x for x in owned if x[1]], items
+
+
+def _delete_rows(owned, items, using):
+    """
+    Deletes owned rows and items which are not used by other campaigns.
+    """
+    # Links first, then results, tasks and agendas
+    for model, pks in sorted(owned, key=lambda x: not x[0]._meta.auto_created):
+        for chunk in _chunks(sorted(pks)):
+            model._base_manager.using(using).filter(pk__in=chunk).delete()
+
+    for item_cls, task_cls, through, target, item_ids in items:
+        result_cls = _TASK_MODELS[task_cls][0]
+        for chunk in _chunks(sorted(item_ids)):
+            used = set(
+                through._base_manager.using(using)
+                .filter(**{target + '__in': chunk})
+                .values_list(target, flat=True)
+            )
+            used.update(
+                result_cls._base_manager.using(using)
+                .filter(item_id__in=chunk)
+                .values_list('item_id', flat=True)
+            )
+            unused = [x for x in chunk if x not in used]
+            if unused:
+                item_cls._base_manager.using(using).filter(pk__in=unused).delete()
+
+
+def _move_campaign(campaign_id, source, target):
+    """
+    Moves rows owned by the given campaign from source to target database.
+
+    Returns dictionary mapping model labels to number of copied rows.
+    """
+    owned, items = _campaign_rows(campaign_id, source)
+    copier = _RowCopier(source, target)
+    with transaction.atomic(using=target):
+        for model, pks in owned:
+            copier.copy(model, pks)
+
+    LOGGER.info('Copied campaign %s to %s: %s', campaign_id, target, copier.counts)
+    with transaction.atomic(using=source):
+        _delete_rows(owned, items, source)
+
+    return dict(copier.counts)
+
+
+def _check_archive_database():
+    if ARCHIVE_DB_ALIAS not in connections.settings:
+        raise ArchiveError(
+            'No archive database configured, see APPRAISE_ARCHIVE_DB_* in '
+            'Appraise/settings.py'
+        )
+
+
+def unfinished_task_count(campaign):
+    """
+    Returns number of tasks of the given campaign which are not completed.
+    """
+    return sum(
+        task_cls.objects.filter(campaign=campaign, completed=False).count()
+        for task_cls in _TASK_MODELS
+    )
+
+
+def archive_campaign(campaign, user=None):
+    """
+    Moves tasks, items, results and agendas of campaign to the archive.
+
+    Returns dictionary mapping model labels to number of archived rows.
+    """
+    _check_archive_database()
+    if ArchivedCampaign.objects.filter(campaign=campaign).exists():
+        raise ArchiveError('Campaign {0} is archived already'.format(campaign))
+
+    counts = _move_campaign(campaign.id, DEFAULT_DB_ALIAS, ARCHIVE_DB_ALIAS)
+    ArchivedCampaign.objects.create(
+        campaign=campaign, archivedBy=user, objectCount=sum(counts.values())
+    )
+    return counts
+
+
+def restore_campaign(campaign):
+    """
+    Moves tasks, items, results and agendas of campaign from the archive.
+
+    Returns dictionary mapping model labels to number of restored rows.
+    """
+    _check_archive_database()
+    archived = ArchivedCampaign.objects.filter(campaign=campaign).first()
+    if archived is None:
+        raise ArchiveError('Campaign {0} is not archived'.format(campaign))
+
+    counts = _move_campaign(campaign.id, ARCHIVE_DB_ALIAS, DEFAULT_DB_ALIAS)
+    archived.delete()
+    return counts
+
+
+def add_include_archived_argument(parser):
+    """
+    Adds --include-archived option to an analysis command.
+    """
+    parser.add_argument(
+        '--include-archived',
+        action='store_true',
+        default=False,
+        help='Read the campaign from the archive database if it has been archived',
+    )
+
+
+@contextmanager
+def campaign_reads(campaign_name, include_archived=False):
+    """
+    Sends reads to the archive database if the campaign is archived.
+
+    Raises CommandError for archived campaigns unless include_archived is
+    set, as their results are no longer in the primary database.
+    """
+    if not ArchivedCampaign.objects.filter(
+        campaign__campaignName=campaign_name
+    ).exists():
+        yield
+        return
+
+    if not include_archived:
+        raise CommandError(
+            'Campaign {0} is archived, use --include-archived to read it from '
+            'the archive database'.format(campaign_name)
+        )
+
+    with archive_reads():
+        yield
+
+
+def use_campaign_database(func):
+    """
+    Decorator for handle() of analysis commands with campaign_name and
+    --include-archived arguments, see campaign_reads().
+    """
+
+    @wraps(func)
+    def wrapper(command, *args, **options):
+        with campaign_reads(
+            options['campaign_name'], options.get('include_archived', False)
+        ):
+            return func(command, *args, **options)
+
+    return wrapper
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from Campaign.archive import archive_campaign
+from Campaign.archive import ArchiveError
+from Campaign.archive import unfinished_task_count
+from Campaign.models import Campaign
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = 'Moves tasks, items, results and agendas of a campaign to the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'campaign_name',
+            type=str,
+            help='Name of the campaign you want to archive',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            default=False,
+            help='Archive campaign even if it has unfinished tasks',
+        )
+
+    def handle(self, *args, **options):
+        campaign = Campaign.get_campaign_or_raise(options['campaign_name'])
+
+        unfinished = unfinished_task_count(campaign)
+        if unfinished and not options['force']:
+            raise CommandError(
+                'Campaign {0} has {1} unfinished tasks, use --force to archive '
+                'it anyway'.format(campaign.campaignName, unfinished)
+            )
+
+        try:
+            counts = archive_campaign(campaign)
+        except ArchiveError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for label, count in sorted(counts.items()):
+            self.stdout.write('{0:>8} {1}'.format(count, label))
+        self.stdout.write(
+            'Archived campaign {0}, {1} rows'.format(
+                campaign.campaignName, sum(counts.values())
+            )
+        )
@@ -0,0 +1,522 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+import csv
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import StringIO
+from math import ceil
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+
+from Appraise.metrics import _collect_queries
+from Campaign.management.commands.MakeAnnotation import _get_annotation_data
+from Campaign.management.commands.MakeAnnotation import _get_task_url
+from Campaign.utils import _load_campaign_manifest
+
+# Task types supported by MakeAnnotation => scores assigned to each item
+SUPPORTED_TASK_TYPES = OrderedDict(
+    (
+        ('Direct', [50]),
+        ('Pairwise', [50, 50]),
+        ('PairwiseDocument', [50, 50]),
+        ('Document', [50]),
+        ('Data', [50, 1]),
+    )
+)
+
+# Reported latency percentiles
+PERCENTILES = (50, 95, 99)
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = (
+        'Load-tests annotation views with concurrent simulated annotators on '
+        'a synthetic campaign built from an Examples/* manifest'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'manifest_json',
+            metavar='manifest-json',
+            type=str,
+            help='Path to manifest file in JSON format, e.g., '
+            'Examples/Direct/manifest.json.',
+        )
+
+        parser.add_argument(
+            '--batches-json',
+            type=str,
+            default=None,
+            metavar='JSON',
+            help='Path to example batches in JSON format, defaults to '
+            'batches.json next to the manifest file.',
+        )
+
+        parser.add_argument(
+            '--tasks',
+            type=int,
+            default=4,
+            help='Number of tasks in the synthetic campaign.',
+        )
+
+        parser.add_argument(
+            '--items-per-task',
+            type=int,
+            default=None,
+            help='Number of items per task, example items are repeated as '
+            'needed. Defaults to the number of items in the example batch.',
+        )
+
+        parser.add_argument(
+            '--annotators',
+            type=int,
+            default=4,
+            help='Number of simulated annotators.',
+        )
+
+        parser.add_argument(
+            '--annotations',
+            type=int,
+            default=20,
+            help='Maximum number of annotations submitted per annotator.',
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Number of annotators running concurrently, defaults to '
+            'the number of annotators.',
+        )
+
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            metavar='JSON',
+            help='Path used to write results, which can be used as a baseline.',
+        )
+
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=None,
+            metavar='JSON',
+            help='Path to results of a previous run to compare against.',
+        )
+
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Relative p95 latency increase over the baseline reported '
+            'as regression.',
+        )
+
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            default=False,
+            help='Exit with an error if a regression against the baseline '
+            'is detected.',
+        )
+
+    def handle(self, *args, **options):
+        manifest_json = options['manifest_json']
+        batches_json = options['batches_json'] or path.join(
+            path.dirname(manifest_json), 'batches.json'
+        )
+        if not path.exists(batches_json):
+            raise CommandError('Batches file {0!r} not found'.format(batches_json))
+
+        manifest_data = _load_campaign_manifest(manifest_json)
+        campaign_type = manifest_data.get('TASK_TYPE', 'Direct')
+        if campaign_type not in SUPPORTED_TASK_TYPES:
+            raise CommandError(
+                'Task type {0!r} is not supported, use one of: {1}'.format(
+                    campaign_type, ', '.join(SUPPORTED_TASK_TYPES)
+                )
+            )
+
+        with open(batches_json, encoding='utf-8') as in_file:
+            example_batches = json.load(in_file)
+
+        config = OrderedDict(
+            (
+                ('manifest', manifest_json),
+                ('task_type', campaign_type),
+                ('tasks', options['tasks']),
+                ('items_per_task', options['items_per_task']),
+                ('annotators', options['annotators']),
+                ('annotations', options['annotations']),
+                ('concurrency', options['concurrency'] or options['annotators']),
+                ('database', connection.vendor),
+            )
+        )
+        manifest_data, batches = _synthesize_campaign(
+            manifest_data,
+            example_batches,
+            config['tasks'],
+            config['items_per_task'],
+            config['annotators'],
+        )
+
+        # Needed to get the response context
+        setup_test_environment()
+        try:
+            with TemporaryDirectory() as temp_dir, _isolated_database(temp_dir):
+                self.stdout.write('Creating synthetic campaign')
+                credentials = _create_campaign(manifest_data, batches, temp_dir)
+
+                self.stdout.write(
+                    'Running {0} annotators, {1} concurrently'.format(
+                        len(credentials), config['concurrency']
+                    )
+                )
+                task_url = '/{0}/'.format(_get_task_url(campaign_type))
+                started = perf_counter()
+                with ThreadPoolExecutor(max_workers=config['concurrency']) as pool:
+                    futures = [
+                        pool.submit(
+                            _simulate_annotator,
+                            username,
+                            password,
+                            campaign_type,
+                            task_url,
+                            config['annotations'],
+                        )
+                        for username, password in credentials
+                    ]
+                    samples = [x for future in futures for x in future.result()]
+                elapsed = perf_counter() - started
+
+        finally:
+            teardown_test_environment()
+
+        results = OrderedDict(
+            (
+                ('created', datetime.now().isoformat()),
+                ('config', config),
+                ('seconds', round(elapsed, 3)),
+                ('requests_per_second', round(len(samples) / elapsed, 2)),
+                ('endpoints', _summarize(samples)),
+            )
+        )
+        _write_results_table(results, self.stdout)
+
+        if options['output']:
+            with open(options['output'], mode='w', encoding='utf-8') as out_file:
+                json.dump(results, out_file, indent=2)
+            self.stdout.write('Results written to {0!r}'.format(options['output']))
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as in_file:
+                baseline = json.load(in_file)
+
+            regressions = _compare_results(
+                baseline, results, options['tolerance'], self.stdout
+            )
+            if regressions and options['fail_on_regression']:
+                raise CommandError(
+                    'Regressions detected: {0}'.format(', '.join(regressions))
+                )
+
+
+def _synthesize_campaign(
+    manifest_data, example_batches, tasks, items_per_task, annotators
+):
+    """Creates manifest and batches for a campaign of the given size.
+
+    Only the first language pair in TASKS_TO_ANNOTATORS is used, with tasks
+    uniformly distributed across annotators.
+    """
+    redundancy = manifest_data['REDUNDANCY']
+    if annotators < 1 or tasks < 1 or (tasks * redundancy) % annotators:
+        raise CommandError(
+            'Cannot distribute {0} tasks with redundancy {1} uniformly '
+            'across {2} annotators'.format(tasks, redundancy, annotators)
+        )
+
+    source_code, target_code = manifest_data['TASKS_TO_ANNOTATORS'][0][:2]
+    manifest_data = dict(manifest_data)
+    manifest_data['TASKS_TO_ANNOTATORS'] = [
+        [source_code, target_code, 'uniform', annotators, tasks]
+    ]
+
+    batches = []
+    for task_no in range(tasks):
+        example = example_batches[task_no % len(example_batches)]
+        batch = dict(example)
+        batch['task'] = dict(
+            example['task'], batchNo=task_no + 1, requiredAnnotations=redundancy
+        )
+        batch['items'] = _synthesize_items(
+            example['items'], items_per_task or len(example['items'])
+        )
+        batches.append(batch)
+
+    return manifest_data, batches
+
+
+def _synthesize_items(items, count):
+    """Returns at least count items, repeating items with new item IDs.
+
+    Items of document-level tasks are only cut between documents.
+    """
+    synthesized = []
+    repetition = 0
+    while True:
+        for index, item in enumerate(items):
+            if len(synthesized) >= count and (
+                index == 0 or _is_new_document(items[index - 1], item)
+            ):
+                return synthesized
+
+            synthesized_item = dict(item)
+            if repetition:
+                offset = repetition * len(items)
+                synthesized_item['itemID'] = int(item['itemID']) + offset
+            synthesized.append(synthesized_item)
+        repetition += 1
+
+
+def _is_new_document(previous_item, item):
+    """Checks if item does not belong to the document of previous_item."""
+    return 'documentID' not in item or (
+        previous_item['documentID'] != item['documentID']
+    )
+
+
+@contextmanager
+def _isolated_database(temp_dir):
+    """Runs block on a new test database and media root in temp_dir.
+
+    SQLite test databases are created as files, so that concurrent
+    annotators use separate connections like in production.
+    """
+    settings_dict = connection.settings_dict
+    test_settings = settings_dict.setdefault('TEST', {})
+    old_name = settings_dict['NAME']
+    old_test_name = test_settings.get('NAME')
+    if connection.vendor == 'sqlite':
+        test_settings['NAME'] = path.join(temp_dir, 'benchmark.sqlite3')
+
+    with override_settings(MEDIA_ROOT=temp_dir):
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            yield
+
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = old_test_name
+
+
+def _create_campaign(manifest_data, batches, temp_dir):
+    """Creates campaign with StartNewCampaign, returns credentials."""
+    manifest_json = path.join(temp_dir, 'manifest.json')
+    batches_json = path.join(temp_dir, 'batches.json')
+    csv_output = path.join(temp_dir, 'credentials.csv')
+    for json_path, json_data in (
+        (manifest_json, manifest_data),
+        (batches_json, batches),
+    ):
+        with open(json_path, mode='w', encoding='utf-8') as out_file:
+            json.dump(json_data, out_file)
+
+    if not User.objects.filter(is_superuser=True).exists():
+        User.objects.create_superuser('benchmark', password=None)
+
+    # Campaign utilities print progress, which would clutter the report
+    with redirect_stdout(StringIO()):
+        call_command(
+            'StartNewCampaign',
+            manifest_json,
+            batches_json=[batches_json],
+            csv_output=csv_output,
+            stdout=StringIO(),
+        )
+
+    with open(csv_output, encoding='utf-8', newline='') as in_file:
+        return [(x['Username'], x['Password']) for x in csv.DictReader(in_file)]
+
+
+def _simulate_annotator(username, password, campaign_type, task_url, annotations):
+    """Drives a single annotator through sign-in, annotation and feedback.
+
+    Returns list of (endpoint, seconds, queries, status code) samples.
+    Server errors are recorded as samples instead of being raised.
+    """
+    client = Client(SERVER_NAME='127.0.0.1', raise_request_exception=False)
+    samples = []
+
+    def _request(endpoint, method, url, data=None):
+        with _collect_queries() as collector:
+            response = getattr(client, method)(url, data)
+        seconds, queries, _ = collector.totals()
+        samples.append((endpoint, seconds, queries, response.status_code))
+        return response
+
+    try:
+        _request('sign-in', 'get', '/dashboard/sso/{0}/{1}/'.format(username, password))
+        _request('dashboard', 'get', '/dashboard/')
+
+        if campaign_type == 'Pairwise':
+            _request(
+                'introduction',
+                'post',
+                '/pairwise-introduction/',
+                {'fluency_in_target_language': 'native'},
+            )
+
+        for _ in range(annotations):
+            response = _request('annotation-get', 'get', task_url)
+            if response.context is None or 'item_id' not in response.context:
+                break
+
+            data, _ = _get_annotation_data(
+                campaign_type, response.context, SUPPORTED_TASK_TYPES[campaign_type]
+            )
+            _request('annotation-post', 'post', task_url, data)
+
+        if campaign_type == 'Pairwise':
+            _request('feedback', 'get', '/pairwise-feedback/')
+            _request(
+                'feedback-submit',
+                'post',
+                '/pairwise-feedback-submit/',
+                {'overallExperience': 'good'},
+            )
+
+    finally:
+        connections.close_all()
+
+    return samples
+
+
+def _percentile(sorted_values, percentile):
+    """Returns nearest-rank percentile of sorted, non-empty values."""
+    rank = ceil(percentile / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def _summarize(samples):
+    """Computes latency percentiles and query counts per endpoint."""
+    by_endpoint = OrderedDict()
+    for endpoint, seconds, queries, status_code in samples:
+        by_endpoint.setdefault(endpoint, []).append((seconds, queries, status_code))
+
+    summary = OrderedDict()
+    for endpoint, values in by_endpoint.items():
+        latencies = sorted(x[0] for x in values)
+        queries = [x[1] for x in values]
+        stats = OrderedDict((('count', len(values)),))
+        stats['errors'] = sum(1 for x in values if x[2] >= 400)
+        for percentile in PERCENTILES:
+            stats['p{0}_ms'.format(percentile)] = round(
+                _percentile(latencies, percentile) * 1000, 2
+            )
+        stats['queries_mean'] = round(sum(queries) / len(queries), 2)
+        stats['queries_max'] = max(queries)
+        summary[endpoint] = stats
+
+    return summary
+
+
+def _write_results_table(results, stdout):
+    header = '{0:18} {1:>6} {2:>6} {3:>9} {4:>9} {5:>9} {6:>8} {7:>7}'
+    row = '{0:18} {1:>6} {2:>6} {3:>9.2f} {4:>9.2f} {5:>9.2f} {6:>8.2f} {7:>7}'
+    stdout.write(
+        header.format(
+            'endpoint',
+            'count',
+            'errors',
+            'p50 ms',
+            'p95 ms',
+            'p99 ms',
+            'queries',
+            'max q',
+        )
+    )
+    for endpoint, stats in results['endpoints'].items():
+        stdout.write(
+            row.format(
+                endpoint,
+                stats['count'],
+                stats['errors'],
+                stats['p50_ms'],
+                stats['p95_ms'],
+                stats['p99_ms'],
+                stats['queries_mean'],
+                stats['queries_max'],
+            )
+        )
+    stdout.write(
+        '{0} requests in {1}s, {2} requests/s'.format(
+            sum(x['count'] for x in results['endpoints'].values()),
+            results['seconds'],
+            results['requests_per_second'],
+        )
+    )
+
+
+def _compare_results(baseline, results, tolerance, stdout):
+    """Writes differences to baseline, returns list of regressions.
+
+    Latency regresses if p95 grows by more than tolerance, query counts
+    regress if the maximum number of queries grows at all.
+    """
+    if baseline.get('config') != results['config']:
+        stdout.write('Warning: baseline was recorded with a different configuration')
+
+    regressions = []
+    for endpoint, stats in results['endpoints'].items():
+        old_stats = baseline.get('endpoints', {}).get(endpoint)
+        if old_stats is None:
+            stdout.write('{0:18} not in baseline'.format(endpoint))
+            continue
+
+        old_p95, new_p95 = old_stats['p95_ms'], stats['p95_ms']
+        change = (new_p95 - old_p95) / old_p95 if old_p95 else 0.0
+        _msg = '{0:18} p95 {1:.2f} -> {2:.2f} ms ({3:+.0%}), queries {4} -> {5}'.format(
+            endpoint,
+            old_p95,
+            new_p95,
+            change,
+            old_stats['queries_max'],
+            stats['queries_max'],
+        )
+
+        if change > tolerance:
+            regressions.append('{0} latency'.format(endpoint))
+            _msg += ' LATENCY REGRESSION'
+
+        if stats['queries_max'] > old_stats['queries_max']:
+            regressions.append('{0} queries'.format(endpoint))
+            _msg += ' QUERY REGRESSION'
+
+        stdout.write(_msg)
+
+    return regressions
@@ -0,0 +1,237 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+import json
+import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import connections
+from django.db import OperationalError
+from django.test.utils import override_settings
+from django.utils.timezone import utc
+
+from Appraise.settings import BASE_DIR
+from Appraise.sqlite import create_result
+from Campaign.management.commands.BenchmarkAnnotationLoad import _create_campaign
+from Campaign.management.commands.BenchmarkAnnotationLoad import (
+    _isolated_database,
+)
+from Campaign.management.commands.BenchmarkAnnotationLoad import _percentile
+from Campaign.utils import _load_campaign_manifest
+from EvalData.models import DirectAssessmentResult
+from EvalData.models import DirectAssessmentTask
+
+EXAMPLE_DIR = os.path.join(BASE_DIR, 'Examples', 'Direct')
+
+# Name => (SQLITE_PRODUCTION, GROUP_COMMIT)
+CONFIGURATIONS = OrderedDict(
+    (
+        ('default', (False, False)),
+        ('wal', (True, False)),
+        ('wal+group-commit', (True, True)),
+    )
+)
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = (
+        'Measures sustained result writes per second of concurrent annotators '
+        'on SQLite with and without the production profile and group commit'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=16,
+            help='Number of concurrently writing request threads.',
+        )
+
+        parser.add_argument(
+            '--writes',
+            type=int,
+            default=200,
+            help='Number of results written by each thread.',
+        )
+
+        parser.add_argument(
+            '--interval-ms',
+            type=float,
+            default=5.0,
+            help='Group commit interval in milliseconds.',
+        )
+
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            help='Write results as JSON to this file.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark requires an SQLite database')
+
+        manifest_data = _load_campaign_manifest(
+            os.path.join(EXAMPLE_DIR, 'manifest.json')
+        )
+        batches_json = os.path.join(EXAMPLE_DIR, 'batches.json')
+        with open(batches_json, encoding='utf-8') as in_file:
+            batches = json.load(in_file)
+
+        results = OrderedDict()
+        profile_off = override_settings(SQLITE_PRODUCTION=False, GROUP_COMMIT=False)
+        with TemporaryDirectory() as temp_dir, profile_off, _isolated_database(
+            temp_dir
+        ):
+            self.stdout.write('Creating campaign from {0}'.format(EXAMPLE_DIR))
+            _create_campaign(manifest_data, batches, temp_dir)
+            task = DirectAssessmentTask.objects.first()
+            result_fields = {
+                'score': 50,
+                'start_time': 0.0,
+                'end_time': 1.0,
+                'item': task.items.first(),
+                'task': task,
+                'createdBy': task.campaign.createdBy,
+                'activated': False,
+                'completed': True,
+            }
+
+            # Each configuration starts from a copy of the same database
+            db_path = connection.settings_dict['NAME']
+            pristine_path = os.path.join(temp_dir, 'pristine.sqlite3')
+            connections.close_all()
+            shutil.copyfile(db_path, pristine_path)
+
+            for name, (production, group_commit) in CONFIGURATIONS.items():
+                _restore_database(pristine_path, db_path)
+                self.stdout.write(
+                    'Running {0} threads x {1} writes: {2}'.format(
+                        options['threads'], options['writes'], name
+                    )
+                )
+                with override_settings(
+                    SQLITE_PRODUCTION=production,
+                    GROUP_COMMIT=group_commit,
+                    GROUP_COMMIT_INTERVAL=options['interval_ms'] / 1000,
+                ):
+                    results[name] = _run_writers(
+                        options['threads'], options['writes'], result_fields
+                    )
+                connections.close_all()
+
+        _write_results_table(results, self.stdout)
+
+        if options['output']:
+            with open(options['output'], mode='w', encoding='utf-8') as out_file:
+                json.dump(
+                    OrderedDict(
+                        (
+                            ('created', datetime.now().isoformat()),
+                            ('threads', options['threads']),
+                            ('writes', options['writes']),
+                            ('interval_ms', options['interval_ms']),
+                            ('results', results),
+                        )
+                    ),
+                    out_file,
+                    indent=2,
+                )
+            self.stdout.write('Results written to {0!r}'.format(options['output']))
+
+
+def _restore_database(pristine_path, db_path):
+    connections.close_all()
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    shutil.copyfile(pristine_path, db_path)
+
+
+def _write_results(writes, result_fields):
+    """Writes results like annotation views, returns (latencies, errors)."""
+    latencies = []
+    errors = 0
+    try:
+        for _ in range(writes):
+            started = perf_counter()
+            try:
+                create_result(
+                    DirectAssessmentResult,
+                    dateCompleted=datetime.utcnow().replace(tzinfo=utc),
+                    **result_fields
+                )
+            except OperationalError:
+                errors += 1
+                continue
+            latencies.append(perf_counter() - started)
+
+    finally:
+        connection.close()
+
+    return latencies, errors
+
+
+def _run_writers(threads, writes, result_fields):
+    """Runs concurrent writer threads, returns summary of their writes."""
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [
+            pool.submit(_write_results, writes, result_fields)
+            for _ in range(threads)
+        ]
+        outcomes = [future.result() for future in futures]
+    elapsed = perf_counter() - started
+
+    latencies = sorted(x for outcome in outcomes for x in outcome[0])
+    summary = OrderedDict()
+    summary['writes'] = len(latencies)
+    summary['errors'] = sum(outcome[1] for outcome in outcomes)
+    summary['seconds'] = round(elapsed, 3)
+    summary['writes_per_second'] = round(len(latencies) / elapsed, 2)
+    for percentile in (50, 95, 99):
+        value = _percentile(latencies, percentile) if latencies else 0.0
+        summary['p{0}_ms'.format(percentile)] = round(value * 1000, 2)
+    return summary
+
+
+def _write_results_table(results, stdout):
+    header = '{0:18} {1:>7} {2:>7} {3:>9} {4:>9} {5:>9} {6:>9} {7:>9}'
+    row = '{0:18} {1:>7} {2:>7} {3:>9.2f} {4:>9.2f} {5:>9.2f} {6:>9.2f} {7:>9.2f}'
+    stdout.write(
+        header.format(
+            'configuration',
+            'writes',
+            'errors',
+            'seconds',
+            'writes/s',
+            'p50 ms',
+            'p95 ms',
+            'p99 ms',
+        )
+    )
+    for name, summary in results.items():
+        stdout.write(
+            row.format(
+                name,
+                summary['writes'],
+                summary['errors'],
+                summary['seconds'],
+                summary['writes_per_second'],
+                summary['p50_ms'],
+                summary['p95_ms'],
+                summary['p99_ms'],
+            )
+        )
@@ -7,6 +7,9 @@ from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Appraise.routers import use_reporting_database
+from Campaign.archive import add_include_archived_argument
+from Campaign.archive import use_campaign_database
 from Campaign.models import Campaign
 from EvalData.models import DirectAssessmentResult
 from EvalData.models import DirectAssessmentTask
@@ -63,8 +66,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Use z scores for reliability checking (pre-WMT23)',
         )
+        add_include_archived_argument(parser)
         # TODO: add argument to specify batch user
 
+    @use_reporting_database
+    @use_campaign_database
     def handle(self, *args, **options):
         campaign_name = options['campaign_name']
         csv_file = options['csv_file']
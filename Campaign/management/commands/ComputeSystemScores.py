@@ -6,6 +6,8 @@ from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Campaign.archive import add_include_archived_argument
+from Campaign.archive import use_campaign_database
 from Campaign.models import Campaign
 from EvalData.models import DirectAssessmentResult
 from EvalData.models import DirectAssessmentTask
@@ -35,8 +37,10 @@ class Command(BaseCommand):
             type=str,
             help='User IDs which should be ignored',
         )
+        add_include_archived_argument(parser)
         # TODO: add argument to specify batch user
 
+    @use_campaign_database
     def handle(self, *args, **options):
         campaign_name = options['campaign_name']
         completed_only = options['completed_only']
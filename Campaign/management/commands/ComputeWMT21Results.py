@@ -9,6 +9,8 @@ from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Campaign.archive import add_include_archived_argument
+from Campaign.archive import use_campaign_database
 from Campaign.models import Campaign
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models import DirectAssessmentResult
@@ -171,8 +173,10 @@ class Command(BaseCommand):
             help='Use approximate randomization',
         )
 
+        add_include_archived_argument(parser)
         # TODO: add argument to specify batch user
 
+    @use_campaign_database
     def handle(self, *args, **options):
         campaign_name = options['campaign_name']
         completed_only = options['completed_only']
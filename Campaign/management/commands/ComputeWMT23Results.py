@@ -9,6 +9,9 @@ from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Appraise.routers import use_reporting_database
+from Campaign.archive import add_include_archived_argument
+from Campaign.archive import use_campaign_database
 from Campaign.models import Campaign
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models import DirectAssessmentResult
@@ -176,8 +179,11 @@ class Command(BaseCommand):
             help='Print output in WMT22 format, including z scores',
         )
 
+        add_include_archived_argument(parser)
         # TODO: add argument to specify batch user
 
+    @use_reporting_database
+    @use_campaign_database
     def handle(self, *args, **options):
         campaign_name = options['campaign_name']
         completed_only = options['completed_only']
@@ -5,6 +5,9 @@ import sys
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Appraise.routers import use_reporting_database
+from Campaign.archive import add_include_archived_argument
+from Campaign.archive import use_campaign_database
 from Campaign.models import Campaign
 from EvalData.models import TASK_DEFINITIONS
 
@@ -30,8 +33,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Export batch and item IDs to help matching the scores to items in the JSON batches',
         )
+        add_include_archived_argument(parser)
         # TODO: add argument to specify batch user
 
+    @use_reporting_database
+    @use_campaign_database
     def handle(self, *args, **options):
         # Identify Campaign instance for given name.
         try:
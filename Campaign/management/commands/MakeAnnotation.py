@@ -129,139 +129,15 @@ class Command(BaseCommand):
 
         # Each task has different context, so the POST request needs to be
         # built separately for each task type
-        data = None
-        msg_info = None
-
-        ##################################################################
-        if campaign_type == "Direct":
-            if len(scores) != 1:
-                raise ValueError('Task "Direct" requires exactly 1 score')
-
-            data = {
-                "score": scores[0],
-                "item_id": response.context["item_id"],
-                "task_id": response.context["task_id"],
-                "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
-                "end_timestamp": datetime.now().timestamp(),
-            }
-
-            msg_info = "item {}/{} with score {} for user {}".format(
-                response.context["item_id"],
-                response.context["task_id"],
-                scores[0],
-                username,
-            )
-
-        ##################################################################
-        elif campaign_type == "Pairwise":
-            if len(scores) != 2:
-                raise ValueError('Task "Pairwise" requires exactly 2 scores')
-
-            data = {
-                "score": scores[0],
-                "item_id": response.context["item_id"],
-                "task_id": response.context["task_id"],
-                "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
-                "end_timestamp": datetime.now().timestamp(),
-            }
-
-            if source_error is not None:
-                data["source_error"] = source_error
-
-            if len(target_errors) > 0:
-                data["error1"] = target_errors[0]
-
-            if response.context["candidate2_text"] is not None:
-                data["score2"] = scores[1]
-                if len(target_errors) > 1:
-                    data["error2"] = target_errors[1]
-
-            msg_info = "item {}/{} with score(s) {}".format(
-                response.context["item_id"], response.context["task_id"], scores[0]
-            )
-            if response.context["candidate2_text"] is not None:
-                msg_info += f", {scores[1]}"
-
-            msg_info += f" for user {username}"
-
-        ##################################################################
-        elif campaign_type == "PairwiseDocument":
-            if len(scores) != 2:
-                raise ValueError('Task "PairwiseDocument" requires exactly 2 scores')
-
-            data = {
-                "score1": scores[0],
-                "score2": scores[1],
-                "item_id": response.context["item_id"],
-                "task_id": response.context["task_id"],
-                "document_id": response.context["document_id"],
-                "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
-                "end_timestamp": datetime.now().timestamp(),
-            }
-
-            msg_info = "item {}/{}/{} with score(s) {}, {}".format(
-                response.context["item_id"],
-                response.context["task_id"],
-                response.context["document_id"],
-                scores[0],
-                scores[1],
-            )
-
-            msg_info += f" for user {username}"
-
-        ##################################################################
-        elif campaign_type == "Document":
-            if len(scores) != 1:
-                raise ValueError('Task "Document" requires exactly 1 score')
-
-            data = {
-                "score": scores[0],
-                "mqm": mqms[0],
-                "item_id": response.context["item_id"],
-                "document_id": response.context["document_id"],
-                "task_id": response.context["task_id"],
-                "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
-                "end_timestamp": datetime.now().timestamp(),
-            }
-
-            msg_info = "item {}/{}/{} with score {} and mqm {} for user {}".format(
-                response.context["item_id"],
-                response.context["task_id"],
-                response.context["document_id"],
-                scores[0],
-                mqms[0],
-                username,
-            )
-
-        ##################################################################
-        elif campaign_type == "Data":
-            if len(scores) != 2:
-                raise ValueError(
-                    'Task "Data" requires exactly 1 score (0-100) and 1 label (1-4)'
-                )
-
-            data = {
-                "score": scores[0],
-                "rank": scores[1],
-                "item_id": response.context["item_id"],
-                "task_id": response.context["task_id"],
-                "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
-                "end_timestamp": datetime.now().timestamp(),
-            }
-
-            msg_info = "item {}/{} with score {} and label {} for user {}".format(
-                response.context["item_id"],
-                response.context["task_id"],
-                scores[0],
-                scores[1],
-                username,
-            )
-
-        ##################################################################
-        else:
-            raise CommandError(
-                f'Task type "{campaign_type}" is not yet supported in this script yet'
-            )
+        data, msg_info = _get_annotation_data(
+            campaign_type,
+            response.context,
+            scores,
+            mqms=mqms,
+            source_error=source_error,
+            target_errors=target_errors,
+        )
+        msg_info += f" for user {username}"
 
         # Final call
         self.stdout.write(f"Created data: {data}")
@@ -282,3 +158,149 @@ def _get_task_url(task_type):
     if len(task_url) != 1:
         return None
     return task_url[0]
+
+
+def _get_annotation_data(
+    campaign_type, context, scores, mqms=None, source_error=None, target_errors=None
+):
+    """Builds POST data for annotating the current item of a task view.
+
+    Parameters:
+    - campaign_type:str campaign task type name, e.g. 'Direct';
+    - context:dict context of the rendered task view;
+    - scores:list[int] score(s) to be assigned;
+    - mqms:list JSON MQM annotations, used by 'Document' only;
+    - source_error:str source error, used by 'Pairwise' only;
+    - target_errors:list[str] error comments, used by 'Pairwise' only.
+
+    Returns:
+    - (data, msg_info) tuple of POST data and a description of the annotation.
+    """
+    mqms = mqms or [[]]
+    target_errors = target_errors or []
+
+    ##################################################################
+    if campaign_type == "Direct":
+        if len(scores) != 1:
+            raise ValueError('Task "Direct" requires exactly 1 score')
+
+        data = {
+            "score": scores[0],
+            "item_id": context["item_id"],
+            "task_id": context["task_id"],
+            "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
+            "end_timestamp": datetime.now().timestamp(),
+        }
+
+        msg_info = "item {}/{} with score {}".format(
+            context["item_id"],
+            context["task_id"],
+            scores[0],
+        )
+
+    ##################################################################
+    elif campaign_type == "Pairwise":
+        if len(scores) != 2:
+            raise ValueError('Task "Pairwise" requires exactly 2 scores')
+
+        data = {
+            "score": scores[0],
+            "item_id": context["item_id"],
+            "task_id": context["task_id"],
+            "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
+            "end_timestamp": datetime.now().timestamp(),
+        }
+
+        if source_error is not None:
+            data["source_error"] = source_error
+
+        if len(target_errors) > 0:
+            data["error1"] = target_errors[0]
+
+        if context["candidate2_text"] is not None:
+            data["score2"] = scores[1]
+            if len(target_errors) > 1:
+                data["error2"] = target_errors[1]
+
+        msg_info = "item {}/{} with score(s) {}".format(
+            context["item_id"], context["task_id"], scores[0]
+        )
+        if context["candidate2_text"] is not None:
+            msg_info += f", {scores[1]}"
+
+    ##################################################################
+    elif campaign_type == "PairwiseDocument":
+        if len(scores) != 2:
+            raise ValueError('Task "PairwiseDocument" requires exactly 2 scores')
+
+        data = {
+            "score1": scores[0],
+            "score2": scores[1],
+            "item_id": context["item_id"],
+            "task_id": context["task_id"],
+            "document_id": context["document_id"],
+            "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
+            "end_timestamp": datetime.now().timestamp(),
+        }
+
+        msg_info = "item {}/{}/{} with score(s) {}, {}".format(
+            context["item_id"],
+            context["task_id"],
+            context["document_id"],
+            scores[0],
+            scores[1],
+        )
+
+    ##################################################################
+    elif campaign_type == "Document":
+        if len(scores) != 1:
+            raise ValueError('Task "Document" requires exactly 1 score')
+
+        data = {
+            "score": scores[0],
+            "mqm": mqms[0],
+            "item_id": context["item_id"],
+            "document_id": context["document_id"],
+            "task_id": context["task_id"],
+            "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
+            "end_timestamp": datetime.now().timestamp(),
+        }
+
+        msg_info = "item {}/{}/{} with score {} and mqm {}".format(
+            context["item_id"],
+            context["task_id"],
+            context["document_id"],
+            scores[0],
+            mqms[0],
+        )
+
+    ##################################################################
+    elif campaign_type == "Data":
+        if len(scores) != 2:
+            raise ValueError(
+                'Task "Data" requires exactly 1 score (0-100) and 1 label (1-4)'
+            )
+
+        data = {
+            "score": scores[0],
+            "rank": scores[1],
+            "item_id": context["item_id"],
+            "task_id": context["task_id"],
+            "start_timestamp": (datetime.now() - timedelta(minutes=5)).timestamp(),
+            "end_timestamp": datetime.now().timestamp(),
+        }
+
+        msg_info = "item {}/{} with score {} and label {}".format(
+            context["item_id"],
+            context["task_id"],
+            scores[0],
+            scores[1],
+        )
+
+    ##################################################################
+    else:
+        raise CommandError(
+            f'Task type "{campaign_type}" is not yet supported in this script yet'
+        )
+
+    return data, msg_info
@@ -5,6 +5,7 @@ from django.core.management.base import CommandError
 from Campaign.models import Campaign
 from Campaign.utils import _identify_super_users
 from Campaign.utils import CAMPAIGN_TASK_TYPES
+from Dashboard.jobs import report_progress
 
 
 class Command(BaseCommand):
@@ -57,7 +58,13 @@ def _process_campaign_data(campaign, batch_user, campaign_type, max_count):
     print('Campign type validated')
 
     # TODO: add rollback in case of errors
-    for batch_data in campaign.batches.filter(dataValid=True):
+    batches = list(campaign.batches.filter(dataValid=True))
+    for batch_index, batch_data in enumerate(batches):
+        report_progress(
+            batch_index / len(batches),
+            'Processing batch {0} of {1}'.format(batch_index + 1, len(batches)),
+        )
+
         # We have already verified that campaign_type is valid
         task_cls = CAMPAIGN_TASK_TYPES.get(campaign_type)
 
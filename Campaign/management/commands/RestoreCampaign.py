@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from Campaign.archive import ArchiveError
+from Campaign.archive import restore_campaign
+from Campaign.models import Campaign
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = 'Moves tasks, items, results and agendas of a campaign from the archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'campaign_name',
+            type=str,
+            help='Name of the campaign you want to restore',
+        )
+
+    def handle(self, *args, **options):
+        campaign = Campaign.get_campaign_or_raise(options['campaign_name'])
+
+        try:
+            counts = restore_campaign(campaign)
+        except ArchiveError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for label, count in sorted(counts.items()):
+            self.stdout.write('{0:>8} {1}'.format(count, label))
+        self.stdout.write(
+            'Restored campaign {0}, {1} rows'.format(
+                campaign.campaignName, sum(counts.values())
+            )
+        )
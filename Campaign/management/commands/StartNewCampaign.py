@@ -79,6 +79,14 @@ class Command(BaseCommand):
             'with external crowd sourcing apps.',
         )
 
+        parser.add_argument(
+            '--login-tokens',
+            action='store_true',
+            default=False,
+            help='Export signed, expiring login URLs, which do not require '
+            'password hashing on each login.',
+        )
+
         parser.add_argument(
             '--max-count',
             type=int,
@@ -126,8 +134,8 @@ class Command(BaseCommand):
             xlsx_output,
             only_activated,
             confirmation_tokens,
-            # When run for the first time, do not process campaign agendas,
-            # because the campaign does not exist yet
+            # When run for the first time, do not process campaign agendas
+            # or login tokens, because the campaign does not exist yet
             skip_agendas=True,
             stdout=self.stdout,
         )
@@ -202,7 +210,7 @@ class Command(BaseCommand):
 
         #############################################################
         self.stdout.write('### Running UpdateEvalDataModels')
-        _update_eval_data_models(self.stdout)
+        _update_eval_data_models(self.stdout, campaign=_campaign)
 
         #############################################################
         self.stdout.write('### Running init_campaign again')
@@ -213,6 +221,7 @@ class Command(BaseCommand):
             xlsx_output,
             only_activated,
             confirmation_tokens,
+            login_tokens=options['login_tokens'],
             skip_agendas=False,
             stdout=self.stdout,
         )
@@ -4,11 +4,14 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 from datetime import datetime
+from urllib.parse import urljoin
 
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
+from django.urls import reverse
 from tablib import Dataset  # type: ignore
 
+from Campaign.models import Campaign
 from Campaign.utils import _create_linear_task_map
 from Campaign.utils import _create_uniform_task_map
 from Campaign.utils import _identify_super_users
@@ -20,6 +23,7 @@ from Campaign.utils import _process_users
 from Campaign.utils import _validate_language_codes
 from Campaign.utils import CAMPAIGN_TASK_TYPES
 from Dashboard.utils import generate_confirmation_token
+from Dashboard.utils import generate_login_tokens
 
 # pylint: disable=C0111,C0330,E1101
 class Command(BaseCommand):
@@ -64,6 +68,14 @@ class Command(BaseCommand):
             'integration with external crowd sourcing apps.',
         )
 
+        parser.add_argument(
+            '--login-tokens',
+            action='store_true',
+            default=False,
+            help='Export signed, expiring login URLs, which do not require '
+            'password hashing on each login.',
+        )
+
     def handle(self, *args, **options):
         manifest_json = options.get('manifest_json')
         self.stdout.write('JSON manifest path: {0!r}'.format(manifest_json))
@@ -91,6 +103,7 @@ class Command(BaseCommand):
         # Compute Boolean flag based on negation of --include-completed state.
         only_activated = not options['include_completed']
         confirmation_tokens = options.get('task_confirmation_tokens', False)
+        login_tokens = options.get('login_tokens', False)
 
         # Initialise campaign based on manifest data
         _init_campaign(
@@ -99,6 +112,7 @@ class Command(BaseCommand):
             xlsx_output,
             only_activated,
             confirmation_tokens,
+            login_tokens=login_tokens,
             stdout=self.stdout,
         )
 
@@ -111,6 +125,7 @@ def _init_campaign(
     confirmation_tokens=False,
     skip_agendas=False,
     stdout=None,
+    login_tokens=False,
 ):
     """Initialises campaign based on manifest data.
 
@@ -119,11 +134,21 @@ def _init_campaign(
     - csv_output:str path to CSV output file, or None;
     - xlsx_output:str path to Excel output file, or None;
     - only_activated:bool only include activated tasks for agenda creation;
-    - confirmation_tokens:bool export valid task confirmation tokens.
+    - confirmation_tokens:bool export valid task confirmation tokens;
+    - login_tokens:bool export signed login URLs, the campaign must exist.
     """
     ALL_LANGUAGES = context['ALL_LANGUAGES']
     print('All languages:', ALL_LANGUAGES)
 
+    # Login tokens refer to the campaign, so it has to exist already
+    if login_tokens and not Campaign.objects.filter(
+        campaignName=context['CAMPAIGN_NAME']
+    ).exists():
+        raise CommandError(
+            'Campaign {0!r} does not exist, login tokens can only be generated '
+            'for existing campaigns'.format(context['CAMPAIGN_NAME'])
+        )
+
     # Find super user
     superusers = _identify_super_users()
     if stdout is not None:
@@ -151,20 +176,32 @@ def _init_campaign(
 
     # Generate Dataset with user credentials and SSO URLs
     export_data = Dataset()
+    _headers = ('Username', 'Password', 'URL')
     if confirmation_tokens:
-        export_data.headers = ('Username', 'Password', 'URL', 'ConfirmationToken')
-    else:
-        export_data.headers = ('Username', 'Password', 'URL')
+        _headers += ('ConfirmationToken',)
+    if login_tokens:
+        _headers += ('LoginURL',)
+    export_data.headers = _headers
     export_data.title = datetime.strftime(datetime.now(), '%Y%m%d')
 
+    _login_tokens = {}
+    if login_tokens:
+        _login_tokens = generate_login_tokens(
+            credentials.keys(), context['CAMPAIGN_NAME']
+        )
+
     base_url = context['CAMPAIGN_URL']
     for _user, _password in credentials.items():
         _url = '{0}{1}/{2}/'.format(base_url, _user, _password)
+        _row = (_user, _password, _url)
         if confirmation_tokens:
-            _token = generate_confirmation_token(_user, run_qc=False)
-            export_data.append((_user, _password, _url, _token))
-        else:
-            export_data.append((_user, _password, _url))
+            _row += (generate_confirmation_token(_user, run_qc=False),)
+        if login_tokens:
+            # Same host as the SSO URLs
+            _row += (
+                urljoin(base_url, reverse('token-login', args=[_login_tokens[_user]])),
+            )
+        export_data.append(_row)
 
     # Export credentials to CSV or Excel files, if specified
     _export_credentials(export_data, csv_output, xlsx_output, stdout=stdout)
@@ -190,8 +227,8 @@ def _export_credentials(export_data, csv_output, xlsx_output, stdout=None):
     """Export credentials to screen, CSV and Excel files.
 
     Parameters:
-    - export_data:Dataset contains triples or 4-tuples (username,
-      password, url, [token]);
+    - export_data:Dataset contains triples to 5-tuples (username,
+      password, url, [token], [login url]);
     - csv_output:str path to CSV output file, or None;
     - xlsx_output:str path to Excel output file, or None.
     """
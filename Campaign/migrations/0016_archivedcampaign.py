@@ -0,0 +1,64 @@
+# Generated by Django 4.1 on 2026-10-19 15:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("Campaign", "0015_alter_campaign_activatedby_alter_campaign_batches_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedCampaign",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "dateArchived",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Date archived"
+                    ),
+                ),
+                (
+                    "objectCount",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="(rows moved to the archive database)",
+                        verbose_name="Object count",
+                    ),
+                ),
+                (
+                    "archivedBy",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(app_label)s_%(class)s_archived_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Archived by",
+                    ),
+                ),
+                (
+                    "campaign",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="archive",
+                        to="Campaign.campaign",
+                        verbose_name="Campaign",
+                    ),
+                ),
+            ],
+        ),
+    ]
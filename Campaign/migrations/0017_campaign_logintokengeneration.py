@@ -0,0 +1,20 @@
+# Generated by Django 4.1 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Campaign", "0016_archivedcampaign"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="campaign",
+            name="loginTokenGeneration",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Login token generation"
+            ),
+        ),
+    ]
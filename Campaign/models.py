@@ -1,6 +1,7 @@
 """
 Campaign models.py
 """
+
 # pylint: disable=C0111,C0330,E1101
 from json import JSONDecodeError
 from json import loads
@@ -11,6 +12,12 @@ from zipfile import ZipFile
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import IntegerField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
 from django.utils.text import format_lazy as f
 from django.utils.translation import gettext_lazy as _
 
@@ -271,6 +278,52 @@ def _validate_package_file(package_file):
     return True
 
 
+def _subquery_count(queryset):
+    """
+    Wraps queryset into a scalar COUNT(*) subquery usable in annotations.
+
+    Unlike Count() this does not add any JOIN or GROUP BY to the outer query,
+    so several of these can be combined in a single SELECT statement.
+    """
+    _count = queryset.order_by().values(_count=Func('pk', function='COUNT'))
+    return Coalesce(Subquery(_count, output_field=IntegerField()), 0)
+
+
+class CampaignTeamQuerySet(models.QuerySet):
+    """
+    QuerySet for CampaignTeam instances.
+    """
+
+    def with_completion_status(self):
+        """
+        Annotates team member and completed annotation counts.
+
+        This computes the data needed for teamMembers() and completionStatus()
+        in one query for all teams in the QuerySet, instead of one count()
+        per result type and team member for every single team.
+        """
+        _members = CampaignTeam.members.through.objects.filter(
+            campaignteam=OuterRef(OuterRef('pk'))
+        ).values('user')
+
+        _member_count = _subquery_count(
+            CampaignTeam.members.through.objects.filter(campaignteam=OuterRef('pk'))
+        )
+
+        _done_count = None
+        for result_type in RESULT_TYPES:
+            _results = result_type.objects.filter(
+                createdBy__in=Subquery(_members), completed=True
+            ).exclude(createdBy=OuterRef('owner'))
+
+            _count = _subquery_count(_results)
+            _done_count = _count if _done_count is None else _done_count + _count
+
+        return self.annotate(
+            _member_count=_member_count, _completed_annotations=_done_count
+        )
+
+
 class CampaignTeam(BaseMetadata):
     """
     Models a campaign team.
@@ -309,6 +362,8 @@ class CampaignTeam(BaseMetadata):
         help_text=_(f('(value in range=[1,{value}])', value=MAX_SMALLINTEGER_VALUE)),
     )
 
+    objects = CampaignTeamQuerySet.as_manager()
+
     # pylint: disable=C0111,R0903
     class Meta:
         ordering = ['_str_name']
@@ -316,7 +371,9 @@ class CampaignTeam(BaseMetadata):
         verbose_name_plural = 'Teams'
 
     def _generate_str_name(self):
-        return '{0} ({1})'.format(self.teamName, self.owner)
+        return '{0} ({1})'.format(
+            self.teamName, self._related_values('owner', 'username')[0]
+        )
 
     def is_valid(self):
         """
@@ -329,12 +386,32 @@ class CampaignTeam(BaseMetadata):
         except ValidationError:
             return False
 
+    def _annotated_counts(self):
+        """
+        Returns (members, completed annotations) for this team.
+
+        Uses values from CampaignTeamQuerySet.with_completion_status() if this
+        instance has been loaded with them. Otherwise, runs a single query on
+        every call; its values are not kept, as they would be stale once
+        members or results change.
+        """
+        if hasattr(self, '_completed_annotations'):
+            return (self._member_count, self._completed_annotations)
+
+        _counts = (
+            CampaignTeam.objects.filter(pk=self.pk)
+            .with_completion_status()
+            .values_list('_member_count', '_completed_annotations')
+            .first()
+        )
+        return _counts or (0, 0)
+
     # pylint: disable=C0103,E1101
     def teamMembers(self):
         """
         Proxy method returning members count.
         """
-        return self.members.count()
+        return self._annotated_counts()[0]
 
     teamMembers.short_description = '# of team members'  # type: ignore
 
@@ -348,17 +425,10 @@ class CampaignTeam(BaseMetadata):
         # of completed annotations / # of required annotations.
 
         """
-        # Required annotations times the number of users excluding the owner
-        count_all = self.requiredAnnotations * (self.members.count() - 1)
+        members, count_done = self._annotated_counts()
 
-        count_done = 0
-        for result_type in RESULT_TYPES:
-            for user in self.members.all():
-                if user == self.owner:  # Skip superuser
-                    continue
-                count_done += result_type.objects.filter(
-                    createdBy=user, completed=True
-                ).count()
+        # Required annotations times the number of users excluding the owner
+        count_all = self.requiredAnnotations * (members - 1)
 
         completion = 0.0
         if count_all != 0:
@@ -471,9 +541,25 @@ class Campaign(BaseMetadata):
         validators=[_validate_package_file],
     )
 
+    # Login tokens of earlier generations are rejected, see Dashboard.utils
+    loginTokenGeneration = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_('Login token generation'),
+    )
+
     def _generate_str_name(self):
         return self.campaignName
 
+    def revoke_login_tokens(self):
+        """
+        Revokes all login tokens issued for this campaign so far.
+        """
+        Campaign.objects.filter(id=self.id).update(
+            loginTokenGeneration=F('loginTokenGeneration') + 1
+        )
+        self.refresh_from_db(fields=['loginTokenGeneration'])
+
     @classmethod
     def get_campaign_or_raise(cls, campaign_name):
         """
@@ -522,3 +608,39 @@ class TrustedUser(models.Model):
     # TODO: decide whether this needs to be optimized.
     def __str__(self):
         return 'trusted:{0}/{1}'.format(self.user.username, self.campaign.campaignName)
+
+
+class ArchivedCampaign(models.Model):
+    '''
+    Marks campaigns whose tasks, items, results and agendas have been moved
+    to the archive database, see Campaign/archive.py.
+    '''
+
+    campaign = models.OneToOneField(
+        Campaign,
+        models.PROTECT,
+        related_name='archive',
+        verbose_name=_('Campaign'),
+    )
+
+    archivedBy = models.ForeignKey(
+        User,
+        models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='%(app_label)s_%(class)s_archived_by',
+        verbose_name=_('Archived by'),
+    )
+
+    dateArchived = models.DateTimeField(
+        auto_now_add=True, verbose_name=_('Date archived')
+    )
+
+    objectCount = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Object count'),
+        help_text=_('(rows moved to the archive database)'),
+    )
+
+    def __str__(self):
+        return 'archived:{0}'.format(self.campaign.campaignName)
@@ -3,16 +3,29 @@ Appraise evaluation framework
 
 See LICENSE for usage details
 """
+
+import os
+from contextlib import redirect_stdout
+from io import StringIO
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.files.base import File
+from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+from django.test import override_settings
 from django.test import TestCase
+from django.test import TransactionTestCase
 
+from Appraise.routers import ARCHIVE_DB_ALIAS
 from Campaign.models import _validate_package_file
+from Campaign.models import ArchivedCampaign
 from Campaign.models import Campaign
+from Campaign.models import CampaignTeam
 from Appraise.utils import _compute_user_total_annotation_time
 
 
@@ -188,3 +201,509 @@ class TestCampaignUtils(TestCase):
         # Same start and end timestamps
         timestamps = [(100, 100), (100, 100), (100, 100), (100, 100), (150, 150)]
         self.assertEqual(_compute_user_total_annotation_time(timestamps), 0)
+
+
+class TestCampaignTeamCompletionStatus(TestCase):
+    '''Tests for annotated CampaignTeam completion status.'''
+
+    def setUp(self):
+        from EvalData.models import DirectAssessmentResult
+        from EvalData.models import Market
+        from EvalData.models import Metadata
+        from EvalData.models import TextPair
+
+        self.owner = User.objects.create(username='admin', is_superuser=True)
+        self.annotators = [
+            User.objects.create(username='annotator{0}'.format(x)) for x in range(2)
+        ]
+
+        self.team = CampaignTeam.objects.create(
+            teamName='team',
+            owner=self.owner,
+            requiredAnnotations=2,
+            requiredHours=1,
+            createdBy=self.owner,
+        )
+        self.team.members.add(self.owner, *self.annotators)
+
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='test',
+            createdBy=self.owner,
+        )
+        metadata = Metadata.objects.create(
+            market=market,
+            corpusName='test',
+            versionInfo='1.0',
+            source='test',
+            createdBy=self.owner,
+        )
+        item = TextPair.objects.create(
+            itemID=1,
+            itemType='TGT',
+            metadata=metadata,
+            sourceID='1',
+            sourceText='source',
+            targetID='1',
+            targetText='target',
+            createdBy=self.owner,
+        )
+
+        # Owner results must not be counted, incomplete ones neither
+        for user, completed in (
+            (self.owner, True),
+            (self.annotators[0], True),
+            (self.annotators[0], False),
+            (self.annotators[1], True),
+        ):
+            DirectAssessmentResult.objects.create(
+                score=50,
+                start_time=0,
+                end_time=1,
+                item=item,
+                completed=completed,
+                createdBy=user,
+            )
+
+    def test_annotated_status_matches_single_instance(self):
+        '''Verifies annotated and on-demand completion status agree.'''
+        self.assertEqual(self.team.teamMembers(), 3)
+        self.assertEqual(self.team.completionStatus(), '50.00%')
+
+        team = CampaignTeam.objects.with_completion_status().get(pk=self.team.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(team.teamMembers(), 3)
+            self.assertEqual(team.completionStatus(), '50.00%')
+
+    def test_status_follows_membership_changes(self):
+        '''Verifies on-demand completion status is not kept on the instance.'''
+        self.assertEqual(self.team.completionStatus(), '50.00%')
+
+        self.team.members.add(User.objects.create(username='annotator2'))
+        self.assertEqual(self.team.teamMembers(), 4)
+        self.assertEqual(self.team.completionStatus(), '33.33%')
+
+
+class TestBenchmarkAnnotationLoad(TestCase):
+    '''Tests helpers of BenchmarkAnnotationLoad management command.'''
+
+    def test_synthesized_items_end_with_complete_documents(self):
+        '''Verifies repeated items get new IDs and documents are not cut.'''
+        from Campaign.management.commands.BenchmarkAnnotationLoad import (
+            _synthesize_items,
+        )
+
+        items = [
+            {'itemID': 0, 'documentID': 'a'},
+            {'itemID': 1, 'documentID': 'a'},
+            {'itemID': '2', 'documentID': 'a'},
+            {'itemID': 0, 'documentID': 'b'},
+        ]
+        synthesized = _synthesize_items(items, 2)
+        self.assertEqual([x['itemID'] for x in synthesized], [0, 1, '2'])
+
+        synthesized = _synthesize_items(items, 5)
+        self.assertEqual([x['itemID'] for x in synthesized], [0, 1, '2', 0, 4, 5, 6])
+
+        items = [{'itemID': x} for x in range(3)]
+        synthesized = _synthesize_items(items, 2)
+        self.assertEqual([x['itemID'] for x in synthesized], [0, 1])
+
+    def test_regressions_against_baseline(self):
+        '''Verifies latency and query count regressions are detected.'''
+        from io import StringIO
+
+        from Campaign.management.commands.BenchmarkAnnotationLoad import (
+            _compare_results,
+        )
+        from Campaign.management.commands.BenchmarkAnnotationLoad import (
+            _summarize,
+        )
+
+        baseline = {
+            'config': {},
+            'endpoints': _summarize(
+                [('dashboard', 0.1, 10, 200), ('annotation-get', 0.1, 10, 200)]
+            ),
+        }
+        results = {
+            'config': {},
+            'endpoints': _summarize(
+                [('dashboard', 0.11, 10, 200), ('annotation-get', 0.2, 11, 200)]
+            ),
+        }
+        self.assertEqual(baseline['endpoints']['dashboard']['p95_ms'], 100.0)
+
+        regressions = _compare_results(baseline, results, 0.25, StringIO())
+        self.assertEqual(
+            regressions, ['annotation-get latency', 'annotation-get queries']
+        )
+
+
+class TestArchiveCampaign(TransactionTestCase):
+    '''Tests ArchiveCampaign and RestoreCampaign management commands.'''
+
+    @classmethod
+    def setUpClass(cls):
+        # Archive database is added only now, as the test runner would
+        # otherwise try to create a test database for it
+        cls.temp_dir = TemporaryDirectory()
+        connections.settings[ARCHIVE_DB_ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.temp_dir.name, 'archive.sqlite3'),
+        }
+        connections.configure_settings(connections.settings)
+        cls.databases = {DEFAULT_DB_ALIAS, ARCHIVE_DB_ALIAS}
+        call_command('migrate', database=ARCHIVE_DB_ALIAS, verbosity=0)
+
+        cls.routers = override_settings(
+            DATABASE_ROUTERS=['Appraise.routers.ArchiveRouter']
+        )
+        cls.routers.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.routers.disable()
+        connections[ARCHIVE_DB_ALIAS].close()
+        del connections[ARCHIVE_DB_ALIAS]
+        del connections.settings[ARCHIVE_DB_ALIAS]
+        cls.temp_dir.cleanup()
+
+    def setUp(self):
+        from EvalData.models import DirectAssessmentResult
+        from EvalData.models import DirectAssessmentTask
+        from EvalData.models import Market
+        from EvalData.models import Metadata
+        from EvalData.models import TaskAgenda
+        from EvalData.models import TextPair
+
+        owner = User.objects.create(username='admin', is_superuser=True)
+        annotator = User.objects.create(username='annotator')
+        self.campaign = Campaign.objects.create(campaignName='old', createdBy=owner)
+        other = Campaign.objects.create(campaignName='live', createdBy=owner)
+
+        metadata = Metadata.objects.create(
+            market=Market.objects.create(
+                sourceLanguageCode='eng',
+                targetLanguageCode='deu',
+                domainName='test',
+                createdBy=owner,
+            ),
+            corpusName='test',
+            versionInfo='1.0',
+            source='test',
+            createdBy=owner,
+        )
+        items = [
+            TextPair.objects.create(
+                itemID=x,
+                itemType='TGT',
+                metadata=metadata,
+                sourceID='doc{0}'.format(x),
+                sourceText='source',
+                targetID='system',
+                targetText='target',
+                createdBy=owner,
+            )
+            for x in range(2)
+        ]
+
+        task = DirectAssessmentTask.objects.create(
+            campaign=self.campaign, requiredAnnotations=1, batchNo=1, createdBy=owner
+        )
+        task.items.add(*items)
+        task.assignedTo.add(annotator)
+        for item in items:
+            DirectAssessmentResult.objects.create(
+                score=50,
+                start_time=0,
+                end_time=1,
+                item=item,
+                task=task,
+                completed=True,
+                createdBy=annotator,
+            )
+        TaskAgenda.objects.create(user=annotator, campaign=self.campaign)
+
+        # Second item is used by another campaign, too
+        live_task = DirectAssessmentTask.objects.create(
+            campaign=other, requiredAnnotations=1, batchNo=1, createdBy=owner
+        )
+        live_task.items.add(items[1])
+        self.items = items
+
+    def _export(self, *args):
+        out = StringIO()
+        with redirect_stdout(out):
+            call_command('ExportSystemScoresToCSV', 'old', *args)
+        return out.getvalue().splitlines()
+
+    def test_archive_and_restore_campaign(self):
+        '''Verifies campaign rows move to the archive and back.'''
+        from EvalData.models import DirectAssessmentResult
+        from EvalData.models import DirectAssessmentTask
+        from EvalData.models import TaskAgenda
+        from EvalData.models import TextPair
+
+        exported = self._export()
+        self.assertEqual(len(exported), 2)
+
+        # Task is not completed, so archiving must be forced
+        with self.assertRaises(CommandError):
+            call_command('ArchiveCampaign', 'old', stdout=StringIO())
+        call_command('ArchiveCampaign', 'old', force=True, stdout=StringIO())
+
+        self.assertTrue(ArchivedCampaign.objects.filter(campaign=self.campaign))
+        self.assertEqual(DirectAssessmentResult.objects.count(), 0)
+        self.assertEqual(TaskAgenda.objects.count(), 0)
+        self.assertEqual(
+            list(DirectAssessmentTask.objects.values_list('campaign', flat=True)),
+            [Campaign.objects.get(campaignName='live').id],
+        )
+        self.assertEqual(
+            list(TextPair.objects.values_list('id', flat=True)), [self.items[1].id]
+        )
+        archived = DirectAssessmentResult.objects.using(ARCHIVE_DB_ALIAS)
+        self.assertEqual(archived.count(), 2)
+
+        with self.assertRaises(CommandError):
+            self._export()
+        self.assertEqual(self._export('--include-archived'), exported)
+
+        call_command('RestoreCampaign', 'old', stdout=StringIO())
+        self.assertFalse(ArchivedCampaign.objects.exists())
+        self.assertEqual(DirectAssessmentResult.objects.count(), 2)
+        self.assertEqual(DirectAssessmentTask.objects.count(), 2)
+        self.assertEqual(TaskAgenda.objects.count(), 1)
+        self.assertEqual(TextPair.objects.count(), 2)
+        self.assertEqual(
+            self.campaign.evaldata_directassessmenttask_campaign.count(), 1
+        )
+        self.assertEqual(archived.count(), 0)
+        self.assertEqual(self._export(), exported)
+
+
+class TestCampaignStatusAPI(TestCase):
+    '''Tests conditional GET of campaign status JSON API.'''
+
+    def setUp(self):
+        from Campaign import views
+        from EvalData.models import DirectAssessmentTask
+        from EvalData.models import Market
+        from EvalData.models import Metadata
+        from EvalData.models import TextPair
+
+        views._CAMPAIGN_RESULT_TYPES.clear()
+        owner = User.objects.create_user(username='admin', password='secret')
+        self.annotators = [
+            User.objects.create(username='annotator{0}'.format(x)) for x in range(2)
+        ]
+        team = CampaignTeam.objects.create(
+            teamName='team',
+            owner=owner,
+            requiredAnnotations=2,
+            requiredHours=1,
+            createdBy=owner,
+        )
+        team.members.add(*self.annotators)
+        campaign = Campaign.objects.create(campaignName='status', createdBy=owner)
+        campaign.teams.add(team)
+
+        metadata = Metadata.objects.create(
+            market=Market.objects.create(
+                sourceLanguageCode='eng',
+                targetLanguageCode='deu',
+                domainName='test',
+                createdBy=owner,
+            ),
+            corpusName='test',
+            versionInfo='1.0',
+            source='test',
+            createdBy=owner,
+        )
+        self.item = TextPair.objects.create(
+            itemID=1,
+            itemType='TGT',
+            metadata=metadata,
+            sourceID='1',
+            sourceText='source',
+            targetID='1',
+            targetText='target',
+            createdBy=owner,
+        )
+        self.task = DirectAssessmentTask.objects.create(
+            campaign=campaign, requiredAnnotations=1, batchNo=1, createdBy=owner
+        )
+        self.task.items.add(self.item)
+        self._add_result(self.annotators[0])
+        self.client.login(username='admin', password='secret')
+
+    def _add_result(self, user):
+        from EvalData.models import DirectAssessmentResult
+
+        return DirectAssessmentResult.objects.create(
+            score=50,
+            start_time=0,
+            end_time=1,
+            item=self.item,
+            task=self.task,
+            completed=True,
+            createdBy=user,
+        )
+
+    def test_unchanged_status_is_not_modified(self):
+        '''Verifies If-None-Match gets 304 until results are added.'''
+        url = '/api/campaign-status/status/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [(x['username'], x['annotations']) for x in data['annotators']],
+            [('annotator1', 0), ('annotator0', 1)],
+        )
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        # Session, user, membership and watermark queries only
+        with self.assertNumQueries(4):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        since = data['watermark']['since']
+        result = self._add_result(self.annotators[1])
+        response = self.client.get(url, {'since': since}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        data = response.json()
+        members = '2-{0}-{1}'.format(
+            self.annotators[1].id, self.annotators[0].id + self.annotators[1].id
+        )
+        self.assertEqual(
+            data['watermark'],
+            {
+                'max_id': result.id,
+                'count': 2,
+                'modified': 0,
+                'members': members,
+                'since': f'{result.id}-0-{members}',
+            },
+        )
+        self.assertEqual(
+            [(x['username'], x['annotations']) for x in data['annotators']],
+            [('annotator1', 1)],
+        )
+
+        response = self.client.get(url, {'since': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reset_agenda_is_modified(self):
+        '''Verifies results changed in place by agenda resets are not 304.'''
+        from EvalData.models import TaskAgenda
+
+        url = '/api/campaign-status/status/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        since = response.json()['watermark']['since']
+
+        agenda = TaskAgenda.objects.create(
+            user=self.annotators[0], campaign=self.task.campaign
+        )
+        self.assertTrue(TaskAgenda.reset_taskagendas([agenda])[0][0])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            [(x['username'], x['annotations']) for x in response.json()['annotators']],
+            [('annotator0', 0), ('annotator1', 0)],
+        )
+
+        # Reset results belong to a shadow user now, so all are returned
+        response = self.client.get(url, {'since': since})
+        self.assertEqual(
+            sorted(x['username'] for x in response.json()['annotators']),
+            ['annotator0', 'annotator1'],
+        )
+
+    def test_membership_changes_are_modified(self):
+        '''Verifies new and deactivated team members are not 304.'''
+        url = '/api/campaign-status/status/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        since = response.json()['watermark']['since']
+
+        self.annotators[1].is_active = False
+        self.annotators[1].save()
+        response = self.client.get(url, {'since': since})
+        self.assertEqual(
+            [(x['username'], x['active']) for x in response.json()['annotators']],
+            [('annotator1', False), ('annotator0', True)],
+        )
+
+        team = self.task.campaign.teams.get()
+        team.members.add(User.objects.create(username='annotator2'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['annotators']), 3)
+
+    def test_recreated_campaign_is_not_cached(self):
+        '''Verifies campaigns recreated with the same name are looked up.'''
+        url = '/api/campaign-status/status/'
+        etag = self.client.get(url)['ETag']
+
+        campaign = self.task.campaign
+        Campaign.objects.filter(id=campaign.id).update(campaignName='status-old')
+        Campaign.objects.create(campaignName='status', createdBy=campaign.createdBy)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['annotators'], [])
+
+
+class TestProvisionUsers(TestCase):
+    '''Tests bulk creation of annotator accounts and team memberships.'''
+
+    def setUp(self):
+        from django.contrib.auth.models import Group
+
+        self.owner = User.objects.create(username='admin', is_superuser=True)
+        self.group = Group.objects.get_or_create(name='deu')[0]
+        self.context = {
+            'CAMPAIGN_KEY': 'key',
+            'CAMPAIGN_NAME': 'provisioning',
+            'CAMPAIGN_NO': 10,
+            'REDUNDANCY': 1,
+            'TASKS_TO_ANNOTATORS': {('eng', 'deu'): [(0,), (1,), (2,)]},
+        }
+
+    def test_users_and_memberships_created_in_bulk(self):
+        '''Verifies credentials, groups and members, skipping existing users.'''
+        from Campaign.utils import _hash_passwords
+        from Campaign.utils import _process_campaign_teams
+        from Campaign.utils import _process_users
+
+        User.objects.create_user(username='engdeu0a01', password='unchanged')
+        credentials = _process_users([('eng', 'deu')], self.context)
+        self.assertEqual(list(credentials), ['engdeu0a01', 'engdeu0a02', 'engdeu0a03'])
+        self.assertEqual(credentials, _process_users([('eng', 'deu')], self.context))
+
+        existing = User.objects.get(username='engdeu0a01')
+        self.assertTrue(existing.check_password('unchanged'))
+        self.assertFalse(existing.groups.exists())
+        for username in ('engdeu0a02', 'engdeu0a03'):
+            user = User.objects.get(username=username)
+            self.assertTrue(user.check_password(credentials[username]))
+            self.assertEqual(list(user.groups.all()), [self.group])
+
+        _process_campaign_teams([('eng', 'deu')], self.owner, self.context)
+        _process_campaign_teams([('eng', 'deu')], self.owner, self.context)
+        team = CampaignTeam.objects.get(teamName='provisioning')
+        self.assertEqual(team.members.count(), 4)
+
+        hashes = _hash_passwords(['a', 'b', 'c'], processes=2)
+        self.assertEqual(len(set(hashes)), 3)
+        for secret, password in zip('abc', hashes):
+            user = User(password=password)
+            self.assertTrue(user.check_password(secret))
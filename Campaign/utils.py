@@ -3,12 +3,17 @@ Appraise evaluation framework
 
 See LICENSE for usage details
 """
+import os
 from collections import defaultdict
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from hashlib import md5
 from json import JSONDecodeError
 from json import load
 
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
 from django.contrib.auth.models import User
 from django.core.management.base import CommandError
 
@@ -22,6 +27,12 @@ from EvalData.models import Metadata
 from EvalData.models import ObjectID
 from EvalData.models import TaskAgenda
 
+# Passwords per worker process, below which hashing is not parallelised
+PASSWORDS_PER_HASHING_PROCESS = 16
+
+# Rows per bulk_create() statement for users and memberships
+PROVISIONING_BATCH_SIZE = 500
+
 
 def _create_uniform_task_map(annotators, tasks, redudancy):
     """
@@ -462,28 +473,34 @@ def _process_campaign_teams(language_pairs, owner, context):
             context.get('CAMPAIGN_NAME'), owner, _tasks, _annotators
         )
 
-        # Hexadecimal ids are zero-prefixed and have at least two digits
-        format_str = '{{0}}{{1}}{{2:0{0}x}}{{3:0{1}x}}'.format(
-            max(len(hex(context.get('CAMPAIGN_NO'))[2:]), 2),
-            max(len(hex(_annotators)[2:]), 2),
+        usernames = _annotator_usernames(
+            _src, _tgt, _annotators, context.get('CAMPAIGN_NO')
+        )
+        user_ids = dict(
+            User.objects.filter(username__in=usernames).values_list('username', 'id')
         )
+        missing = [x for x in usernames if x not in user_ids]
+        if missing:
+            raise User.DoesNotExist('User {0!r} does not exist'.format(missing[0]))
+
+        member_ids = set(campaign_team_object.members.values_list('id', flat=True))
+        new_members = []
+        for username in usernames:
+            if user_ids[username] in member_ids:
+                continue
 
-        for user_id in range(_annotators):
-            username = format_str.format(
-                _src.lower().replace('-', ''),
-                _tgt.lower().replace('-', ''),
-                context.get('CAMPAIGN_NO'),
-                user_id + 1,
+            print('{0} --> {1}'.format(campaign_team_object.teamName, username))
+            member_ids.add(user_ids[username])
+            new_members.append(
+                CampaignTeam.members.through(
+                    campaignteam_id=campaign_team_object.id,
+                    user_id=user_ids[username],
+                )
             )
 
-            user_object = User.objects.get(username=username)
-            if user_object not in campaign_team_object.members.all():
-                print(
-                    '{0} --> {1}'.format(
-                        campaign_team_object.teamName, user_object.username
-                    )
-                )
-                campaign_team_object.members.add(user_object)
+        CampaignTeam.members.through.objects.bulk_create(
+            new_members, batch_size=PROVISIONING_BATCH_SIZE, ignore_conflicts=True
+        )
 
 
 def _process_market_and_metadata(language_pairs, owner, **kwargs):
@@ -517,48 +534,147 @@ def _process_market_and_metadata(language_pairs, owner, **kwargs):
     return markets_and_metadata
 
 
-def _process_users(language_pairs, context):
+def _annotator_usernames(source_code, target_code, annotators, campaign_no):
+    """
+    Returns usernames of annotators for given language pair.
+
+    Usernames consist of source and target code, campaign number and
+    annotator number, e.g., engdeu0a01. Hexadecimal ids are zero-prefixed
+    and have at least two digits.
+    """
+    format_str = '{{0}}{{1}}{{2:0{0}x}}{{3:0{1}x}}'.format(
+        max(len(hex(campaign_no)[2:]), 2),
+        max(len(hex(annotators)[2:]), 2),
+    )
+
+    return [
+        format_str.format(
+            source_code.lower().replace('-', ''),
+            target_code.lower().replace('-', ''),
+            campaign_no,
+            user_id + 1,
+        )
+        for user_id in range(annotators)
+    ]
+
+
+def _annotator_secret(username, campaign_key):
+    """
+    Returns password of annotator, derived from username and campaign key.
+    """
+    hasher = md5()
+    hasher.update(username.encode('utf8'))
+    hasher.update(campaign_key.encode('utf8'))
+    return hasher.hexdigest()[:8]
+
+
+def _init_hashing_worker():
+    # Worker processes may be spawned instead of forked
+    django.setup()
+
+
+def _hash_passwords(secrets, processes=None):
+    """
+    Returns password hashes for given secrets, in the same order.
+
+    Hashing is slow on purpose, so it is spread across worker processes.
+    By default, one process per CPU is used if there are enough secrets.
+    """
+    secrets = list(secrets)
+    if processes is None:
+        processes = min(
+            os.cpu_count() or 1, len(secrets) // PASSWORDS_PER_HASHING_PROCESS
+        )
+
+    processes = min(processes, len(secrets))
+    if processes < 2:
+        return [make_password(x) for x in secrets]
+
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_hashing_worker
+    ) as executor:
+        return list(
+            executor.map(
+                make_password,
+                secrets,
+                chunksize=max(1, len(secrets) // (processes * 4)),
+            )
+        )
+
+
+def _process_users(language_pairs, context, processes=None):
     """
     Create User instances for given language pairs.
 
+    Existing users are looked up in one query and kept unchanged. New
+    users are created in bulk, with passwords hashed by up to processes
+    worker processes, and added to the group of their target language.
+
     Parameters:
     - language_pairs:list[tuple(str, str), ...] list of language pairs;
     - context:dict specifies additional context:
-      CAMPAIGN_KEY, CAMPAIGN_NO, REDUNDANCY and TASKS_TO_ANNOTATORS.
+      CAMPAIGN_KEY, CAMPAIGN_NO, REDUNDANCY and TASKS_TO_ANNOTATORS;
+    - processes:int number of password hashing processes, or None.
     """
     required_keys = ('CAMPAIGN_KEY', 'CAMPAIGN_NO')
     _validate_required_keys(context, required_keys)
 
     # Ordered dictionary is used to ensure stability in unit tests
     _credentials = OrderedDict()
+    _target_codes = {}
     for _src, _tgt in language_pairs:
         _tasks_map = _get_tasks_map_for_language_pair(_src, _tgt, context)
         _annotators = len(_tasks_map)
 
-        # Hexadecimal ids are zero-prefixed and have at least two digits
-        format_str = '{{0}}{{1}}{{2:0{0}x}}{{3:0{1}x}}'.format(
-            max(len(hex(context.get('CAMPAIGN_NO'))[2:]), 2),
-            max(len(hex(_annotators)[2:]), 2),
-        )
-
-        for user_id in range(_annotators):
-            username = format_str.format(
-                _src.lower().replace('-', ''),
-                _tgt.lower().replace('-', ''),
-                context.get('CAMPAIGN_NO'),
-                user_id + 1,
+        for username in _annotator_usernames(
+            _src, _tgt, _annotators, context.get('CAMPAIGN_NO')
+        ):
+            _credentials[username] = _annotator_secret(
+                username, context.get('CAMPAIGN_KEY')
             )
+            _target_codes[username] = _tgt
 
-            hasher = md5()
-            hasher.update(username.encode('utf8'))
-            hasher.update(context.get('CAMPAIGN_KEY').encode('utf8'))
-            secret = hasher.hexdigest()[:8]
+    existing = set(
+        User.objects.filter(username__in=_credentials.keys()).values_list(
+            'username', flat=True
+        )
+    )
+    new_usernames = [x for x in _credentials if x not in existing]
+    if not new_usernames:
+        return _credentials
 
-            if not User.objects.filter(username=username).exists():
-                new_user = User.objects.create_user(username=username, password=secret)
-                new_user.save()
+    hashes = _hash_passwords(
+        [_credentials[x] for x in new_usernames], processes=processes
+    )
+    User.objects.bulk_create(
+        [
+            User(username=username, password=password)
+            for username, password in zip(new_usernames, hashes)
+        ],
+        batch_size=PROVISIONING_BATCH_SIZE,
+    )
 
-            _credentials[username] = secret
+    # Not all databases return primary keys from bulk_create()
+    user_ids = dict(
+        User.objects.filter(username__in=new_usernames).values_list('username', 'id')
+    )
+    group_ids = dict(
+        Group.objects.filter(name__in=set(_target_codes.values())).values_list(
+            'name', 'id'
+        )
+    )
+    User.groups.through.objects.bulk_create(
+        [
+            User.groups.through(
+                user_id=user_ids[username],
+                group_id=group_ids[_target_codes[username]],
+            )
+            for username in new_usernames
+            if _target_codes[username] in group_ids
+        ],
+        batch_size=PROVISIONING_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
 
     return _credentials
 
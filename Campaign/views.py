@@ -7,15 +7,27 @@ See LICENSE for usage details
 # pylint: disable=E1101
 from collections import defaultdict
 from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 import json
+import re
 from math import floor
 from math import sqrt
 
 from django.contrib.auth.decorators import login_required
 from django.core.management.base import CommandError
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Q
+from django.db.models import Sum
 from django.http import HttpResponse
+from django.http import JsonResponse
+from django.views.decorators.http import condition
+from django.views.decorators.http import require_safe
 
+from Appraise.routers import use_reporting_database
 from Appraise.utils import _get_logger, _compute_user_total_annotation_time
+from Campaign.models import Campaign
 from Campaign.utils import _get_campaign_instance
 from EvalData.models import DataAssessmentResult
 from EvalData.models import DirectAssessmentDocumentResult
@@ -30,8 +42,26 @@ RESULT_TYPE_BY_CLASS_NAME = {tup[1].__name__: tup[2] for tup in TASK_DEFINITIONS
 
 LOGGER = _get_logger(name=__name__)
 
+CAMPAIGN_STATUS_FIELDS = (
+    'username',
+    'active',
+    'annotations',
+    'first_modified',
+    'last_modified',
+    'annotation_time',
+)
+
+# Value of since parameter, see _parse_since()
+_SINCE_PATTERN = re.compile(r'([0-9]+)(?:-([0-9]+))?(?:-([0-9]+-[0-9]+-[0-9]+))?')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Result type by campaign ID, see _campaign_status_etag()
+_CAMPAIGN_RESULT_TYPES = {}
+
 
 @login_required
+@use_reporting_database
 def campaign_status(request, campaign_name, sort_key=2):
     """
     Campaign status view with completion details.
@@ -52,184 +82,29 @@ def campaign_status(request, campaign_name, sort_key=2):
         return HttpResponse(_msg, content_type='text/plain')
 
     _out = []
+    campaign_opts = (campaign.campaignOptions or "").lower().split(";")
+    campaign_type = campaign.get_campaign_type()
+    result_type = RESULT_TYPE_BY_CLASS_NAME.get(campaign_type)
+    if result_type is None:
+        LOGGER.error(
+            'Invalid campaign type %s for campaign %s',
+            campaign_type,
+            campaign.campaignName,
+        )
+
     for team in campaign.teams.all():
         for user in team.members.all():
-            try:
-                campaign_opts = campaign.campaignOptions.lower().split(";")
-                # may raise KeyError
-                result_type = RESULT_TYPE_BY_CLASS_NAME[campaign.get_campaign_type()]
-            except KeyError as exc:
-                LOGGER.debug(
-                    f'Invalid campaign type {campaign.get_campaign_type()} for campaign {campaign.campaignName}'
-                )
-                LOGGER.error(exc)
+            if result_type is None:
                 continue
 
-            _data = result_type.objects.filter(
-                createdBy=user, completed=True, task__campaign=campaign.id
-            )
-            is_mqm_or_esa = False
-
-
-            # Exclude document scores in document-level tasks, because we want to keep
-            # the numbers reported on the campaign status page consistent across
-            # accounts, which usually include different numbers of document
-            if (
-                result_type is DirectAssessmentDocumentResult
-                or result_type is PairwiseAssessmentDocumentResult
-            ):
-                _data = _data.exclude(item__isCompleteDocument=True)
-            # Contrastive tasks use different field names for target segments/scores
-            if (
-                result_type is PairwiseAssessmentResult
-                or result_type is PairwiseAssessmentDocumentResult
-            ):
-                _data = _data.values_list(
-                    'start_time',
-                    'end_time',
-                    'score1',
-                    'item__itemID',
-                    'item__target1ID',
-                    'item__itemType',
-                    'item__id',
-                )
-            elif "mqm" in campaign_opts:
-                is_mqm_or_esa = True
-                _data = _data.values_list(
-                    'start_time',
-                    'end_time',
-                    'mqm',
-                    'item__itemID',
-                    'item__targetID',
-                    'item__itemType',
-                    'item__id',
-                    'item__documentID',
-                )
-                # compute time override based on document times
-                import collections
-                _time_pairs = collections.defaultdict(list)
-                for x in _data:
-                    _time_pairs[x[7]+ " ||| " +x[4]].append((x[0], x[1]))
-                _time_pairs = [
-                    (min([x[0] for x in doc_v]), max([x[1] for x in doc_v]))
-                    for doc, doc_v in _time_pairs.items()
-                ]
-                _data = [
-                    (x[0], x[1], -len(json.loads(x[2])), x[3], x[4], x[5], x[6])
-                    for x in _data
-                ]
-            elif "esa" in campaign_opts:
-                is_mqm_or_esa = True
-                _data = _data.values_list(
-                    'start_time',
-                    'end_time',
-                    'score',
-                    'item__itemID',
-                    'item__targetID',
-                    'item__itemType',
-                    'item__id',
-                    'item__documentID',
-                )
-                # compute time override based on document times
-                import collections
-                _time_pairs = collections.defaultdict(list)
-                for x in _data:
-                    _time_pairs[x[7]+ " ||| " +x[4]].append((x[0], x[1]))
-                _time_pairs = [
-                    (min([x[0] for x in doc_v]), max([x[1] for x in doc_v]))
-                    for doc, doc_v in _time_pairs.items()
-                ]
-                _data = [
-                    (x[0], x[1], x[2], x[3], x[4], x[5], x[6])
-                    for x in _data
-                ]
-            else:
-                _data = _data.values_list(
-                    'start_time',
-                    'end_time',
-                    'score',
-                    'item__itemID',
-                    'item__targetID',
-                    'item__itemType',
-                    'item__id',
-                )
-
-            _reliable = stat_reliable_testing(_data, campaign_opts, result_type)
-
-            # Compute number of annotations
-            _annotations = len(set([x[6] for x in _data]))
-
-            _start_times = [x[0] for x in _data]
-            _end_times = [x[1] for x in _data]
-
-            # Compute first modified time
-            _first_modified_raw = (
-                seconds_to_timedelta(min(_start_times)) if _start_times else None
+            _item = _compute_annotator_status(
+                user, campaign, campaign_opts, result_type, request.user.is_staff
             )
-            if _first_modified_raw:
-                _date_modified = datetime(1970, 1, 1) + _first_modified_raw
-                _first_modified = str(_date_modified).split('.')[0]
-            else:
-                _first_modified = 'Never'
-                
-            # Compute last modified time
-            _last_modified_raw = (
-                seconds_to_timedelta(max(_end_times)) if _end_times else None
-            )
-            if _last_modified_raw:
-                _date_modified = datetime(1970, 1, 1) + _last_modified_raw
-                _last_modified = str(_date_modified).split('.')[0]
-            else:
-                _last_modified = 'Never'
-
-            # Compute total annotation time
-            if is_mqm_or_esa and _first_modified_raw and _last_modified_raw:
-                # for MQM and ESA compute the lower and upper annotation times
-                # use only the end times 
-                _annotation_time_upper = (_last_modified_raw-_first_modified_raw).seconds
-                _hours = int(floor(_annotation_time_upper / 3600))
-                _minutes = int(floor((_annotation_time_upper % 3600) / 60))
-                _annotation_time_upper = f'{_hours:0>2d}h{_minutes:0>2d}m'
-            else:
-                _time_pairs = list(zip(_start_times, _end_times))
-                _annotation_time_upper = None
-            _annotation_time = _compute_user_total_annotation_time(_time_pairs)
-
-            # Format total annotation time
-            if _annotation_time:
-                _hours = int(floor(_annotation_time / 3600))
-                _minutes = int(floor((_annotation_time % 3600) / 60))
-                _annotation_time = f'{_hours:0>2d}h{_minutes:0>2d}m'
-                # for MQM and ESA join it together
-                if is_mqm_or_esa and _annotation_time_upper:
-                    _annotation_time = f'{_annotation_time}--{_annotation_time_upper}'
-            else:
-                _annotation_time = 'n/a'
-
-
-            _item = (
-                user.username,
-                user.is_active,
-                _annotations,
-                _first_modified,
-                _last_modified,
-                _annotation_time,
-            )
-            if request.user.is_staff:
-                _item += (_reliable,)
-
             _out.append(_item)
 
     _out.sort(key=lambda x: x[int(sort_key)])
 
-    _header = (
-        'username',
-        'active',
-        'annotations',
-        'first_modified',
-        'last_modified',
-        'annotation_time',
-    )
+    _header = CAMPAIGN_STATUS_FIELDS
     if request.user.is_staff:
         _header += ('random',)
 
@@ -246,6 +121,378 @@ def campaign_status(request, campaign_name, sort_key=2):
     return HttpResponse(u'\n'.join(_txt), content_type='text/plain')
 
 
+def _get_campaign_result_type(campaign_name):
+    """
+    Returns (campaign, result type) for the given campaign name.
+
+    Result type is None for campaigns without tasks. Raises CommandError
+    if the campaign does not exist.
+    """
+    campaign = _get_campaign_instance(campaign_name)
+    try:
+        campaign_type = campaign.get_campaign_type()
+    except LookupError:
+        campaign_type = None
+
+    result_type = RESULT_TYPE_BY_CLASS_NAME.get(campaign_type)
+    if result_type is not None:
+        _CAMPAIGN_RESULT_TYPES[campaign.id] = result_type
+    return campaign, result_type
+
+
+def _campaign_members(**campaign_filter):
+    """
+    Returns (campaign ID, team membership fingerprint) of the campaign
+    matching campaign_filter, or None.
+
+    The fingerprint is '<members>-<max member ID>-<active member IDs>',
+    where the last part is the sum of IDs of active members, so that it
+    changes if members are added, removed, activated or deactivated.
+    Computed in one aggregate query.
+    """
+    members = 'teams__members'
+    campaign = (
+        Campaign.objects.filter(**campaign_filter)
+        .values('id')
+        .annotate(
+            count=Count(members, distinct=True),
+            max_id=Max(members),
+            active=Sum(
+                members, distinct=True, filter=Q(teams__members__is_active=True)
+            ),
+        )
+        .first()
+    )
+    if campaign is None:
+        return None
+
+    fingerprint = '{0}-{1}-{2}'.format(
+        campaign['count'], campaign['max_id'] or 0, campaign['active'] or 0
+    )
+    return campaign['id'], fingerprint
+
+
+def _campaign_watermark(campaign_id, result_type, members=None):
+    """
+    Returns (maximum result ID, completed result count, modification time,
+    team membership fingerprint) of the given campaign.
+
+    New results raise the maximum ID. Results changed in place, e.g., by
+    change_answers or TaskAgenda.reset_taskagendas(), set dateModified and
+    usually change the completed count. Modification time is the latest
+    dateModified in microseconds since the epoch, or 0. Computed in one
+    aggregate query, plus one for the fingerprint unless members is given,
+    see _campaign_members().
+    """
+    if members is None:
+        members = _campaign_members(id=campaign_id)[1]
+
+    watermark = result_type.objects.filter(task__campaign=campaign_id).aggregate(
+        max_id=Max('id'),
+        count=Count('id', filter=Q(completed=True)),
+        modified=Max('dateModified'),
+    )
+    modified = 0
+    if watermark['modified'] is not None:
+        modified = (watermark['modified'] - _EPOCH) // timedelta(microseconds=1)
+    return watermark['max_id'] or 0, watermark['count'], modified, members
+
+
+def _parse_since(value):
+    """
+    Returns (maximum result ID, modification time, team membership
+    fingerprint) for since parameter.
+
+    Values are '<max_id>-<modified>-<members>', as returned in the
+    watermark. Without members, membership is treated as changed; with
+    just '<max_id>', every modified result is treated as changed, too.
+    Raises ValueError for other values.
+    """
+    match = _SINCE_PATTERN.fullmatch(value)
+    if match is None:
+        raise ValueError('since must be a watermark')
+    return int(match.group(1)), int(match.group(2) or 0), match.group(3)
+
+
+def _campaign_status_etag(request, campaign_name):
+    """
+    Returns strong ETag for campaign_status_json(), or None.
+
+    The campaign ID is looked up together with the team membership
+    fingerprint. Result types are remembered per campaign ID, so requests
+    for unchanged campaigns cost only these two queries, even if the
+    campaign is recreated under the same name. The watermark is kept on
+    the request for the response.
+    """
+    since = request.GET.get('since')
+    if since is not None and _SINCE_PATTERN.fullmatch(since) is None:
+        return None
+
+    members = _campaign_members(campaignName=campaign_name)
+    if members is None:
+        return None
+
+    campaign_id, fingerprint = members
+    if campaign_id not in _CAMPAIGN_RESULT_TYPES:
+        try:
+            _get_campaign_result_type(campaign_name)
+        except CommandError:
+            return None
+
+        if campaign_id not in _CAMPAIGN_RESULT_TYPES:
+            return None
+
+    result_type = _CAMPAIGN_RESULT_TYPES[campaign_id]
+    request.campaign_watermark = _campaign_watermark(
+        campaign_id, result_type, fingerprint
+    )
+    return '{0}-{1}-{2}-{3}-{4}-{5}-{6}'.format(
+        campaign_id,
+        *request.campaign_watermark,
+        since or '',
+        int(request.user.is_staff),
+    )
+
+
+@login_required
+@use_reporting_database
+@require_safe
+@condition(etag_func=_campaign_status_etag)
+def campaign_status_json(request, campaign_name):
+    """
+    Campaign status API with completion details per annotator.
+
+    Responses carry an ETag derived from the campaign's result watermark,
+    so clients sending it as If-None-Match get 304 Not Modified as long as
+    no results and team members have been added or changed. With
+    ?since=<watermark since>, only annotators with newer results are
+    returned, or all annotators if results have been changed in place or
+    team membership has changed since then, as results may have been
+    moved to other users and annotators added or deactivated.
+    """
+    since = request.GET.get('since')
+    if since is not None:
+        try:
+            since_id, since_modified, since_members = _parse_since(since)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+
+    try:
+        campaign, result_type = _get_campaign_result_type(campaign_name)
+
+    except CommandError:
+        _msg = 'Failure to identify campaign {0}'.format(campaign_name)
+        return JsonResponse({'error': _msg}, status=404)
+
+    annotators = []
+    watermark = (0, 0, 0, '0-0-0')
+    campaign_opts = (campaign.campaignOptions or "").lower().split(";")
+    if result_type is not None:
+        watermark = getattr(request, 'campaign_watermark', None)
+        if watermark is None:
+            watermark = _campaign_watermark(campaign.id, result_type)
+
+        changed = None
+        results = result_type.objects.filter(task__campaign=campaign.id)
+        if (
+            since is not None
+            and since_modified >= watermark[2]
+            and since_members == watermark[3]
+        ):
+            changed = set(
+                results.filter(id__gt=since_id).values_list('createdBy', flat=True)
+            )
+
+        fields = CAMPAIGN_STATUS_FIELDS
+        if request.user.is_staff:
+            fields += ('random',)
+
+        for team in campaign.teams.all():
+            for user in team.members.all():
+                if changed is not None and user.id not in changed:
+                    continue
+
+                _item = _compute_annotator_status(
+                    user, campaign, campaign_opts, result_type, request.user.is_staff
+                )
+                annotators.append(dict(zip(fields, _item)))
+
+    annotators.sort(key=lambda x: x['annotations'])
+    return JsonResponse(
+        {
+            'campaign': campaign.campaignName,
+            'watermark': {
+                'max_id': watermark[0],
+                'count': watermark[1],
+                'modified': watermark[2],
+                'members': watermark[3],
+                'since': '{0}-{2}-{3}'.format(*watermark),
+            },
+            'since': since,
+            'annotators': annotators,
+        }
+    )
+
+
+def _compute_annotator_status(
+    user, campaign, campaign_opts, result_type, include_reliable
+):
+    """
+    Computes campaign status row of the given annotator.
+
+    Returns (username, active, annotations, first_modified, last_modified,
+    annotation_time) tuple, with reliability p-value if include_reliable.
+    """
+    _data = result_type.objects.filter(
+        createdBy=user, completed=True, task__campaign=campaign.id
+    )
+    is_mqm_or_esa = False
+
+    # Exclude document scores in document-level tasks, because we want to keep
+    # the numbers reported on the campaign status page consistent across
+    # accounts, which usually include different numbers of document
+    if (
+        result_type is DirectAssessmentDocumentResult
+        or result_type is PairwiseAssessmentDocumentResult
+    ):
+        _data = _data.exclude(item__isCompleteDocument=True)
+    # Contrastive tasks use different field names for target segments/scores
+    if (
+        result_type is PairwiseAssessmentResult
+        or result_type is PairwiseAssessmentDocumentResult
+    ):
+        _data = _data.values_list(
+            'start_time',
+            'end_time',
+            'score1',
+            'item__itemID',
+            'item__target1ID',
+            'item__itemType',
+            'item__id',
+        )
+    elif "mqm" in campaign_opts:
+        is_mqm_or_esa = True
+        _data = _data.values_list(
+            'start_time',
+            'end_time',
+            'mqm',
+            'item__itemID',
+            'item__targetID',
+            'item__itemType',
+            'item__id',
+            'item__documentID',
+        )
+        # compute time override based on document times
+        import collections
+
+        _time_pairs = collections.defaultdict(list)
+        for x in _data:
+            _time_pairs[x[7] + " ||| " + x[4]].append((x[0], x[1]))
+        _time_pairs = [
+            (min([x[0] for x in doc_v]), max([x[1] for x in doc_v]))
+            for doc, doc_v in _time_pairs.items()
+        ]
+        _data = [
+            (x[0], x[1], -len(json.loads(x[2])), x[3], x[4], x[5], x[6]) for x in _data
+        ]
+    elif "esa" in campaign_opts:
+        is_mqm_or_esa = True
+        _data = _data.values_list(
+            'start_time',
+            'end_time',
+            'score',
+            'item__itemID',
+            'item__targetID',
+            'item__itemType',
+            'item__id',
+            'item__documentID',
+        )
+        # compute time override based on document times
+        import collections
+
+        _time_pairs = collections.defaultdict(list)
+        for x in _data:
+            _time_pairs[x[7] + " ||| " + x[4]].append((x[0], x[1]))
+        _time_pairs = [
+            (min([x[0] for x in doc_v]), max([x[1] for x in doc_v]))
+            for doc, doc_v in _time_pairs.items()
+        ]
+        _data = [(x[0], x[1], x[2], x[3], x[4], x[5], x[6]) for x in _data]
+    else:
+        _data = _data.values_list(
+            'start_time',
+            'end_time',
+            'score',
+            'item__itemID',
+            'item__targetID',
+            'item__itemType',
+            'item__id',
+        )
+
+    _reliable = stat_reliable_testing(_data, campaign_opts, result_type)
+
+    # Compute number of annotations
+    _annotations = len(set([x[6] for x in _data]))
+
+    _start_times = [x[0] for x in _data]
+    _end_times = [x[1] for x in _data]
+
+    # Compute first modified time
+    _first_modified_raw = (
+        seconds_to_timedelta(min(_start_times)) if _start_times else None
+    )
+    if _first_modified_raw:
+        _date_modified = datetime(1970, 1, 1) + _first_modified_raw
+        _first_modified = str(_date_modified).split('.')[0]
+    else:
+        _first_modified = 'Never'
+
+    # Compute last modified time
+    _last_modified_raw = seconds_to_timedelta(max(_end_times)) if _end_times else None
+    if _last_modified_raw:
+        _date_modified = datetime(1970, 1, 1) + _last_modified_raw
+        _last_modified = str(_date_modified).split('.')[0]
+    else:
+        _last_modified = 'Never'
+
+    # Compute total annotation time
+    if is_mqm_or_esa and _first_modified_raw and _last_modified_raw:
+        # for MQM and ESA compute the lower and upper annotation times
+        # use only the end times
+        _annotation_time_upper = (_last_modified_raw - _first_modified_raw).seconds
+        _hours = int(floor(_annotation_time_upper / 3600))
+        _minutes = int(floor((_annotation_time_upper % 3600) / 60))
+        _annotation_time_upper = f'{_hours:0>2d}h{_minutes:0>2d}m'
+    else:
+        _time_pairs = list(zip(_start_times, _end_times))
+        _annotation_time_upper = None
+    _annotation_time = _compute_user_total_annotation_time(_time_pairs)
+
+    # Format total annotation time
+    if _annotation_time:
+        _hours = int(floor(_annotation_time / 3600))
+        _minutes = int(floor((_annotation_time % 3600) / 60))
+        _annotation_time = f'{_hours:0>2d}h{_minutes:0>2d}m'
+        # for MQM and ESA join it together
+        if is_mqm_or_esa and _annotation_time_upper:
+            _annotation_time = f'{_annotation_time}--{_annotation_time_upper}'
+    else:
+        _annotation_time = 'n/a'
+
+    _item = (
+        user.username,
+        user.is_active,
+        _annotations,
+        _first_modified,
+        _last_modified,
+        _annotation_time,
+    )
+    if include_reliable:
+        _item += (_reliable,)
+
+    return _item
+
+
 def stat_reliable_testing(_data, campaign_opts, result_type):
     _annotations = len(set([x[6] for x in _data]))
     _user_mean = sum([x[2] for x in _data]) / (_annotations or 1)
@@ -4,10 +4,136 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 # pylint: disable=import-error
+import os
+
 from django.contrib import admin
+from django.contrib import messages
+from django.http import FileResponse
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.urls import re_path
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
 
+from Dashboard.models import Job
 from Dashboard.models import TimedKeyValueData
 from Dashboard.models import UserInviteToken
 
+
+class JobAdmin(admin.ModelAdmin):
+    """
+    Model admin for Job instances.
+
+    Jobs are created by admin actions and run by the RunJobs worker, so
+    they cannot be added or edited here. Artifacts of finished jobs can be
+    downloaded by staff users with view permission.
+    """
+
+    actions = ['cancel_jobs']
+
+    list_display = [
+        'id',
+        'jobType',
+        'status',
+        'progress_percent',
+        'statusMessage',
+        'createdBy',
+        'dateCreated',
+        'dateFinished',
+        'artifact_link',
+    ]
+    list_filter = ['status', 'jobType']
+    list_select_related = ['createdBy']
+    search_fields = ['jobType', 'statusMessage', 'createdBy__username']
+
+    readonly_fields = [
+        'jobType',
+        'jobArguments',
+        'status',
+        'progress',
+        'statusMessage',
+        'artifact_link',
+        'createdBy',
+        'dateCreated',
+        'dateStarted',
+        'dateFinished',
+        'heartbeat',
+        'workerName',
+    ]
+    exclude = ['artifact']
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        download_view = self.admin_site.admin_view(self.download_artifact)
+        return [
+            re_path(
+                r'^(?P<job_id>[0-9]+)/artifact/$',
+                download_view,
+                name='Dashboard_job_artifact',
+            ),
+        ] + super(JobAdmin, self).get_urls()
+
+    def download_artifact(self, request, job_id):
+        """
+        Returns artifact of the given job as file download.
+        """
+        job = get_object_or_404(Job, pk=job_id)
+        if not self.has_view_permission(request, job):
+            raise Http404('Job artifact not available')
+
+        if not job.artifact:
+            raise Http404('Job has no artifact')
+
+        return FileResponse(
+            job.artifact.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(job.artifact.name),
+        )
+
+    @admin.display(description='Progress', ordering='progress')
+    def progress_percent(self, obj):
+        return '{0:.0%}'.format(obj.progress)
+
+    @admin.display(description='Artifact')
+    def artifact_link(self, obj):
+        if not obj.artifact:
+            return '-'
+        url = reverse('admin:Dashboard_job_artifact', args=(obj.id,))
+        return format_html(
+            '<a href="{0}">{1}</a>', url, os.path.basename(obj.artifact.name)
+        )
+
+    def cancel_jobs(self, request, queryset):
+        """
+        Cancels selected jobs which have not been started yet.
+        """
+        cancelled = queryset.filter(status=Job.QUEUED).update(
+            status=Job.CANCELLED, dateFinished=timezone.now()
+        )
+        _msg = 'Cancelled {0} queued jobs.'.format(cancelled)
+        self.message_user(request, _msg, level=messages.INFO)
+
+    cancel_jobs.short_description = "Cancel queued jobs"  # type: ignore
+
+
+def queue_jobs(modeladmin, request, job_type, arguments_list):
+    """
+    Queues one job per arguments dictionary and reports this to the user.
+    """
+    jobs = [
+        Job.enqueue(job_type, created_by=request.user, **arguments)
+        for arguments in arguments_list
+    ]
+    _msg = 'Queued {0} {1} jobs, see {2}.'.format(
+        len(jobs), job_type, reverse('admin:Dashboard_job_changelist')
+    )
+    modeladmin.message_user(request, _msg, level=messages.INFO)
+    return jobs
+
+
 admin.site.register(UserInviteToken)
 admin.site.register(TimedKeyValueData)
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,221 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+Background jobs stored in the database and run by the RunJobs worker.
+
+Job types are functions registered with @register_job_type(name). They
+are called with the Job instance and its jobArguments as keyword
+arguments, and may return (file name, content) to be stored as the job's
+artifact. Long-running code can call report_progress(), which updates the
+progress of the current job and does nothing outside of jobs.
+"""
+import os
+import socket
+import traceback
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from contextvars import ContextVar
+from datetime import timedelta
+from io import StringIO
+from time import monotonic
+
+from django.contrib import messages
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connections
+from django.utils import timezone
+
+from Appraise.utils import _get_logger
+from Dashboard.models import Job
+from EvalData.models import TaskAgenda
+
+LOGGER = _get_logger(name=__name__)
+
+# Name => function(job, **arguments) returning None or (file name, content)
+JOB_TYPES = OrderedDict()
+
+# Management commands which can be run as jobs => artifact file extension.
+# Their output, written to stdout, is stored as the job's artifact.
+COMMAND_JOB_TYPES = OrderedDict(
+    (
+        ('ExportSystemScoresToCSV', '.csv'),
+        ('ComputeZScores', '.txt'),
+        ('ComputeWMT23Results', '.txt'),
+        ('ComputeAnnotatorMetrics', '.txt'),
+        ('ProcessCampaignData', '.log'),
+    )
+)
+
+# Minimum number of seconds between progress updates written to database
+PROGRESS_INTERVAL = 1.0
+
+_CURRENT_JOB = ContextVar('appraise_current_job', default=None)
+
+
+def register_job_type(name):
+    """
+    Decorator registering function as job type with the given name.
+    """
+
+    def decorator(func):
+        JOB_TYPES[name] = func
+        return func
+
+    return decorator
+
+
+class _JobState:
+    __slots__ = ('job_id', 'last_update')
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.last_update = 0.0
+
+
+def report_progress(progress, message=''):
+    """
+    Updates progress (0.0 to 1.0) and status message of the current job.
+
+    Updates are written at most once per PROGRESS_INTERVAL seconds. Does
+    nothing outside of jobs, so it is safe to call from commands.
+    """
+    state = _CURRENT_JOB.get()
+    if state is None or monotonic() - state.last_update < PROGRESS_INTERVAL:
+        return
+
+    state.last_update = monotonic()
+    Job.objects.filter(pk=state.job_id).update(
+        progress=max(0.0, min(1.0, progress)),
+        statusMessage=message,
+        heartbeat=timezone.now(),
+    )
+
+
+def get_worker_name():
+    """
+    Returns name identifying this worker process.
+    """
+    return '{0}:{1}'.format(socket.gethostname(), os.getpid())
+
+
+def claim_job(job_id, worker_name):
+    """
+    Marks queued job as running, returns False if another worker was faster.
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+        status=Job.RUNNING,
+        dateStarted=now,
+        heartbeat=now,
+        workerName=worker_name,
+    )
+    return claimed == 1
+
+
+def run_job(job_id):
+    """
+    Runs claimed job and stores its outcome, returns final status.
+
+    Called in worker processes, so database connections are closed
+    before returning.
+    """
+    try:
+        job = Job.objects.get(pk=job_id)
+        token = _CURRENT_JOB.set(_JobState(job_id))
+        try:
+            artifact = JOB_TYPES[job.jobType](job, **job.jobArguments)
+            if artifact is not None:
+                file_name, content = artifact
+                job.artifact.save(file_name, ContentFile(content), save=False)
+            job.status = Job.SUCCEEDED
+            job.progress = 1.0
+            job.statusMessage = ''
+
+        # pylint: disable=broad-except
+        except Exception:
+            LOGGER.exception('Job %s failed', job_id)
+            job.status = Job.FAILED
+            job.statusMessage = traceback.format_exc()
+
+        finally:
+            _CURRENT_JOB.reset(token)
+
+        job.dateFinished = timezone.now()
+        job.save(
+            update_fields=[
+                'status',
+                'progress',
+                'statusMessage',
+                'artifact',
+                'dateFinished',
+            ]
+        )
+        return job.status
+
+    finally:
+        connections.close_all()
+
+
+def fail_stale_jobs(stale_seconds):
+    """
+    Marks running jobs without heartbeat for stale_seconds as failed.
+
+    Such jobs were left behind by workers that died. They are not re-run,
+    as they may have been partially done.
+    """
+    threshold = timezone.now() - timedelta(seconds=stale_seconds)
+    return Job.objects.filter(status=Job.RUNNING, heartbeat__lt=threshold).update(
+        status=Job.FAILED,
+        statusMessage='Worker stopped sending heartbeats',
+        dateFinished=timezone.now(),
+    )
+
+
+def _run_command_job(job, args=None, options=None):
+    """
+    Runs management command, returns its output as artifact.
+    """
+    output = StringIO()
+    # Some commands write to sys.stdout directly, e.g., using print()
+    with redirect_stdout(output):
+        call_command(job.jobType, *(args or []), stdout=output, **(options or {}))
+
+    extension = COMMAND_JOB_TYPES[job.jobType]
+    file_name = '{0}-{1}{2}'.format(job.jobType, job.id, extension)
+    return file_name, output.getvalue().encode('utf-8')
+
+
+for _command_name in COMMAND_JOB_TYPES:
+    register_job_type(_command_name)(_run_command_job)
+
+
+@register_job_type('ResetTaskAgendas')
+def _reset_task_agendas(job, agenda_ids):
+    """
+    Resets task agendas in bulk, returns per-agenda messages as artifact.
+
+    Fails if any agenda could not be reset with a warning or error, after
+    storing the artifact. Agendas without annotations are only reported.
+    """
+    agendas = TaskAgenda.objects.filter(id__in=agenda_ids)
+    agendas = agendas.select_related('user', 'campaign')
+    statuses = TaskAgenda.reset_taskagendas(agendas)
+
+    lines = [
+        '{0}\t{1}'.format('OK' if _ret else messages.DEFAULT_TAGS[_level].upper(), _msg)
+        for _ret, _msg, _level in statuses
+    ]
+    file_name = 'ResetTaskAgendas-{0}.txt'.format(job.id)
+    content = '\n'.join(lines).encode('utf-8')
+
+    failed = sum(1 for _, _, _level in statuses if _level >= messages.WARNING)
+    if failed:
+        # run_job() stores the artifact of failed jobs, too
+        job.artifact.save(file_name, ContentFile(content), save=False)
+        raise RuntimeError(
+            'Failed to reset {0} task agendas:\n{1}'.format(failed, '\n'.join(lines))
+        )
+
+    return file_name, content
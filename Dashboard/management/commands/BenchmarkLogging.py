@@ -0,0 +1,145 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+import logging
+import os
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from logging.handlers import RotatingFileHandler
+from queue import SimpleQueue
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from Appraise.settings import LOG_FORMATTER
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = (
+        'Measures per-request logging overhead of synchronous, eagerly '
+        'formatted logging versus queued, lazily formatted logging'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=10000,
+            help='Number of simulated requests per configuration.',
+        )
+
+        parser.add_argument(
+            '--debug-calls',
+            type=int,
+            default=12,
+            help='Number of debug messages logged per simulated request.',
+        )
+
+        parser.add_argument(
+            '--info-calls',
+            type=int,
+            default=2,
+            help='Number of info messages logged per simulated request.',
+        )
+
+    def handle(self, *args, **options):
+        with TemporaryDirectory() as temp_dir:
+            configurations = (
+                ('before: sync, DEBUG, eager', _setup_sync, _teardown_sync, True),
+                ('after: queue, INFO, lazy', _setup_queue, _teardown_queue, False),
+            )
+            for name, setup, teardown, eager in configurations:
+                log_path = os.path.join(temp_dir, 'benchmark.log')
+                logger = setup(log_path)
+
+                started = perf_counter()
+                for request_no in range(options['requests']):
+                    _simulate_request(
+                        logger,
+                        request_no,
+                        options['debug_calls'],
+                        options['info_calls'],
+                        eager,
+                    )
+                elapsed = perf_counter() - started
+
+                teardown(logger)
+                os.remove(log_path)
+
+                _msg = '{0:40} {1:10.2f} us/request'.format(
+                    name, elapsed / max(1, options['requests']) * 1e6
+                )
+                self.stdout.write(_msg)
+
+
+def _new_logger(level):
+    logger = logging.getLogger('Appraise.benchmark')
+    logger.propagate = False
+    logger.setLevel(level)
+    logger.handlers = []
+    return logger
+
+
+def _setup_sync(log_path):
+    """Previous configuration: file writes in the request thread at DEBUG."""
+    logger = _new_logger(logging.DEBUG)
+    handler = RotatingFileHandler(log_path, encoding='utf-8')
+    handler.setFormatter(LOG_FORMATTER)
+    logger.addHandler(handler)
+    return logger
+
+
+def _teardown_sync(logger):
+    for handler in logger.handlers:
+        handler.close()
+    logger.handlers = []
+
+
+def _setup_queue(log_path):
+    """Current configuration: queued records at INFO, written by a thread."""
+    logger = _new_logger(logging.INFO)
+    handler = RotatingFileHandler(log_path, encoding='utf-8', delay=True)
+    handler.setFormatter(LOG_FORMATTER)
+    queue = SimpleQueue()
+    logger.addHandler(QueueHandler(queue))
+    logger.listener = QueueListener(queue, handler)
+    logger.listener.start()
+    return logger
+
+
+def _teardown_queue(logger):
+    logger.listener.stop()
+    for handler in logger.listener.handlers:
+        handler.close()
+    logger.handlers = []
+
+
+def _simulate_request(logger, request_no, debug_calls, info_calls, eager):
+    """Logs messages resembling those of an annotation view request."""
+    diff_pairs = [('old {0}'.format(x), 'new {0}'.format(x)) for x in range(10)]
+    for call_no in range(debug_calls):
+        if eager:
+            logger.debug(
+                'Collected diff_pairs for item {0}/{1}: {2}'.format(
+                    request_no, call_no, diff_pairs
+                )
+            )
+        else:
+            logger.debug(
+                'Collected diff_pairs for item %s/%s: %s',
+                request_no,
+                call_no,
+                diff_pairs,
+            )
+
+    for call_no in range(info_calls):
+        if eager:
+            logger.info(
+                'score={0}, item_id={1}, ajax={2}'.format(call_no, request_no, False)
+            )
+        else:
+            logger.info('score=%s, item_id=%s, ajax=%s', call_no, request_no, False)
@@ -0,0 +1,106 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from Campaign.management.commands.BenchmarkAnnotationLoad import (
+    _isolated_database,
+)
+from Campaign.models import Campaign
+from Campaign.utils import _annotator_secret
+from Campaign.utils import _annotator_usernames
+from Campaign.utils import _hash_passwords
+from Dashboard.utils import generate_login_tokens
+from Dashboard.utils import verify_login_token
+
+BENCHMARK_CAMPAIGN = 'benchmark'
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = (
+        'Measures login throughput of password SSO links versus signed login '
+        'token links'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=20,
+            help='Number of annotator accounts.',
+        )
+
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=100,
+            help='Number of logins per configuration, cycling through users.',
+        )
+
+    def handle(self, *args, **options):
+        # Needed to accept requests from the test client
+        setup_test_environment()
+        with TemporaryDirectory() as temp_dir, _isolated_database(temp_dir):
+            usernames = _annotator_usernames('eng', 'deu', options['users'], 1)
+            secrets = [_annotator_secret(x, BENCHMARK_CAMPAIGN) for x in usernames]
+            User.objects.bulk_create(
+                User(username=username, password=password)
+                for username, password in zip(usernames, _hash_passwords(secrets))
+            )
+            owner = User.objects.create(username='benchmark', is_superuser=True)
+            Campaign.objects.create(campaignName=BENCHMARK_CAMPAIGN, createdBy=owner)
+            tokens = generate_login_tokens(usernames, BENCHMARK_CAMPAIGN)
+
+            credentials = [
+                (username, secret, tokens[username])
+                for username, secret in zip(usernames, secrets)
+            ]
+            logins = [
+                credentials[x % len(credentials)] for x in range(options['logins'])
+            ]
+
+            configurations = (
+                (
+                    'verify: authenticate()',
+                    lambda x: authenticate(username=x[0], password=x[1]),
+                ),
+                ('verify: verify_login_token()', lambda x: verify_login_token(x[2])),
+                (
+                    'login: /dashboard/sso/',
+                    lambda x: _login('/dashboard/sso/{0}/{1}/'.format(x[0], x[1])),
+                ),
+                (
+                    'login: /dashboard/login/',
+                    lambda x: _login(reverse('token-login', args=[x[2]])),
+                ),
+            )
+            for name, login in configurations:
+                started = perf_counter()
+                failures = sum(1 for x in logins if login(x) is None)
+                elapsed = perf_counter() - started
+
+                _msg = '{0:32} {1:10.1f} logins/s {2:10.2f} ms/login {3} failed'.format(
+                    name,
+                    len(logins) / elapsed,
+                    elapsed / max(1, len(logins)) * 1e3,
+                    failures,
+                )
+                self.stdout.write(_msg)
+
+
+def _login(url):
+    """Returns session user ID after requesting url with a new client."""
+    client = Client(SERVER_NAME='127.0.0.1')
+    client.get(url)
+    return client.session.get('_auth_user_id')
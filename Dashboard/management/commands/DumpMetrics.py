@@ -0,0 +1,99 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from Appraise.metrics import load_snapshots
+from Appraise.metrics import merge_snapshots
+from Appraise.metrics import render_prometheus_text
+from Appraise.settings import METRICS_DIR
+
+
+# pylint: disable=C0111,C0330
+class Command(BaseCommand):
+    help = 'Dumps per-view latency and query count metrics of all processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metrics-dir',
+            type=str,
+            default=METRICS_DIR,
+            help='Directory containing metrics snapshots, defaults to '
+            'APPRAISE_METRICS_DIR.',
+        )
+
+        parser.add_argument(
+            '--format',
+            choices=('prometheus', 'json', 'summary'),
+            default='summary',
+            help='Output format, defaults to human readable summary.',
+        )
+
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            default=False,
+            help='Delete metrics snapshots after dumping them.',
+        )
+
+    def handle(self, *args, **options):
+        metrics_dir = options['metrics_dir']
+        if not metrics_dir or not os.path.isdir(metrics_dir):
+            raise CommandError(
+                'Metrics directory {0!r} does not exist. Set APPRAISE_METRICS_DIR '
+                'for the web server processes or pass --metrics-dir'.format(
+                    metrics_dir
+                )
+            )
+
+        metrics = merge_snapshots(load_snapshots(metrics_dir))
+
+        if options['format'] == 'prometheus':
+            self.stdout.write(render_prometheus_text(metrics), ending='')
+
+        elif options['format'] == 'json':
+            self.stdout.write(json.dumps(metrics, indent=2))
+
+        else:
+            for line in _summarize(metrics):
+                self.stdout.write(line)
+
+        if options['reset']:
+            for file_name in os.listdir(metrics_dir):
+                if file_name.startswith('metrics-') and file_name.endswith('.json'):
+                    os.remove(os.path.join(metrics_dir, file_name))
+
+
+def _estimate_quantile(metric, quantile):
+    """Estimates quantile as upper bound of the bucket containing it."""
+    rank = quantile * metric['count']
+    for bound, count in zip(metric['bounds'], metric['counts']):
+        if count >= rank:
+            return bound
+    return float('inf')
+
+
+def _summarize(metrics):
+    """Yields one line per metric with count, mean, p50 and p95 estimates."""
+    yield '{0:<28} {1:<48} {2:>8} {3:>10} {4:>8} {5:>8}'.format(
+        'metric', 'labels', 'count', 'mean', 'p50<=', 'p95<='
+    )
+    for metric in metrics:
+        if not metric['count']:
+            continue
+
+        labels = ','.join('{0}={1}'.format(*x) for x in metric['labels'])
+        yield '{0:<28} {1:<48} {2:>8} {3:>10.4f} {4:>8} {5:>8}'.format(
+            metric['name'],
+            labels,
+            metric['count'],
+            metric['sum'] / metric['count'],
+            _estimate_quantile(metric, 0.5),
+            _estimate_quantile(metric, 0.95),
+        )
@@ -0,0 +1,143 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connections
+from django.utils import timezone
+
+from Appraise.utils import _get_logger
+from Dashboard.jobs import claim_job
+from Dashboard.jobs import fail_stale_jobs
+from Dashboard.jobs import get_worker_name
+from Dashboard.jobs import run_job
+from Dashboard.models import Job
+
+LOGGER = _get_logger(name=__name__)
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = 'Runs queued background jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of jobs run in parallel, defaults to number of CPUs.',
+        )
+
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds between checks for new jobs.',
+        )
+
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=600.0,
+            help='Fail running jobs without heartbeat for this many seconds, '
+            'left behind by workers which died. Use 0 to disable.',
+        )
+
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            default=False,
+            help='Exit once no jobs are queued and all started jobs finished.',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError('--processes must be at least 1')
+
+        worker_name = get_worker_name()
+        self.stdout.write(
+            'Worker {0} running jobs in {1} processes'.format(worker_name, processes)
+        )
+
+        # Forked processes inherit loaded Django apps, so start much faster
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+        running = {}
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            while True:
+                if options['stale_after'] > 0:
+                    stale = fail_stale_jobs(options['stale_after'])
+                    if stale:
+                        LOGGER.warning('Marked %s stale jobs as failed', stale)
+
+                self._collect_finished(running)
+
+                free_slots = processes - len(running)
+                if free_slots > 0:
+                    for job_id in _queued_job_ids(free_slots):
+                        if not claim_job(job_id, worker_name):
+                            continue
+
+                        self.stdout.write('Starting job #{0}'.format(job_id))
+                        # Child processes must not share the parent's connections
+                        connections.close_all()
+                        try:
+                            running[job_id] = pool.submit(run_job, job_id)
+                        except BrokenProcessPool as exc:
+                            _mark_failed(job_id, 'Worker process pool is broken')
+                            raise CommandError(
+                                'Worker process pool is broken, restart worker'
+                            ) from exc
+
+                if running:
+                    Job.objects.filter(
+                        id__in=list(running), status=Job.RUNNING
+                    ).update(heartbeat=timezone.now())
+
+                elif options['once']:
+                    break
+
+                sleep(options['poll_interval'])
+
+    def _collect_finished(self, running):
+        for job_id, future in list(running.items()):
+            if not future.done():
+                continue
+
+            del running[job_id]
+            try:
+                status = future.result()
+
+            except BrokenProcessPool:
+                LOGGER.exception('Worker process of job #%s died', job_id)
+                _mark_failed(job_id, 'Worker process died')
+                status = Job.FAILED
+
+            # pylint: disable=broad-except
+            except Exception as exc:
+                LOGGER.exception('Job #%s could not be run', job_id)
+                _mark_failed(job_id, str(exc))
+                status = Job.FAILED
+
+            self.stdout.write('Job #{0} {1}'.format(job_id, status))
+
+
+def _queued_job_ids(limit):
+    queued = Job.objects.filter(status=Job.QUEUED).order_by('id')
+    return list(queued.values_list('id', flat=True)[:limit])
+
+
+def _mark_failed(job_id, message):
+    Job.objects.filter(pk=job_id, status=Job.RUNNING).update(
+        status=Job.FAILED, statusMessage=message, dateFinished=timezone.now()
+    )
@@ -0,0 +1,144 @@
+# Generated by Django 4.1 on 2026-10-19 14:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("Dashboard", "0003_auto_20210804_0940"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "jobType",
+                    models.CharField(
+                        db_index=True,
+                        help_text="Registered job type, e.g., a management command name",
+                        max_length=100,
+                        verbose_name="Job type",
+                    ),
+                ),
+                (
+                    "jobArguments",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Keyword arguments passed to the job type",
+                        verbose_name="Job arguments",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "Queued"),
+                            ("running", "Running"),
+                            ("succeeded", "Succeeded"),
+                            ("failed", "Failed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=20,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "progress",
+                    models.FloatField(
+                        default=0.0,
+                        help_text="Fraction of work done, from 0.0 to 1.0",
+                        verbose_name="Progress",
+                    ),
+                ),
+                (
+                    "statusMessage",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Latest progress message or error",
+                        verbose_name="Status message",
+                    ),
+                ),
+                (
+                    "artifact",
+                    models.FileField(
+                        blank=True,
+                        help_text="Output of the job, e.g., an exported CSV file",
+                        null=True,
+                        upload_to="Jobs",
+                        verbose_name="Artifact",
+                    ),
+                ),
+                (
+                    "dateCreated",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Date created"
+                    ),
+                ),
+                (
+                    "dateStarted",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Date started"
+                    ),
+                ),
+                (
+                    "dateFinished",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Date finished"
+                    ),
+                ),
+                (
+                    "heartbeat",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Last sign of life from the worker running this job",
+                        null=True,
+                        verbose_name="Heartbeat",
+                    ),
+                ),
+                (
+                    "workerName",
+                    models.CharField(
+                        blank=True,
+                        default="",
+                        help_text="Host and process ID of the worker running this job",
+                        max_length=100,
+                        verbose_name="Worker",
+                    ),
+                ),
+                (
+                    "createdBy",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(app_label)s_%(class)s_created_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Created by",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Job",
+                "verbose_name_plural": "Jobs",
+                "ordering": ["-id"],
+            },
+        ),
+    ]
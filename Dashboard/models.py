@@ -330,3 +330,139 @@ class TimedKeyValueData(models.Model):
         if not _latest_values or _latest_values[0] != new_value:
             new_data = cls(key=key, value=new_value)
             new_data.save()
+
+
+# pylint: disable=C0330,E1101,too-few-public-methods
+class Job(models.Model):
+    """
+    Background job run by the RunJobs worker, see Dashboard/jobs.py.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    )
+
+    jobType = models.CharField(
+        max_length=100,
+        db_index=True,
+        help_text="Registered job type, e.g., a management command name",
+        verbose_name="Job type",
+    )
+
+    jobArguments = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Keyword arguments passed to the job type",
+        verbose_name="Job arguments",
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        db_index=True,
+        verbose_name="Status",
+    )
+
+    progress = models.FloatField(
+        default=0.0,
+        help_text="Fraction of work done, from 0.0 to 1.0",
+        verbose_name="Progress",
+    )
+
+    statusMessage = models.TextField(
+        blank=True,
+        default='',
+        help_text="Latest progress message or error",
+        verbose_name="Status message",
+    )
+
+    artifact = models.FileField(
+        upload_to='Jobs',
+        blank=True,
+        null=True,
+        help_text="Output of the job, e.g., an exported CSV file",
+        verbose_name="Artifact",
+    )
+
+    createdBy = models.ForeignKey(
+        User,
+        models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='%(app_label)s_%(class)s_created_by',
+        verbose_name="Created by",
+    )
+
+    dateCreated = models.DateTimeField(auto_now_add=True, verbose_name="Date created")
+
+    dateStarted = models.DateTimeField(
+        blank=True, null=True, verbose_name="Date started"
+    )
+
+    dateFinished = models.DateTimeField(
+        blank=True, null=True, verbose_name="Date finished"
+    )
+
+    heartbeat = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Last sign of life from the worker running this job",
+        verbose_name="Heartbeat",
+    )
+
+    workerName = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        help_text="Host and process ID of the worker running this job",
+        verbose_name="Worker",
+    )
+
+    class Meta:
+        """
+        Metadata options for the Job object model.
+        """
+
+        ordering = ['-id']
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+
+    def __str__(self):
+        """
+        Returns a Unicode String for this Job object.
+        """
+        return u'<job id="{0}" type="{1}" status="{2}" />'.format(
+            self.id, self.jobType, self.status
+        )
+
+    @classmethod
+    def enqueue(cls, job_type, created_by=None, **arguments):
+        """
+        Creates queued job of the given registered type.
+        """
+        # pylint: disable=import-outside-toplevel
+        from Dashboard.jobs import JOB_TYPES
+
+        if job_type not in JOB_TYPES:
+            raise ValueError('Unknown job type {0!r}'.format(job_type))
+
+        return cls.objects.create(
+            jobType=job_type, jobArguments=arguments, createdBy=created_by
+        )
+
+    def is_finished(self):
+        """
+        Returns True if this job will not run (again).
+        """
+        return self.status in (self.SUCCEEDED, self.FAILED, self.CANCELLED)
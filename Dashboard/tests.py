@@ -3,7 +3,390 @@ Appraise evaluation framework
 
 See LICENSE for usage details
 """
-# pylint: disable=unused-import
-from django.db import models
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from tempfile import TemporaryDirectory
 
-# Deliberately left empty.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import connections
+from django.db import IntegrityError
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from Appraise.metrics import load_snapshots
+from Appraise.metrics import measure
+from Appraise.metrics import REGISTRY
+from Appraise.routers import REPORTING_DB_ALIAS
+from Appraise.routers import reporting_reads
+from Appraise.sqlite import configure_connection
+from Appraise.sqlite import GroupCommitWriter
+from Campaign.models import Campaign
+from Dashboard.jobs import claim_job
+from Dashboard.jobs import fail_stale_jobs
+from Dashboard.jobs import register_job_type
+from Dashboard.jobs import report_progress
+from Dashboard.jobs import run_job
+from Dashboard.models import Job
+
+
+class TestMetrics(TestCase):
+    '''Tests per-view metrics middleware and endpoint.'''
+
+    def setUp(self):
+        REGISTRY.reset()
+        self.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+
+    def _get_metric(self, name, **labels):
+        for metric in REGISTRY.snapshot():
+            if metric['name'] == name and dict(metric['labels']) == labels:
+                return metric
+        return None
+
+    def test_records_view_and_phase_metrics(self):
+        '''Verifies requests record view and checkpoint phase histograms.'''
+        self.client.login(username='staff', password='secret')
+        self.client.get('/dashboard/')
+
+        view = self._get_metric('appraise_view_seconds', view='dashboard')
+        self.assertEqual(view['count'], 1)
+
+        queries = self._get_metric('appraise_view_queries', view='dashboard')
+        self.assertGreater(queries['sum'], 0)
+
+        for phase in ('current-task', 'agenda-scan', 'annotation-time', 'render'):
+            metric = self._get_metric(
+                'appraise_phase_seconds', view='dashboard', phase=phase
+            )
+            self.assertEqual(metric['count'], 1)
+
+    def test_measure_outside_of_requests(self):
+        '''Verifies measure() counts queries of the wrapped block.'''
+        with measure('count-users'):
+            User.objects.count()
+            User.objects.count()
+
+        metric = self._get_metric(
+            'appraise_phase_queries', view='none', phase='count-users'
+        )
+        self.assertEqual(metric['sum'], 2)
+
+    def test_metrics_endpoint_requires_staff(self):
+        '''Verifies only staff users can access Prometheus metrics.'''
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 302)
+
+        self.client.login(username='staff', password='secret')
+        self.client.get('/dashboard/')
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            b'appraise_view_seconds_bucket{view="dashboard",le="+Inf"} 1',
+            response.content,
+        )
+
+    def test_flush_writes_snapshot_once_per_interval(self):
+        '''Verifies snapshots replace each other without leftover files.'''
+        with measure('count-users'):
+            User.objects.count()
+
+        with TemporaryDirectory() as directory:
+            REGISTRY._last_flush = 0
+            REGISTRY.maybe_flush(directory, interval=60)
+            REGISTRY.maybe_flush(directory, interval=60)
+            self.assertEqual(len(load_snapshots(directory)), 1)
+
+            REGISTRY._last_flush = 0
+            REGISTRY.maybe_flush(directory, interval=60)
+            self.assertEqual(
+                os.listdir(directory), ['metrics-{0}.json'.format(os.getpid())]
+            )
+
+    def test_flush_errors_do_not_fail_requests(self):
+        '''Verifies requests succeed if snapshots cannot be written.'''
+
+        def _fail_flush():
+            raise OSError('No space left on device')
+
+        REGISTRY.maybe_flush = _fail_flush
+        try:
+            with self.assertLogs('Appraise.metrics', 'ERROR'):
+                response = self.client.get('/')
+        finally:
+            del REGISTRY.maybe_flush
+        self.assertEqual(response.status_code, 200)
+
+
+class TestReportingRouter(TransactionTestCase):
+    '''Tests routing of reporting reads to a second SQLite database.'''
+
+    @classmethod
+    def setUpClass(cls):
+        # Reporting database is added only now, as the test runner would
+        # otherwise try to create a test database for it
+        cls.temp_dir = TemporaryDirectory()
+        cls.reporting_path = os.path.join(cls.temp_dir.name, 'reporting.sqlite3')
+        connections.settings[REPORTING_DB_ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.reporting_path,
+            # Like in settings.py, not flushed after tests
+            'TEST': {'MIRROR': DEFAULT_DB_ALIAS},
+        }
+        connections.configure_settings(connections.settings)
+        cls.databases = {DEFAULT_DB_ALIAS, REPORTING_DB_ALIAS}
+
+        cls.routers = override_settings(
+            DATABASE_ROUTERS=['Appraise.routers.ReportingRouter']
+        )
+        cls.routers.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.routers.disable()
+        connections[REPORTING_DB_ALIAS].close()
+        del connections[REPORTING_DB_ALIAS]
+        del connections.settings[REPORTING_DB_ALIAS]
+        cls.temp_dir.cleanup()
+
+    def _replicate(self):
+        """Copies primary database into the reporting SQLite file.
+
+        Requires TransactionTestCase, as SQLite cannot back up an in-memory
+        database with an open transaction.
+        """
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        reporting = sqlite3.connect(self.reporting_path)
+        try:
+            primary.connection.backup(reporting)
+        finally:
+            reporting.close()
+
+    def test_reads_use_reporting_database(self):
+        '''Verifies only reads inside reporting_reads() use reporting.'''
+        User.objects.create_user('replicated')
+        self._replicate()
+        User.objects.create_user('primary-only')
+
+        self.assertTrue(User.objects.filter(username='primary-only').exists())
+        with reporting_reads():
+            self.assertFalse(User.objects.filter(username='primary-only').exists())
+            self.assertTrue(User.objects.filter(username='replicated').exists())
+
+            # Writes always go to the primary database
+            User.objects.create_user('written')
+        self.assertTrue(User.objects.filter(username='written').exists())
+
+    def test_analysis_commands_read_reporting_database(self):
+        '''Verifies analysis commands do not see unreplicated campaigns.'''
+        staff = User.objects.create_user('staff')
+        Campaign.objects.create(campaignName='replicated', createdBy=staff)
+        self._replicate()
+        Campaign.objects.create(campaignName='primaryonly', createdBy=staff)
+
+        call_command('ExportSystemScoresToCSV', 'replicated', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('ExportSystemScoresToCSV', 'primaryonly', stdout=StringIO())
+
+
+class TestSQLiteProfile(TransactionTestCase):
+    '''Tests SQLite production profile and group-commit writer.'''
+
+    @override_settings(SQLITE_PRODUCTION=True, SQLITE_BUSY_TIMEOUT=7)
+    def test_configure_connection(self):
+        '''Verifies profile pragmas are applied to connections.'''
+        configure_connection(None, connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 7000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_group_commit_saves_concurrent_instances(self):
+        '''Verifies concurrent instances are saved and acknowledged.'''
+        writer = GroupCommitWriter(interval=0.05, max_batch=100)
+        users = [User(username='user{0}'.format(x)) for x in range(20)]
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            saved = list(pool.map(writer.save, users))
+
+        self.assertTrue(all(x.pk for x in saved))
+        self.assertEqual(User.objects.filter(username__startswith='user').count(), 20)
+
+    def test_group_commit_isolates_failing_instances(self):
+        '''Verifies a failing instance does not prevent others from saving.'''
+        User.objects.create_user('taken')
+        writer = GroupCommitWriter(interval=0.05, max_batch=100)
+        futures = [
+            writer.submit(User(username='taken')),
+            writer.submit(User(username='available')),
+        ]
+
+        with self.assertRaises(IntegrityError):
+            futures[0].result()
+        self.assertTrue(futures[1].result().pk)
+        self.assertTrue(User.objects.filter(username='available').exists())
+
+
+@register_job_type('TestJob')
+def _test_job(job, fail=False):
+    report_progress(0.5, 'Halfway')
+    if fail:
+        raise ValueError('Requested failure')
+    return 'test-{0}.txt'.format(job.id), b'done'
+
+
+class TestJobs(TestCase):
+    '''Tests database-backed background jobs.'''
+
+    def setUp(self):
+        self.staff = User.objects.create_superuser('staff', password='secret')
+        self.media_dir = TemporaryDirectory()
+        self.addCleanup(self.media_dir.cleanup)
+        media_root = override_settings(MEDIA_ROOT=self.media_dir.name + os.sep)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def test_enqueue_requires_registered_type(self):
+        '''Verifies jobs can only be queued for registered types.'''
+        with self.assertRaises(ValueError):
+            Job.enqueue('NoSuchJob')
+
+        job = Job.enqueue('TestJob', created_by=self.staff, fail=False)
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.jobArguments, {'fail': False})
+
+    def test_claim_job_only_once(self):
+        '''Verifies a queued job is claimed by a single worker.'''
+        job = Job.enqueue('TestJob')
+        self.assertTrue(claim_job(job.id, 'worker-1'))
+        self.assertFalse(claim_job(job.id, 'worker-2'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.workerName, 'worker-1')
+
+    def test_run_job_stores_artifact(self):
+        '''Verifies successful jobs store their artifact.'''
+        job = Job.enqueue('TestJob')
+        claim_job(job.id, 'worker')
+        self.assertEqual(run_job(job.id), Job.SUCCEEDED)
+
+        job.refresh_from_db()
+        self.assertEqual(job.progress, 1.0)
+        self.assertIsNotNone(job.dateFinished)
+        with job.artifact.open('rb') as artifact:
+            self.assertEqual(artifact.read(), b'done')
+
+    def test_run_job_records_failure(self):
+        '''Verifies failing jobs are marked as failed with traceback.'''
+        job = Job.enqueue('TestJob', fail=True)
+        claim_job(job.id, 'worker')
+        self.assertEqual(run_job(job.id), Job.FAILED)
+
+        job.refresh_from_db()
+        self.assertIn('Requested failure', job.statusMessage)
+        self.assertFalse(job.artifact)
+
+    def test_run_command_job(self):
+        '''Verifies management command output becomes the artifact.'''
+        Campaign.objects.create(campaignName='jobs', createdBy=self.staff)
+        job = Job.enqueue('ExportSystemScoresToCSV', args=['jobs'])
+        claim_job(job.id, 'worker')
+        self.assertEqual(run_job(job.id), Job.SUCCEEDED)
+
+        job.refresh_from_db()
+        self.assertTrue(job.artifact.name.endswith('.csv'))
+
+    def test_fail_stale_jobs(self):
+        '''Verifies running jobs without heartbeat are failed.'''
+        job = Job.enqueue('TestJob')
+        claim_job(job.id, 'worker')
+        self.assertEqual(fail_stale_jobs(3600), 0)
+        Job.objects.filter(pk=job.id).update(heartbeat=job.dateCreated.replace(year=2000))
+        self.assertEqual(fail_stale_jobs(3600), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_admin_queues_jobs_and_serves_artifacts(self):
+        '''Verifies admin actions queue jobs and artifacts can be downloaded.'''
+        campaign = Campaign.objects.create(campaignName='jobs', createdBy=self.staff)
+        self.client.login(username='staff', password='secret')
+        self.client.post(
+            reverse('admin:Campaign_campaign_changelist'),
+            {'action': 'queue_compute_zscores', '_selected_action': [campaign.id]},
+        )
+        job = Job.objects.get(jobType='ComputeZScores')
+        self.assertEqual(job.jobArguments, {'args': ['jobs']})
+        self.assertEqual(job.createdBy, self.staff)
+
+        claim_job(job.id, 'worker')
+        run_job(job.id)
+        url = reverse('admin:Dashboard_job_artifact', args=(job.id,))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        User.objects.create_user('annotator', password='secret')
+        self.client.login(username='annotator', password='secret')
+        self.assertNotEqual(self.client.get(url).status_code, 200)
+
+
+class TestLoginTokens(TestCase):
+    '''Tests signed login token links.'''
+
+    def setUp(self):
+        owner = User.objects.create(username='admin', is_superuser=True)
+        self.campaign = Campaign.objects.create(campaignName='tokens', createdBy=owner)
+        self.user = User.objects.create_user(username='engdeu0101', password='x')
+
+    def _login(self, token):
+        self.client.logout()
+        response = self.client.get(reverse('token-login', args=[token]))
+        self.assertRedirects(
+            response, reverse('dashboard'), fetch_redirect_response=False
+        )
+        return self.client.session.get('_auth_user_id')
+
+    def test_tokens_log_in_until_revoked(self):
+        '''Verifies valid tokens log in, tampered and revoked ones do not.'''
+        from Dashboard.utils import generate_login_tokens
+
+        token = generate_login_tokens(['engdeu0101'], 'tokens')['engdeu0101']
+        self.assertEqual(self._login(token), str(self.user.id))
+        self.assertIsNone(self._login(token[:-1] + ('A' if token[-1] != 'A' else 'B')))
+
+        self.campaign.revoke_login_tokens()
+        self.assertEqual(self.campaign.loginTokenGeneration, 1)
+        self.assertIsNone(self._login(token))
+
+        token = generate_login_tokens(['engdeu0101'], 'tokens')['engdeu0101']
+        self.assertEqual(self._login(token), str(self.user.id))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self._login(token))
+
+    def test_tokens_of_deleted_campaigns(self):
+        '''Verifies tokens are rejected once their campaign is deleted.'''
+        from Dashboard.utils import generate_login_tokens
+
+        with self.assertRaises(LookupError):
+            generate_login_tokens(['engdeu0101'], 'missing')
+
+        token = generate_login_tokens(['engdeu0101'], 'tokens')['engdeu0101']
+        owner = self.campaign.createdBy
+        self.campaign.delete()
+        self.assertIsNone(self._login(token))
+
+        Campaign.objects.create(campaignName='tokens', createdBy=owner)
+        self.assertIsNone(self._login(token))
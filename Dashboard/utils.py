@@ -4,15 +4,21 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 from collections import defaultdict
+from collections import OrderedDict
 from datetime import datetime
 from hashlib import md5
 from math import floor
 from math import sqrt
 from uuid import UUID
 
+from django.contrib.auth.models import User
+from django.core.signing import BadSignature
+from django.core.signing import TimestampSigner
 from scipy.stats import mannwhitneyu  # type: ignore
 
+from Appraise.settings import LOGIN_TOKEN_MAX_AGE
 from Appraise.settings import SECRET_KEY
+from Campaign.models import Campaign
 from EvalData.models import DataAssessmentResult
 from EvalData.models import DirectAssessmentContextResult
 from EvalData.models import DirectAssessmentDocumentResult
@@ -50,6 +56,55 @@ def generate_confirmation_token(username, run_qc=True):
     return new_uuid
 
 
+# Separates login tokens from other values signed with SECRET_KEY
+LOGIN_TOKEN_SALT = 'Dashboard.login_token'
+
+
+def generate_login_tokens(usernames, campaign_name):
+    """
+    Generates signed login tokens for the given users of a campaign.
+
+    Tokens expire after LOGIN_TOKEN_MAX_AGE seconds, or when the campaign
+    revokes its login tokens, see Campaign.revoke_login_tokens(). Tokens
+    refer to the campaign by primary key, so they are rejected once the
+    campaign is deleted, even if another one with the same name is created.
+
+    Returns dictionary mapping usernames to tokens. Raises LookupError if
+    the campaign does not exist.
+    """
+    campaign = Campaign.get_campaign_or_raise(campaign_name)
+    signer = TimestampSigner(salt=LOGIN_TOKEN_SALT)
+    generation = campaign.loginTokenGeneration
+    return OrderedDict(
+        (username, signer.sign_object([username, campaign.id, generation]))
+        for username in usernames
+    )
+
+
+def verify_login_token(token):
+    """
+    Returns active user for the given login token.
+
+    Only the token's HMAC signature is checked, no password hash. Returns
+    None if the token is invalid, expired or revoked, or if its campaign
+    no longer exists.
+    """
+    try:
+        username, campaign_id, generation = TimestampSigner(
+            salt=LOGIN_TOKEN_SALT
+        ).unsign_object(token, max_age=LOGIN_TOKEN_MAX_AGE)
+
+    except (BadSignature, TypeError, ValueError):
+        return None
+
+    if not Campaign.objects.filter(
+        id=campaign_id, loginTokenGeneration=generation
+    ).exists():
+        return None
+
+    return User.objects.filter(username=username, is_active=True).first()
+
+
 def run_quality_control(username):
     """
     Runs quality control for the user.
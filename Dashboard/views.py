@@ -11,17 +11,23 @@ from inspect import getframeinfo
 from django.contrib.auth import authenticate
 from django.contrib.auth import login
 from django.contrib.auth import logout
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import User
+from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
 
+from Appraise.metrics import checkpoint
+from Appraise.metrics import collect_metrics
+from Appraise.metrics import render_prometheus_text
 from Appraise.settings import BASE_CONTEXT
 from Appraise.utils import _get_logger
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from Dashboard.models import UserInviteToken
 from Dashboard.utils import generate_confirmation_token
+from Dashboard.utils import verify_login_token
 from EvalData.models import DirectAssessmentTask
 from EvalData.models import TASK_DEFINITIONS
 from EvalData.models import TaskAgenda
@@ -98,6 +104,44 @@ def sso_login(request, username, password):
     return redirect('dashboard')
 
 
+def token_login(request, token):
+    """
+    Forces login for the given signed login token, see
+    Dashboard.utils.generate_login_tokens(). Unlike sso_login, this
+    verifies an HMAC instead of a password hash. If another user is
+    already logged in, it will be logged out.
+    """
+    if request.user.username:
+        LOGGER.info('Logging out user "%s"', request.user.username)
+        logout(request)
+
+    user = verify_login_token(token)
+
+    # login failed
+    if user is None:
+        return redirect('dashboard')
+
+    login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+
+    LOGGER.info(
+        'Rendering token login view for user "%s".',
+        request.user.username or "Anonymous",
+    )
+
+    return redirect('dashboard')
+
+
+@staff_member_required
+def metrics(request):
+    """
+    Per-view latency and query count metrics in Prometheus text format.
+    """
+    return HttpResponse(
+        render_prometheus_text(collect_metrics()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
 def frontpage(request, extra_context=None):
     """
     Appraise front page.
@@ -197,9 +241,7 @@ def create_profile(request):
 
             # For any other exception, clean up and ask user to retry.
             except Exception:
-                from traceback import format_exc
-
-                print(format_exc())  # TODO: need logger here!
+                LOGGER.exception('Failed to create user "%s"', username)
                 username = None
                 email = None
                 token = None
@@ -269,9 +311,9 @@ def update_profile(request):
 
             # For any other exception, clean up and ask user to retry.
             except Exception:
-                from traceback import format_exc
-
-                print(format_exc())
+                LOGGER.exception(
+                    'Failed to update languages for user "%s"', request.user.username
+                )
 
                 languages = set()
 
@@ -325,7 +367,7 @@ def dashboard(request):
         # Check if marketTargetLanguage for current_task matches user languages.
         if current_task:
             code = current_task.marketTargetLanguageCode()
-            print('  User groups:', request.user.groups.all())
+            LOGGER.debug('User groups: %s', request.user.groups.all())
             if code not in request.user.groups.values_list('name', flat=True):
                 _msg = 'Language %s not specified for user %s. Giving up task %s'
                 LOGGER.info(_msg, code, request.user.username, current_task)
@@ -333,9 +375,10 @@ def dashboard(request):
                 current_task.assignedTo.remove(request.user)
                 current_task = None
 
-    print('  Current task: {0}'.format(current_task))
+    LOGGER.debug('Current task: %s', current_task)
 
     _t2 = datetime.now()
+    checkpoint('current-task')
 
     # If there is no current task, check if user is done with work agenda.
     work_completed = False
@@ -344,7 +387,6 @@ def dashboard(request):
 
         for agenda in agendas:
             LOGGER.info('Identified work agenda %s', agenda)
-            print('Identified work agenda', agenda)
 
             tasks_to_complete = []
             for serialized_open_task in agenda.serialized_open_tasks():
@@ -398,7 +440,7 @@ def dashboard(request):
         campaign_map = {task_cls: None for task_cls in TASK_TYPES}
 
         for campaign in Campaign.objects.all():
-            print('Campaign: {0}'.format(campaign.campaignName))
+            LOGGER.debug('Campaign: %s', campaign.campaignName)
 
             for task_cls in campaign_map:
                 campaign_map[task_cls] = task_cls.objects.filter(
@@ -437,15 +479,15 @@ def dashboard(request):
                     _languages = languages_map[task_cls]
                     break
 
-            print(
-                "campaign = {0}, type = {1}, languages = {2}".format(
-                    campaign.campaignName,
-                    _type,
-                    _languages.get(campaign.campaignName, 'none'),
-                )
+            LOGGER.debug(
+                'campaign = %s, type = %s, languages = %s',
+                campaign.campaignName,
+                _type,
+                _languages.get(campaign.campaignName, 'none'),
             )
 
     _t3 = datetime.now()
+    checkpoint('agenda-scan')
 
     # Collect total annotation time
     times = {'days': 0, 'hours': 0, 'minutes': 0, 'seconds': 0}
@@ -459,6 +501,7 @@ def dashboard(request):
         times['seconds'] += int((secs - (days * 86400)) % 60)
 
     _t4 = datetime.now()
+    checkpoint('annotation-time')
 
     # All languages per task type
     # Mapping: task name => list of (code, language, campaign, task_url)
@@ -476,19 +519,16 @@ def dashboard(request):
                     (lang_code, lang_name, camp_name, task_url)
                 )
 
-        print(
-            '    Languages "{}": {}'.format(
-                task_name,
-                str(all_languages.get(task_name, 'none')).encode('utf-8'),
-            )
+        LOGGER.debug(
+            'Languages "%s": %s', task_name, all_languages.get(task_name, 'none')
         )
 
     # Note that the default task type is 'direct'
     current_type = TASK_NAMES.get(current_task.__class__, 'direct')
-    print('  Final task type: {0}'.format(current_type))
+    LOGGER.debug('Final task type: %s', current_type)
 
     current_url = TASK_URLS[current_type]
-    print('  URL: {0}'.format(current_url))
+    LOGGER.debug('URL: %s', current_url)
 
     # Provide UUID for the completed task
     if work_completed:
@@ -11,11 +11,70 @@ from datetime import datetime
 
 from django.contrib import admin
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db import router
 from django.http import HttpResponseRedirect
 from django.urls import reverse
+from django.utils.functional import cached_property
+
+from Dashboard.admin import queue_jobs
 
 from .models import *
 
+# Below this number of rows, changelists always use exact counts
+ESTIMATED_COUNT_THRESHOLD = 100000
+
+
+def _estimated_row_count(model):
+    """
+    Returns estimated number of rows for the given model's table.
+
+    Uses PostgreSQL planner statistics or SQLite max rowid, both of which
+    avoid a full table scan. Returns None for other database backends.
+    """
+    connection = connections[router.db_for_read(model)]
+    table_name = model._meta.db_table
+
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+        params = [table_name]
+
+    elif connection.vendor == 'sqlite':
+        sql = 'SELECT MAX(_ROWID_) FROM {0}'.format(
+            connection.ops.quote_name(table_name)
+        )
+        params = []
+
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    return int(row[0]) if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator using estimated row counts for unfiltered changelists.
+
+    Exact COUNT(*) queries on multi-million row tables take longer than
+    rendering the changelist page itself. Filtered changelists and small
+    tables still use exact counts.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = _estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate > ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+
+        return super(EstimatedCountPaginator, self).count
+
 
 # TODO:chrife: find a way to use SELECT-based filtering widgets
 class BaseMetadataAdmin(admin.ModelAdmin):
@@ -25,6 +84,7 @@ class BaseMetadataAdmin(admin.ModelAdmin):
 
     list_display = ['modifiedBy', 'dateModified']
     list_filter = ['activated', 'completed', 'retired']
+    list_select_related = ['modifiedBy']
     search_fields = [
         'createdBy__username',
         'activatedBy__username',
@@ -83,6 +143,20 @@ class BaseMetadataAdmin(admin.ModelAdmin):
 
         super(BaseMetadataAdmin, self).save_model(request, obj, form, change)
 
+    def changelist_view(self, request, extra_context=None):
+        """
+        Renders the changelist, fetching related names once per object.
+        """
+        with related_values_cache():
+            response = super(BaseMetadataAdmin, self).changelist_view(
+                request, extra_context
+            )
+            # TemplateResponse is rendered lazily, i.e., after returning
+            if hasattr(response, 'render'):
+                response.render()
+
+        return response
+
 
 class MarketAdmin(BaseMetadataAdmin):
     """
@@ -172,8 +246,16 @@ class TextSegmentAdmin(BaseMetadataAdmin):
     search_fields = [
         'segmentID',
         'segmentText',
+        'segmentTextRef__text',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'metadata',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = (
         (
             None,
@@ -219,12 +301,22 @@ class TextSegmentWithTwoTargetsAdmin(BaseMetadataAdmin):
     search_fields = [
         'segmentID',
         'segmentText',
+        'segmentTextRef__text',
         'target1ID',
         'target1Text',
+        'target1TextRef__text',
         'target2ID',
         'target2Text',
+        'target2TextRef__text',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'metadata',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = (
         (
             None,
@@ -273,11 +365,20 @@ class TextPairAdmin(BaseMetadataAdmin):
     search_fields = [
         'sourceID',
         'sourceText',
+        'sourceTextRef__text',
         'targetID',
         'targetText',
+        'targetTextRef__text',
         'mqm',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'metadata',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = (
         (
             None,
@@ -333,13 +434,22 @@ class TextPairWithContextAdmin(BaseMetadataAdmin):
         'sourceID',
         'targetID',
         'sourceText',
+        'sourceTextRef__text',
         'sourceContextLeft',
         'sourceContextRight',
         'targetText',
+        'targetTextRef__text',
         'targetContextLeft',
         'targetContextRight',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'metadata',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = (
         (
             None,
@@ -396,6 +506,13 @@ class TextPairWithImageAdmin(BaseMetadataAdmin):
         'targetText',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'metadata',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = (
         (
             None,
@@ -439,6 +556,14 @@ class DirectAssessmentTaskAdmin(BaseMetadataAdmin):
         'assignedTo',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'batchData',
+        'campaign',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    autocomplete_fields = ['assignedTo']
+    raw_id_fields = ['batchData', 'items']
+    ordering = ['-id']
+
     fieldsets = (
         (
             None,
@@ -479,6 +604,13 @@ class DirectAssessmentResultAdmin(BaseMetadataAdmin):
         # nothing model specific
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'item',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     readonly_fields = ('item', 'task')
 
     fieldsets = (
@@ -509,6 +641,14 @@ class DirectAssessmentContextTaskAdmin(BaseMetadataAdmin):
         'assignedTo',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'batchData',
+        'campaign',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    autocomplete_fields = ['assignedTo']
+    raw_id_fields = ['batchData', 'items']
+    ordering = ['-id']
+
     fieldsets = (
         (
             None,
@@ -550,6 +690,13 @@ class DirectAssessmentContextResultAdmin(BaseMetadataAdmin):
         # nothing model specific
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'item',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     readonly_fields = ('item', 'task')
 
     fieldsets = (
@@ -596,6 +743,14 @@ class MultiModalAssessmentTaskAdmin(BaseMetadataAdmin):
         'assignedTo',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'batchData',
+        'campaign',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    autocomplete_fields = ['assignedTo']
+    raw_id_fields = ['batchData', 'items']
+    ordering = ['-id']
+
     fieldsets = (
         (
             None,
@@ -636,6 +791,13 @@ class MultiModalAssessmentResultAdmin(BaseMetadataAdmin):
         # nothing model specific
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'item',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = (
         (
             None,
@@ -651,6 +813,7 @@ class WorkAgendaAdmin(admin.ModelAdmin):
 
     list_display = ['user', 'campaign', 'completed']
     list_filter = ['campaign']
+    list_select_related = ['user', 'campaign']
     search_fields = [
         'user__username',
         'campaign__campaignName',
@@ -662,10 +825,11 @@ class TaskAgendaAdmin(admin.ModelAdmin):
     Model admin for TaskAgenda object model.
     """
 
-    actions = ['reset_taskagenda']
+    actions = ['reset_taskagenda', 'queue_reset_taskagenda']
 
     list_display = ['user', 'campaign', 'completed']
     list_filter = ['campaign']
+    list_select_related = ['user', 'campaign']
     search_fields = [
         'user__username',
         'campaign__campaignName',
@@ -673,32 +837,50 @@ class TaskAgendaAdmin(admin.ModelAdmin):
 
     def get_actions(self, request):
         """
-        Reset task agenda action requires reset_taskagenda permission.
+        Reset task agenda actions require reset_taskagenda permission.
         """
         actions = super(TaskAgendaAdmin, self).get_actions(request)
-        if 'reset_taskagenda' in actions:
-            if not request.user.has_perm('EvalData.reset_taskagenda'):
-                del actions['reset_taskagenda']
+        if not request.user.has_perm('EvalData.reset_taskagenda'):
+            for action in ('reset_taskagenda', 'queue_reset_taskagenda'):
+                actions.pop(action, None)
         return actions
 
     def reset_taskagenda(self, request, queryset):
         """
         Handles reset task agenda admin action for TaskAgenda instances.
+
+        All selected agendas are reset in bulk within the current request.
         """
-        agendas_selected = queryset.count()
-        if agendas_selected > 1:
-            _msg = (
-                "You can only reset one task agenda at a time. "
-                "No items have been changed."
-            )
-            self.message_user(request, _msg, level=messages.WARNING)
-            return HttpResponseRedirect(reverse('admin:EvalData_taskagenda_changelist'))
+        queryset = queryset.select_related('user', 'campaign')
+        statuses = TaskAgenda.reset_taskagendas(queryset)
+
+        succeeded = [(_msg, _lvl) for _ret, _msg, _lvl in statuses if _ret]
+        if len(succeeded) > 1:
+            _msg = 'Succesfully reset {0} task agendas.'.format(len(succeeded))
+            self.message_user(request, _msg, level=messages.INFO)
+        else:
+            for _msg, _lvl in succeeded:
+                self.message_user(request, _msg, level=_lvl)
 
-        _pk = request.POST.getlist(admin.helpers.ACTION_CHECKBOX_NAME)
-        return HttpResponseRedirect(reverse('reset-taskagenda', args=_pk))
+        for _ret, _msg, _lvl in statuses:
+            if not _ret:
+                self.message_user(request, _msg, level=_lvl)
+
+        return HttpResponseRedirect(reverse('admin:EvalData_taskagenda_changelist'))
 
     reset_taskagenda.short_description = "Reset task agenda"  # type: ignore
 
+    def queue_reset_taskagenda(self, request, queryset):
+        """
+        Queues background job resetting the selected TaskAgenda instances.
+        """
+        agenda_ids = list(queryset.values_list('id', flat=True))
+        queue_jobs(self, request, 'ResetTaskAgendas', [{'agenda_ids': agenda_ids}])
+
+    queue_reset_taskagenda.short_description = (  # type: ignore
+        "Reset task agenda in background"
+    )
+
 
 class PairwiseAssessmentTaskAdmin(BaseMetadataAdmin):
     """
@@ -722,6 +904,14 @@ class PairwiseAssessmentTaskAdmin(BaseMetadataAdmin):
         'assignedTo',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'batchData',
+        'campaign',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    autocomplete_fields = ['assignedTo']
+    raw_id_fields = ['batchData', 'items']
+    ordering = ['-id']
+
     fieldsets = (
         (
             None,
@@ -763,6 +953,13 @@ class PairwiseAssessmentResultAdmin(BaseMetadataAdmin):
         # nothing model specific
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'item',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     readonly_fields = ('item', 'task')
 
     fieldsets = (
@@ -796,6 +993,14 @@ class PairwiseAssessmentDocumentTaskAdmin(BaseMetadataAdmin):
         'assignedTo',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'batchData',
+        'campaign',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    autocomplete_fields = ['assignedTo']
+    raw_id_fields = ['batchData', 'items']
+    ordering = ['-id']
+
     fieldsets = (
         (
             None,
@@ -838,6 +1043,13 @@ class PairwiseAssessmentDocumentResultAdmin(BaseMetadataAdmin):
         # nothing model specific
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'item',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     readonly_fields = ('item', 'task')
 
     fieldsets = (
@@ -871,6 +1083,14 @@ class DataAssessmentTaskAdmin(BaseMetadataAdmin):
         'assignedTo',
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'batchData',
+        'campaign',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    autocomplete_fields = ['assignedTo']
+    raw_id_fields = ['batchData', 'items']
+    ordering = ['-id']
+
     fieldsets = (
         (
             None,
@@ -911,6 +1131,13 @@ class DataAssessmentResultAdmin(BaseMetadataAdmin):
         # nothing model specific
     ] + BaseMetadataAdmin.search_fields  # type: ignore
 
+    list_select_related = [
+        'item',
+    ] + BaseMetadataAdmin.list_select_related  # type: ignore
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     readonly_fields = ('item', 'task')
 
     fieldsets = (
@@ -4,7 +4,14 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 # pylint: disable=missing-docstring
 class EvaldataConfig(AppConfig):
     name = 'EvalData'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from Appraise.sqlite import configure_connection
+
+        connection_created.connect(configure_connection)
@@ -0,0 +1,338 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+Bulk ingestion of results collected on external crowdsourcing platforms.
+
+Records are dictionaries, read from NDJSON or CSV, with the fields:
+- idempotency_key: client-supplied unique key of the judgement;
+- task, item: IDs of the task and of one of its items;
+- user: username of the annotator, who must exist;
+- start_time, end_time: annotation timestamps in seconds;
+- date_completed: optional ISO 8601 date, defaults to the import time;
+- answer fields of the result type, e.g., score or score1 and score2.
+
+Each batch is validated with a few set-based queries, not per record,
+and written with bulk_create() in one transaction. Records whose idempotency key has
+been imported before are skipped, so batches can be safely resent.
+"""
+import csv
+import json
+from collections import namedtuple
+from datetime import datetime
+from datetime import timezone
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from Appraise.utils import _get_logger
+from EvalData.models import BaseMetadata
+from EvalData.models import ImportedResult
+from EvalData.models import MAX_IDEMPOTENCYKEY_LENGTH
+from EvalData.models import TASK_DEFINITIONS
+
+LOGGER = _get_logger(name=__name__)
+
+utc = timezone.utc
+
+# Result type name, e.g., Direct or DirectAssessmentResult => result class
+RESULT_CLASSES = {}
+for _definition in TASK_DEFINITIONS:
+    RESULT_CLASSES[_definition[0]] = _definition[2]
+    RESULT_CLASSES[_definition[2].__name__] = _definition[2]
+
+# Fields of every record, all other fields are answers
+RECORD_FIELDS = (
+    'idempotency_key',
+    'task',
+    'item',
+    'user',
+    'start_time',
+    'end_time',
+    'date_completed',
+)
+
+# Number of values per IN lookup, bounded by SQLite variable limits
+LOOKUP_BATCH_SIZE = 500
+
+# Maximum number of errors reported per batch
+MAX_REPORTED_ERRORS = 100
+
+ImportSummary = namedtuple('ImportSummary', ('created', 'duplicates', 'errors'))
+
+
+class ResultImportError(ValueError):
+    """
+    Raised for invalid batches, with a list of record errors.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super(ResultImportError, self).__init__(
+            '{0} invalid records: {1}'.format(len(errors), '; '.join(errors[:5]))
+        )
+
+
+def get_result_class(result_type):
+    """
+    Returns result class for type name, raises ValueError if unknown.
+    """
+    if result_type not in RESULT_CLASSES:
+        raise ValueError(
+            'Unknown result type {0!r}, expected one of: {1}'.format(
+                result_type, ', '.join(sorted(RESULT_CLASSES))
+            )
+        )
+    return RESULT_CLASSES[result_type]
+
+
+def _answer_fields(result_cls):
+    """
+    Returns {name: field} for answer fields of result class.
+    """
+    skipped = {x.name for x in BaseMetadata._meta.fields}
+    skipped.update(('id', 'item', 'task', 'start_time', 'end_time'))
+    return {
+        x.name: x for x in result_cls._meta.concrete_fields if x.name not in skipped
+    }
+
+
+def read_ndjson(lines):
+    """
+    Yields records from lines of newline-delimited JSON objects.
+    """
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ResultImportError(['line {0}: {1}'.format(line_no, exc)]) from exc
+
+        if not isinstance(record, dict):
+            raise ResultImportError(['line {0}: expected JSON object'.format(line_no)])
+
+        yield record
+
+
+def read_csv(lines):
+    """
+    Yields records from CSV lines with header row.
+
+    Empty values are treated as missing.
+    """
+    for row in csv.DictReader(lines):
+        yield {key: value for key, value in row.items() if value not in ('', None)}
+
+
+def batched(records, batch_size):
+    """
+    Yields lists of up to batch_size records.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+        yield values[start : start + LOOKUP_BATCH_SIZE]
+
+
+def _existing_keys(keys):
+    existing = set()
+    for chunk in _chunks(keys):
+        existing.update(
+            ImportedResult.objects.filter(idempotencyKey__in=chunk).values_list(
+                'idempotencyKey', flat=True
+            )
+        )
+    return existing
+
+
+def _task_items(task_cls, pairs):
+    """
+    Returns set of (task ID, item ID) pairs which exist in task_cls.items.
+    """
+    items_field = task_cls._meta.get_field('items')
+    through = items_field.remote_field.through
+    task_column = items_field.m2m_field_name() + '_id'
+    item_column = items_field.m2m_reverse_field_name() + '_id'
+
+    found = set()
+    task_ids = sorted({task_id for task_id, _ in pairs})
+    item_ids = sorted({item_id for _, item_id in pairs})
+    for task_chunk in _chunks(task_ids):
+        for item_chunk in _chunks(item_ids):
+            lookup = {
+                task_column + '__in': task_chunk,
+                item_column + '__in': item_chunk,
+            }
+            found.update(
+                through.objects.filter(**lookup).values_list(task_column, item_column)
+            )
+    return found & pairs
+
+
+def _users_by_name(usernames):
+    users = {}
+    for chunk in _chunks(usernames):
+        users.update(
+            User.objects.filter(username__in=chunk).in_bulk(field_name='username')
+        )
+    return users
+
+
+def _clean_record(record, answer_fields):
+    """
+    Returns (key, task ID, item ID, username, fields) of valid record.
+
+    Raises ValueError or ValidationError if record is invalid.
+    """
+    key = str(record['idempotency_key']).strip()
+    if not key or len(key) > MAX_IDEMPOTENCYKEY_LENGTH:
+        raise ValueError('invalid idempotency_key')
+
+    fields = {
+        'start_time': float(record['start_time']),
+        'end_time': float(record['end_time']),
+        'dateCompleted': datetime.utcnow().replace(tzinfo=utc),
+    }
+    if record.get('date_completed'):
+        date_completed = parse_datetime(str(record['date_completed']))
+        if date_completed is None:
+            raise ValueError('invalid date_completed')
+        if date_completed.tzinfo is None:
+            date_completed = date_completed.replace(tzinfo=utc)
+        fields['dateCompleted'] = date_completed
+
+    unknown = set(record) - set(RECORD_FIELDS) - set(answer_fields)
+    if unknown:
+        raise ValueError('unknown fields {0}'.format(', '.join(sorted(unknown))))
+
+    for name, field in answer_fields.items():
+        if name in record:
+            fields[name] = field.clean(record[name], None)
+        elif field.has_default():
+            fields[name] = field.get_default()
+        elif field.null:
+            fields[name] = None
+        elif field.blank:
+            fields[name] = ''
+        else:
+            raise KeyError(name)
+
+    return key, int(record['task']), int(record['item']), str(record['user']), fields
+
+
+def import_results(result_type, records, imported_by=None, skip_invalid=False):
+    """
+    Imports batch of result records, returns ImportSummary.
+
+    Raises ResultImportError if any record is invalid, unless skip_invalid is
+    set, in which case valid records are imported and errors returned.
+    """
+    result_cls = get_result_class(result_type)
+    task_cls = result_cls._meta.get_field('task').related_model
+    answer_fields = _answer_fields(result_cls)
+
+    errors = []
+    cleaned = {}
+    duplicates = 0
+    for index, record in enumerate(records):
+        try:
+            key, task_id, item_id, username, fields = _clean_record(
+                record, answer_fields
+            )
+        except (KeyError, TypeError, ValueError, ValidationError) as exc:
+            errors.append('record {0}: {1}'.format(index, _error_message(exc)))
+            continue
+
+        if key in cleaned:
+            duplicates += 1
+            continue
+
+        cleaned[key] = (index, task_id, item_id, username, fields)
+
+    existing = _existing_keys(cleaned)
+    duplicates += len(existing)
+    for key in existing:
+        del cleaned[key]
+
+    pairs = {(x[1], x[2]) for x in cleaned.values()}
+    valid_pairs = _task_items(task_cls, pairs)
+    users = _users_by_name({x[3] for x in cleaned.values()})
+
+    results = []
+    keys = []
+    for key, (index, task_id, item_id, username, fields) in cleaned.items():
+        if (task_id, item_id) not in valid_pairs:
+            errors.append(
+                'record {0}: item {1} is not in task {2}'.format(
+                    index, item_id, task_id
+                )
+            )
+            continue
+
+        if username not in users:
+            errors.append('record {0}: unknown user {1!r}'.format(index, username))
+            continue
+
+        results.append(
+            result_cls(
+                task_id=task_id,
+                item_id=item_id,
+                createdBy=users[username],
+                activated=False,
+                completed=True,
+                **fields
+            )
+        )
+        keys.append(key)
+
+    if errors and not skip_invalid:
+        raise ResultImportError(errors[:MAX_REPORTED_ERRORS])
+
+    with transaction.atomic():
+        result_cls.objects.bulk_create(results, batch_size=LOOKUP_BATCH_SIZE)
+        # Raises IntegrityError if a concurrent import saved the same keys
+        ImportedResult.objects.bulk_create(
+            [
+                ImportedResult(
+                    idempotencyKey=key,
+                    resultType=result_cls.__name__,
+                    resultID=result.id,
+                    importedBy=imported_by,
+                )
+                for key, result in zip(keys, results)
+            ],
+            batch_size=LOOKUP_BATCH_SIZE,
+        )
+
+    LOGGER.info(
+        'Imported %s %s instances, skipped %s duplicates and %s invalid records',
+        len(results),
+        result_cls.__name__,
+        duplicates,
+        len(errors),
+    )
+    return ImportSummary(len(results), duplicates, errors[:MAX_REPORTED_ERRORS])
+
+
+def _error_message(exc):
+    if isinstance(exc, KeyError):
+        return 'missing field {0}'.format(exc.args[0])
+    if isinstance(exc, ValidationError):
+        return '; '.join(exc.messages)
+    return str(exc)
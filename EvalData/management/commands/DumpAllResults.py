@@ -8,6 +8,7 @@ from os.path import basename
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Appraise.routers import use_reporting_database
 from EvalData.models import DirectAssessmentResult
 from EvalData.models import MultiModalAssessmentResult
 
@@ -24,6 +25,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         pass
 
+    @use_reporting_database
     def handle(self, *args, **options):
         del args  # Unused.
         del options  # Unused.
@@ -9,7 +9,9 @@ from os.path import basename
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 
+from Appraise.routers import use_reporting_database
 from EvalData.models import DirectAssessmentResult
+from EvalData.models import stored_text
 
 # pylint: disable=E0401,W0611
 
@@ -24,6 +26,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('target_file', type=str, help='Path to target text file')
 
+    @use_reporting_database
     def handle(self, *args, **options):
         _msg = '\n[{0}]\n\n'.format(basename(__file__))
         self.stdout.write(_msg)
@@ -51,14 +54,20 @@ class Command(BaseCommand):
             'task__campaign__campaignName',
             'item__itemID',
             'item__itemType',
-            'item__sourceText',
+            'item_source_text',
             'item__sourceID',
-            'item__targetText',
+            'item_target_text',
             'item__targetID',
             'score',
             'item__metadata__market__sourceLanguageCode',
             'item__metadata__market__targetLanguageCode',
         )
+
+        # Item texts may be interned in TextContent
+        labels = labels.annotate(
+            item_source_text=stored_text('item__sourceText'),
+            item_target_text=stored_text('item__targetText'),
+        )
         for label_data in labels.order_by('-id').values_list(*label_values):
             result_id = label_data[0]
             date_created = label_data[1]
@@ -0,0 +1,120 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+import sys
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+
+from EvalData.ingestion import batched
+from EvalData.ingestion import get_result_class
+from EvalData.ingestion import import_results
+from EvalData.ingestion import read_csv
+from EvalData.ingestion import read_ndjson
+from EvalData.ingestion import ResultImportError
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = (
+        'Imports results collected on external platforms from NDJSON or CSV; '
+        'records with already imported idempotency keys are skipped'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'result_type',
+            type=str,
+            help='Result type, e.g., Direct or DirectAssessmentResult',
+        )
+
+        parser.add_argument(
+            'results_file',
+            type=str,
+            help='NDJSON or CSV file with results, use - for stdin',
+        )
+
+        parser.add_argument(
+            '--format',
+            choices=tuple(READERS),
+            default=None,
+            help='Input format, defaults to CSV for *.csv files, else NDJSON',
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of records imported per transaction',
+        )
+
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            default=False,
+            help='Import valid records of batches with invalid records',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            get_result_class(options['result_type'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        results_file = options['results_file']
+        input_format = options['format']
+        if input_format is None:
+            input_format = 'csv' if results_file.endswith('.csv') else 'ndjson'
+
+        if results_file == '-':
+            _import_file(sys.stdin, input_format, options, self.stdout)
+        else:
+            with open(results_file, encoding='utf-8', newline='') as in_file:
+                _import_file(in_file, input_format, options, self.stdout)
+
+
+def _import_file(in_file, input_format, options, stdout):
+    records = READERS[input_format](in_file)
+    created = duplicates = invalid = 0
+    try:
+        for batch_no, batch in enumerate(
+            batched(records, options['batch_size']), start=1
+        ):
+            summary = import_results(
+                options['result_type'], batch, skip_invalid=options['skip_invalid']
+            )
+            created += summary.created
+            duplicates += summary.duplicates
+            invalid += len(summary.errors)
+            for error in summary.errors:
+                stdout.write('Batch {0}, skipped {1}'.format(batch_no, error))
+
+    except ResultImportError as exc:
+        for error in exc.errors:
+            stdout.write(error)
+        raise CommandError(
+            'Invalid records, nothing imported from this batch; {0} results '
+            'were imported from earlier batches'.format(created)
+        )
+
+    except IntegrityError:
+        raise CommandError(
+            'Results of this batch were imported concurrently, nothing imported '
+            'from this batch; {0} results were imported from earlier batches. '
+            'Re-running the import is safe, imported results are skipped'.format(
+                created
+            )
+        )
+
+    stdout.write(
+        'Imported {0} results, skipped {1} duplicates and {2} invalid '
+        'records'.format(created, duplicates, invalid)
+    )
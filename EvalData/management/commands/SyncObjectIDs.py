@@ -0,0 +1,89 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from EvalData.models import AnnotationTaskRegistry
+from EvalData.models import CAMPAIGN_TASK_TYPES
+from EvalData.models import ObjectID
+from EvalData.models import TaskAgenda
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = 'Creates missing ObjectID instances for all annotation task types'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of ObjectID instances created per INSERT statement.',
+        )
+
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            default=False,
+            help='Delete ObjectID instances for types which do not maintain '
+            'them, e.g., assessment results, unless referenced by TaskAgenda.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for task_cls in CAMPAIGN_TASK_TYPES.values():
+            t1 = datetime.now()
+            created = _sync_object_ids(task_cls, batch_size)
+            t2 = datetime.now()
+
+            _msg = 'Created {0} ObjectID instances for {1} in {2}'.format(
+                created, task_cls.__name__, t2 - t1
+            )
+            self.stdout.write(_msg)
+
+        if options['prune']:
+            deleted = _prune_object_ids()
+            self.stdout.write('Deleted {0} unused ObjectID instances'.format(deleted))
+
+
+def _sync_object_ids(task_cls, batch_size=1000):
+    """Creates missing ObjectID instances for task_cls.
+
+    Computes missing IDs as set difference in Python, using one query for
+    the task IDs and one for existing ObjectID instances, then inserts the
+    remainder in batches. Returns the number of missing instances.
+    """
+    type_name = task_cls.__name__
+    task_ids = {str(x) for x in task_cls.objects.values_list('id', flat=True)}
+    known_ids = set(
+        ObjectID.objects.filter(typeName=type_name).values_list(
+            'primaryID', flat=True
+        )
+    )
+
+    missing_ids = sorted(task_ids - known_ids, key=int)
+    ObjectID.bulk_sync(type_name, missing_ids, batch_size=batch_size)
+    return len(missing_ids)
+
+
+def _prune_object_ids():
+    """Deletes ObjectID instances for unregistered, unreferenced types.
+
+    Returns the number of deleted instances.
+    """
+    referenced = Q(pk__in=TaskAgenda._open_tasks.through.objects.values('objectid'))
+    referenced |= Q(
+        pk__in=TaskAgenda._completed_tasks.through.objects.values('objectid')
+    )
+
+    unused = ObjectID.objects.exclude(
+        typeName__in=AnnotationTaskRegistry.get_types()
+    ).exclude(referenced)
+    deleted, _ = unused.delete()
+    return deleted
@@ -10,17 +10,18 @@ from os import path
 from django.contrib.auth.models import User
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
+from django.db import connections
 from django.db.models import Count
+from django.db.models import F
 from django.db.models import Q
+from django.db.models import Subquery
 from django.db.utils import OperationalError
 from django.db.utils import ProgrammingError
 
+from Campaign.models import Campaign
 from EvalData.models import Market
 from EvalData.models import Metadata
-from EvalData.models import MultiModalAssessmentResult
-from EvalData.models import MultiModalAssessmentTask
 from EvalData.models import TASK_DEFINITIONS
-from EvalData.models import TextPairWithImage
 
 
 INFO_MSG = 'INFO: '
@@ -31,13 +32,57 @@ class Command(BaseCommand):
     help = 'Updates object instances required for EvalData app'
 
     def add_arguments(self, parser):
-        pass
+        parser.add_argument(
+            '--campaign',
+            type=str,
+            default=None,
+            help='Only update tasks, items and results for this campaign name.',
+        )
 
     def handle(self, *args, **options):
-        _update_eval_data_models(self.stdout)
+        campaign = None
+        if options['campaign']:
+            try:
+                campaign = Campaign.get_campaign_or_raise(options['campaign'])
+            except LookupError as error:
+                raise CommandError(error)
+
+        _update_eval_data_models(self.stdout, campaign=campaign)
+
+
+def _update_queryset(queryset, **values):
+    """Updates all rows matched by queryset with a set-based UPDATE.
+
+    Rows are selected as UPDATE ... WHERE id IN (subquery), so that filters
+    across the task M2M and campaign relations never pull ids into Python.
+    Backends which cannot select from the updated table in a subquery get
+    explicit id lists instead, chunked to the backend's parameter limit.
+    Returns the number of updated rows.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    matched_ids = queryset.order_by().values('pk')
+
+    if connection.features.update_can_self_select:
+        return model.objects.filter(pk__in=Subquery(matched_ids)).update(**values)
+
+    updated = 0
+    ids = list(matched_ids.distinct().values_list('pk', flat=True))
+    batch_size = max(connection.ops.bulk_batch_size(['pk'], ids), 1)
+    for i in range(0, len(ids), batch_size):
+        updated += model.objects.filter(pk__in=ids[i : i + batch_size]).update(
+            **values
+        )
+    return updated
+
 
+def _update_eval_data_models(stdout, campaign=None):
+    """Activates tasks and items for active campaigns.
 
-def _update_eval_data_models(stdout):
+    Parameters:
+    - stdout:OutputWrapper used for status and timing output;
+    - campaign:Campaign only process rows for this campaign, or None.
+    """
     _msg = '\n[{0}]\n\n'.format(path.basename(__file__))
     stdout.write(_msg)
     stdout.write('\n[INIT]\n\n')
@@ -120,78 +165,66 @@ def _update_eval_data_models(stdout):
         result_name = result_cls.__name__
         item_name = item_cls.__name__
 
-        print('Processing {}/{}/{}'.format(task_name, result_name, item_name))
+        _msg = 'Processing {}/{}/{}'.format(task_name, result_name, item_name)
+        stdout.write(_msg)
+
+        tasks = task_cls.objects.all()
+        results = result_cls.objects.all()
+        items = item_cls.objects.filter(
+            **{evaldata_task_str + '__campaign__activated': True}
+        )
+        if campaign is not None:
+            tasks = tasks.filter(campaign=campaign)
+            results = results.filter(task__campaign=campaign)
+            items = items.filter(**{evaldata_task_str + '__campaign': campaign})
 
         t1 = datetime.now()
-        results = result_cls.objects.filter(completed=False)
-        results.update(activated=False, completed=True)
+        results = results.filter(completed=False)
+        updated = _update_queryset(results, activated=False, completed=True)
         t2 = datetime.now()
-        print('  Processed', result_name, 'instances', t2 - t1)
+        _msg = '  Processed {0} {1} instances {2}'.format(updated, result_name, t2 - t1)
+        stdout.write(_msg)
 
         bad_results = result_cls.objects.filter(Q(item=None) | Q(task=None))
-        print('  Identified bad', result_name, 'instances', bad_results.count())
+        _msg = '  Identified bad {0} instances {1}'.format(
+            result_name, bad_results.count()
+        )
+        stdout.write(_msg)
 
         #################################################################
         # Check which 'task_cls' instances can be activated.
         #
-        # Iterate over all tasks
         # If completed_items >= 100, complete task
         # Otherwise, if campagin active, activate items and task
-        activated_items = 0
-        completed_tasks = 0
-
-        tasks_to_complete = []
-        tasks_to_activate = []
-        items_to_activate = []
-
         t1 = datetime.now()
-        task_data = task_cls.objects.values(
-            'id', 'activated', 'completed', 'requiredAnnotations'
-        )
-        task_data = task_data.annotate(results=Count(evaldata_result_str))
-        for task in task_data:
-            if task['results'] >= 100 * task['requiredAnnotations']:
-                if task['activated']:
-                    tasks_to_complete.append(task['id'])
-                    completed_tasks += 1
-
-            elif task['completed']:
-                tasks_to_activate.append(task['id'])
+        task_data = tasks.annotate(results=Count(evaldata_result_str))
 
-        ttc = task_cls.objects.filter(id__in=tasks_to_complete)
-        ttc.update(activated=False, completed=True)
+        tasks_to_complete = task_data.filter(
+            activated=True, results__gte=100 * F('requiredAnnotations')
+        )
+        _update_queryset(tasks_to_complete, activated=False, completed=True)
 
-        tta = task_cls.objects.filter(id__in=tasks_to_activate)
-        tta.update(activated=True, completed=False)
+        tasks_to_activate = task_data.filter(
+            completed=True, results__lt=100 * F('requiredAnnotations')
+        )
+        _update_queryset(tasks_to_activate, activated=True, completed=False)
 
         t2 = datetime.now()
-        print('  Processed', task_name, 'instances', t2 - t1)
-
-        filters = {
-            evaldata_task_str + '__campaign__activated': True,
-            'activated': False,
-        }
-        item_data = item_cls.objects.filter(**filters)
-        
-        # Process items in smaller batches to avoid SQLite "too many variables" error
-        batch_size = 100  # SQLite limit is around 999 variables, so we use 100 to be safe
-        total_items = item_data.count()
-        if total_items > 0:
-            item_ids = list(item_data.values_list('id', flat=True))
-            for i in range(0, len(item_ids), batch_size):
-                batch_ids = item_ids[i:i + batch_size]
-                item_cls.objects.filter(id__in=batch_ids).update(activated=True)
-        else:
-            item_data.update(activated=True)
+        stdout.write('  Processed {0} instances {1}'.format(task_name, t2 - t1))
+
+        updated = _update_queryset(items.filter(activated=False), activated=True)
 
         t3 = datetime.now()
-        print('  Processed', item_name, 'instances', t3 - t2)
+        _msg = '  Processed {0} {1} instances {2}'.format(updated, item_name, t3 - t2)
+        stdout.write(_msg)
 
-        task_ids = task_cls.objects.filter(campaign__activated=True)
-        task_ids.update(activated=True)
+        updated = tasks.filter(campaign__activated=True).update(activated=True)
 
         t4 = datetime.now()
-        print('  Processed related', task_name, 'instances', t4 - t3)
+        _msg = '  Processed {0} related {1} instances {2}'.format(
+            updated, task_name, t4 - t3
+        )
+        stdout.write(_msg)
 
     #################################################################
     # Metrics Task language pairs
@@ -289,53 +322,4 @@ def _update_eval_data_models(stdout):
 
         stdout.write(_msg)
 
-    t1 = datetime.now()
-    task_data = MultiModalAssessmentTask.objects.values(
-        'id', 'activated', 'completed', 'requiredAnnotations'
-    )
-    task_data = task_data.annotate(
-        results=Count('evaldata_multimodalassessmentresults')
-    )
-    for task in task_data:
-        if task['results'] >= 100 * task['requiredAnnotations']:
-            if task['activated']:
-                tasks_to_complete.append(task['id'])
-                completed_tasks += 1
-
-        elif task['completed']:
-            tasks_to_activate.append(task['id'])
-
-    ttc = MultiModalAssessmentTask.objects.filter(id__in=tasks_to_complete)
-    ttc.update(activated=False, completed=True)
-
-    tta = MultiModalAssessmentTask.objects.filter(id__in=tasks_to_activate)
-    tta.update(activated=True, completed=False)
-
-    t2 = datetime.now()
-    print('Processed MultiModalAssessmentTask instances', t2 - t1)
-
-    item_data = TextPairWithImage.objects.filter(
-        evaldata_multimodalassessmenttasks__campaign__activated=True, activated=False
-    )
-    
-    # Process items in smaller batches to avoid SQLite "too many variables" error
-    batch_size = 100  # SQLite limit is around 999 variables, so we use 100 to be safe
-    total_items = item_data.count()
-    if total_items > 0:
-        item_ids = list(item_data.values_list('id', flat=True))
-        for i in range(0, len(item_ids), batch_size):
-            batch_ids = item_ids[i:i + batch_size]
-            TextPairWithImage.objects.filter(id__in=batch_ids).update(activated=True)
-    else:
-        item_data.update(activated=True)
-
-    t3 = datetime.now()
-    print('Processed TextPairWithImage instances', t3 - t2)
-
-    task_ids = MultiModalAssessmentTask.objects.filter(campaign__activated=True)
-    task_ids.update(activated=True)
-
-    t4 = datetime.now()
-    print('Processed related MultiModalAssessmentTask instances', t4 - t3)
-
     stdout.write('\n[DONE]\n\n')
@@ -0,0 +1,129 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+from datetime import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from EvalData.models import BaseMetadata
+from EvalData.models import related_values_cache
+
+
+# pylint: disable=C0111,C0330,E1101
+class Command(BaseCommand):
+    help = 'Fills in missing _str_name values for all BaseMetadata models'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            default=False,
+            help='Recompute _str_name for all instances, not only empty ones.',
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of instances updated per UPDATE statement.',
+        )
+
+    def handle(self, *args, **options):
+        for model in _get_models_in_dependency_order():
+            t1 = datetime.now()
+            # One cache per model, as names of related models change
+            with related_values_cache():
+                updated = _update_str_names(
+                    model, options['batch_size'], only_empty=not options['all']
+                )
+            t2 = datetime.now()
+
+            if updated:
+                _msg = 'Updated {0} {1} instances in {2}'.format(
+                    updated, model.__name__, t2 - t1
+                )
+                self.stdout.write(_msg)
+
+
+def _get_related_fields(model):
+    """Returns forward foreign keys of model pointing to BaseMetadata models."""
+    return [
+        field
+        for field in model._meta.get_fields()
+        if field.many_to_one
+        and field.concrete
+        and issubclass(field.related_model, BaseMetadata)
+        and field.related_model is not model
+    ]
+
+
+def _get_models_in_dependency_order():
+    """Returns BaseMetadata models, related models first.
+
+    Names of related instances are then available from the database,
+    e.g., Market names are computed before Metadata names.
+    """
+    models = [x for x in apps.get_models() if issubclass(x, BaseMetadata)]
+
+    depths = {}
+
+    def _depth(model):
+        if model not in depths:
+            depths[model] = 0
+            related = [_depth(x.related_model) for x in _get_related_fields(model)]
+            depths[model] = 1 + max(related, default=0)
+        return depths[model]
+
+    return sorted(models, key=lambda x: (_depth(x), x._meta.label))
+
+
+def _update_str_names(model, batch_size=1000, only_empty=True):
+    """Computes _str_name for instances of model and stores changed names.
+
+    Related instances are loaded via select_related(), updates are sent
+    as one set-based UPDATE statement per batch using bulk_update().
+    Returns the number of updated instances.
+    """
+    queryset = model.objects.all()
+    if only_empty:
+        queryset = queryset.filter(_str_name='')
+
+    # Rows of multi-table inheritance children are named after the child
+    for child in apps.get_models():
+        if model in child._meta.get_parent_list():
+            queryset = queryset.exclude(pk__in=child.objects.values('pk'))
+
+    related_names = [x.name for x in _get_related_fields(model)]
+    queryset = queryset.select_related(*related_names).order_by('pk')
+
+    updated = 0
+    last_pk = 0
+    while True:
+        # Keyset pagination, as we are writing to the table we iterate over
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        changed = []
+        for instance in batch:
+            _str_name = instance._generate_str_name()
+            if instance._str_name != _str_name:
+                instance._str_name = _str_name
+                changed.append(instance)
+
+        updated += _flush_str_names(model, changed)
+
+    return updated
+
+
+def _flush_str_names(model, instances):
+    """Stores _str_name for all instances, returns number of instances."""
+    if instances:
+        with transaction.atomic():
+            model.objects.bulk_update(instances, ['_str_name'])
+    return len(instances)
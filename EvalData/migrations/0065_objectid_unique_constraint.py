@@ -0,0 +1,66 @@
+# Generated by Django 4.1 on 2026-10-19 12:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_objectids(apps, schema_editor):
+    """
+    Merges duplicate (typeName, primaryID) rows into the oldest one.
+
+    TaskAgenda references to duplicates are moved to the kept instance
+    so that the unique constraint can be added safely.
+    """
+    ObjectID = apps.get_model('EvalData', 'ObjectID')
+    TaskAgenda = apps.get_model('EvalData', 'TaskAgenda')
+
+    duplicates = (
+        ObjectID.objects.values('typeName', 'primaryID')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+
+    for duplicate in duplicates:
+        drop_ids = list(
+            ObjectID.objects.filter(
+                typeName=duplicate['typeName'], primaryID=duplicate['primaryID']
+            )
+            .exclude(id=duplicate['keep_id'])
+            .values_list('id', flat=True)
+        )
+
+        for field_name in ('_open_tasks', '_completed_tasks'):
+            through = getattr(TaskAgenda, field_name).through
+            referencing = through.objects.filter(objectid_id__in=drop_ids)
+            agenda_ids = set(referencing.values_list('taskagenda_id', flat=True))
+            has_kept = set(
+                through.objects.filter(
+                    objectid_id=duplicate['keep_id'], taskagenda_id__in=agenda_ids
+                ).values_list('taskagenda_id', flat=True)
+            )
+            through.objects.bulk_create(
+                [
+                    through(taskagenda_id=x, objectid_id=duplicate['keep_id'])
+                    for x in agenda_ids - has_kept
+                ]
+            )
+            referencing.delete()
+
+        ObjectID.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EvalData', '0064_remove_pairwiseassessmentresult_selected_choices_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_objectids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='objectid',
+            constraint=models.UniqueConstraint(
+                fields=('typeName', 'primaryID'), name='unique_objectid_type_primary'
+            ),
+        ),
+    ]
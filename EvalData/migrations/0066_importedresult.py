@@ -0,0 +1,69 @@
+# Generated by Django 4.1 on 2026-10-19 14:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("EvalData", "0065_objectid_unique_constraint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportedResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "idempotencyKey",
+                    models.CharField(
+                        help_text="(max. 200 characters)",
+                        max_length=200,
+                        unique=True,
+                        verbose_name="Idempotency key",
+                    ),
+                ),
+                (
+                    "resultType",
+                    models.CharField(max_length=100, verbose_name="Result type"),
+                ),
+                (
+                    "resultID",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Result ID"
+                    ),
+                ),
+                (
+                    "dateCreated",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Date created"
+                    ),
+                ),
+                (
+                    "importedBy",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="%(app_label)s_%(class)s_imported_by",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Imported by",
+                    ),
+                ),
+            ],
+            options={
+                "permissions": (("import_results", "Can import results in bulk"),),
+            },
+        ),
+    ]
@@ -0,0 +1,212 @@
+# Generated by Django 4.1 on 2026-10-19 15:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("EvalData", "0066_importedresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TextContent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "contentHash",
+                    models.CharField(
+                        editable=False,
+                        help_text="(SHA-256, hex encoded)",
+                        max_length=64,
+                        unique=True,
+                        verbose_name="Content hash",
+                    ),
+                ),
+                ("text", models.TextField(verbose_name="Text")),
+            ],
+            options={
+                "verbose_name": "Text content",
+                "verbose_name_plural": "Text contents",
+            },
+        ),
+        migrations.AddField(
+            model_name="textpair",
+            name="sourceTextRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textpair",
+            name="targetTextRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textpairwithcontext",
+            name="sourceContextLeftRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textpairwithcontext",
+            name="sourceContextRightRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textpairwithcontext",
+            name="targetContextLeftRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textpairwithcontext",
+            name="targetContextRightRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegment",
+            name="segmentTextRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegmentwithtwotargets",
+            name="contextLeftRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegmentwithtwotargets",
+            name="contextRightRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegmentwithtwotargets",
+            name="target1ContextLeftRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegmentwithtwotargets",
+            name="target1TextRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegmentwithtwotargets",
+            name="target2ContextLeftRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+        migrations.AddField(
+            model_name="textsegmentwithtwotargets",
+            name="target2TextRef",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="EvalData.textcontent",
+            ),
+        ),
+    ]
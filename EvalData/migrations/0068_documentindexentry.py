@@ -0,0 +1,75 @@
+# Generated by Django 4.1 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("EvalData", "0067_textcontent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentIndexEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "taskType",
+                    models.CharField(
+                        help_text="(max. 100 characters)",
+                        max_length=100,
+                        verbose_name="Task type",
+                    ),
+                ),
+                ("taskID", models.PositiveIntegerField(verbose_name="Task ID")),
+                (
+                    "itemPrimaryID",
+                    models.PositiveIntegerField(verbose_name="Item primary ID"),
+                ),
+                (
+                    "documentID",
+                    models.CharField(
+                        help_text="(max. 100 characters)",
+                        max_length=100,
+                        verbose_name="Document ID",
+                    ),
+                ),
+                (
+                    "itemOrdinal",
+                    models.PositiveIntegerField(
+                        help_text="(0-based, within document)",
+                        verbose_name="Item ordinal",
+                    ),
+                ),
+                ("blockStart", models.PositiveIntegerField(verbose_name="Block start")),
+                ("blockEnd", models.PositiveIntegerField(verbose_name="Block end")),
+            ],
+            options={
+                "verbose_name": "Document index entry",
+                "verbose_name_plural": "Document index entries",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="documentindexentry",
+            constraint=models.UniqueConstraint(
+                fields=("taskType", "taskID", "itemPrimaryID"),
+                name="unique_documentindexentry_task_item",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="documentindexentry",
+            constraint=models.UniqueConstraint(
+                fields=("taskType", "taskID", "documentID", "itemOrdinal"),
+                name="unique_documentindexentry_task_ordinal",
+            ),
+        ),
+    ]
@@ -8,9 +8,11 @@ from .data_assessment import *
 from .direct_assessment import *
 from .direct_assessment_context import *
 from .direct_assessment_document import *
+from .document_index import *
 from .multi_modal_assessment import *
 from .pairwise_assessment import *
 from .pairwise_assessment_document import *
+from .result_import import *
 from .task_agenda import *
 
 # Task definitions: user-friendly name, task class, task result class, URL name
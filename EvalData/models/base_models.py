@@ -4,18 +4,29 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 # pylint: disable=C0103,C0330,no-member
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timezone
 
 utc = timezone.utc
 from datetime import datetime
 from datetime import timedelta
 from difflib import SequenceMatcher
+from hashlib import sha256
 from traceback import format_exc
+from typing import Any
+from typing import Dict
+from typing import Optional
 from typing import Set
+from typing import Tuple
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.db.models.query_utils import DeferredAttribute
 from django.utils.html import escape
 from django.utils.text import format_lazy as f
 from django.utils.translation import gettext_lazy as _
@@ -36,6 +47,10 @@ MAX_ITEMTYPE_LENGTH = 5
 MAX_REQUIREDANNOTATIONS_VALUE = 50
 MAX_TYPENAME_LENGTH = 100
 MAX_PRIMARYID_LENGTH = 50
+MAX_CONTENTHASH_LENGTH = 64
+
+# Maximum number of hashes per TextContent lookup, below SQLite's limit
+TEXT_LOOKUP_BATCH_SIZE = 500
 
 SET_ITEMTYPE_CHOICES = (
     ('SRC', 'Source text'),
@@ -47,6 +62,33 @@ SET_ITEMTYPE_CHOICES = (
 
 LOGGER = _get_logger(name=__name__)
 
+# Cached values of related objects used by _generate_str_name(), keyed by
+# (model label, primary key). Only set within related_values_cache().
+_RELATED_VALUES_CACHE = ContextVar(
+    'appraise_related_values_cache', default=None
+)  # type: ContextVar[Optional[Dict[Tuple[str, Any], Dict[Tuple, Tuple]]]]
+
+
+@contextmanager
+def related_values_cache():
+    """
+    Caches values of related objects fetched by _generate_str_name().
+
+    Use this around code naming many objects which share related objects,
+    e.g., rendering an admin changelist. Values are dropped when the block
+    exits, so later calls never see stale values. Nested blocks share the
+    outermost cache.
+    """
+    if _RELATED_VALUES_CACHE.get() is not None:
+        yield
+        return
+
+    token = _RELATED_VALUES_CACHE.set({})
+    try:
+        yield
+    finally:
+        _RELATED_VALUES_CACHE.reset(token)
+
 
 def seconds_to_timedelta(value):
     """
@@ -78,6 +120,38 @@ class ObjectID(models.Model):
         help_text=_(f('(max. {value} characters)', value=MAX_PRIMARYID_LENGTH)),
     )
 
+    # pylint: disable=C0111
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['typeName', 'primaryID'], name='unique_objectid_type_primary'
+            )
+        ]
+
+    @classmethod
+    def get_object_id(cls, instance):
+        """
+        Returns ObjectID instance for the given model instance, creating it if needed.
+        """
+        serialized, _ = cls.objects.get_or_create(
+            typeName=instance.__class__.__name__, primaryID=instance.id
+        )
+        return serialized
+
+    @classmethod
+    def bulk_sync(cls, type_name, primary_ids, batch_size=1000):
+        """
+        Creates missing ObjectID instances for the given type name and IDs.
+
+        Uses INSERT ... ON CONFLICT DO NOTHING, relying on the unique
+        constraint on (typeName, primaryID) instead of checking first.
+        """
+        return cls.objects.bulk_create(
+            [cls(typeName=type_name, primaryID=x) for x in primary_ids],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
     def get_object_instance(self):
         """
         Returns actual object instance for current ObjectID instance.
@@ -115,6 +189,176 @@ class ObjectID(models.Model):
         return str(self.id) + '.' + self.typeName + '.' + self.primaryID
 
 
+class TextContent(models.Model):
+    """
+    Stores segment texts once, keyed by their SHA-256 hash.
+
+    With TEXT_STORE enabled, importers move the texts of new items into
+    this table, so that a source sentence shared by all systems, batches
+    and redundant check items is only stored once. See ContentTextField.
+    """
+
+    contentHash = models.CharField(
+        editable=False,
+        max_length=MAX_CONTENTHASH_LENGTH,
+        unique=True,
+        verbose_name=_('Content hash'),
+        help_text=_('(SHA-256, hex encoded)'),
+    )
+
+    text = models.TextField(verbose_name=_('Text'))
+
+    # pylint: disable=C0111
+    class Meta:
+        verbose_name = 'Text content'
+        verbose_name_plural = 'Text contents'
+
+    @staticmethod
+    def hash_text(text):
+        """
+        Returns SHA-256 hash of the given text, hex encoded.
+        """
+        return sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def bulk_intern(cls, texts):
+        """
+        Returns dictionary mapping the given texts to TextContent IDs.
+
+        Texts which are not stored yet are inserted with INSERT ... ON
+        CONFLICT DO NOTHING, so concurrent imports of the same texts are
+        safe. Needs one query per TEXT_LOOKUP_BATCH_SIZE texts, plus the
+        same again for new texts.
+        """
+        texts_by_hash = {cls.hash_text(text): text for text in set(texts)}
+        text_ids = {}
+
+        def _lookup(hashes):
+            for start in range(0, len(hashes), TEXT_LOOKUP_BATCH_SIZE):
+                text_ids.update(
+                    cls.objects.filter(
+                        contentHash__in=hashes[start : start + TEXT_LOOKUP_BATCH_SIZE]
+                    ).values_list('contentHash', 'id')
+                )
+
+        _lookup(list(texts_by_hash))
+        missing = [x for x in texts_by_hash if x not in text_ids]
+        if missing:
+            cls.objects.bulk_create(
+                [cls(contentHash=x, text=texts_by_hash[x]) for x in missing],
+                batch_size=TEXT_LOOKUP_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            _lookup(missing)
+
+        return {text: text_ids[x] for x, text in texts_by_hash.items()}
+
+    @classmethod
+    def intern_items(cls, items):
+        """
+        Moves texts of the given unsaved items into TextContent.
+
+        Content text fields of each item are cleared and their references
+        set instead; attribute access still returns the text. Items still
+        need to be saved afterwards.
+        """
+        items = list(items)
+        texts = []
+        for item in items:
+            for field in item.content_text_fields():
+                text = item.__dict__.get(field.attname)
+                if text:
+                    texts.append(text)
+
+        text_ids = cls.bulk_intern(texts)
+        for item in items:
+            for field in item.content_text_fields():
+                text = item.__dict__.get(field.attname)
+                if text:
+                    setattr(item, field.ref_attname, text_ids[text])
+                    setattr(item, field.attname, None if field.null else '')
+
+    def __str__(self):
+        return self.contentHash
+
+
+class ContentTextDescriptor(DeferredAttribute):
+    """
+    Returns text of a ContentTextField, loading it from TextContent if the
+    text has been interned.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        value = super(ContentTextDescriptor, self).__get__(instance, cls)
+        if value or getattr(instance, self.field.ref_attname) is None:
+            return value
+
+        return getattr(instance, self.field.ref_name).text
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class ContentTextField(models.TextField):
+    """
+    Text field whose text may be kept in TextContent instead.
+
+    Interned texts leave the column empty and set the <name>Ref foreign
+    key, which the model has to define. Reading the attribute returns the
+    text in both cases, while saving writes the column as it is. Queries
+    which read texts with values() should use stored_text().
+    """
+
+    descriptor_class = ContentTextDescriptor
+
+    @property
+    def ref_name(self):
+        return '{0}Ref'.format(self.name)
+
+    @property
+    def ref_attname(self):
+        return '{0}Ref_id'.format(self.name)
+
+    def pre_save(self, model_instance, add):
+        return model_instance.__dict__.get(self.attname)
+
+    def deconstruct(self):
+        # Stored as a plain text column, keep migrations independent
+        name, _, args, kwargs = super(ContentTextField, self).deconstruct()
+        return name, 'django.db.models.TextField', args, kwargs
+
+
+def content_text_ref():
+    """
+    Returns foreign key to TextContent for a ContentTextField.
+
+    Not indexed, to keep item tables small; TextContent rows are never
+    deleted while referenced.
+    """
+    return models.ForeignKey(
+        TextContent,
+        blank=True,
+        db_index=False,
+        editable=False,
+        null=True,
+        on_delete=models.PROTECT,
+        related_name='+',
+    )
+
+
+def stored_text(path):
+    """
+    Returns expression for the text of a ContentTextField, e.g., for
+    stored_text('item__sourceText') in values() queries.
+    """
+    return Coalesce(
+        F('{0}Ref__text'.format(path)), F(path), output_field=models.TextField()
+    )
+
+
 class AnnotationTaskRegistry:
     """
     Keeps a registry of known annotation task types.
@@ -131,14 +375,17 @@ class AnnotationTaskRegistry:
         """
         _name = obj.__name__
         AnnotationTaskRegistry._ANNOTATION_TASK_REGISTRY.add(_name)
+
+        # Only task types are serialized into TaskAgenda instances
+        obj.MAINTAIN_OBJECT_ID = True
         return obj
 
     @staticmethod
     def get_types():
         """
-        Get annotation task types in registry.
+        Get annotation task types in registry, sorted by name.
         """
-        return AnnotationTaskRegistry._ANNOTATION_TASK_REGISTRY
+        return sorted(AnnotationTaskRegistry._ANNOTATION_TASK_REGISTRY)
 
 
 # pylint: disable=C0103,R0903
@@ -250,6 +497,10 @@ class BaseMetadata(models.Model):
 
     _str_name = models.TextField(blank=True, default="", editable=False)
 
+    # Set to True for models which need a matching ObjectID binding.
+    # Enabled for all @AnnotationTaskRegistry.register annotation tasks.
+    MAINTAIN_OBJECT_ID = False
+
     # pylint: disable=C0111
     class Meta:
         abstract = True
@@ -312,35 +563,113 @@ class BaseMetadata(models.Model):
         """
         return '{0}[{1}]'.format(self.__class__.__name__, self.id)
 
+    def _related_values(self, field_name, *value_names):
+        """
+        Returns tuple of value_names for the object related via field_name.
+
+        Uses the related instance if it has already been loaded, e.g., via
+        select_related(). Otherwise, values are fetched with values_list().
+        Within related_values_cache(), they are cached per related class
+        and primary key, so that generating names for many objects sharing
+        a related object needs one query.
+        """
+        field = self._meta.get_field(field_name)
+        if field.is_cached(self):
+            related = getattr(self, field_name)
+            if related is None:
+                return (None,) * len(value_names)
+            return tuple(getattr(related, x) for x in value_names)
+
+        related_id = getattr(self, field.attname)
+        if related_id is None:
+            return (None,) * len(value_names)
+
+        related_model = field.related_model
+        _cache = _RELATED_VALUES_CACHE.get()
+        _values = {}
+        if _cache is not None:
+            _values = _cache.setdefault((related_model._meta.label, related_id), {})
+
+        if value_names not in _values:
+            _related = (
+                related_model.objects.filter(pk=related_id)
+                .values_list(*value_names)
+                .first()
+            )
+            # Missing objects are not cached, they may be created later on
+            if _related is None:
+                return (None,) * len(value_names)
+            _values[value_names] = _related
+
+        return _values[value_names]
+
+    def _related_label(self, field_name):
+        """
+        Returns human readable name for the object related via field_name.
+
+        This does not trigger any writes; for BaseMetadata instances without
+        precomputed _str_name, the related instance is loaded once and its
+        name generated in memory.
+        """
+        field = self._meta.get_field(field_name)
+        related_model = field.related_model
+        if field.is_cached(self) or not issubclass(related_model, BaseMetadata):
+            return str(getattr(self, field_name))
+
+        _str_name = self._related_values(field_name, '_str_name')[0]
+        if not _str_name:
+            _str_name = str(getattr(self, field_name))
+        return _str_name
+
     def save(self, *args, **kwargs):
         """
         For object instances with an ID, we precompute the _str_name
         attribute so that future __str__() lookups are efficient.
 
-        Also, we ensure that a matching ObjectID binding is created.
+        New instances get their ID on insert only, so their _str_name is
+        stored with an additional update afterwards.
+
+        Also, for models with MAINTAIN_OBJECT_ID set, we ensure that a
+        matching ObjectID binding is created. This is a single upsert and
+        skipped for all other models, e.g., assessment results.
         """
+        _created = not self.id
         if self.id:
             _new_name = self._generate_str_name()
             if self._str_name != _new_name:
                 self._str_name = _new_name
 
-            qs = ObjectID.objects.filter(
-                typeName=self.__class__.__name__, primaryID=self.id
-            )
-            if not qs.exists():
-                _serialized = ObjectID.objects.create(
-                    typeName=self.__class__.__name__, primaryID=self.id
-                )
-                _msg = 'Created serialized ObjectID:{0}'.format(_serialized.id)
-                LOGGER.info(_msg)
+            # Values cached for the previous state are stale now
+            _cache = _RELATED_VALUES_CACHE.get()
+            if _cache is not None:
+                _cache.pop((self._meta.label, self.id), None)
 
         super(BaseMetadata, self).save(*args, **kwargs)
 
+        if _created and self.id:
+            self._store_str_name()
+
+        if self.MAINTAIN_OBJECT_ID and self.id:
+            ObjectID.bulk_sync(self.__class__.__name__, [self.id])
+
+    def _store_str_name(self):
+        """
+        Generates _str_name and stores it with a single-column update.
+
+        Unlike save(), this does not touch any other fields, related
+        objects or ObjectID bindings.
+        """
+        self._str_name = self._generate_str_name()
+        self.__class__._base_manager.filter(pk=self.id).update(_str_name=self._str_name)
+
     # pylint: disable=E1136
     def __str__(self):
-        if self._str_name == "":
-            # This will populate self._str_name
-            self.save()
+        if not self._str_name:
+            # Instances created with bulk_create() have no name yet. Saved
+            # instances store it once, unsaved ones compute it in memory.
+            if not self.id:
+                return self._generate_str_name()
+            self._store_str_name()
 
         return self._str_name
 
@@ -531,14 +860,32 @@ class Metadata(BaseMetadata):
         verbose_name = 'Metadata record'
 
     def _generate_str_name(self):
+        source, target = self._related_values(
+            'market', 'sourceLanguageCode', 'targetLanguageCode'
+        )
         return '{0}->{1}/{2}["{3}"]'.format(
-            self.market.sourceLanguageCode,
-            self.market.targetLanguageCode,
+            source,
+            target,
             self.corpusName,
             self.versionInfo,
         )
 
 
+class EvalItemManager(models.Manager):
+    """
+    Loads interned texts of evaluation items along with the items, if
+    TEXT_STORE is enabled.
+    """
+
+    def get_queryset(self):
+        queryset = super(EvalItemManager, self).get_queryset()
+        if getattr(settings, 'TEXT_STORE', False):
+            ref_names = [x.ref_name for x in self.model.content_text_fields()]
+            if ref_names:
+                queryset = queryset.select_related(*ref_names)
+        return queryset
+
+
 class EvalItem(BaseMetadata):
     """
     Abstract base class for evaluation data items.
@@ -546,6 +893,8 @@ class EvalItem(BaseMetadata):
     Models corresponding, 1-based, integer ID and metadata.
     """
 
+    objects = EvalItemManager()
+
     itemID = models.PositiveIntegerField(
         verbose_name=_('Item ID'), help_text=_('(1-based)')
     )
@@ -564,6 +913,17 @@ class EvalItem(BaseMetadata):
         abstract = True
         ordering = ['_str_name']
 
+    @classmethod
+    def content_text_fields(cls):
+        """
+        Returns fields whose texts can be interned in TextContent.
+        """
+        return [
+            field
+            for field in cls._meta.concrete_fields
+            if isinstance(field, ContentTextField)
+        ]
+
     # pylint: disable=E1101
     def is_valid(self):
         """
@@ -582,7 +942,7 @@ class EvalItem(BaseMetadata):
 
     def _generate_str_name(self):
         return '{0}.{1}[{2}]'.format(
-            self.__class__.__name__, self.metadata, self.itemID
+            self.__class__.__name__, self._related_label('metadata'), self.itemID
         )
 
 
@@ -597,12 +957,14 @@ class TextSegment(EvalItem):
         help_text=_(f('(max. {value} characters)', value=MAX_SEGMENTID_LENGTH)),
     )
 
-    segmentText = models.TextField(
+    segmentText = ContentTextField(
         max_length=MAX_SEGMENTTEXT_LENGTH,
         verbose_name=_('Segment text'),
         help_text=_(f('(max. {value} characters)', value=MAX_SEGMENTTEXT_LENGTH)),
     )
 
+    segmentTextRef = content_text_ref()
+
     # pylint: disable=E1101
     def is_valid(self):
         """
@@ -631,22 +993,26 @@ class TextPair(EvalItem):
         help_text=_(f('(max. {value} characters)', value=MAX_SEGMENTID_LENGTH)),
     )
 
-    sourceText = models.TextField(
+    sourceText = ContentTextField(
         blank=True,
         verbose_name=_('Source text'),
     )
 
+    sourceTextRef = content_text_ref()
+
     targetID = models.CharField(
         max_length=MAX_SEGMENTID_LENGTH,
         verbose_name=_('Target ID'),
         help_text=_(f('(max. {value} characters)', value=MAX_SEGMENTID_LENGTH)),
     )
 
-    targetText = models.TextField(
+    targetText = ContentTextField(
         blank=True,
         verbose_name=_('Target text'),
     )
 
+    targetTextRef = content_text_ref()
+
     # user for AI-assisted annotation
     mqm = models.TextField(
         blank=True,
@@ -687,11 +1053,13 @@ class TextSegmentWithTwoTargets(TextSegment):
         help_text=_(f('(max. {value} characters)', value=MAX_SEGMENTID_LENGTH)),
     )
 
-    target1Text = models.TextField(
+    target1Text = ContentTextField(
         blank=True,
         verbose_name=_('Text (1)'),
     )
 
+    target1TextRef = content_text_ref()
+
     target2ID = models.CharField(
         null=True,
         max_length=MAX_SEGMENTID_LENGTH,
@@ -699,29 +1067,39 @@ class TextSegmentWithTwoTargets(TextSegment):
         help_text=_(f('(max. {value} characters)', value=MAX_SEGMENTID_LENGTH)),
     )
 
-    target2Text = models.TextField(
+    target2Text = ContentTextField(
         blank=True,
         null=True,
         verbose_name=_('Text (2)'),
     )
 
+    target2TextRef = content_text_ref()
+
     # Source sentence context
-    contextLeft = models.TextField(
+    contextLeft = ContentTextField(
         blank=True, null=True, verbose_name=_('Context (left)')
     )
 
-    contextRight = models.TextField(
+    contextLeftRef = content_text_ref()
+
+    contextRight = ContentTextField(
         blank=True, null=True, verbose_name=_('Context (right)')
     )
 
-    target1ContextLeft = models.TextField(
+    contextRightRef = content_text_ref()
+
+    target1ContextLeft = ContentTextField(
         blank=True, null=True, verbose_name=_('Target context (1)')
     )
 
-    target2ContextLeft = models.TextField(
+    target1ContextLeftRef = content_text_ref()
+
+    target2ContextLeft = ContentTextField(
         blank=True, null=True, verbose_name=_('Target context (2)')
     )
 
+    target2ContextLeftRef = content_text_ref()
+
     def has_context(self):
         """Checks if the current segment has context provided."""
         return self.contextLeft or self.contextRight
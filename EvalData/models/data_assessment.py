@@ -10,6 +10,7 @@ from json import loads
 from zipfile import is_zipfile
 from zipfile import ZipFile
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils.text import format_lazy as f
@@ -23,6 +24,7 @@ from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
 from EvalData.models.base_models import MAX_SEGMENTID_LENGTH
 from EvalData.models.base_models import MAX_SEGMENTTEXT_LENGTH
 from EvalData.models.base_models import seconds_to_timedelta
+from EvalData.models.base_models import TextContent
 from EvalData.models.base_models import TextPair
 
 # TODO: Unclear if these are needed?
@@ -215,10 +217,11 @@ class DataAssessmentTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
+                LOGGER.debug(
+                    'identified next item: %s/%s for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType == 'TGT':
                     next_item = item
@@ -322,7 +325,7 @@ class DataAssessmentTask(BaseMetadata):
         )
 
         for active_task in active_tasks:
-            print(active_task)
+            LOGGER.debug('Active task: %s', active_task)
             active_users = active_task[2] or 0
             if active_users < active_task[1]:
                 return cls.objects.get(pk=active_task[0])
@@ -425,7 +428,9 @@ class DataAssessmentTask(BaseMetadata):
                 )
                 new_items.append(new_item)
 
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
+            if settings.TEXT_STORE:
+                TextContent.intern_items(new_items)
             current_count += 1
 
             # for new_item in new_items:
@@ -479,7 +484,9 @@ class DataAssessmentTask(BaseMetadata):
         return True
 
     def _generate_str_name(self):
-        return '{0}.{1}[{2}]'.format(self.__class__.__name__, self.campaign, self.id)
+        return '{0}.{1}[{2}]'.format(
+            self.__class__.__name__, self._related_label('campaign'), self.id
+        )
 
 
 class DataAssessmentResult(BaseMetadata):
@@ -528,7 +535,9 @@ class DataAssessmentResult(BaseMetadata):
 
     # pylint: disable=E1136
     def _generate_str_name(self):
-        return '{0}.{1}={2}'.format(self.__class__.__name__, self.item, self.score)
+        return '{0}.{1}={2}'.format(
+            self.__class__.__name__, self._related_label('item'), self.score
+        )
 
     def duration(self):
         d = self.end_time - self.start_time
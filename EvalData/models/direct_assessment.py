@@ -10,6 +10,7 @@ from json import loads
 from zipfile import is_zipfile
 from zipfile import ZipFile
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils.text import format_lazy as f
@@ -21,6 +22,7 @@ from EvalData.models.base_models import AnnotationTaskRegistry
 from EvalData.models.base_models import BaseMetadata
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
 from EvalData.models.base_models import seconds_to_timedelta
+from EvalData.models.base_models import TextContent
 from EvalData.models.base_models import TextPair
 
 LOGGER = _get_logger(name=__name__)
@@ -137,10 +139,11 @@ class DirectAssessmentTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
+                LOGGER.debug(
+                    'identified next item: %s/%s for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType == 'TGT':
                     next_item = item
@@ -177,6 +180,36 @@ class DirectAssessmentTask(BaseMetadata):
 
         return next_item
 
+    def next_items_for_user(self, user, count):
+        """
+        Returns up to count next items for user, in next_item_for_user() order.
+
+        Uses one query for all completed items instead of one per item and,
+        unlike next_item_for_user(), never completes the task.
+        """
+        trusted_user = self.is_trusted_user(user)
+        completed_item_ids = set(
+            DirectAssessmentResult.objects.filter(
+                item__in=self.items.all(),
+                activated=False,
+                completed=True,
+                createdBy=user,
+            ).values_list('item_id', flat=True)
+        )
+
+        next_items = []
+        for item in self.items.all().order_by('id'):
+            if len(next_items) >= count:
+                break
+
+            if item.id in completed_item_ids:
+                continue
+
+            if not trusted_user or item.itemType == 'TGT':
+                next_items.append(item)
+
+        return next_items
+
     @classmethod
     def get_task_for_user(cls, user):
         for active_task in cls.objects.filter(
@@ -213,7 +246,7 @@ class DirectAssessmentTask(BaseMetadata):
         )
 
         for active_task in active_tasks:
-            print(active_task)
+            LOGGER.debug('Active task: %s', active_task)
             active_users = active_task[2] or 0
             if active_users < active_task[1]:
                 return cls.objects.get(pk=active_task[0])
@@ -311,7 +344,9 @@ class DirectAssessmentTask(BaseMetadata):
                 )
                 new_items.append(new_item)
 
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
+            if settings.TEXT_STORE:
+                TextContent.intern_items(new_items)
             current_count += 1
             batch_meta.textpair_set.add(*new_items, bulk=False)
             batch_meta.save()
@@ -332,7 +367,7 @@ class DirectAssessmentTask(BaseMetadata):
                 f"Success processing batch {batch_data}, task {batch_task['task']['batchNo']}"
             )
 
-        LOGGER.info(f'Max length ID={max_length_id}, text={max_length_text}')
+        LOGGER.info('Max length ID=%s, text=%s', max_length_id, max_length_text)
 
         t2 = datetime.now()
         print(t2 - t1)
@@ -355,7 +390,7 @@ class DirectAssessmentTask(BaseMetadata):
         return True
 
     def _generate_str_name(self):
-        return f'{self.__class__.__name__}.{self.campaign}[{self.id}]'
+        return f'{self.__class__.__name__}.{self._related_label("campaign")}[{self.id}]'
 
 
 class DirectAssessmentResult(BaseMetadata):
@@ -397,7 +432,9 @@ class DirectAssessmentResult(BaseMetadata):
 
     # pylint: disable=E1136
     def _generate_str_name(self):
-        return '{0}.{1}={2} {3}'.format(self.__class__.__name__, self.item, self.score)
+        return '{0}.{1}={2}'.format(
+            self.__class__.__name__, self._related_label('item'), self.score
+        )
 
     def duration(self):
         d = self.end_time - self.start_time
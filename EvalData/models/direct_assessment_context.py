@@ -10,6 +10,7 @@ from json import loads
 from zipfile import is_zipfile
 from zipfile import ZipFile
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils.text import format_lazy as f
@@ -19,8 +20,11 @@ from Appraise.utils import _get_logger, _compute_user_total_annotation_time
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models.base_models import AnnotationTaskRegistry
 from EvalData.models.base_models import BaseMetadata
+from EvalData.models.base_models import content_text_ref
+from EvalData.models.base_models import ContentTextField
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
 from EvalData.models.base_models import seconds_to_timedelta
+from EvalData.models.base_models import TextContent
 from EvalData.models.base_models import TextPair
 
 # TODO: Unclear if these are needed?
@@ -49,22 +53,30 @@ class TextPairWithContext(TextPair):
         verbose_name=_('Complete document?'),
     )
 
-    sourceContextLeft = models.TextField(
+    sourceContextLeft = ContentTextField(
         blank=True, null=True, verbose_name=_('Source context (left)')
     )
 
-    sourceContextRight = models.TextField(
+    sourceContextLeftRef = content_text_ref()
+
+    sourceContextRight = ContentTextField(
         blank=True, null=True, verbose_name=_('Source context (right)')
     )
 
-    targetContextLeft = models.TextField(
+    sourceContextRightRef = content_text_ref()
+
+    targetContextLeft = ContentTextField(
         blank=True, null=True, verbose_name=_('Target context (left)')
     )
 
-    targetContextRight = models.TextField(
+    targetContextLeftRef = content_text_ref()
+
+    targetContextRight = ContentTextField(
         blank=True, null=True, verbose_name=_('Target context (right)')
     )
 
+    targetContextRightRef = content_text_ref()
+
     # pylint: disable=E1101
     def is_valid(self):
         """
@@ -184,10 +196,11 @@ class DirectAssessmentContextTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
+                LOGGER.debug(
+                    'identified next item: %s/%s for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType == 'TGT':
                     next_item = item
@@ -260,7 +273,7 @@ class DirectAssessmentContextTask(BaseMetadata):
         )
 
         for active_task in active_tasks:
-            print(active_task)
+            LOGGER.debug('Active task: %s', active_task)
             active_users = active_task[2] or 0
             if active_users < active_task[1]:
                 return cls.objects.get(pk=active_task[0])
@@ -363,7 +376,9 @@ class DirectAssessmentContextTask(BaseMetadata):
                 if item['isCompleteDocument']:
                     doc_items += 1
 
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
+            if settings.TEXT_STORE:
+                TextContent.intern_items(new_items)
             current_count += 1
 
             for new_item in new_items:
@@ -415,7 +430,9 @@ class DirectAssessmentContextTask(BaseMetadata):
         return True
 
     def _generate_str_name(self):
-        return '{0}.{1}[{2}]'.format(self.__class__.__name__, self.campaign, self.id)
+        return '{0}.{1}[{2}]'.format(
+            self.__class__.__name__, self._related_label('campaign'), self.id
+        )
 
 
 class DirectAssessmentContextResult(BaseMetadata):
@@ -457,7 +474,9 @@ class DirectAssessmentContextResult(BaseMetadata):
 
     # pylint: disable=E1136
     def _generate_str_name(self):
-        return '{0}.{1}={2}'.format(self.__class__.__name__, self.item, self.score)
+        return '{0}.{1}={2}'.format(
+            self.__class__.__name__, self._related_label('item'), self.score
+        )
 
     def duration(self):
         d = self.end_time - self.start_time
@@ -12,6 +12,7 @@ from json import loads
 from zipfile import is_zipfile
 from zipfile import ZipFile
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils.text import format_lazy as f
@@ -24,7 +25,9 @@ from EvalData.models.base_models import BaseAssessmentResult
 from EvalData.models.base_models import BaseMetadata
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
 from EvalData.models.base_models import seconds_to_timedelta
+from EvalData.models.base_models import TextContent
 from EvalData.models.direct_assessment_context import TextPairWithContext
+from EvalData.models.document_index import DocumentIndexEntry
 
 LOGGER = _get_logger(name=__name__)
 
@@ -147,10 +150,12 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'Identified next item: {}/{} (itemID={}) for trusted={}'.format(
-                        item.id, item.itemType, item.itemID, trusted_user
-                    )
+                LOGGER.debug(
+                    'Identified next item: %s/%s (itemID=%s) for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    item.itemID,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType == 'TGT':
                     next_item = item
@@ -201,21 +206,8 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             else:
                 return (next_item, completed_items, 0, 0, [], [], 0)
 
-        # Retrieve all items from the document which next_item belongs to
-        _items = self.items.filter(
-            documentID=next_item.documentID,
-        ).order_by('id')
-
-        block_items = []
-        current_block = False
-        for item in _items:
-            block_items.append(item)
-            if item.id == next_item.id:
-                current_block = True
-            if item.isCompleteDocument:
-                if current_block:
-                    break
-                block_items.clear()
+        # Retrieve all items from the document block which next_item belongs to
+        block_items = DocumentIndexEntry.block_items(self, next_item)
 
         # Get results for completed items in this block
         block_results = self.get_results_for_each_item(block_items, user)
@@ -235,8 +227,14 @@ class DirectAssessmentDocumentTask(BaseMetadata):
         ).count()
         total_blocks = self.items.filter(isCompleteDocument=True).count()
 
-        print(
-            f'Completed {completed_blocks}/{total_blocks} documents, {completed_items_in_block}/{len(block_items)} items in the current document, completed {completed_items} items in total'
+        LOGGER.debug(
+            'Completed %s/%s documents, %s/%s items in the current document, '
+            'completed %s items in total',
+            completed_blocks,
+            total_blocks,
+            completed_items_in_block,
+            len(block_items),
+            completed_items,
         )
 
         return (
@@ -262,16 +260,15 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             total_docs,
         """
 
-        # get all items (100) and try to find resul
-        all_items = [
-            (
-                item, 
-                DirectAssessmentDocumentResult.objects.filter(
-                    item=item, activated=False, completed=True, createdBy=user
-                ).last()
-            )
-            for item in self.items.all().order_by('id')
-        ]
+        # get all items (100) and the last result for each, using one query
+        # for results instead of one per item
+        items = list(self.items.all().order_by('id'))
+        last_results = {}
+        for result in DirectAssessmentDocumentResult.objects.filter(
+            item__in=items, activated=False, completed=True, createdBy=user
+        ).order_by('_str_name', 'id'):
+            last_results[result.item_id] = result
+        all_items = [(item, last_results.get(item.id)) for item in items]
         unfinished_items = [i for i, r in all_items if not r]
         
         docs_total = len({i.documentID for i, r in all_items})
@@ -302,9 +299,11 @@ class DirectAssessmentDocumentTask(BaseMetadata):
         doc_items = [i for i, r in doc_items_all]
         doc_items_results = [r for i, r in doc_items_all]
 
-        print(
-            f'Completed {docs_completed}/{docs_total} documents, '
-            f'completed {items_completed} items in total'
+        LOGGER.debug(
+            'Completed %s/%s documents, completed %s items in total',
+            docs_completed,
+            docs_total,
+            items_completed,
         )
 
         return (
@@ -318,28 +317,23 @@ class DirectAssessmentDocumentTask(BaseMetadata):
 
     def get_results_for_each_item(self, block_items, user):
         """Returns the latest result object for each item or none."""
-        # TODO: optimize, this possibly makes too many individual queries
-        block_results = []
-
-        for item in block_items:
-            result = (
-                DirectAssessmentDocumentResult.objects.filter(
-                    item__id=item.id,
-                    completed=True,
-                    createdBy=user,
-                    task=self,
-                )
-                .order_by('item__id', 'dateModified')
-                .first()
-            )
-            block_results.append(result)
+        # Earliest modified result of each item, for all items in one query
+        results = {}
+        for result in DirectAssessmentDocumentResult.objects.filter(
+            item__id__in=[item.id for item in block_items],
+            completed=True,
+            createdBy=user,
+            task=self,
+        ).order_by('dateModified', 'id'):
+            results.setdefault(result.item_id, result)
+        block_results = [results.get(item.id) for item in block_items]
 
         # Sanity checks for items and results
         if len(block_items) != len(block_results):
-            print('Warning: incorrect number of retrieved results!')
+            LOGGER.warning('Incorrect number of retrieved results!')
         for item, result in zip(block_items, block_results):
-            if result and item.id != result.item.id:
-                print('Warning: incorrect order of items and results!')
+            if result and item.id != result.item_id:
+                LOGGER.warning('Incorrect order of items and results!')
 
         return block_results
 
@@ -458,7 +452,9 @@ class DirectAssessmentDocumentTask(BaseMetadata):
                 if item['isCompleteDocument']:
                     doc_items += 1
             
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
+            if settings.TEXT_STORE:
+                TextContent.intern_items(new_items)
             current_count += 1
 
             for new_item in new_items:
@@ -480,6 +476,7 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             #    new_task.items.add(new_item)
             new_task.items.add(*new_items)
             new_task.save()
+            DocumentIndexEntry.build(new_task, new_items)
 
             _msg = 'Success processing batch {0}, task {1}'.format(
                 str(batch_data), batch_task['task']['batchNo']
@@ -510,7 +507,9 @@ class DirectAssessmentDocumentTask(BaseMetadata):
         return True
 
     def _generate_str_name(self):
-        return '{0}.{1}[{2}]'.format(self.__class__.__name__, self.campaign, self.id)
+        return '{0}.{1}[{2}]'.format(
+            self.__class__.__name__, self._related_label('campaign'), self.id
+        )
 
 
 class DirectAssessmentDocumentResult(BaseAssessmentResult):
@@ -556,7 +555,9 @@ class DirectAssessmentDocumentResult(BaseAssessmentResult):
 
     # pylint: disable=E1136
     def _generate_str_name(self):
-        return '{0}.{1}={2}'.format(self.__class__.__name__, self.item, self.score)
+        return '{0}.{1}={2}'.format(
+            self.__class__.__name__, self._related_label('item'), self.score
+        )
 
     def duration(self):
         d = self.end_time - self.start_time
@@ -0,0 +1,162 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+# pylint: disable=C0103,C0330,no-member
+from django.db import models
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils.text import format_lazy as f
+from django.utils.translation import gettext_lazy as _
+
+from Appraise.utils import _get_logger
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+
+# Identical to the document ID length of document-level items
+MAX_DOCUMENTID_LENGTH = 100
+
+LOGGER = _get_logger(name=__name__)
+
+
+class DocumentIndexEntry(models.Model):
+    """
+    Position of an item within the documents of a document-level task.
+
+    Items of each document are numbered in the order of their IDs. A
+    document block ends with an item marked as complete document, and
+    blockStart, blockEnd are the numbers of its first and last item, so
+    a block is fetched as a range of numbers. The index is built when
+    tasks are imported, see build().
+    """
+
+    taskType = models.CharField(
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Task type'),
+        help_text=_(f('(max. {value} characters)', value=MAX_TYPENAME_LENGTH)),
+    )
+
+    taskID = models.PositiveIntegerField(verbose_name=_('Task ID'))
+
+    itemPrimaryID = models.PositiveIntegerField(verbose_name=_('Item primary ID'))
+
+    documentID = models.CharField(
+        max_length=MAX_DOCUMENTID_LENGTH,
+        verbose_name=_('Document ID'),
+        help_text=_(f('(max. {value} characters)', value=MAX_DOCUMENTID_LENGTH)),
+    )
+
+    itemOrdinal = models.PositiveIntegerField(
+        verbose_name=_('Item ordinal'), help_text=_('(0-based, within document)')
+    )
+
+    blockStart = models.PositiveIntegerField(verbose_name=_('Block start'))
+
+    blockEnd = models.PositiveIntegerField(verbose_name=_('Block end'))
+
+    # pylint: disable=C0111
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['taskType', 'taskID', 'itemPrimaryID'],
+                name='unique_documentindexentry_task_item',
+            ),
+            models.UniqueConstraint(
+                fields=['taskType', 'taskID', 'documentID', 'itemOrdinal'],
+                name='unique_documentindexentry_task_ordinal',
+            ),
+        ]
+        verbose_name = 'Document index entry'
+        verbose_name_plural = 'Document index entries'
+
+    @classmethod
+    def for_task(cls, task):
+        """
+        Returns index entries of the given task.
+        """
+        return cls.objects.filter(taskType=task.__class__.__name__, taskID=task.id)
+
+    @classmethod
+    def build(cls, task, items=None):
+        """
+        Builds index for the given task, replacing existing entries.
+
+        Items are the task's saved items, which are loaded if not given;
+        only their id, documentID and isCompleteDocument are used.
+        """
+        if items is None:
+            rows = task.items.values_list('id', 'documentID', 'isCompleteDocument')
+        else:
+            rows = [(x.id, x.documentID, x.isCompleteDocument) for x in items]
+
+        entries = []
+        documents = {}
+        for item_id, document_id, is_complete_document in sorted(rows):
+            # First ordinal and entries of the open block of each document
+            block = documents.setdefault(document_id, [0, []])
+            entry = cls(
+                taskType=task.__class__.__name__,
+                taskID=task.id,
+                itemPrimaryID=item_id,
+                documentID=document_id,
+                itemOrdinal=block[0] + len(block[1]),
+                blockStart=block[0],
+            )
+            block[1].append(entry)
+            entries.append(entry)
+
+            if is_complete_document:
+                cls._close_block(block)
+
+        for block in documents.values():
+            if block[1]:
+                cls._close_block(block)
+
+        with transaction.atomic():
+            cls.for_task(task).delete()
+            cls.objects.bulk_create(entries, batch_size=500)
+
+        return entries
+
+    @staticmethod
+    def _close_block(block):
+        block_end = block[0] + len(block[1]) - 1
+        for entry in block[1]:
+            entry.blockEnd = block_end
+        block[0] = block_end + 1
+        block[1] = []
+
+    @classmethod
+    def block_items(cls, task, item):
+        """
+        Returns items of the document block containing the given item.
+
+        Items are fetched by ordinal range in one query. The index is
+        (re)built if it is missing or does not contain the item, e.g., for
+        tasks imported before the index existed.
+        """
+        items = cls._query_block_items(task, item)
+        if not any(x.id == item.id for x in items):
+            LOGGER.info('Building document index for task %s', task.id)
+            cls.build(task)
+            items = cls._query_block_items(task, item)
+
+        return items
+
+    @classmethod
+    def _query_block_items(cls, task, item):
+        entries = cls.for_task(task)
+        current = entries.filter(itemPrimaryID=item.id)
+        block = entries.filter(
+            documentID=item.documentID,
+            itemOrdinal__gte=Subquery(current.values('blockStart')[:1]),
+            itemOrdinal__lte=Subquery(current.values('blockEnd')[:1]),
+        )
+        return list(
+            task.items.filter(id__in=block.values('itemPrimaryID')).order_by('id')
+        )
+
+    def __str__(self):
+        return '{0}[{1}].{2}[{3}]'.format(
+            self.taskType, self.taskID, self.documentID, self.itemOrdinal
+        )
@@ -197,10 +197,11 @@ class MultiModalAssessmentTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
+                LOGGER.debug(
+                    'identified next item: %s/%s for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType == 'TGT':
                     next_item = item
@@ -237,6 +238,36 @@ class MultiModalAssessmentTask(BaseMetadata):
 
         return next_item
 
+    def next_items_for_user(self, user, count):
+        """
+        Returns up to count next items for user, in next_item_for_user() order.
+
+        Uses one query for all completed items instead of one per item and,
+        unlike next_item_for_user(), never completes the task.
+        """
+        trusted_user = self.is_trusted_user(user)
+        completed_item_ids = set(
+            MultiModalAssessmentResult.objects.filter(
+                item__in=self.items.all(),
+                activated=False,
+                completed=True,
+                createdBy=user,
+            ).values_list('item_id', flat=True)
+        )
+
+        next_items = []
+        for item in self.items.all().order_by('id'):
+            if len(next_items) >= count:
+                break
+
+            if item.id in completed_item_ids:
+                continue
+
+            if not trusted_user or item.itemType == 'TGT':
+                next_items.append(item)
+
+        return next_items
+
     @classmethod
     def get_task_for_user(cls, user):
         for active_task in cls.objects.filter(
@@ -261,7 +292,12 @@ class MultiModalAssessmentTask(BaseMetadata):
 
         for active_task in active_tasks.order_by('id'):
             active_users = active_task.assignedTo.count()
-            print(active_users, active_task.requiredAnnotations)
+            LOGGER.debug(
+                'Task %s has %s/%s annotators',
+                active_task.id,
+                active_users,
+                active_task.requiredAnnotations,
+            )
             if active_users < active_task.requiredAnnotations:
                 if user and not user in active_task.assignedTo.all():
                     return active_task
@@ -344,7 +380,7 @@ class MultiModalAssessmentTask(BaseMetadata):
                 )
                 new_items.append(new_item)
 
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
             current_count += 1
 
             # for new_item in new_items:
@@ -398,7 +434,7 @@ class MultiModalAssessmentTask(BaseMetadata):
     # pylint: disable=E1136
     def _generate_str_name(self):
         return '{0}.{1}[1..{2}]'.format(
-            self.__class__.__name__, self.campaign, self.items.count()
+            self.__class__.__name__, self._related_label('campaign'), self.items.count()
         )
 
 
@@ -441,7 +477,9 @@ class MultiModalAssessmentResult(BaseMetadata):
 
     # pylint: disable=E1136
     def _generate_str_name(self):
-        return '{0}.{1}={2}'.format(self.__class__.__name__, self.item, self.score)
+        return '{0}.{1}={2}'.format(
+            self.__class__.__name__, self._related_label('item'), self.score
+        )
 
     def duration(self):
         d = self.end_time - self.start_time
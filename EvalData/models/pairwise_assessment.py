@@ -14,6 +14,7 @@ from zipfile import ZipFile
 from datetime import timezone
 
 utc = timezone.utc
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
@@ -142,10 +143,11 @@ class PairwiseAssessmentTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
+                LOGGER.debug(
+                    'identified next item: %s/%s for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType.startswith('TGT'):
                     next_item = item
@@ -182,6 +184,36 @@ class PairwiseAssessmentTask(BaseMetadata):
 
         return next_item
 
+    def next_items_for_user(self, user, count):
+        """
+        Returns up to count next items for user, in next_item_for_user() order.
+
+        Uses one query for all completed items instead of one per item and,
+        unlike next_item_for_user(), never completes the task.
+        """
+        trusted_user = self.is_trusted_user(user)
+        completed_item_ids = set(
+            PairwiseAssessmentResult.objects.filter(
+                item__in=self.items.all(),
+                activated=False,
+                completed=True,
+                createdBy=user,
+            ).values_list('item_id', flat=True)
+        )
+
+        next_items = []
+        for item in self.items.all().order_by('id'):
+            if len(next_items) >= count:
+                break
+
+            if item.id in completed_item_ids:
+                continue
+
+            if not trusted_user or item.itemType.startswith('TGT'):
+                next_items.append(item)
+
+        return next_items
+
     @classmethod
     def get_task_for_user(cls, user):
         for active_task in cls.objects.filter(
@@ -195,9 +227,12 @@ class PairwiseAssessmentTask(BaseMetadata):
 
     @classmethod
     def get_next_free_task_for_language(cls, code, campaign=None, user=None):
-        print('  Looking for next free task for language: {0}'.format(code))
-        print('  Campaign: {0}'.format(campaign))
-        print('  User: {0}'.format(user))
+        LOGGER.debug(
+            'Looking for next free task for language: %s, campaign: %s, user: %s',
+            code,
+            campaign,
+            user,
+        )
 
         active_tasks = cls.objects.filter(
             activated=True,
@@ -205,7 +240,7 @@ class PairwiseAssessmentTask(BaseMetadata):
             items__metadata__market__targetLanguageCode=code,
         )
 
-        print('    Number of active tasks: ({0})'.format(len(active_tasks)))
+        LOGGER.debug('Number of active tasks: %s', len(active_tasks))
 
         if campaign:
             active_tasks = active_tasks.filter(campaign=campaign)
@@ -216,7 +251,7 @@ class PairwiseAssessmentTask(BaseMetadata):
                 if user and not user in active_task.assignedTo.all():
                     return active_task
 
-        print('    No next free task available')
+        LOGGER.debug('No next free task available')
         return None
 
         # It seems that assignedTo is converted to an integer count.
@@ -225,7 +260,7 @@ class PairwiseAssessmentTask(BaseMetadata):
         )
 
         for active_task in active_tasks:
-            print(active_task)
+            LOGGER.debug('Active task: %s', active_task)
             active_users = active_task[2] or 0
             if active_users < active_task[1]:
                 return cls.objects.get(pk=active_task[0])
@@ -342,7 +377,9 @@ class PairwiseAssessmentTask(BaseMetadata):
                 )
                 new_items.append(new_item)
             
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
+            if settings.TEXT_STORE:
+                TextContent.intern_items(new_items)
             current_count += 1
 
             # Process items in smaller batches to avoid SQLite "too many variables" error
@@ -396,7 +433,9 @@ class PairwiseAssessmentTask(BaseMetadata):
         return True
 
     def _generate_str_name(self):
-        return '{0}.{1}[{2}]'.format(self.__class__.__name__, self.campaign, self.id)
+        return '{0}.{1}[{2}]'.format(
+            self.__class__.__name__, self._related_label('campaign'), self.id
+        )
 
 
 class PairwiseAssessmentResult(BasePairwiseAssessmentResult):
@@ -587,7 +626,7 @@ class PairwiseAssessmentResult(BasePairwiseAssessmentResult):
     def _generate_str_name(self):
         return '{0}.{1}={2}+{3}'.format(
             self.__class__.__name__,
-            self.item,
+            self._related_label('item'),
             self.score1,
             self.score2,
         )
@@ -940,13 +979,18 @@ class PairwiseAssessmentResult(BasePairwiseAssessmentResult):
         if not include_inactive:
             qs = qs.filter(createdBy__is_active=True)
 
+        qs = qs.annotate(
+            item_target1_text=stored_text('item__target1Text'),
+            item_target2_text=stored_text('item__target2Text'),
+        )
+
         attributes_to_extract = (
             'item__segmentID',   # 0
             'createdBy__username',  # 1
             'item__target1ID',  # 2
-            'item__target1Text',  # 3
+            'item_target1_text',  # 3
             'item__target2ID',  # 4
-            'item__target2Text', # 5
+            'item_target2_text', # 5
             'item__itemID',     # 6
             'item__itemType',   # 7
             'item__metadata__market__sourceLanguageCode',  # 8
@@ -10,6 +10,7 @@ from json import loads
 from zipfile import is_zipfile
 from zipfile import ZipFile
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils.text import format_lazy as f
@@ -21,7 +22,9 @@ from EvalData.models.base_models import AnnotationTaskRegistry
 from EvalData.models.base_models import BaseMetadata
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
 from EvalData.models.base_models import seconds_to_timedelta
+from EvalData.models.base_models import TextContent
 from EvalData.models.base_models import TextSegmentWithTwoTargets
+from EvalData.models.document_index import DocumentIndexEntry
 
 # TODO: Unclear if these are needed?
 # from Appraise.settings import STATIC_URL, BASE_CONTEXT
@@ -175,10 +178,12 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
             )
 
             if not result.exists():
-                print(
-                    'Identified next item: {}/{} (itemID={}) for trusted={}'.format(
-                        item.id, item.itemType, item.itemID, trusted_user
-                    )
+                LOGGER.debug(
+                    'Identified next item: %s/%s (itemID=%s) for trusted=%s',
+                    item.id,
+                    item.itemType,
+                    item.itemID,
+                    trusted_user,
                 )
                 if not trusted_user or item.itemType == 'TGT':
                     next_item = item
@@ -228,21 +233,8 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
                 return (next_item, [], [])
             return (next_item, completed_items, 0, 0, [], [], 0)
 
-        # Retrieve all items from the document which next_item belongs to
-        _items = self.items.filter(
-            documentID=next_item.documentID,
-        ).order_by('id')
-
-        block_items = []
-        current_block = False
-        for item in _items:
-            block_items.append(item)
-            if item.id == next_item.id:
-                current_block = True
-            if item.isCompleteDocument:
-                if current_block:
-                    break
-                block_items.clear()
+        # Retrieve all items from the document block which next_item belongs to
+        block_items = DocumentIndexEntry.block_items(self, next_item)
 
         # Get results for completed items in this block
         block_results = self.get_results_for_each_item(block_items, user)
@@ -262,14 +254,14 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
         ).count()
         total_blocks = self.items.filter(isCompleteDocument=True).count()
 
-        print(
-            'Completed {}/{} documents, {}/{} items in the current document, completed {} items in total'.format(
-                completed_blocks,
-                total_blocks,
-                completed_items_in_block,
-                len(block_items),
-                completed_items,
-            )
+        LOGGER.debug(
+            'Completed %s/%s documents, %s/%s items in the current document, '
+            'completed %s items in total',
+            completed_blocks,
+            total_blocks,
+            completed_items_in_block,
+            len(block_items),
+            completed_items,
         )
 
         return (
@@ -284,29 +276,24 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
 
     def get_results_for_each_item(self, block_items, user):
         """Returns the latest result object for each item or none."""
-        # TODO: optimize, this possibly makes too many individual queries
-        block_results = []
-
-        for item in block_items:
-            result = (
-                PairwiseAssessmentDocumentResult.objects.filter(
-                    item__id=item.id,
-                    completed=True,
-                    createdBy=user,  # TODO: is passing user as an argument needed?
-                    task=self,
-                )
-                .order_by('item__id', 'dateModified')
-                .first()
-            )
-            block_results.append(result)
+        # Earliest modified result of each item, for all items in one query
+        results = {}
+        for result in PairwiseAssessmentDocumentResult.objects.filter(
+            item__id__in=[item.id for item in block_items],
+            completed=True,
+            createdBy=user,
+            task=self,
+        ).order_by('dateModified', 'id'):
+            results.setdefault(result.item_id, result)
+        block_results = [results.get(item.id) for item in block_items]
 
         # Sanity checks for items and results
         if len(block_items) != len(block_results):
-            print('Warning: incorrect number of retrieved results!')
+            LOGGER.warning('Incorrect number of retrieved results!')
         for item, result in zip(block_items, block_results):
             # print(f'  >> item={item} result={result}')
-            if result and item.id != result.item.id:
-                print('Warning: incorrect order of items and results!')
+            if result and item.id != result.item_id:
+                LOGGER.warning('Incorrect order of items and results!')
 
         return block_results
 
@@ -346,7 +333,7 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
         )
 
         for active_task in active_tasks:
-            print(active_task)
+            LOGGER.debug('Active task: %s', active_task)
             active_users = active_task[2] or 0
             if active_users < active_task[1]:
                 return cls.objects.get(pk=active_task[0])
@@ -471,7 +458,9 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
                 if item['isCompleteDocument']:
                     doc_items += 1
             
-            LOGGER.info(f'The task has {len(new_items)} items')
+            LOGGER.info('The task has %s items', len(new_items))
+            if settings.TEXT_STORE:
+                TextContent.intern_items(new_items)
             current_count += 1
 
             for new_item in new_items:
@@ -493,6 +482,7 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
             #    new_task.items.add(new_item)
             new_task.items.add(*new_items)
             new_task.save()
+            DocumentIndexEntry.build(new_task, new_items)
 
             _msg = 'Success processing batch {0}, task {1}'.format(
                 str(batch_data), batch_task['task']['batchNo']
@@ -523,7 +513,9 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
         return True
 
     def _generate_str_name(self):
-        return '{0}.{1}[{2}]'.format(self.__class__.__name__, self.campaign, self.id)
+        return '{0}.{1}[{2}]'.format(
+            self.__class__.__name__, self._related_label('campaign'), self.id
+        )
 
 
 class PairwiseAssessmentDocumentResult(BaseMetadata):
@@ -575,7 +567,7 @@ class PairwiseAssessmentDocumentResult(BaseMetadata):
     def _generate_str_name(self):
         return '{0}.{1}={2}+{3}'.format(
             self.__class__.__name__,
-            self.item,
+            self._related_label('item'),
             self.score1,
             self.score2,
         )
@@ -0,0 +1,60 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+# pylint: disable=C0103,C0330,no-member
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils.text import format_lazy as f
+from django.utils.translation import gettext_lazy as _
+
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+
+MAX_IDEMPOTENCYKEY_LENGTH = 200
+
+
+class ImportedResult(models.Model):
+    """
+    Idempotency key of a result imported from an external platform.
+
+    Keys are unique, so importing the same judgement again is detected and
+    skipped, see EvalData/ingestion.py.
+    """
+
+    idempotencyKey = models.CharField(
+        max_length=MAX_IDEMPOTENCYKEY_LENGTH,
+        unique=True,
+        verbose_name=_('Idempotency key'),
+        help_text=_(f('(max. {value} characters)', value=MAX_IDEMPOTENCYKEY_LENGTH)),
+    )
+
+    resultType = models.CharField(
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Result type'),
+    )
+
+    # Not available on databases which cannot return bulk inserted IDs
+    resultID = models.PositiveIntegerField(
+        blank=True, null=True, verbose_name=_('Result ID')
+    )
+
+    importedBy = models.ForeignKey(
+        User,
+        models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='%(app_label)s_%(class)s_imported_by',
+        verbose_name=_('Imported by'),
+    )
+
+    dateCreated = models.DateTimeField(
+        auto_now_add=True, verbose_name=_('Date created')
+    )
+
+    # pylint: disable=C0111
+    class Meta:
+        permissions = (("import_results", "Can import results in bulk"),)
+
+    def __str__(self):
+        return '{0}[{1}]'.format(self.resultType, self.idempotencyKey)
@@ -4,6 +4,9 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 # pylint: disable=C0103,C0330,no-member
+from collections import defaultdict
+from datetime import datetime
+from datetime import timezone
 from inspect import currentframe
 from inspect import getframeinfo
 from re import compile as re_compile
@@ -11,6 +14,11 @@ from re import compile as re_compile
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.db import models
+from django.db import transaction
+from django.db.models import Case
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models import When
 from django.utils.translation import gettext_lazy as _
 
 from deprecated import add_deprecated_method
@@ -32,9 +40,27 @@ from EvalData.models.pairwise_assessment_document import (
     PairwiseAssessmentDocumentResult,
 )
 
+utc = timezone.utc
+
 # TODO: Unclear if these are needed?
 # from Appraise.settings import STATIC_URL, BASE_CONTEXT
 
+# Result classes for campaign types which support resetting task agendas
+RESET_RESULT_CLASSES = {
+    'DataAssessmentTask': DataAssessmentResult,
+    'DirectAssessmentTask': DirectAssessmentResult,
+    'DirectAssessmentContextTask': DirectAssessmentContextResult,
+    'DirectAssessmentDocumentTask': DirectAssessmentDocumentResult,
+    'MultiModalAssessmentTask': MultiModalAssessmentResult,
+    'PairwiseAssessmentDocumentTask': PairwiseAssessmentDocumentResult,
+    'PairwiseAssessmentTask': PairwiseAssessmentResult,
+}
+
+# Number of users reassigned per UPDATE, bounded by SQLite variable limits
+RESET_BATCH_SIZE = 100
+
+_SHADOW_SUFFIX = re_compile(r'[0-9a-f]{2}')
+
 
 class TaskAgenda(models.Model):
     user = models.ForeignKey(User, models.PROTECT, verbose_name=_('User'))
@@ -145,72 +171,196 @@ class TaskAgenda(models.Model):
 
         Returns True upon success, False otherwise.
         """
-        type_to_result_class_mapping = {
-            'DataAssessmentTask': DataAssessmentResult,
-            'DirectAssessmentTask': DirectAssessmentResult,
-            'DirectAssessmentContextTask': DirectAssessmentContextResult,
-            'DirectAssessmentDocumentTask': DirectAssessmentDocumentResult,
-            'MultiModalAssessmentTask': MultiModalAssessmentResult,
-            'PairwiseAssessmentDocumentTask': PairwiseAssessmentDocumentResult,
-            'PairwiseAssessmentTask': PairwiseAssessmentResult,
-        }
-
-        result_class = type_to_result_class_mapping.get(
-            self.campaign.get_campaign_type(), None
+        return TaskAgenda.reset_taskagendas([self])[0]
+
+    @classmethod
+    def reset_taskagendas(cls, agendas):
+        """
+        Resets annotations and state for all given task agenda instances.
+
+        Works like reset_taskagenda() for each agenda, but in bulk: shadow
+        copies are created with one INSERT, annotations are reassigned and
+        retired with one UPDATE per result class, and tasks are moved with
+        set operations on the M2M tables, all inside a single transaction.
+
+        Returns list of (success, message, level) triples in agenda order.
+        """
+        agendas = list(agendas)
+        statuses = [None] * len(agendas)
+
+        # Group agendas by result class, computing each campaign type once
+        campaign_types = {}
+        agendas_for_result_class = defaultdict(list)
+        for index, agenda in enumerate(agendas):
+            if agenda.campaign_id not in campaign_types:
+                campaign_types[agenda.campaign_id] = agenda.campaign.get_campaign_type()
+            campaign_type = campaign_types[agenda.campaign_id]
+
+            result_class = RESET_RESULT_CLASSES.get(campaign_type, None)
+            if not result_class:
+                _msg = 'Unknown annotation type {0} for user {1}'.format(
+                    campaign_type, agenda.user
+                )
+                statuses[index] = (False, _msg, messages.ERROR)
+                continue
+
+            agendas_for_result_class[result_class].append((index, agenda))
+
+        with transaction.atomic():
+            for result_class, indexed_agendas in agendas_for_result_class.items():
+                cls._reset_results(result_class, indexed_agendas, statuses)
+
+            reset_agendas = [
+                agendas[index]
+                for index, status in enumerate(statuses)
+                if status is not None and status[0]
+            ]
+            cls._reopen_completed_tasks(reset_agendas)
+
+        return statuses
+
+    @staticmethod
+    def _reset_results(result_class, indexed_agendas, statuses):
+        """
+        Moves annotations of result_class to shadow copies of agenda users.
+
+        Updates statuses in place for all given (index, agenda) pairs.
+        """
+        user_ids = {agenda.user_id for _, agenda in indexed_agendas}
+        annotated_user_ids = set(
+            result_class.objects.filter(createdBy__in=user_ids)
+            .order_by()
+            .values_list('createdBy', flat=True)
+            .distinct()
         )
 
-        if not result_class:
-            _msg = 'Unknown annotation type {0} for user {1}'.format(
-                self.campaign.get_campaign_type(), self.user
+        users_to_reset = {}
+        for index, agenda in indexed_agendas:
+            # Agendas for the same user share annotations, first one wins
+            if agenda.user_id not in annotated_user_ids:
+                _msg = 'Nothing to be done for user {0}.'.format(agenda.user)
+                statuses[index] = (False, _msg, messages.INFO)
+                continue
+
+            annotated_user_ids.discard(agenda.user_id)
+            users_to_reset[index] = agenda.user
+
+        shadow_names = TaskAgenda._next_shadow_names(users_to_reset.values())
+        for index, user in list(users_to_reset.items()):
+            if shadow_names[user.username] is None:
+                _msg = 'Cannot create shadow copy for user {0}.'.format(user)
+                statuses[index] = (False, _msg, messages.WARNING)
+                del users_to_reset[index]
+
+        if not users_to_reset:
+            return
+
+        # Shadow copies will be inactive and won't allow authentication as
+        # we do not set a password. The accounts are purely for archival use.
+        _names = [shadow_names[x.username] for x in users_to_reset.values()]
+        _shadow_copies = []
+        for _name in _names:
+            _shadow_copy = User(username=_name, is_active=False)
+            _shadow_copy.set_unusable_password()
+            _shadow_copies.append(_shadow_copy)
+        User.objects.bulk_create(_shadow_copies)
+        shadow_ids = dict(
+            User.objects.filter(username__in=_names).values_list('username', 'id')
+        )
+
+        utc_now = datetime.utcnow().replace(tzinfo=utc)
+        users = list(users_to_reset.values())
+        for offset in range(0, len(users), RESET_BATCH_SIZE):
+            batch = users[offset : offset + RESET_BATCH_SIZE]
+            new_owner = Case(
+                *[
+                    When(
+                        createdBy=user.id,
+                        then=Value(shadow_ids[shadow_names[user.username]]),
+                    )
+                    for user in batch
+                ]
+            )
+            result_class.objects.filter(createdBy__in=[x.id for x in batch]).update(
+                createdBy=new_owner,
+                modifiedBy=new_owner,
+                activated=False,
+                dateActivated=None,
+                completed=False,
+                dateCompleted=None,
+                dateModified=utc_now,
+                retired=True,
+                dateRetired=utc_now,
             )
-            _lvl = messages.ERROR
-            return (False, _msg, _lvl)
-
-        annotated_output_for_user = result_class.objects.filter(createdBy=self.user)
-
-        if not annotated_output_for_user.exists():
-            _msg = 'Nothing to be done for user {0}.'.format(self.user)
-            _lvl = messages.INFO
-            return (False, _msg, _lvl)
-
-        _shadow = re_compile(r'{0}-[0-9a-f]{{2}}'.format(self.user.username))
-        _users = User.objects.filter(username__startswith=self.user.username)
-        _shadow_copies = 0
-        for _candidate in _users:
-            if _shadow.match(_candidate.username):
-                _shadow_copies += 1
-
-        if (_shadow_copies + 1) > 255:
-            _msg = 'Cannot create shadow copy for user {0}.'.format(self.user)
-            _lvl = messages.WARNING
-            return (False, _msg, _lvl)
-
-        # Next shadow copy will be named:
-        #   {self.user.username}-{_shadow_copies+1:02x}
-        #
-        # This user will be inactive and won't allow authentication as we
-        # do not set a password. The account is purely for archival use.
-        _name = '{0}-{1:02x}'.format(self.user.username, _shadow_copies + 1)
-        _shadow_copy = User.objects.create_user(_name)
-        _shadow_copy.is_active = False
-        _shadow_copy.save()
-
-        for annotation_result in annotated_output_for_user:
-            annotation_result.createdBy = _shadow_copy
-            annotation_result.modifiedBy = _shadow_copy
-            annotation_result.retire()  # Implictly calls save()
+
+        for index, user in users_to_reset.items():
+            _msg = (
+                'Succesfully reset task agenda for user {0}, creating '
+                'shadow copy {1}.'.format(user, shadow_names[user.username])
+            )
+            statuses[index] = (True, _msg, messages.INFO)
+
+    @staticmethod
+    def _next_shadow_names(users):
+        """
+        Returns dictionary mapping usernames to next free shadow copy name.
+
+        Shadow copies are named '{username}-{number:02x}'; maps to None if
+        all 255 shadow copies are in use. Uses a single query for all users.
+        """
+        usernames = {x.username for x in users}
+        if not usernames:
+            return {}
+
+        _prefixes = Q()
+        for username in usernames:
+            _prefixes |= Q(username__startswith='{0}-'.format(username))
+        _candidates = User.objects.filter(_prefixes).values_list('username', flat=True)
+
+        shadow_copies = defaultdict(int)
+        for _candidate in _candidates:
+            _username, _, _suffix = _candidate.rpartition('-')
+            if _username in usernames and _SHADOW_SUFFIX.fullmatch(_suffix):
+                shadow_copies[_username] = max(
+                    shadow_copies[_username], int(_suffix, 16)
+                )
+
+        shadow_names = {}
+        for username in usernames:
+            _number = shadow_copies[username] + 1
+            shadow_names[username] = (
+                '{0}-{1:02x}'.format(username, _number) if _number <= 255 else None
+            )
+        return shadow_names
+
+    @staticmethod
+    def _reopen_completed_tasks(agendas):
+        """
+        Moves all completed tasks back into open tasks for given agendas.
+        """
+        agenda_ids = [x.id for x in agendas]
+        if not agenda_ids:
+            return
 
         # pylint: disable=protected-access
-        for task in self._completed_tasks.all():
-            self._open_tasks.add(task)
-            self._completed_tasks.remove(task)
+        open_through = TaskAgenda._open_tasks.through
+        completed_through = TaskAgenda._completed_tasks.through
+
+        completed = completed_through.objects.filter(taskagenda_id__in=agenda_ids)
+        already_open = set(
+            open_through.objects.filter(taskagenda_id__in=agenda_ids).values_list(
+                'taskagenda_id', 'objectid_id'
+            )
+        )
+        reopened = set(completed.values_list('taskagenda_id', 'objectid_id'))
 
-        _msg = (
-            'Succesfully reset task agenda for user {0}, creating '
-            'shadow copy {1}.'.format(self.user, _shadow_copy)
+        open_through.objects.bulk_create(
+            [
+                open_through(taskagenda_id=agenda_id, objectid_id=objectid_id)
+                for agenda_id, objectid_id in sorted(reopened - already_open)
+            ]
         )
-        _lvl = messages.INFO
-        return (True, _msg, _lvl)
+        completed.delete()
 
 
 class WorkAgenda(models.Model):
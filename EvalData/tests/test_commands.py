@@ -0,0 +1,267 @@
+import json
+import os
+from base64 import b64encode
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import IntegrityError
+from django.test import TestCase
+
+from Campaign.models import Campaign
+from EvalData.models import DirectAssessmentResult
+from EvalData.models import DirectAssessmentTask
+from EvalData.models import ImportedResult
+from EvalData.models import Market
+from EvalData.models import Metadata
+from EvalData.models import TextPair
+
+
+class UpdateEvalDataModelsTests(TestCase):
+    def setUp(self):
+        """
+        Create two active campaigns with one task and item each.
+        """
+        self.user = User.objects.create(username='dummy-user', is_superuser=True)
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='TEST',
+            createdBy=self.user,
+        )
+        self.metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=self.user,
+        )
+
+        self.campaigns = []
+        for name in ('CampaignA', 'CampaignB'):
+            campaign = Campaign.objects.create(
+                campaignName=name, activated=True, createdBy=self.user
+            )
+            task = DirectAssessmentTask.objects.create(
+                campaign=campaign,
+                requiredAnnotations=1,
+                batchNo=1,
+                completed=True,
+                createdBy=self.user,
+            )
+            item = TextPair.objects.create(
+                itemID=1,
+                itemType='TGT',
+                metadata=self.metadata,
+                sourceID='1',
+                sourceText='source',
+                targetID='1',
+                targetText='target',
+                createdBy=self.user,
+            )
+            task.items.add(item)
+            DirectAssessmentResult.objects.create(
+                score=50,
+                start_time=0,
+                end_time=1,
+                item=item,
+                task=task,
+                createdBy=self.user,
+            )
+            self.campaigns.append(campaign)
+
+    def test_activates_all_campaigns(self):
+        """
+        Without --campaign, tasks and items for all campaigns are activated.
+        """
+        call_command('UpdateEvalDataModels', stdout=StringIO())
+
+        self.assertEqual(TextPair.objects.filter(activated=False).count(), 0)
+        self.assertEqual(
+            DirectAssessmentTask.objects.filter(
+                activated=True, completed=False
+            ).count(),
+            2,
+        )
+        results = DirectAssessmentResult.objects.filter(completed=False)
+        self.assertFalse(results.exists())
+
+    def test_only_activates_given_campaign(self):
+        """
+        With --campaign, only rows for the given campaign are touched.
+        """
+        call_command('UpdateEvalDataModels', campaign='CampaignA', stdout=StringIO())
+
+        for campaign, activated in zip(self.campaigns, (True, False)):
+            task = DirectAssessmentTask.objects.get(campaign=campaign)
+            self.assertEqual(task.activated, activated)
+            self.assertEqual(task.items.get().activated, activated)
+
+            result = DirectAssessmentResult.objects.get(task=task)
+            self.assertEqual(result.completed, activated)
+
+
+class ImportResultsTests(TestCase):
+    def setUp(self):
+        """
+        Create one task with two items and an annotator.
+        """
+        self.user = User.objects.create(username='dummy-user', is_superuser=True)
+        self.annotator = User.objects.create(username='crowd-worker')
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='TEST',
+            createdBy=self.user,
+        )
+        metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=self.user,
+        )
+        campaign = Campaign.objects.create(campaignName='Crowd', createdBy=self.user)
+        self.task = DirectAssessmentTask.objects.create(
+            campaign=campaign, requiredAnnotations=1, batchNo=1, createdBy=self.user
+        )
+        self.items = []
+        for item_id in (1, 2):
+            item = TextPair.objects.create(
+                itemID=item_id,
+                itemType='TGT',
+                metadata=metadata,
+                sourceID=str(item_id),
+                sourceText='source',
+                targetID=str(item_id),
+                targetText='target',
+                createdBy=self.user,
+            )
+            self.task.items.add(item)
+            self.items.append(item)
+
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+    def _record(self, key, item, score=60):
+        return {
+            'idempotency_key': key,
+            'task': self.task.id,
+            'item': item.id,
+            'user': 'crowd-worker',
+            'start_time': 0,
+            'end_time': 2.5,
+            'score': score,
+        }
+
+    def _write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, mode='w', encoding='utf-8') as out_file:
+            out_file.write(content)
+        return path
+
+    def test_import_ndjson_is_idempotent(self):
+        """
+        Importing the same records twice only creates results once.
+        """
+        records = [self._record('a', self.items[0]), self._record('b', self.items[1])]
+        path = self._write('results.ndjson', '\n'.join(json.dumps(x) for x in records))
+
+        call_command('ImportResults', 'Direct', path, stdout=StringIO())
+        output = StringIO()
+        call_command('ImportResults', 'Direct', path, stdout=output)
+
+        self.assertIn('Imported 0 results, skipped 2 duplicates', output.getvalue())
+        results = DirectAssessmentResult.objects.filter(createdBy=self.annotator)
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(results.get(item=self.items[0]).score, 60)
+        self.assertEqual(
+            ImportedResult.objects.get(idempotencyKey='a').resultID,
+            results.get(item=self.items[0]).id,
+        )
+
+    def test_import_csv_validates_task_membership(self):
+        """
+        Items outside of the task reject the batch, unless skipped.
+        """
+        other_task = DirectAssessmentTask.objects.create(
+            campaign=self.task.campaign,
+            requiredAnnotations=1,
+            batchNo=2,
+            createdBy=self.user,
+        )
+        rows = [
+            'idempotency_key,task,item,user,start_time,end_time,score',
+            'a,{0},{1},crowd-worker,0,1,70'.format(self.task.id, self.items[0].id),
+            'b,{0},{1},crowd-worker,0,1,70'.format(other_task.id, self.items[1].id),
+        ]
+        path = self._write('results.csv', '\n'.join(rows))
+
+        with self.assertRaises(CommandError):
+            call_command('ImportResults', 'Direct', path, stdout=StringIO())
+        self.assertFalse(DirectAssessmentResult.objects.exists())
+
+        call_command(
+            'ImportResults', 'Direct', path, skip_invalid=True, stdout=StringIO()
+        )
+        self.assertEqual(DirectAssessmentResult.objects.get().item, self.items[0])
+
+    def test_import_reports_concurrent_imports(self):
+        """
+        Concurrently imported keys abort the import with a summary.
+        """
+        records = [self._record('a', self.items[0]), self._record('b', self.items[1])]
+        path = self._write('results.ndjson', '\n'.join(json.dumps(x) for x in records))
+        inserts = []
+
+        def _concurrent_import(execute, sql, params, many, context):
+            # Another import saves the second batch's key in the meantime
+            if sql.startswith('INSERT') and ImportedResult._meta.db_table in sql:
+                inserts.append(sql)
+                if len(inserts) > 1:
+                    raise IntegrityError('UNIQUE constraint failed')
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(_concurrent_import):
+            with self.assertRaisesMessage(
+                CommandError, '1 results were imported from earlier batches'
+            ):
+                call_command(
+                    'ImportResults', 'Direct', path, batch_size=1, stdout=StringIO()
+                )
+
+        self.assertEqual(ImportedResult.objects.get().idempotencyKey, 'a')
+
+    def test_import_api_requires_permission(self):
+        """
+        The import endpoint requires Basic credentials with permission.
+        """
+        url = '/api/results/import/DirectAssessmentResult/'
+        body = json.dumps(self._record('a', self.items[0]))
+        self.assertEqual(
+            self.client.post(url, body, content_type='text/plain').status_code, 401
+        )
+
+        self.annotator.set_password('secret')
+        self.annotator.save()
+        credentials = b64encode(b'crowd-worker:secret').decode('ascii')
+        auth = {'HTTP_AUTHORIZATION': 'Basic ' + credentials}
+        response = self.client.post(
+            url, body, content_type='application/x-ndjson', **auth
+        )
+        self.assertEqual(response.status_code, 403)
+
+        self.annotator.user_permissions.add(
+            Permission.objects.get(codename='import_results')
+        )
+        for created in (1, 0):
+            response = self.client.post(
+                url, body, content_type='application/x-ndjson', **auth
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['created'], created)
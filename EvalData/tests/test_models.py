@@ -1,13 +1,32 @@
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.test import TestCase
+from django.test.utils import override_settings
 
 from Campaign.models import Campaign
+from Dashboard.jobs import claim_job
+from Dashboard.jobs import run_job
+from Dashboard.models import Job
+from EvalData.models import DirectAssessmentResult
+from EvalData.models import DirectAssessmentDocumentTask
+from EvalData.models import DirectAssessmentTask
+from EvalData.models import DocumentIndexEntry
 from EvalData.models import Market
 from EvalData.models import Metadata
 from EvalData.models import ObjectID
+from EvalData.models import related_values_cache
+from EvalData.models import stored_text
 from EvalData.models import TaskAgenda
+from EvalData.models import TextContent
+from EvalData.models import TextPair
+from EvalData.models import TextPairWithContext
 from EvalData.models import TextSegment
+from EvalData.models import TextSegmentWithTwoTargets
 
 
 class TaskAgendaTests(TestCase):
@@ -56,6 +75,164 @@ class TaskAgendaTests(TestCase):
         self.assertTrue(dummy_task in agenda._completed_tasks.all())
 
 
+class TaskAgendaResetTests(TestCase):
+    def setUp(self):
+        """
+        Create two users with one annotation and completed task each.
+        """
+        owner = User.objects.create(username='owner')
+        self.campaign = Campaign.objects.create(campaignName='test', createdBy=owner)
+        task = DirectAssessmentTask.objects.create(
+            campaign=self.campaign, requiredAnnotations=1, batchNo=1, createdBy=owner
+        )
+        item = TextPair.objects.create(
+            itemID=1,
+            itemType='TGT',
+            metadata=Metadata.objects.create(
+                market=Market.objects.create(
+                    sourceLanguageCode='eng',
+                    targetLanguageCode='deu',
+                    domainName='TEST',
+                    createdBy=owner,
+                ),
+                corpusName='TEST',
+                versionInfo='1.0',
+                source='MANUAL',
+                createdBy=owner,
+            ),
+            sourceID='1',
+            sourceText='source',
+            targetID='1',
+            targetText='target',
+            createdBy=owner,
+        )
+        serialized_task = ObjectID.get_object_id(task)
+
+        self.agendas = []
+        for username in ('user-a', 'user-b'):
+            user = User.objects.create(username=username)
+            DirectAssessmentResult.objects.create(
+                score=50,
+                start_time=0,
+                end_time=1,
+                item=item,
+                task=task,
+                completed=True,
+                createdBy=user,
+            )
+            agenda = TaskAgenda.objects.create(user=user, campaign=self.campaign)
+            agenda._completed_tasks.add(serialized_task)
+            self.agendas.append(agenda)
+
+        # Existing shadow copy, next one should be user-a-02
+        User.objects.create(username='user-a-01')
+
+    def test_bulk_reset_moves_annotations_and_tasks(self):
+        """
+        Resetting agendas creates shadow copies and reopens tasks.
+        """
+        statuses = TaskAgenda.reset_taskagendas(self.agendas)
+        self.assertEqual([x[0] for x in statuses], [True, True])
+
+        for agenda, shadow_name in zip(self.agendas, ('user-a-02', 'user-b-01')):
+            shadow_copy = User.objects.get(username=shadow_name)
+            self.assertFalse(shadow_copy.is_active)
+            self.assertFalse(shadow_copy.has_usable_password())
+
+            result = DirectAssessmentResult.objects.get(createdBy=shadow_copy)
+            self.assertTrue(result.retired)
+            self.assertFalse(result.completed)
+
+            self.assertEqual(agenda._open_tasks.count(), 1)
+            self.assertEqual(agenda._completed_tasks.count(), 0)
+
+    def test_reset_without_annotations_does_nothing(self):
+        """
+        Agendas without annotations are reported and left unchanged.
+        """
+        self.agendas[0].reset_taskagenda()
+        _ret, _msg, _ = self.agendas[0].reset_taskagenda()
+
+        self.assertFalse(_ret)
+        self.assertEqual(_msg, 'Nothing to be done for user user-a.')
+
+    def test_reset_job_reports_agendas_without_annotations(self):
+        """
+        Reset jobs succeed if agendas have nothing to be done.
+        """
+        self.agendas[0].reset_taskagenda()
+        job = Job.enqueue('ResetTaskAgendas', agenda_ids=[x.id for x in self.agendas])
+        claim_job(job.id, 'worker')
+        with TemporaryDirectory() as media_dir, override_settings(
+            MEDIA_ROOT=media_dir + os.sep
+        ):
+            self.assertEqual(run_job(job.id), Job.SUCCEEDED)
+            job.refresh_from_db()
+            with job.artifact.open('rb') as artifact:
+                lines = artifact.read().decode('utf-8').splitlines()
+
+        self.assertEqual(
+            lines,
+            [
+                'INFO\tNothing to be done for user user-a.',
+                'OK\tSuccesfully reset task agenda for user user-b, creating '
+                'shadow copy user-b-01.',
+            ],
+        )
+
+
+class ObjectIDTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create valid User and Campaign instances to test ObjectID with.
+        """
+        super(ObjectIDTests, cls).setUpClass()
+
+        cls.valid_user = User()
+        cls.valid_user.username = 'dummy-user'
+        cls.valid_user.save()
+
+        cls.valid_campaign = Campaign()
+        cls.valid_campaign.createdBy = cls.valid_user
+        cls.valid_campaign.save()
+
+    def _create_task(self):
+        return DirectAssessmentTask.objects.create(
+            campaign=self.valid_campaign,
+            requiredAnnotations=1,
+            batchNo=1,
+            createdBy=self.valid_user,
+        )
+
+    def test_only_registered_tasks_maintain_object_ids(self):
+        """
+        Saving tasks creates one ObjectID, saving other models none.
+        """
+        task = self._create_task()
+        task.save()
+        self.valid_campaign.save()
+
+        self.assertEqual(ObjectID.objects.count(), 1)
+        self.assertTrue(
+            ObjectID.objects.filter(
+                typeName='DirectAssessmentTask', primaryID=task.id
+            ).exists()
+        )
+
+    def test_sync_command_backfills_missing_object_ids(self):
+        """
+        SyncObjectIDs creates missing ObjectID instances for tasks.
+        """
+        tasks = [self._create_task() for _ in range(3)]
+        ObjectID.objects.filter(primaryID=tasks[0].id).delete()
+
+        call_command('SyncObjectIDs', stdout=StringIO())
+        self.assertEqual(
+            ObjectID.objects.filter(typeName='DirectAssessmentTask').count(), 3
+        )
+
+
 class MarketTests(TestCase):
     def test_cannot_exceed_max_length_for_source_language_code(self):
         pass
@@ -306,3 +483,267 @@ class TextSegmentTests(TestCase):
         for itemtype in SET_ITEMTYPE_CHOICES:
             test_obj.itemType = itemtype[0]
             self.assertEqual(test_obj.is_valid(), True)
+
+
+class StrNameTests(TestCase):
+    def setUp(self):
+        """
+        Create Market, Metadata and TextSegment instances without _str_name.
+        """
+        user = User.objects.create(username='dummy-user')
+        market = Market.objects.create(
+            sourceLanguageCode='en-US',
+            targetLanguageCode='de-DE',
+            domainName='TEST',
+            createdBy=user,
+        )
+        metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=user,
+        )
+        self.segment = TextSegment.objects.create(
+            itemID=1,
+            itemType='SRC',
+            segmentID='SomeID',
+            segmentText='This is a test sentence.',
+            metadata=metadata,
+            createdBy=user,
+        )
+
+        # Names of new instances are stored on insert, clear them as
+        # bulk_create() would leave them
+        for model in (Market, Metadata, TextSegment):
+            model.objects.update(_str_name='')
+
+    def test_create_stores_name(self):
+        """
+        Instances created with create() have their _str_name stored.
+        """
+        metadata = Metadata.objects.get(id=self.segment.metadata_id)
+        segment = TextSegment.objects.create(
+            itemID=2,
+            itemType='SRC',
+            segmentID='OtherID',
+            segmentText='This is another test sentence.',
+            metadata=metadata,
+            createdBy=metadata.createdBy,
+        )
+        self.assertEqual(
+            TextSegment.objects.get(id=segment.id)._str_name,
+            'TextSegment.en-US->de-DE/TEST["1.0"][2]',
+        )
+
+    def test_str_stores_missing_name(self):
+        """
+        __str__() stores missing names without saving the instance.
+        """
+        segment = TextSegment.objects.select_related('metadata').get(
+            id=self.segment.id
+        )
+        # Market values, then one update each for metadata and segment
+        with self.assertNumQueries(3):
+            name = str(segment)
+
+        self.assertEqual(name, 'TextSegment.en-US->de-DE/TEST["1.0"][1]')
+        self.assertEqual(TextSegment.objects.get(id=segment.id)._str_name, name)
+        self.assertFalse(Metadata.objects.filter(_str_name='').exists())
+        with self.assertNumQueries(0):
+            str(segment)
+
+    def test_update_command_fills_missing_names(self):
+        """
+        UpdateStrNames stores names for all instances with empty _str_name.
+        """
+        call_command('UpdateStrNames', stdout=StringIO())
+
+        segment = TextSegment.objects.get(id=self.segment.id)
+        self.assertEqual(segment._str_name, 'TextSegment.en-US->de-DE/TEST["1.0"][1]')
+        self.assertFalse(Metadata.objects.filter(_str_name='').exists())
+
+    def test_related_values_are_cached_within_block_only(self):
+        """
+        Related values are fetched once per related_values_cache() block.
+        """
+        metadata = Metadata.objects.get(id=self.segment.metadata_id)
+        with related_values_cache(), self.assertNumQueries(1):
+            metadata._generate_str_name()
+            name = metadata._generate_str_name()
+        self.assertEqual(name, 'en-US->de-DE/TEST["1.0"]')
+
+        Market.objects.filter(id=metadata.market_id).update(targetLanguageCode='fr')
+        self.assertEqual(metadata._generate_str_name(), 'en-US->fr/TEST["1.0"]')
+
+
+class TextContentTests(TestCase):
+    def setUp(self):
+        """
+        Create Metadata instance for TextPair and TextSegmentWithTwoTargets.
+        """
+        self.user = User.objects.create(username='dummy-user')
+        self.metadata = Metadata.objects.create(
+            market=Market.objects.create(
+                sourceLanguageCode='eng',
+                targetLanguageCode='deu',
+                domainName='TEST',
+                createdBy=self.user,
+            ),
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=self.user,
+        )
+
+    def _text_pair(self, item_id, source_text, target_text):
+        return TextPair(
+            itemID=item_id,
+            itemType='TGT',
+            metadata=self.metadata,
+            sourceID=str(item_id),
+            sourceText=source_text,
+            targetID=str(item_id),
+            targetText=target_text,
+            createdBy=self.user,
+        )
+
+    def test_interned_texts_are_stored_once(self):
+        """
+        Interning stores distinct texts once and keeps attribute access.
+        """
+        items = [
+            self._text_pair(1, 'source', 'target A'),
+            self._text_pair(2, 'source', 'target B'),
+        ]
+        TextContent.intern_items(items)
+        for item in items:
+            item.save()
+        self.assertEqual(items[0].sourceText, 'source')
+
+        # Interning again reuses existing texts
+        TextContent.intern_items([self._text_pair(3, 'source', 'target A')])
+        self.assertEqual(TextContent.objects.count(), 3)
+
+        self.assertEqual(
+            set(TextPair.objects.values_list('sourceText', 'targetText')), {('', '')}
+        )
+        item = TextPair.objects.get(itemID=2)
+        self.assertEqual((item.sourceText, item.targetText), ('source', 'target B'))
+        self.assertEqual(
+            list(
+                TextPair.objects.order_by('itemID')
+                .annotate(text=stored_text('targetText'))
+                .values_list('text', flat=True)
+            ),
+            ['target A', 'target B'],
+        )
+
+    def test_changed_text_overrides_interned_text(self):
+        """
+        Assigning a text stores it in the column, as for other items.
+        """
+        item = self._text_pair(1, 'source', 'target')
+        TextContent.intern_items([item])
+        item.save()
+
+        item.targetText = 'new target'
+        item.save()
+        item = TextPair.objects.get(id=item.id)
+        self.assertEqual((item.sourceText, item.targetText), ('source', 'new target'))
+
+    def test_nullable_texts_and_manager_loads_texts(self):
+        """
+        Empty texts are not interned; TEXT_STORE loads texts with items.
+        """
+        item = TextSegmentWithTwoTargets(
+            itemID=1,
+            itemType='TGT',
+            metadata=self.metadata,
+            segmentID='1',
+            segmentText='source',
+            target1ID='A',
+            target1Text='target',
+            contextLeft='context',
+            createdBy=self.user,
+        )
+        TextContent.intern_items([item])
+        item.save()
+        self.assertIsNone(item.target2TextRef_id)
+        self.assertIsNone(item.contextRightRef_id)
+
+        with self.settings(TEXT_STORE=True):
+            item = TextSegmentWithTwoTargets.objects.get(id=item.id)
+        with self.assertNumQueries(0):
+            texts = (item.segmentText, item.target1Text, item.target2Text)
+            self.assertEqual(item.context_left(), 'context')
+        self.assertEqual(texts, ('source', 'target', None))
+
+
+class DocumentIndexTests(TestCase):
+    def setUp(self):
+        """
+        Create document task with two blocks of doc-1 and one of doc-2.
+        """
+        owner = User.objects.create(username='owner')
+        self.user = User.objects.create(username='annotator')
+        campaign = Campaign.objects.create(campaignName='test', createdBy=owner)
+        self.task = DirectAssessmentDocumentTask.objects.create(
+            campaign=campaign, requiredAnnotations=1, batchNo=1, createdBy=owner
+        )
+        metadata = Metadata.objects.create(
+            market=Market.objects.create(
+                sourceLanguageCode='eng',
+                targetLanguageCode='deu',
+                domainName='TEST',
+                createdBy=owner,
+            ),
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=owner,
+        )
+
+        self.items = []
+        layout = (('doc-1', 3), ('doc-2', 2), ('doc-1', 2))
+        for document_id, length in layout:
+            for position in range(length):
+                self.items.append(
+                    TextPairWithContext.objects.create(
+                        itemID=len(self.items) + 1,
+                        itemType='TGT',
+                        metadata=metadata,
+                        sourceID=document_id,
+                        sourceText='source',
+                        targetID=document_id,
+                        targetText='target',
+                        documentID=document_id,
+                        isCompleteDocument=position == length - 1,
+                        createdBy=owner,
+                    )
+                )
+        self.task.items.add(*self.items)
+
+    def test_block_items_fetched_by_range(self):
+        """
+        Blocks end with complete document items, per document ID.
+        """
+        DocumentIndexEntry.build(self.task)
+        with self.assertNumQueries(1):
+            block = DocumentIndexEntry.block_items(self.task, self.items[6])
+        self.assertEqual(block, self.items[5:7])
+
+        block = DocumentIndexEntry.block_items(self.task, self.items[1])
+        self.assertEqual(block, self.items[0:3])
+
+    def test_missing_index_is_built(self):
+        """
+        Tasks without index, e.g., imported earlier, are indexed on demand.
+        """
+        next_item, block_items, block_results = self.task.next_document_for_user(
+            self.user, return_statistics=False
+        )
+        self.assertEqual(next_item, self.items[0])
+        self.assertEqual(block_items, self.items[0:3])
+        self.assertEqual(block_results, [None, None, None])
+        self.assertEqual(DocumentIndexEntry.for_task(self.task).count(), 7)
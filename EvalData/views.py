@@ -3,13 +3,25 @@ Appraise evaluation framework
 
 See LICENSE for usage details
 """
+from base64 import b64decode
+
 from django.contrib import messages
+from django.contrib.auth import authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.decorators import permission_required
+from django.db import IntegrityError
 from django.http import HttpResponseRedirect
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import render
 from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+
+from EvalData.ingestion import get_result_class
+from EvalData.ingestion import import_results
+from EvalData.ingestion import read_csv
+from EvalData.ingestion import read_ndjson
+from EvalData.ingestion import ResultImportError
 
 from .models import TaskAgenda
 
@@ -36,3 +48,75 @@ def reset_taskagenda(request, agenda_id):
     messages.add_message(request, _lvl, _msg)
 
     return HttpResponseRedirect(reverse('admin:EvalData_taskagenda_changelist'))
+
+
+def _basic_auth_user(request):
+    """
+    Returns active user for HTTP Basic credentials of request, or None.
+    """
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split(' ', 1)
+    if len(auth) != 2 or auth[0].lower() != 'basic':
+        return None
+
+    try:
+        username, password = b64decode(auth[1]).decode('utf-8').split(':', 1)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    user = authenticate(request, username=username, password=password)
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+@csrf_exempt
+def import_results_api(request, result_type):
+    """
+    Imports NDJSON or CSV result batch posted by an external platform.
+
+    Clients authenticate with HTTP Basic credentials of a user with
+    import_results permission. The content type selects the format:
+    text/csv or application/x-ndjson. With ?skip_invalid=1, valid records
+    are imported even if others are invalid. See EvalData/ingestion.py for
+    the record format; batches can be safely resent.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are supported'}, status=405)
+
+    user = _basic_auth_user(request)
+    if user is None:
+        response = JsonResponse({'error': 'Authentication required'}, status=401)
+        response['WWW-Authenticate'] = 'Basic realm="Appraise"'
+        return response
+
+    if not user.has_perm('EvalData.import_results'):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    try:
+        get_result_class(result_type)
+        lines = request.body.decode('utf-8').splitlines()
+        if request.content_type == 'text/csv':
+            records = list(read_csv(lines))
+        else:
+            records = list(read_ndjson(lines))
+
+        summary = import_results(
+            result_type,
+            records,
+            imported_by=user,
+            skip_invalid=request.GET.get('skip_invalid') == '1',
+        )
+
+    except ResultImportError as exc:
+        return JsonResponse(
+            {'error': 'Invalid records', 'errors': exc.errors}, status=400
+        )
+
+    except (ValueError, UnicodeDecodeError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    except IntegrityError:
+        # A concurrent request imported some of the same records
+        return JsonResponse({'error': 'Conflicting import, retry'}, status=409)
+
+    return JsonResponse(summary._asdict())
@@ -3,7 +3,375 @@ Appraise evaluation framework
 
 See LICENSE for usage details
 """
-# pylint: disable=unused-import
+import json
+import os
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import override_settings
+
+from Campaign.management.commands.BenchmarkAnnotationLoad import _create_campaign
+from Campaign.management.commands.BenchmarkAnnotationLoad import (
+    _synthesize_campaign,
+)
+from Campaign.management.commands.MakeAnnotation import _get_task_url
+from EvalData.models import MultiModalAssessmentResult
+from EvalData.models import PairwiseAssessmentResult
+from EvalView.views import _span_diff_texts
+
+# Example campaigns: name => (manifest, batches, manifest and item overrides).
+# There are no DocLevelDA batches or MultiModal examples, so these reuse
+# Document and Direct batches, respectively.
+EXAMPLES = {
+    'Direct': ('Direct/manifest.json', 'Direct/batches.json', {}, {}),
+    'Pairwise': ('Pairwise/manifest.json', 'Pairwise/batches.json', {}, {}),
+    'PairwiseDocument': (
+        'PairwiseDocument/manifest.json',
+        'PairwiseDocument/batches.json',
+        {},
+        {},
+    ),
+    'MQM+ESA': ('MQM+ESA/manifest_esa.json', 'MQM+ESA/batches_esa.json', {}, {}),
+    'Data': ('Data/manifest.json', 'Data/batches.json', {}, {}),
+    'DocLevelDA': ('DocLevelDA/manifest.json', 'Document/batches.json', {}, {}),
+    'MultiModal': (
+        'Direct/manifest.json',
+        'Direct/batches.json',
+        {'TASK_TYPE': 'MultiModal'},
+        {'imageURL': 'https://example.com/image.png'},
+    ),
+}
+
+# Items per task each example campaign is seeded with. Query counts must
+# be the same for all sizes, i.e., not grow with the number of items.
+TASK_SIZES = (10, 40)
+
+# Maximum number of database queries per example campaign and endpoint.
+# Annotation GET is measured after the task has been assigned, POST for
+# the first item of the task. Review changes here like changes to code.
+QUERY_BUDGETS = {
+    'Direct': {
+        'dashboard': 50,
+        'annotation-get': 30,
+        'annotation-post': 34,
+        'campaign-status': 20,
+    },
+    'Pairwise': {
+        'dashboard': 50,
+        'annotation-get': 35,
+        'annotation-post': 37,
+        'campaign-status': 20,
+        'introduction': 6,
+        'feedback': 3,
+        'feedback-submit': 4,
+    },
+    'PairwiseDocument': {
+        'dashboard': 50,
+        'annotation-get': 43,
+        'annotation-post': 56,
+        'campaign-status': 20,
+    },
+    'MQM+ESA': {
+        'dashboard': 55,
+        'annotation-get': 33,
+        'annotation-post': 34,
+        'campaign-status': 20,
+    },
+    'Data': {
+        'dashboard': 51,
+        'annotation-get': 34,
+        'annotation-post': 38,
+        'campaign-status': 20,
+    },
+    'DocLevelDA': {
+        'dashboard': 50,
+        'annotation-get': 30,
+        'annotation-post': 34,
+        'campaign-status': 20,
+    },
+    'MultiModal': {
+        'dashboard': 50,
+        'annotation-get': 30,
+        'annotation-post': 34,
+        'campaign-status': 20,
+    },
+}
+
+
+def _annotation_data(context):
+    """Builds POST data accepted by all annotation views."""
+    data = {
+        'score': 50,
+        'score1': 50,
+        'score2': 50,
+        'rank': 1,
+        'mqm': '[]',
+        'item_id': context['item_id'],
+        'task_id': context['task_id'],
+        'start_timestamp': 0,
+        'end_timestamp': 1,
+    }
+    if 'document_id' in context:
+        data['document_id'] = context['document_id']
+    return data
+
+
+def _load_example(file_name):
+    """Returns JSON data of the given file in Examples/."""
+    path = os.path.join(settings.BASE_DIR, 'Examples', file_name)
+    with open(path, encoding='utf-8') as in_file:
+        return json.load(in_file)
+
+
+class _ExampleCampaignTestCase(TestCase):
+    '''Base class for tests on synthesized example campaigns.'''
+
+    def setUp(self):
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+
+        media_root = override_settings(MEDIA_ROOT=self.temp_dir)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.staff = User.objects.create_superuser('staff', password='secret')
+
+    def _seed_campaign(self, example, items_per_task):
+        """Creates campaign for example, returns (name, username, password)."""
+        manifest_json, batches_json, manifest_extra, item_extra = EXAMPLES[example]
+        manifest_data = _load_example(manifest_json)
+        example_batches = _load_example(batches_json)
+
+        # Campaign names and numbers are unique per size
+        manifest_data.update(manifest_extra)
+        manifest_data['CAMPAIGN_NAME'] += str(items_per_task)
+        manifest_data['CAMPAIGN_NO'] = (
+            manifest_data['CAMPAIGN_NO'] * 100 + items_per_task
+        )
+        for batch in example_batches:
+            for item in batch['items']:
+                item.update(item_extra)
+
+        manifest_data, batches = _synthesize_campaign(
+            manifest_data, example_batches, 2, items_per_task, 2
+        )
+        credentials = _create_campaign(manifest_data, batches, self.temp_dir)
+        return (manifest_data['CAMPAIGN_NAME'],) + credentials[0]
+
+
+class TestQueryBudgets(_ExampleCampaignTestCase):
+    '''Tests number of queries of annotation views against QUERY_BUDGETS.'''
+
+    def _count_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400, url)
+        return response, len(queries)
+
+    def _measure(self, example, items_per_task):
+        """Returns number of queries per endpoint for example campaign."""
+        campaign_name, username, password = self._seed_campaign(
+            example, items_per_task
+        )
+        task_type = _load_example(EXAMPLES[example][0]).get('TASK_TYPE', 'Direct')
+        task_type = EXAMPLES[example][2].get('TASK_TYPE', task_type)
+        task_url = '/{0}/'.format(_get_task_url(task_type))
+
+        counts = {}
+        self.client.login(username=username, password=password)
+        _, counts['dashboard'] = self._count_queries('get', '/dashboard/')
+
+        if task_type == 'Pairwise':
+            _, counts['introduction'] = self._count_queries(
+                'post',
+                '/pairwise-introduction/',
+                {'fluency_in_target_language': 'native'},
+            )
+
+        # Assigns the task to the user
+        response, _ = self._count_queries('get', task_url)
+        self.assertIn('item_id', response.context)
+
+        _, counts['annotation-post'] = self._count_queries(
+            'post', task_url, _annotation_data(response.context)
+        )
+        response, counts['annotation-get'] = self._count_queries('get', task_url)
+        self.assertIn('item_id', response.context)
+
+        if task_type == 'Pairwise':
+            _, counts['feedback'] = self._count_queries('get', '/pairwise-feedback/')
+            _, counts['feedback-submit'] = self._count_queries(
+                'post', '/pairwise-feedback-submit/', {'overallExperience': 'good'}
+            )
+
+        self.client.login(username='staff', password='secret')
+        _, counts['campaign-status'] = self._count_queries(
+            'get', '/campaign-status/{0}/'.format(campaign_name)
+        )
+        return counts
+
+    def _check_budgets(self, example):
+        counts = [self._measure(example, size) for size in TASK_SIZES]
+        for endpoint, budget in QUERY_BUDGETS[example].items():
+            with self.subTest(endpoint=endpoint):
+                for size, size_counts in zip(TASK_SIZES, counts):
+                    self.assertLessEqual(
+                        size_counts[endpoint],
+                        budget,
+                        '{0} {1} with {2} items per task'.format(
+                            example, endpoint, size
+                        ),
+                    )
+                self.assertEqual(
+                    len(set(x[endpoint] for x in counts)),
+                    1,
+                    '{0} {1} grows with number of items: {2}'.format(
+                        example, endpoint, [x[endpoint] for x in counts]
+                    ),
+                )
+
+    def test_direct(self):
+        '''Verifies query budgets of direct assessment views.'''
+        self._check_budgets('Direct')
+
+    def test_pairwise(self):
+        '''Verifies query budgets of pairwise assessment views.'''
+        self._check_budgets('Pairwise')
+
+    def test_pairwise_document(self):
+        '''Verifies query budgets of pairwise document assessment views.'''
+        self._check_budgets('PairwiseDocument')
+
+    def test_mqm_esa(self):
+        '''Verifies query budgets of MQM/ESA document assessment views.'''
+        self._check_budgets('MQM+ESA')
+
+    def test_data(self):
+        '''Verifies query budgets of data assessment views.'''
+        self._check_budgets('Data')
+
+    def test_doc_level_da(self):
+        '''Verifies query budgets of context assessment views.'''
+        self._check_budgets('DocLevelDA')
+
+    def test_multimodal(self):
+        '''Verifies query budgets of multimodal assessment views.'''
+        self._check_budgets('MultiModal')
+
+
+class TestAnnotationAPI(_ExampleCampaignTestCase):
+    '''Tests item prefetch and bulk result submission API.'''
+
+    def _start_task(self, example, task_url):
+        """Logs in annotator and assigns task, returns (task ID, item ID)."""
+        _, username, password = self._seed_campaign(example, 10)
+        self.client.login(username=username, password=password)
+        if example == 'Pairwise':
+            self.client.post(
+                '/pairwise-introduction/', {'fluency_in_target_language': 'native'}
+            )
+        response = self.client.get(task_url)
+        return response.context['datask_id'], response.context['task_id']
+
+    def _submit(self, task_type, task_id, results, prefetch=0):
+        return self.client.post(
+            '/api/{0}/{1}/results/'.format(task_type, task_id),
+            json.dumps({'results': results, 'prefetch': prefetch}),
+            content_type='application/json',
+        )
+
+    @staticmethod
+    def _results(items, **answers):
+        return [
+            dict(id=item['id'], start_timestamp=0, end_timestamp=1, **answers)
+            for item in items
+        ]
+
+    def test_prefetch_and_submit_direct(self):
+        '''Verifies bulk submission is idempotent and keeps item order.'''
+        task_id, first_item_id = self._start_task('Direct', '/direct-assessment/')
+        url = '/api/direct/{0}/next-items/'.format(task_id)
+        items = self.client.get(url, {'count': 5}).json()['items']
+        self.assertEqual(len(items), 5)
+        self.assertEqual(items[0]['id'], first_item_id)
+        self.assertIn('targetText', items[0])
+
+        # Items must be submitted in task order
+        response = self._submit('direct', task_id, self._results(items[1:3], score=1))
+        self.assertEqual(response.status_code, 409)
+
+        response = self._submit(
+            'direct', task_id, self._results(items[:3], score=70), prefetch=2
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['saved'], [x['id'] for x in items[:3]])
+        self.assertEqual(response.json()['items'], items[3:5])
+
+        # Resending the same results does not save them again
+        response = self._submit('direct', task_id, self._results(items[:4], score=70))
+        self.assertEqual(response.json()['duplicates'], [x['id'] for x in items[:3]])
+        self.assertEqual(response.json()['saved'], [items[3]['id']])
+
+        response = self.client.get('/direct-assessment/')
+        self.assertEqual(response.context['task_id'], items[4]['id'])
+
+    def test_submit_queries_do_not_grow(self):
+        '''Verifies bulk submission uses a constant number of queries.'''
+        task_id, _ = self._start_task('Direct', '/direct-assessment/')
+        url = '/api/direct/{0}/next-items/'.format(task_id)
+        items = self.client.get(url, {'count': 10}).json()['items']
+
+        counts = []
+        for batch in (items[:2], items[2:8]):
+            results = self._results(batch, score=1)
+            with CaptureQueriesContext(connection) as queries:
+                response = self._submit('direct', task_id, results)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_submit_pairwise(self):
+        '''Verifies pairwise results store scores and list answers.'''
+        task_id, _ = self._start_task('Pairwise', '/pairwise-assessment/')
+        url = '/api/pairwise/{0}/next-items/'.format(task_id)
+        items = self.client.get(url, {'count': 2}).json()['items']
+        self.assertIn('candidate1Html', items[0])
+
+        results = self._results(
+            items, score1=80, score2=20, selected_advantages=['fluency', 'style']
+        )
+        response = self._submit('pairwise', task_id, results)
+        self.assertEqual(response.status_code, 200)
+
+        result = PairwiseAssessmentResult.objects.get(item_id=items[0]['id'])
+        self.assertEqual((result.score1, result.score2), (80, 20))
+        self.assertEqual(result.selected_advantages, 'fluency;\nstyle')
+        self.assertEqual(result.fluency_in_target_language, 'native')
+        self.assertEqual(result.span_diff_texts, _span_diff_texts(result.item))
+        self.assertTrue(result.span_diff_texts)
+
+    def test_multimodal_items_and_validation(self):
+        '''Verifies multimodal items and rejection of invalid results.'''
+        task_id, _ = self._start_task('MultiModal', '/multimodal-assessment/')
+        url = '/api/multimodal/{0}/next-items/'.format(task_id)
+        items = self.client.get(url).json()['items']
+        self.assertEqual(items[0]['imageURL'], 'https://example.com/image.png')
+
+        response = self._submit(
+            'multimodal', task_id, self._results(items[:1], score=101)
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(MultiModalAssessmentResult.objects.exists())
 
-# Deliberately left empty.
+    def test_requires_assigned_task(self):
+        '''Verifies users cannot access tasks which are not theirs.'''
+        task_id, _ = self._start_task('Direct', '/direct-assessment/')
+        User.objects.create_user('other', password='secret')
+        self.client.login(username='other', password='secret')
+        response = self.client.get('/api/direct/{0}/next-items/'.format(task_id))
+        self.assertEqual(response.status_code, 404)
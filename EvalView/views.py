@@ -11,6 +11,7 @@ import json  # Import json module for JSON handling
 utc = timezone.utc
 
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
@@ -19,7 +20,9 @@ from django.contrib import messages
 from django.http import HttpResponse, HttpResponseServerError
 from django.template.loader import render_to_string
 
+from Appraise.metrics import checkpoint
 from Appraise.settings import BASE_CONTEXT
+from Appraise.sqlite import create_result
 from Appraise.utils import _get_logger
 from Campaign.models import Campaign
 from Dashboard.models import SIGN_LANGUAGE_CODES
@@ -44,6 +47,8 @@ from difflib import SequenceMatcher # hiba added this to replicate the functiona
 import re
 
 def extract_marked_spans(candidate_text):
+    if not candidate_text:
+        return []
     return re.findall(r'<span class="diff[^"]*">(.*?)</span>', candidate_text)
 
 # pylint: disable=import-error
@@ -52,6 +57,48 @@ LOGGER = _get_logger(name=__name__)
 
 # pylint: disable=C0103,C0330
 
+def _span_diff_pairs(item):
+    """
+    Returns (old, new) token differences between both targets of an item.
+
+    Uses the same alignment as TextSegmentWithTwoTargets.target_texts_with_diffs().
+    """
+    # Use the raw texts, not the annotated ones, tokenized like
+    # target_texts_with_diffs() does
+    toks1 = item.target1Text.split()
+    toks2 = (item.target2Text or "").split()
+
+    matcher = SequenceMatcher(None, toks1, toks2)
+    diff_pairs = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+
+        if tag == 'replace':
+            a = " ".join(toks1[i1:i2]).strip() or " "
+            b = " ".join(toks2[j1:j2]).strip() or " "
+            diff_pairs.append((a, b))
+
+        elif tag == 'delete':
+            a = " ".join(toks1[i1:i2]).strip() or " "
+            diff_pairs.append((a, " "))
+
+        elif tag == 'insert':
+            b = " ".join(toks2[j1:j2]).strip() or " "
+            diff_pairs.append((" ", b))
+
+    return diff_pairs
+
+
+def _span_diff_texts(item, diff_pairs=None):
+    """
+    Returns token differences of a pairwise item as "old |vs| new" lines.
+    """
+    if diff_pairs is None:
+        diff_pairs = _span_diff_pairs(item)
+    return ";\n".join(f"{old.strip()} |vs| {new.strip()}" for old, new in diff_pairs)
+
+
 @login_required
 def change_answers(request):
     """
@@ -61,11 +108,11 @@ def change_answers(request):
     from EvalData.models import TaskAgenda, ObjectID, PairwiseAssessmentResult, PairwiseAssessmentTask
     logger = logging.getLogger(__name__)
     
-    logger.info(f"change_answers called for user: {request.user.username}")
+    logger.info("change_answers called for user: %s", request.user.username)
     
     # Find the user's task agenda for pairwise assessment
     agendas = TaskAgenda.objects.filter(user=request.user)
-    logger.info(f"Found {agendas.count()} agendas for user")
+    logger.info("Found %s agendas for user", agendas.count())
     
     # Store a flag in the session to indicate we're in "edit mode"
     request.session['edit_mode'] = True
@@ -76,7 +123,7 @@ def change_answers(request):
         createdBy=request.user,
         completed=True
     ).exists()
-    logger.info(f"User has completed results: {has_results}")
+    logger.info("User has completed results: %s", has_results)
     
     # If user has completed tasks but no agenda (already completed feedback),
     # we need to recreate the agenda with completed tasks moved back to open tasks
@@ -90,11 +137,11 @@ def change_answers(request):
         
         if latest_result:
             campaign = latest_result.task.campaign
-            logger.info(f"Found campaign: {campaign.campaignName}")
+            logger.info("Found campaign: %s", campaign.campaignName)
             
             # Create a new TaskAgenda for this user and campaign
             agenda = TaskAgenda.objects.create(user=request.user, campaign=campaign)
-            logger.info(f"Created new agenda: {agenda}")
+            logger.info("Created new agenda: %s", agenda)
             
             # Get all completed tasks for this user and campaign
             tasks = set()
@@ -102,17 +149,17 @@ def change_answers(request):
                 createdBy=request.user, 
                 task__campaign=campaign
             ).values_list('task', flat=True).distinct()
-            logger.info(f"Found {len(task_results)} distinct tasks")
+            logger.info("Found %s distinct tasks", len(task_results))
             
             for result_id in task_results:
                 try:
                     task_obj = PairwiseAssessmentTask.objects.get(id=result_id)
                     task_id = ObjectID.get_object_id(task_obj)
                     tasks.add(task_id)
-                    logger.info(f"Added task ID: {task_id}")
+                    logger.info("Added task ID: %s", task_id)
                 except PairwiseAssessmentTask.DoesNotExist:
                     # Skip tasks that don't exist anymore
-                    logger.warning(f"Task with ID {result_id} does not exist")
+                    logger.warning("Task with ID %s does not exist", result_id)
                     continue
             
             # Add all tasks to the open_tasks list
@@ -120,7 +167,7 @@ def change_answers(request):
                 agenda._open_tasks.add(task_id)
             
             agenda.save()
-            logger.info(f"Saved agenda with {agenda._open_tasks.count()} open tasks")
+            logger.info("Saved agenda with %s open tasks", agenda._open_tasks.count())
             agendas = TaskAgenda.objects.filter(user=request.user)
     
     # If we still have no agendas, redirect to dashboard
@@ -133,7 +180,7 @@ def change_answers(request):
     for agenda in agendas:
         # Get the campaign type to check if it's a pairwise assessment
         campaign_type = agenda.campaign.get_campaign_type()
-        logger.info(f"Processing agenda with campaign type: {campaign_type}")
+        logger.info("Processing agenda with campaign type: %s", campaign_type)
         
         if campaign_type == 'PairwiseAssessmentTask':
             # Get all task IDs from both open and completed tasks
@@ -141,7 +188,7 @@ def change_answers(request):
             
             # Get completed tasks and move them back to open tasks
             completed_count = agenda._completed_tasks.count()
-            logger.info(f"Found {completed_count} completed tasks to move back to open tasks")
+            logger.info("Found %s completed tasks to move back to open tasks", completed_count)
             
             for task in list(agenda._completed_tasks.all()):
                 agenda._open_tasks.add(task)
@@ -159,7 +206,7 @@ def change_answers(request):
                     all_task_ids.append(task_instance.id)
                     
             agenda.save()
-            logger.info(f"After moving tasks: {agenda._open_tasks.count()} open tasks, {agenda._completed_tasks.count()} completed tasks")
+            logger.info("After moving tasks: %s open tasks, %s completed tasks", agenda._open_tasks.count(), agenda._completed_tasks.count())
             
             # Reset the completion status of all results for this user
             # This is the key change - we mark all results as incomplete so they can be edited
@@ -167,8 +214,8 @@ def change_answers(request):
                 results_updated = PairwiseAssessmentResult.objects.filter(
                     createdBy=request.user,
                     task__id__in=all_task_ids
-                ).update(completed=False)
-                logger.info(f"Reset completion status for {results_updated} results")
+                ).update(completed=False, dateModified=datetime.now(timezone.utc))
+                logger.info("Reset completion status for %s results", results_updated)
             
             # Store previous answers in session instead of deleting them
             # This will allow us to pre-populate the form when the user revisits each item
@@ -200,7 +247,7 @@ def change_answers(request):
                     if result.span_diff_other_texts:
                         span_diff_other_texts = result.span_diff_other_texts.split(';\n')
                     
-                    logger.info(f"Item {key}: span_diff_votes={span_diff_votes}, span_diff_explanations={span_diff_explanations}, span_diff_other_texts={span_diff_other_texts}")
+                    logger.debug("Item %s: span_diff_votes=%s, span_diff_explanations=%s, span_diff_other_texts=%s", key, span_diff_votes, span_diff_explanations, span_diff_other_texts)
                     
                     previous_results[key] = {
                         'score1': result.score1,
@@ -218,7 +265,7 @@ def change_answers(request):
                 
                 # Store the previous results in the session
                 request.session['previous_results'] = previous_results
-                logger.info(f"Stored {len(previous_results)} previous results in session for pre-population")
+                logger.info("Stored %s previous results in session for pre-population", len(previous_results))
             
             # Get the language code from the task
             try:
@@ -226,13 +273,13 @@ def change_answers(request):
                 if task_instance:
                     code = task_instance.marketTargetLanguageCode()
                     campaign_name = agenda.campaign.campaignName
-                    logger.info(f"Found task with code: {code}, campaign: {campaign_name}")
+                    logger.info("Found task with code: %s, campaign: %s", code, campaign_name)
                     
                     messages.success(request, "You can now change your previous answers.")
                     
                     # Redirect to the pairwise introduction page with the appropriate code and campaign
                     if code and campaign_name:
-                        logger.info(f"Redirecting to pairwise-introduction with code: {code}, campaign: {campaign_name}")
+                        logger.info("Redirecting to pairwise-introduction with code: %s, campaign: %s", code, campaign_name)
                         return redirect('pairwise-introduction', code=code, campaign_name=campaign_name)
                     
                     logger.info("Redirecting to pairwise-introduction without code/campaign")
@@ -241,7 +288,7 @@ def change_answers(request):
                     logger.warning("No task instance found in open_tasks")
             except Exception as e:
                 # Log the error and continue checking other agendas
-                logger.error(f"Error processing task agenda: {e}", exc_info=True)
+                logger.error("Error processing task agenda: %s", e, exc_info=True)
                 continue
     
     logger.warning("No valid pairwise assessment tasks found")
@@ -346,6 +393,7 @@ def direct_assessment(request, code=None, campaign_name=None):
             campaign = current_task.campaign
 
     t2 = datetime.now()
+    checkpoint('agenda-scan')
     if request.method == "POST":
         score = request.POST.get('score', None)
         item_id = request.POST.get('item_id', None)
@@ -353,9 +401,9 @@ def direct_assessment(request, code=None, campaign_name=None):
         start_timestamp = request.POST.get('start_timestamp', None)
         end_timestamp = request.POST.get('end_timestamp', None)
 
-        LOGGER.info(f'score={score}, item_id={item_id}')
+        LOGGER.info('score=%s, item_id=%s', score, item_id)
         if not score or score == -1:
-            LOGGER.debug(f"Score not submitted ({score}).")
+            LOGGER.debug("Score not submitted (%s).", score)
 
         if score and item_id and start_timestamp and end_timestamp:
             duration = float(end_timestamp) - float(start_timestamp)
@@ -373,7 +421,8 @@ def direct_assessment(request, code=None, campaign_name=None):
             else:
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
                 # pylint: disable=E1101
-                DirectAssessmentResult.objects.create(
+                create_result(
+                    DirectAssessmentResult,
                     score=score,
                     start_time=float(start_timestamp),
                     end_time=float(end_timestamp),
@@ -386,6 +435,7 @@ def direct_assessment(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -404,6 +454,7 @@ def direct_assessment(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     # Define priming question
     #
@@ -591,6 +642,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
             campaign = current_task.campaign
 
     t2 = datetime.now()
+    checkpoint('agenda-scan')
     if request.method == "POST":
         score = request.POST.get('score', None)
         item_id = request.POST.get('item_id', None)
@@ -621,7 +673,8 @@ def direct_assessment_context(request, code=None, campaign_name=None):
             else:
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
                 # pylint: disable=E1101
-                DirectAssessmentContextResult.objects.create(
+                create_result(
+                    DirectAssessmentContextResult,
                     score=score,
                     start_time=float(start_timestamp),
                     end_time=float(end_timestamp),
@@ -634,6 +687,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -652,6 +706,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     # Define priming question
     #
@@ -846,6 +901,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
     # direct_assessment_context view, but the input is the same: a score for the
     # single submitted item
     t2 = datetime.now()
+    checkpoint('agenda-scan')
     ajax = False
     item_saved = False
     error_msg = ''
@@ -858,8 +914,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
         end_timestamp = request.POST.get('end_timestamp', None)
         ajax = bool(request.POST.get('ajax', None) == 'True')
 
-        LOGGER.info('score=%s, item_id=%s', score, item_id)
-        print(f'Got request score={score}, item_id={item_id}, ajax={ajax}')
+        LOGGER.info('score=%s, item_id=%s, ajax=%s', score, item_id, ajax)
 
         # If all required information was provided in the POST request
         if score and item_id and start_timestamp and end_timestamp:
@@ -893,7 +948,8 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                 ):
                     utc_now = datetime.utcnow().replace(tzinfo=utc)
                     # pylint: disable=E1101
-                    DirectAssessmentDocumentResult.objects.create(
+                    create_result(
+                        DirectAssessmentDocumentResult,
                         score=score,
                         start_time=float(start_timestamp),
                         end_time=float(end_timestamp),
@@ -904,7 +960,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                         completed=True,
                         dateCompleted=utc_now,
                     )
-                    print('Item {} (itemID={}) saved'.format(task_id, item_id))
+                    LOGGER.debug('Item %s (itemID=%s) saved', task_id, item_id)
                     item_saved = True
 
                 # It is not the current item, so check if the result for it
@@ -934,11 +990,13 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                         utc_now = datetime.utcnow().replace(tzinfo=utc)
                         current_result.dateCompleted = utc_now
                         current_result.save()
-                        _msg = 'Item {} (itemID={}) updated {}->{}'.format(
-                            task_id, item_id, prev_score, score
+                        LOGGER.debug(
+                            'Item %s (itemID=%s) updated %s->%s',
+                            task_id,
+                            item_id,
+                            prev_score,
+                            score,
                         )
-                        LOGGER.debug(_msg)
-                        print(_msg)
                         item_saved = True
 
                     # If not yet scored, check if the submitted item is from
@@ -957,7 +1015,8 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                         if found_item:
                             utc_now = datetime.utcnow().replace(tzinfo=utc)
                             # pylint: disable=E1101
-                            DirectAssessmentDocumentResult.objects.create(
+                            create_result(
+                                DirectAssessmentDocumentResult,
                                 score=score,
                                 start_time=float(start_timestamp),
                                 end_time=float(end_timestamp),
@@ -968,11 +1027,12 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                                 completed=True,
                                 dateCompleted=utc_now,
                             )
-                            _msg = 'Item {} (itemID={}) saved, although it was not the next item'.format(
-                                task_id, item_id
+                            LOGGER.debug(
+                                'Item %s (itemID=%s) saved, although it was not '
+                                'the next item',
+                                task_id,
+                                item_id,
                             )
-                            LOGGER.debug(_msg)
-                            print(_msg)
                             item_saved = True
 
                         else:
@@ -982,18 +1042,18 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                                 'please reload the page and try again.'
                             )
 
-                            _msg = 'Item ID {} does not match item {}, will not save!'.format(
-                                item_id, current_item.itemID
+                            LOGGER.debug(
+                                'Item ID %s does not match item %s, will not save!',
+                                item_id,
+                                current_item.itemID,
                             )
-                            LOGGER.debug(_msg)
-                            print(_msg)
 
             # An item from a wrong document was submitted
             else:
-                print(
-                    'Different document IDs: {} != {}, will not save!'.format(
-                        current_item.documentID, document_id
-                    )
+                LOGGER.debug(
+                    'Different document IDs: %s != %s, will not save!',
+                    current_item.documentID,
+                    document_id,
                 )
 
                 error_msg = (
@@ -1003,6 +1063,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     # Get all items from the document that the first unannotated item in the
     # task belongs to, and collect some additional statistics
@@ -1040,11 +1101,11 @@ def direct_assessment_document(request, code=None, campaign_name=None):
         ):
             item.itemID += 1
             item.save()
-            _msg = 'Self-repaired the document item {} for user {}'.format(
-                item, request.user.username
+            LOGGER.info(
+                'Self-repaired the document item %s for user %s',
+                item,
+                request.user.username,
             )
-            print(_msg)
-            LOGGER.info(_msg)
 
         block_scores.append(item_scores)
         _prev_item = item
@@ -1058,6 +1119,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     # By default, source and target items are text segments
     source_item_type = 'text'
@@ -1317,7 +1379,8 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
             LOGGER.error(error_msg)
             item_saved = False
         else:
-            DirectAssessmentDocumentResult.objects.create(
+            create_result(
+                DirectAssessmentDocumentResult,
                 score=score,
                 mqm=mqm,
                 start_time=float(start_timestamp),
@@ -1333,8 +1396,9 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
             LOGGER.info(error_msg)
             item_saved = True
 
-        LOGGER.info(f'score={score}, item_id={item_id}, mqm={mqm}')
-        print(f'Got request score={score}, item_id={item_id}, ajax={ajax}, mqm={mqm}')
+        LOGGER.info(
+            'score=%s, item_id=%s, ajax=%s, mqm=%s', score, item_id, ajax, mqm
+        )
     else:
         ajax = False
 
@@ -1383,7 +1447,7 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
         for item, result in zip(doc_items, doc_items_results)
     ]
 
-    LOGGER.info(f'items_completed={items_completed}, docs_completed={docs_completed}')
+    LOGGER.info('items_completed=%s, docs_completed=%s', items_completed, docs_completed)
 
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
@@ -1536,6 +1600,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
             campaign = current_task.campaign
 
     t2 = datetime.now()
+    checkpoint('agenda-scan')
     if request.method == "POST":
         score = request.POST.get('score', None)
         item_id = request.POST.get('item_id', None)
@@ -1563,7 +1628,8 @@ def multimodal_assessment(request, code=None, campaign_name=None):
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
 
                 # pylint: disable=E1101
-                MultiModalAssessmentResult.objects.create(
+                create_result(
+                    MultiModalAssessmentResult,
                     score=score,
                     start_time=float(start_timestamp),
                     end_time=float(end_timestamp),
@@ -1576,6 +1642,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -1594,6 +1661,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     context = {
         'active_page': 'multimodal-assessment',
@@ -1760,6 +1828,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             campaign = current_task.campaign
 
     t2 = datetime.now()
+    checkpoint('agenda-scan')
 
     # Use a custom approach to get the next item in edit mode
     current_item = None
@@ -1794,13 +1863,13 @@ def pairwise_assessment(request, code=None, campaign_name=None):
         
         if key in previous_results:
             previous_answers_data = previous_results[key]
-            LOGGER.info(f"Found previous answers for item {key} in session")
-            LOGGER.info(f"Previous answers data: {previous_answers_data}")
+            LOGGER.info("Found previous answers for item %s in session", key)
+            LOGGER.debug("Previous answers data: %s", previous_answers_data)
             
             # Add debug info for span differences
-            LOGGER.info(f"Span diff votes: {previous_answers_data.get('span_diff_votes', [])}")
-            LOGGER.info(f"Span diff explanations: {previous_answers_data.get('span_diff_explanations', [])}")
-            LOGGER.info(f"Span diff other texts: {previous_answers_data.get('span_diff_other_texts', [])}")
+            LOGGER.debug("Span diff votes: %s", previous_answers_data.get('span_diff_votes', []))
+            LOGGER.debug("Span diff explanations: %s", previous_answers_data.get('span_diff_explanations', []))
+            LOGGER.debug("Span diff other texts: %s", previous_answers_data.get('span_diff_other_texts', []))
             
             # Ensure arrays have correct length
             max_diffs = max(len(candidate1_diffs), len(candidate2_diffs)) #len(diff_pairs)
@@ -1821,7 +1890,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             previous_answers_data['span_diff_explanations'] = span_diff_explanations
             previous_answers_data['span_diff_other_texts'] = span_diff_other_texts
             
-            LOGGER.info(f"Updated span diff arrays to match {max_diffs} differences")
+            LOGGER.info("Updated span diff arrays to match %s differences", max_diffs)
         else:
             # If not in session, try to find in database (fallback)
             previous_answers = PairwiseAssessmentResult.objects.filter(
@@ -1867,9 +1936,9 @@ def pairwise_assessment(request, code=None, campaign_name=None):
                     span_diff_other_texts.append('')
                 
                 # Debug logging
-                LOGGER.info(f"Found {len(span_diff_votes)} span diff votes, {len(span_diff_explanations)} explanations, and {len(span_diff_other_texts)} other texts")
+                LOGGER.debug("Found %s span diff votes, %s explanations, and %s other texts", len(span_diff_votes), len(span_diff_explanations), len(span_diff_other_texts))
                 for i, (votes, exps, others) in enumerate(zip(span_diff_votes, span_diff_explanations, span_diff_other_texts)):
-                    LOGGER.info(f"Diff {i}: Vote={votes}, Explanations={exps}, Other={others}")
+                    LOGGER.debug("Diff %s: Vote=%s, Explanations=%s, Other=%s", i, votes, exps, others)
                 
                 previous_answers_data = {
                     'score1': previous_answers.score1,
@@ -1884,10 +1953,10 @@ def pairwise_assessment(request, code=None, campaign_name=None):
                     'span_diff_explanations': span_diff_explanations,
                     'span_diff_other_texts': span_diff_other_texts
                 }
-                LOGGER.info(f"Found previous answers for item {key} in database")
+                LOGGER.info("Found previous answers for item %s in database", key)
             else:
                 previous_answers_data = None
-                LOGGER.info(f"No previous answers found for item {key}")
+                LOGGER.info("No previous answers found for item %s", key)
     else:
         previous_answers_data = None
 
@@ -1926,21 +1995,21 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             
             # Get explanations for this diff
             explanations = request.POST.getlist(f"selected_choices_diff_{i}")
-            print(f"DEBUG - Raw explanations for diff {i}:", explanations)  # Debug print
+            LOGGER.debug("Raw explanations for diff %s: %s", i, explanations)
             diff_explanations.append(" + ".join(explanations) if explanations else "")
             
             # Get other text for this diff - fixed field name to match template
             other_text_diff = request.POST.get(f"other_text_diff_{i}", "")
-            print(f"DEBUG - Other text for diff {i}:", other_text_diff)  # Add debug print
+            LOGGER.debug("Other text for diff %s: %s", i, other_text_diff)
             diff_other_texts.append(other_text_diff)
             
             i += 1
 
 
 
-        print("Collected diff_choices:", diff_choices)
-        print("Collected diff_explanations:", diff_explanations)
-        print("Collected diff_other_texts:", diff_other_texts)
+        LOGGER.debug("Collected diff_choices: %s", diff_choices)
+        LOGGER.debug("Collected diff_explanations: %s", diff_explanations)
+        LOGGER.debug("Collected diff_other_texts: %s", diff_other_texts)
         # ============================
         # Hiba added this: retrieve selected choices from POST data
         # ============================
@@ -1981,12 +2050,17 @@ def pairwise_assessment(request, code=None, campaign_name=None):
                     return redirect(request.path)
             i += 1
 
-        print(
-        'score1={0}, score2={1}, item_id={2}, src_err={3}, error1={4}, error2={5}, freetextannotation={6}'.format(
-            score1, score2, item_id, source_error, error1, error2, Free_Text_Annotation
-            ))
         LOGGER.info(
-        'score1=%s, score2=%s, item_id=%s, freetextannotation=%s', score1, score2, item_id, Free_Text_Annotation)
+            'score1=%s, score2=%s, item_id=%s, src_err=%s, error1=%s, error2=%s, '
+            'freetextannotation=%s',
+            score1,
+            score2,
+            item_id,
+            source_error,
+            error1,
+            error2,
+            Free_Text_Annotation,
+        )
 
         '''
         print(
@@ -2023,57 +2097,27 @@ def pairwise_assessment(request, code=None, campaign_name=None):
                 fluency_in_target_language = request.session.get("fluency_in_target_language", "")
 
                 # Optionally log them to confirm:
-                print("SAVING SESSION FIELDS:")
-                print("wikipedia_familiarity =", wikipedia_familiarity)
-                print("other_wikipedia_familiarity_text =", other_wikipedia_familiarity_text)
-                print("fluency_in_target_language =", fluency_in_target_language)
-
-
-                print("SESSION - wikipedia_familiarity:", request.session.get("wikipedia_familiarity"))
-                print("SESSION - other_wikipedia_familiarity_text:", request.session.get("other_wikipedia_familiarity_text"))
-                print("SESSION - fluency:", request.session.get("fluency_in_target_language"))
-
-                print("POST - feedback_options:", request.POST.getlist("feedback_options"))
-                print("POST - overallExperience:", request.POST.get("overallExperience"))
-
-
-
-                # 1) grab the raw texts, not the annotated ones:
-                raw1 = current_item.target1Text
-                raw2 = current_item.target2Text
-
-                # 2) tokenize exactly as target_texts_with_diffs does:
-                toks1 = raw1.split()
-                toks2 = raw2.split()
-
-                # 3) align them
-                matcher = SequenceMatcher(None, toks1, toks2)
-                diff_pairs = []
-                #span_diff_texts = ""
-
-                for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-                    if tag == 'equal':
-                        continue
-
-                    if tag == 'replace':
-                        a = " ".join(toks1[i1:i2]).strip() or " "
-                        b = " ".join(toks2[j1:j2]).strip() or " "
-                        diff_pairs.append((a, b))
-
-                    elif tag == 'delete':
-                        a = " ".join(toks1[i1:i2]).strip() or " "
-                        diff_pairs.append((a, " "))
+                LOGGER.debug(
+                    "Session fields: wikipedia_familiarity=%s, "
+                    "other_wikipedia_familiarity_text=%s, "
+                    "fluency_in_target_language=%s",
+                    wikipedia_familiarity,
+                    other_wikipedia_familiarity_text,
+                    fluency_in_target_language,
+                )
+                LOGGER.debug(
+                    "POST fields: feedback_options=%s, overallExperience=%s",
+                    request.POST.getlist("feedback_options"),
+                    request.POST.get("overallExperience"),
+                )
 
-                    elif tag == 'insert':
-                        b = " ".join(toks2[j1:j2]).strip() or " "
-                        diff_pairs.append((" ", b))
 
-                span_diff_texts = (";\n".join(f"{old.strip()} |vs| {new.strip()}" for old, new in diff_pairs) if diff_pairs else "")
 
-                print("Collected diff_pairs:", diff_pairs)
-                print("Collected span_diff_texts:", span_diff_texts)
+                span_diff_texts = _span_diff_texts(current_item)
+                LOGGER.debug("Collected span_diff_texts: %s", span_diff_texts)
                 # pylint: disable=E1101
-                PairwiseAssessmentResult.objects.create(
+                create_result(
+                    PairwiseAssessmentResult,
                     score1=score1,
                     score2=score2,
                     start_time=float(start_timestamp),
@@ -2105,6 +2149,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -2126,6 +2171,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     # Define priming question
     #
@@ -2282,40 +2328,11 @@ def pairwise_assessment(request, code=None, campaign_name=None):
     #    span_b = b.strip() if b.strip() else " "
     #    diff_pairs.append((span_a, span_b))
 
-    # 1) grab the raw texts, not the annotated ones:
-    raw1 = current_item.target1Text
-    raw2 = current_item.target2Text
-
-    # 2) tokenize exactly as target_texts_with_diffs does:
-    toks1 = raw1.split()
-    toks2 = raw2.split()
-
-    # 3) align them
-    matcher = SequenceMatcher(None, toks1, toks2)
-    diff_pairs = []
-    #span_diff_texts = ""
-
-    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-        if tag == 'equal':
-            continue
-
-        if tag == 'replace':
-            a = " ".join(toks1[i1:i2]).strip() or " "
-            b = " ".join(toks2[j1:j2]).strip() or " "
-            diff_pairs.append((a, b))
-
-        elif tag == 'delete':
-            a = " ".join(toks1[i1:i2]).strip() or " "
-            diff_pairs.append((a, " "))
-
-        elif tag == 'insert':
-            b = " ".join(toks2[j1:j2]).strip() or " "
-            diff_pairs.append((" ", b))
-
-    span_diff_texts = (";\n".join(f"{old.strip()} |vs| {new.strip()}" for old, new in diff_pairs) if diff_pairs else "")
+    diff_pairs = _span_diff_pairs(current_item)
+    span_diff_texts = _span_diff_texts(current_item, diff_pairs)
 
-    print("Collected diff_pairs:", diff_pairs)
-    print("Collected span_diff_texts:", span_diff_texts)
+    LOGGER.debug("Collected diff_pairs: %s", diff_pairs)
+    LOGGER.debug("Collected span_diff_texts: %s", span_diff_texts)
 
     context = {
         'active_page': 'pairwise-assessment',
@@ -2416,7 +2433,7 @@ def pairwise_introduction(request, code=None, campaign_name=None):
                 'other_wikipedia_familiarity_text': previous_result.other_wikipedia_familiarity_text or '',
                 'fluency_in_target_language': previous_result.fluency_in_target_language or ''
             }
-            LOGGER.info(f"Pre-populating introduction form with previous answers from result {previous_result.id}")
+            LOGGER.info("Pre-populating introduction form with previous answers from result %s", previous_result.id)
         else:
             # Fallback to session data if available
             previous_data = {
@@ -2466,7 +2483,7 @@ def pairwise_feedback(request):
                 'other_feedback_options_text': previous_result.other_feedback_options_text or '',
                 'overallExperience': previous_result.overallExperience or ''
             }
-            LOGGER.info(f"Pre-populating feedback form with previous answers from result {previous_result.id}")
+            LOGGER.info("Pre-populating feedback form with previous answers from result %s", previous_result.id)
     
     context = {
         'active_page': 'pairwise-feedback',
@@ -2491,10 +2508,13 @@ def pairwise_feedback_submit(request):
         overall_experience = request.POST.get("overallExperience", "")
 
         # DEBUG LOGGING
-        print("== FEEDBACK SUBMITTED ==")
-        print("feedback_options:", feedback_options)
-        print("other_feedback_options_text:", other_feedback_options_text)
-        print("overallExperience:", overall_experience)
+        LOGGER.debug(
+            "Feedback submitted: feedback_options=%s, "
+            "other_feedback_options_text=%s, overallExperience=%s",
+            feedback_options,
+            other_feedback_options_text,
+            overall_experience,
+        )
 
         # Optional: Save feedback_text to a separate model if you want
         # FeedbackModel.objects.create(
@@ -2629,6 +2649,7 @@ def data_assessment(request, code=None, campaign_name=None):
             campaign = current_task.campaign
 
     t2 = datetime.now()
+    checkpoint('agenda-scan')
     if request.method == "POST":
         score = request.POST.get('score', None)
         rank = request.POST.get('rank', None)
@@ -2637,12 +2658,10 @@ def data_assessment(request, code=None, campaign_name=None):
         start_timestamp = request.POST.get('start_timestamp', None)
         end_timestamp = request.POST.get('end_timestamp', None)
 
-        _msg = 'score={} rank={} item_id={}'.format(score, rank, item_id)
-        LOGGER.info(_msg)
-        print(_msg)
+        LOGGER.info('score=%s rank=%s item_id=%s', score, rank, item_id)
 
         if score is None:
-            print('No score provided, will not save!')
+            LOGGER.debug('No score provided, will not save!')
         elif item_id and start_timestamp and end_timestamp:
             duration = float(end_timestamp) - float(start_timestamp)
             LOGGER.debug(float(start_timestamp))
@@ -2663,7 +2682,8 @@ def data_assessment(request, code=None, campaign_name=None):
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
 
                 # pylint: disable=E1101
-                DataAssessmentResult.objects.create(
+                create_result(
+                    DataAssessmentResult,
                     score=score,
                     rank=rank,
                     start_time=float(start_timestamp),
@@ -2677,6 +2697,7 @@ def data_assessment(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -2693,6 +2714,7 @@ def data_assessment(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     source_label = 'Source text'
     target_label = 'Translation'
@@ -2875,6 +2897,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
     # Handling POST requests differs from the original direct_assessment/
     # direct_assessment_context view
     t2 = datetime.now()
+    checkpoint('agenda-scan')
     ajax = False
     item_saved = False
     error_msg = ''
@@ -2888,11 +2911,8 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
         end_timestamp = request.POST.get('end_timestamp', None)
         ajax = bool(request.POST.get('ajax', None) == 'True')
 
-        LOGGER.info('score1=%s, score2=%s, item_id=%s', score1, score2, item_id)
-        print(
-            'Got request score1={0}, score2={1}, item_id={2}, ajax={3}'.format(
-                score1, score2, item_id, ajax
-            )
+        LOGGER.info(
+            'score1=%s, score2=%s, item_id=%s, ajax=%s', score1, score2, item_id, ajax
         )
 
         # If all required information was provided in the POST request
@@ -2928,7 +2948,8 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
 
                     utc_now = datetime.utcnow().replace(tzinfo=utc)
                     # pylint: disable=E1101
-                    PairwiseAssessmentDocumentResult.objects.create(
+                    create_result(
+                        PairwiseAssessmentDocumentResult,
                         score1=score1,
                         score2=score2,
                         start_time=float(start_timestamp),
@@ -2940,7 +2961,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                         completed=True,
                         dateCompleted=utc_now,
                     )
-                    print('Item {} (itemID={}) saved'.format(task_id, item_id))
+                    LOGGER.debug('Item %s (itemID=%s) saved', task_id, item_id)
                     item_saved = True
 
                 # It is not the current item, so check if the result for it
@@ -2972,11 +2993,15 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                         utc_now = datetime.utcnow().replace(tzinfo=utc)
                         current_result.dateCompleted = utc_now
                         current_result.save()
-                        _msg = 'Item {} (itemID={}) updated {}->{} and {}->{}'.format(
-                            task_id, item_id, prev_score1, score1, prev_score2, score2
+                        LOGGER.debug(
+                            'Item %s (itemID=%s) updated %s->%s and %s->%s',
+                            task_id,
+                            item_id,
+                            prev_score1,
+                            score1,
+                            prev_score2,
+                            score2,
                         )
-                        LOGGER.debug(_msg)
-                        print(_msg)
                         item_saved = True
 
                     # If not yet scored, check if the submitted item is from
@@ -2995,7 +3020,8 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                         if found_item:
                             utc_now = datetime.utcnow().replace(tzinfo=utc)
                             # pylint: disable=E1101
-                            PairwiseAssessmentDocumentResult.objects.create(
+                            create_result(
+                                PairwiseAssessmentDocumentResult,
                                 score1=score1,
                                 score2=score2,
                                 start_time=float(start_timestamp),
@@ -3007,11 +3033,12 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                                 completed=True,
                                 dateCompleted=utc_now,
                             )
-                            _msg = 'Item {} (itemID={}) saved, although it was not the next item'.format(
-                                task_id, item_id
+                            LOGGER.debug(
+                                'Item %s (itemID=%s) saved, although it was not '
+                                'the next item',
+                                task_id,
+                                item_id,
                             )
-                            LOGGER.debug(_msg)
-                            print(_msg)
                             item_saved = True
 
                         else:
@@ -3021,18 +3048,18 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                                 'please reload the page and try again.'
                             )
 
-                            _msg = 'Item ID {} does not match item {}, will not save!'.format(
-                                item_id, current_item.itemID
+                            LOGGER.debug(
+                                'Item ID %s does not match item %s, will not save!',
+                                item_id,
+                                current_item.itemID,
                             )
-                            LOGGER.debug(_msg)
-                            print(_msg)
 
             # An item from a wrong document was submitted
             else:
-                print(
-                    'Different document IDs: {} != {}, will not save!'.format(
-                        current_item.documentID, document_id
-                    )
+                LOGGER.debug(
+                    'Different document IDs: %s != %s, will not save!',
+                    current_item.documentID,
+                    document_id,
                 )
 
                 error_msg = (
@@ -3042,6 +3069,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                 )
 
     t3 = datetime.now()
+    checkpoint('submit')
 
     # Get all items from the document that the first unannotated item in the
     # task belongs to, and collect some additional statistics
@@ -3119,6 +3147,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
     target_language = current_task.marketTargetLanguage()
 
     t4 = datetime.now()
+    checkpoint('next-item')
 
     reference_label = 'Source text'
     candidate1_label = 'Translation A'
@@ -3246,3 +3275,316 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
     if new_ui:
         template = 'EvalView/pairwise-assessment-document-newui.html'
     return render(request, template, context)
+
+
+# Default and maximum number of items returned or submitted per API call
+API_DEFAULT_ITEMS = 10
+API_MAX_ITEMS = 100
+
+# Pairwise result fields accepted as lists, stored joined like in the view
+_PAIRWISE_LIST_FIELDS = (
+    'selected_advantages',
+    'non_selected_problems',
+    'wiki_adequacy',
+    'feedback_options',
+    'span_diff_votes',
+    'span_diff_explanations',
+    'span_diff_other_texts',
+)
+
+_PAIRWISE_TEXT_FIELDS = (
+    'selected_advantages_other',
+    'non_selected_problems_other',
+    'other_feedback_options_text',
+    'overallExperience',
+)
+
+
+def _score_value(value, name, required=True):
+    if value is None or value == '':
+        if required:
+            raise ValueError('missing {0}'.format(name))
+        return None
+
+    score = int(value)
+    if not 0 <= score <= 100:
+        raise ValueError('{0} must be between 0 and 100'.format(name))
+    return score
+
+
+def _segment_result_fields(data, request):
+    """
+    Returns result fields for direct and multimodal assessment results.
+    """
+    return {'score': _score_value(data.get('score'), 'score')}
+
+
+def _pairwise_result_fields(data, request):
+    """
+    Returns result fields for pairwise assessment results.
+
+    Like in pairwise_assessment(), introduction answers are read from the
+    session and list answers are stored joined by ";\n".
+    """
+    fields = {
+        'score1': _score_value(data.get('score1', data.get('score')), 'score1'),
+        'score2': _score_value(data.get('score2'), 'score2', required=False),
+        'sourceErrors': data.get('source_error'),
+        'errors1': data.get('error1'),
+        'errors2': data.get('error2'),
+        'wikipedia_familiarity': ';\n'.join(
+            request.session.get('wikipedia_familiarity', [])
+        ),
+        'other_wikipedia_familiarity_text': request.session.get(
+            'other_wikipedia_familiarity_text', ''
+        ),
+        'fluency_in_target_language': request.session.get(
+            'fluency_in_target_language', ''
+        ),
+    }
+    for name in _PAIRWISE_LIST_FIELDS:
+        values = data.get(name, [])
+        if not isinstance(values, list):
+            raise ValueError('{0} must be a list'.format(name))
+        fields[name] = ';\n'.join(str(x) for x in values)
+
+    for name in _PAIRWISE_TEXT_FIELDS:
+        fields[name] = str(data.get(name, ''))
+
+    return fields
+
+
+def _segment_item_data(item):
+    data = {
+        'sourceText': item.sourceText,
+        'targetText': item.targetText,
+    }
+    if hasattr(item, 'imageURL'):
+        data['imageURL'] = item.imageURL
+    return data
+
+
+def _pairwise_item_data(item):
+    candidate1_text, candidate2_text = item.target_texts_with_diffs()
+    return {
+        'segmentText': item.segmentText,
+        'target1Text': item.target1Text,
+        'target2Text': item.target2Text,
+        'contextLeft': item.context_left(),
+        'contextRight': item.context_right(),
+        'candidate1Html': candidate1_text,
+        'candidate2Html': candidate2_text,
+    }
+
+
+def _segment_item_result_fields(item):
+    return {}
+
+
+def _pairwise_item_result_fields(item):
+    """
+    Returns result fields computed from the item, like pairwise_assessment().
+    """
+    return {'span_diff_texts': _span_diff_texts(item)}
+
+
+# Task type in API URLs => (task class, result class, item data, result
+# fields from submitted data, result fields from the item)
+API_TASK_TYPES = {
+    'direct': (
+        DirectAssessmentTask,
+        DirectAssessmentResult,
+        _segment_item_data,
+        _segment_result_fields,
+        _segment_item_result_fields,
+    ),
+    'multimodal': (
+        MultiModalAssessmentTask,
+        MultiModalAssessmentResult,
+        _segment_item_data,
+        _segment_result_fields,
+        _segment_item_result_fields,
+    ),
+    'pairwise': (
+        PairwiseAssessmentTask,
+        PairwiseAssessmentResult,
+        _pairwise_item_data,
+        _pairwise_result_fields,
+        _pairwise_item_result_fields,
+    ),
+}
+
+
+def _api_error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _api_task_for_user(task_cls, task_id, user):
+    """
+    Returns active task if assigned to user or open in their agenda.
+    """
+    task = task_cls.objects.filter(pk=task_id, activated=True).first()
+    if task is None:
+        return None
+
+    if task.assignedTo.filter(pk=user.pk).exists():
+        return task
+
+    open_in_agenda = TaskAgenda.objects.filter(
+        user=user,
+        _open_tasks__typeName=task_cls.__name__,
+        _open_tasks__primaryID=str(task.id),
+    )
+    if open_in_agenda.exists():
+        return task
+
+    return None
+
+
+def _api_items(items, item_data):
+    return [
+        dict(id=item.id, itemID=item.itemID, itemType=item.itemType, **item_data(item))
+        for item in items
+    ]
+
+
+def _api_count(value, default):
+    count = int(value if value is not None else default)
+    if not 0 <= count <= API_MAX_ITEMS:
+        raise ValueError('count must be between 0 and {0}'.format(API_MAX_ITEMS))
+    return count
+
+
+@login_required
+def next_items_api(request, task_type, task_id):
+    """
+    Returns the next items of a segment-level task for the current user.
+
+    GET parameter count sets the number of items, defaults to
+    API_DEFAULT_ITEMS. Annotation pages can use this to prefetch items and
+    submit their results in bulk with submit_results_api().
+    """
+    if request.method != 'GET':
+        return _api_error('Only GET requests are supported', status=405)
+
+    task_cls, _, item_data, _, _ = API_TASK_TYPES[task_type]
+    try:
+        count = _api_count(request.GET.get('count'), API_DEFAULT_ITEMS)
+    except ValueError as exc:
+        return _api_error(str(exc))
+
+    task = _api_task_for_user(task_cls, task_id, request.user)
+    if task is None:
+        return _api_error('No such task for user', status=404)
+
+    items = task.next_items_for_user(request.user, count)
+    return JsonResponse({'task': task.id, 'items': _api_items(items, item_data)})
+
+
+@login_required
+def submit_results_api(request, task_type, task_id):
+    """
+    Saves results for the next items of a task in one transaction.
+
+    Expects a JSON object with a list of results, each with the item "id",
+    "start_timestamp", "end_timestamp" and the type-specific answers, e.g.,
+    "score", and optionally "prefetch", the number of next items to return.
+    Results are saved at most once per task, item and user, so resending a
+    request after a lost response is safe: results which already exist are
+    reported as duplicates. New results must be for the next items of the
+    task, in task order, just like a single result in the annotation views.
+    """
+    if request.method != 'POST':
+        return _api_error('Only POST requests are supported', status=405)
+
+    task_cls, result_cls, item_data, result_fields, item_result_fields = API_TASK_TYPES[
+        task_type
+    ]
+    try:
+        data = json.loads(request.body)
+        results = data['results']
+        prefetch = _api_count(data.get('prefetch'), 0)
+    except (ValueError, KeyError, TypeError):
+        return _api_error('Expected JSON object with list of results')
+
+    if not isinstance(results, list) or not 0 < len(results) <= API_MAX_ITEMS:
+        return _api_error('Expected 1 to {0} results'.format(API_MAX_ITEMS))
+
+    task = _api_task_for_user(task_cls, task_id, request.user)
+    if task is None:
+        return _api_error('No such task for user', status=404)
+
+    fields_by_item = {}
+    for index, result in enumerate(results):
+        try:
+            item_id = int(result['id'])
+            start_time = float(result['start_timestamp'])
+            end_time = float(result['end_timestamp'])
+            fields = result_fields(result, request)
+        except (ValueError, KeyError, TypeError) as exc:
+            return _api_error('Invalid result #{0}: {1}'.format(index, exc))
+
+        if item_id in fields_by_item:
+            return _api_error('Duplicate item {0} in results'.format(item_id))
+
+        fields.update(start_time=start_time, end_time=end_time)
+        fields_by_item[item_id] = fields
+
+    with transaction.atomic():
+        # Serializes concurrent submissions for the same task where supported
+        task_cls.objects.select_for_update().filter(pk=task.pk).exists()
+
+        duplicates = set(
+            result_cls.objects.filter(
+                task=task,
+                item_id__in=fields_by_item,
+                createdBy=request.user,
+                activated=False,
+                completed=True,
+            ).values_list('item_id', flat=True)
+        )
+        new_item_ids = sorted(set(fields_by_item) - duplicates)
+
+        next_items = task.next_items_for_user(request.user, len(new_item_ids))
+        if [item.id for item in next_items] != new_item_ids:
+            return _api_error(
+                'Results must be for the next items of the task',
+                status=409,
+            )
+
+        utc_now = datetime.utcnow().replace(tzinfo=utc)
+        result_cls.objects.bulk_create(
+            result_cls(
+                item=item,
+                task=task,
+                createdBy=request.user,
+                activated=False,
+                completed=True,
+                dateCompleted=utc_now,
+                **fields_by_item[item.id],
+                **item_result_fields(item),
+            )
+            for item in next_items
+        )
+
+    LOGGER.info(
+        'Saved %s results, skipped %s duplicates for task %s, user "%s"',
+        len(new_item_ids),
+        len(duplicates),
+        task.id,
+        request.user.username,
+    )
+
+    # Keep task completion in sync with single result submissions
+    next_items = task.next_items_for_user(request.user, max(prefetch, 1))
+    if not next_items:
+        task.next_item_for_user(request.user)
+
+    return JsonResponse(
+        {
+            'task': task.id,
+            'saved': new_item_ids,
+            'duplicates': sorted(duplicates),
+            'items': _api_items(next_items[:prefetch], item_data),
+        }
+    )
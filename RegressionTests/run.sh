@@ -56,18 +56,10 @@ if ! command -v $APPRAISE_PYTHON > /dev/null; then
     exit 1
 fi
 
-# This is quite fragile, but seems to work for now. Other (quickly) tested
-# approaches for running regression tests on a dedicated database:
-#
-# 1. Setting up a new database name and using --database in management
-#   commands, but custom commands do not support this yet, and I'm not sure if
-#   it's possible to switch the database on the fly.
-# 2. Using custom local_settings.py file, but it would be mostly a copy of the
-#   basic settings.py and could overwrite developer's custom local settings.
-#
-# Setup a database for regression tests.
-log "Using database: $APPRAISE_DATABASE"
-sed -ri.bak "s/development\\.db/$APPRAISE_DATABASE/g" "$APPRAISE_ROOT/Appraise/settings.py"
+# Setup a database for regression tests. Appraise/settings.py uses the
+# SQLite database given in APPRAISE_SQLITE_DB instead of the default one.
+export APPRAISE_SQLITE_DB="$APPRAISE_ROOT/$APPRAISE_DATABASE"
+log "Using database: $APPRAISE_SQLITE_DB"
 
 # Prepare database
 $APPRAISE_PYTHON manage.py migrate --database $APPRAISE_DB_NAME
@@ -143,13 +135,6 @@ time_end=$(date +%s.%N)
 time_total=$(format_time $time_start $time_end)
 
 
-##########################################################################
-# Clean up
-
-# Restore the original development database in Appraise settings
-test -e Appraise/settings.py.bak && mv Appraise/settings.py.bak Appraise/settings.py
-
-
 ##########################################################################
 # Show summary
 prev_log="$APPRAISE_TESTS_DIR/previous.log"
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+
+Runs regression tests in parallel, each in isolation.
+
+Every test_*.sh script gets its own copy of a freshly migrated SQLite
+database, its own media root and log file, passed to Django through the
+APPRAISE_SQLITE_DB, APPRAISE_MEDIA_ROOT and APPRAISE_LOG_FILENAME
+environment variables, so Appraise/settings.py is never modified. Prints a
+per-test timing table and flags tests which became slower than in a
+previous run, or slower than an absolute threshold.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+APPRAISE_ROOT = os.path.dirname(TESTS_DIR)
+
+EXIT_CODE_SUCCESS = 0
+
+
+def _find_python():
+    """Returns Python executable, preferring PYTHONBIN and ../venv."""
+    if os.environ.get('PYTHONBIN'):
+        return os.environ['PYTHONBIN']
+
+    venv_python = os.path.join(APPRAISE_ROOT, 'venv', 'bin', 'python3')
+    if os.path.isfile(venv_python):
+        return venv_python
+
+    return sys.executable
+
+
+def _find_tests(prefixes):
+    """Returns sorted paths of test_*.sh scripts, skipping _* directories."""
+    test_paths = []
+    for prefix in prefixes:
+        for root, dirs, files in os.walk(os.path.abspath(prefix)):
+            dirs[:] = [x for x in dirs if not x.startswith('_')]
+            test_paths.extend(
+                os.path.join(root, x)
+                for x in files
+                if x.startswith('test_') and x.endswith('.sh')
+            )
+    return sorted(test_paths)
+
+
+def _base_environment(python):
+    env = dict(os.environ)
+    env.update(
+        {
+            'LC_ALL': 'C.UTF-8',
+            'APPRAISE_TESTS_DIR': TESTS_DIR,
+            'APPRAISE_ROOT': APPRAISE_ROOT,
+            'APPRAISE_EXAMPLES': os.path.join(APPRAISE_ROOT, 'Examples'),
+            'APPRAISE_PYTHON': python,
+            'APPRAISE_MANAGE': '{0} {1}'.format(
+                python, os.path.join(APPRAISE_ROOT, 'manage.py')
+            ),
+            # Disable Django Debug Toolbar for regression testing
+            'APPRAISE_DEBUG': '',
+            'EXIT_CODE_SUCCESS': str(EXIT_CODE_SUCCESS),
+        }
+    )
+    # Tests must not use an external database or shared metrics directory
+    for name in ('APPRAISE_DB_ENGINE', 'APPRAISE_METRICS_DIR'):
+        env.pop(name, None)
+    return env
+
+
+def _isolated_environment(base_env, work_dir):
+    env = dict(base_env)
+    env['APPRAISE_SQLITE_DB'] = os.path.join(work_dir, 'db.sqlite3')
+    env['APPRAISE_MEDIA_ROOT'] = os.path.join(work_dir, 'media') + os.sep
+    env['APPRAISE_LOG_FILENAME'] = os.path.join(work_dir, 'appraise.log')
+    os.makedirs(env['APPRAISE_MEDIA_ROOT'])
+    return env
+
+
+def _prepare_template_database(base_env, work_dir):
+    """Migrates a database with a superuser, copied for each test."""
+    env = _isolated_environment(base_env, work_dir)
+    manage = env['APPRAISE_MANAGE'].split(' ', 1)
+    commands = (
+        ['migrate', '--no-input'],
+        [
+            'createsuperuser',
+            '--no-input',
+            '--username',
+            'admin',
+            '--email',
+            'admin@appraise.org',
+        ],
+    )
+    for command in commands:
+        subprocess.run(
+            manage + command,
+            cwd=APPRAISE_ROOT,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    return env['APPRAISE_SQLITE_DB']
+
+
+def _run_test(test_path, base_env, template_db):
+    """Runs test in its own database, returns (passed, seconds)."""
+    test_dir, test_file = os.path.split(test_path)
+    with TemporaryDirectory(prefix='appraise-regression-') as work_dir:
+        env = _isolated_environment(base_env, work_dir)
+        shutil.copyfile(template_db, env['APPRAISE_SQLITE_DB'])
+
+        started = perf_counter()
+        # Tests are executed from their directory
+        with open(test_path + '.log', mode='w', encoding='utf-8') as log_file:
+            process = subprocess.run(
+                ['bash', '-x', test_file],
+                cwd=test_dir,
+                env=env,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                check=False,
+            )
+        seconds = perf_counter() - started
+
+    return process.returncode == EXIT_CODE_SUCCESS, seconds
+
+
+def _relative_name(test_path):
+    return os.path.relpath(test_path, APPRAISE_ROOT)
+
+
+def _check_timings(results, baseline, tolerance, slow_threshold):
+    """Returns {test name: reason} for tests which are too slow."""
+    slow = {}
+    for name, (_, seconds) in results.items():
+        if name in baseline and seconds > baseline[name] * (1 + tolerance):
+            slow[name] = '+{0:.0%} vs. baseline'.format(
+                seconds / baseline[name] - 1
+            )
+        elif slow_threshold and seconds > slow_threshold:
+            slow[name] = 'over {0:.0f}s'.format(slow_threshold)
+    return slow
+
+
+def _write_timing_table(results, baseline, slow, out):
+    _header = ('test', 'result', 'seconds', 'baseline', 'flag')
+    _width = max(len(x) for x in list(results) + [_header[0]])
+    _fmt = '{0:' + str(_width) + '} {1:>6} {2:>8} {3:>8}  {4}'
+    out.write(_fmt.format(*_header) + '\n')
+    for name, (passed, seconds) in sorted(
+        results.items(), key=lambda x: x[1][1], reverse=True
+    ):
+        _baseline = baseline.get(name)
+        _row = (
+            name,
+            'OK' if passed else 'failed',
+            '{0:.2f}'.format(seconds),
+            '{0:.2f}'.format(_baseline) if _baseline is not None else '-',
+            'SLOW ' + slow[name] if name in slow else '',
+        )
+        out.write(_fmt.format(*_row) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[2])
+    parser.add_argument(
+        'prefixes',
+        nargs='*',
+        default=[os.path.join(TESTS_DIR, 'tests')],
+        help='Directories with test_*.sh scripts, default: all tests.',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Number of tests run in parallel, default: number of CPUs.',
+    )
+    parser.add_argument(
+        '--output', type=str, help='Write per-test timings to this JSON file.'
+    )
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        help='Compare against per-test timings from an earlier --output file.',
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.5,
+        help='Flag tests slower than baseline by this fraction, default: 0.5.',
+    )
+    parser.add_argument(
+        '--slow-threshold',
+        type=float,
+        default=30.0,
+        help='Flag tests without baseline taking longer, in seconds.',
+    )
+    parser.add_argument(
+        '--fail-on-regression',
+        action='store_true',
+        help='Exit with an error if any test is flagged as slow.',
+    )
+    args = parser.parse_args()
+
+    test_paths = _find_tests(args.prefixes)
+    if not test_paths:
+        print('No regression tests found in {0}'.format(' '.join(args.prefixes)))
+        return 1
+
+    python = _find_python()
+    base_env = _base_environment(python)
+    print('Python executable: {0}'.format(python))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as in_file:
+            baseline = json.load(in_file)
+
+    # Start slowest tests first, so that the suite takes about as long
+    # as its slowest test if there are enough jobs
+    test_paths.sort(key=lambda x: baseline.get(_relative_name(x), 0), reverse=True)
+
+    started = perf_counter()
+    with TemporaryDirectory(prefix='appraise-regression-') as template_dir:
+        template_db = _prepare_template_database(base_env, template_dir)
+
+        print(
+            'Running {0} regression tests with {1} jobs...'.format(
+                len(test_paths), args.jobs
+            )
+        )
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+            futures = {
+                executor.submit(_run_test, x, base_env, template_db): x
+                for x in test_paths
+            }
+            for future, test_path in futures.items():
+                results[_relative_name(test_path)] = future.result()
+    elapsed = perf_counter() - started
+
+    slow = _check_timings(results, baseline, args.tolerance, args.slow_threshold)
+    print('---------------------')
+    _write_timing_table(results, baseline, slow, sys.stdout)
+
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8') as out_file:
+            timings = {name: round(x[1], 3) for name, x in sorted(results.items())}
+            json.dump(timings, out_file, indent=2)
+
+    failed = sorted(name for name, (passed, _) in results.items() if not passed)
+    if failed:
+        print('---------------------')
+        print('Failed:')
+        for name in failed:
+            print('  - {0}'.format(name))
+
+    print('---------------------')
+    print(
+        'Ran {0} tests in {1:.2f}s, {2} passed, {3} failed, {4} slow'.format(
+            len(results), elapsed, len(results) - len(failed), len(failed), len(slow)
+        )
+    )
+
+    if failed or (slow and args.fail_on_regression):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
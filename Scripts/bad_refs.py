@@ -0,0 +1,296 @@
+# pylint: disable=C0103,C0111,C0330,E1101
+"""
+Bad reference generator for quality control items.
+
+Shared by the create_*_tasks.py scripts. A bad reference replaces an
+embedded phrase of a segment with a phrase of the same length, taken
+from a different reference segment.
+
+Reference segments are tokenised once into a PhraseIndex, which buckets
+them by length, so a donor segment long enough for the required phrase
+is picked in constant time. Each (system, document, segment) triple gets
+its own random draws, derived from the global seed and the triple, so
+systems can be processed in parallel and the output for a
+given seed does not depend on the number of processes.
+"""
+import sys
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from struct import Struct
+from time import perf_counter
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+# Segment length (a, b] to phrase length, see bad_phrase_length()
+BAD_PHRASE_LENGTHS = ((0, 0), (1, 2), (5, 2), (8, 3), (15, 4), (20, 5))
+MAX_BAD_PHRASE_LENGTH = 6
+
+# Four 64-bit values per digest, each segment uses up to three
+_DRAWS = Struct('>4Q')
+
+
+def _tokenize(text: str, character_based: bool = False) -> List[str]:
+    if character_based:
+        return list(text)
+    return text.split(' ')
+
+
+def _detokenize(tokens: List[str], character_based: bool = False) -> str:
+    if character_based:
+        return ''.join(tokens)
+    return ' '.join(tokens)
+
+
+def bad_phrase_length(seg_len: int, character_based: bool = False) -> int:
+    """
+    Returns length of bad phrase for segment of given length.
+
+    Segment length (a, b] to phrase length (excluding a, including b)
+    mapping defined as follows:
+        ( 0,   1] : 2
+        ( 1,   5] : 2
+        ( 5,   8] : 3
+        ( 8,  15] : 4
+        (15,  20] : 5
+        (20, max] : 6
+
+    For character-based languages, which do not support tokenisation
+    by whitespace, the resulting phrase length will be doubled, and
+    is interpreted as a character length.
+    """
+    bad_len = MAX_BAD_PHRASE_LENGTH
+    for right, length in BAD_PHRASE_LENGTHS:
+        if seg_len <= right:
+            bad_len = length
+            break
+
+    if character_based:
+        bad_len = 2 * bad_len
+
+    return bad_len
+
+
+class SegmentRandom:
+    """
+    Random draws for one segment of a system output.
+
+    Draws are taken from a hash of the global seed and the (system,
+    document, segment) triple, not from Python's hash() or a shared
+    generator, so they are stable across processes and interpreter runs.
+    Seeding a random.Random instance per segment would cost more than
+    generating the bad reference itself.
+    """
+
+    def __init__(self, system_hash, doc_id: str, seg_id: int):
+        digest = system_hash.copy()
+        digest.update(f'{doc_id}\t{seg_id}'.encode('utf-8'))
+        self.digest = digest.digest()
+        self.values = list(_DRAWS.unpack(self.digest))
+
+    def randrange(self, stop: int) -> int:
+        """
+        Returns integer in [0, stop), using the next value of the digest.
+        """
+        if not self.values:
+            self.digest = blake2b(self.digest, digest_size=32).digest()
+            self.values = list(_DRAWS.unpack(self.digest))
+        return self.values.pop() % stop
+
+    @staticmethod
+    def system_hash(rng_seed: int, sys_id: str):
+        """
+        Returns hash state for all segments of the given system.
+        """
+        return blake2b(f'{rng_seed}\t{sys_id}\t'.encode('utf-8'), digest_size=32)
+
+
+class PhraseIndex:
+    """
+    Tokenised reference segments, bucketed by length.
+
+    Keys are ordered by length, so the segments with at least n tokens
+    are a suffix of keys which starts at a precomputed offset.
+    """
+
+    def __init__(
+        self,
+        refs: Dict[str, List[Tuple[int, str]]],
+        character_based: bool = False,
+    ):
+        segments = []
+        for doc_id, doc in refs.items():
+            for seg_id, ref_text in doc:
+                tokens = _tokenize(ref_text, character_based)
+                segments.append((len(tokens), f'{doc_id}_{seg_id}', tokens))
+
+        # Stable sort keeps document order within each length
+        segments.sort(key=lambda x: x[0])
+        self.lengths = [x[0] for x in segments]
+        self.keys = [x[1] for x in segments]
+        self.tokens = [x[2] for x in segments]
+        self.positions = {key: pos for pos, key in enumerate(self.keys)}
+        self.character_based = character_based
+
+        max_len = bad_phrase_length(sys.maxsize, character_based)
+        self.offsets = [
+            bisect_left(self.lengths, min_len) for min_len in range(max_len + 1)
+        ]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidate(self, rng: SegmentRandom, min_len: int, exclude: str) -> List[str]:
+        """
+        Returns tokens of a random segment with at least min_len tokens.
+
+        The segment with key exclude is never chosen, unless it is the
+        only one. Falls back to shorter segments if there are no others
+        with at least min_len tokens.
+        """
+        if min_len < len(self.offsets):
+            offset = self.offsets[min_len]
+        else:
+            offset = bisect_left(self.lengths, min_len)
+
+        excluded = self.positions.get(exclude)
+        available = len(self.keys) - offset
+        if excluded is not None and excluded >= offset:
+            available -= 1
+
+        if available < 1:
+            offset = 0
+            available = len(self.keys) - (1 if excluded is not None else 0)
+            if available < 1:
+                return self.tokens[excluded] if excluded is not None else []
+
+        pos = offset + rng.randrange(available)
+        if excluded is not None and excluded <= pos and excluded >= offset:
+            pos += 1
+        return self.tokens[pos]
+
+
+def create_bad_ref(
+    seg_data: List[str],
+    ref_data: List[str],
+    bad_len: int,
+    rng: SegmentRandom,
+) -> List[str]:
+    """
+    Replaces a phrase of bad_len tokens in seg_data with one of ref_data.
+
+    See bad_phrase_length() definition for length mapping details.
+    """
+    seg_len = len(seg_data)
+    ref_len = len(ref_data)
+
+    # Determine random replacement position. For segments longer than
+    # (bad_len + 1), we enforce that this cannot be sentence initial
+    # or final, so positions 0 and (seg_len - bad_len -1) are invalid
+    # and we use an embedded bad_pos in [1, (seg_len - bad_len - 1)].
+    # This happens for all seg_len > 3.
+    bad_pos = 0
+    if seg_len - bad_len > 0:
+        bad_pos = rng.randrange(seg_len - bad_len)
+
+    elif seg_len > 3:
+        bad_pos = 1 + rng.randrange(max(1, seg_len - bad_len - 1))
+
+    ref_pos = 0
+    if ref_len - bad_len > 0:
+        ref_pos = rng.randrange(ref_len - bad_len)
+
+    return (
+        seg_data[:bad_pos]
+        + ref_data[ref_pos : ref_pos + bad_len]
+        + seg_data[bad_pos + bad_len :]
+    )
+
+
+def create_bad_refs(
+    docs: Dict[str, List[Tuple[int, str]]],
+    index: PhraseIndex,
+    sys_id: str,
+    rng_seed: int,
+) -> Dict[str, List[Tuple[int, str]]]:
+    """
+    Creates bad references for given documents of one system.
+
+    For each segment in the given documents, this creates a so-called
+    ``bad reference'' which is constructed by replacing an embedded
+    phrase p with a randomly placed phrase p' of the same length,
+    taken from a different segment contained in the index. The length
+    of the phrase is relative to the full segment length.
+    """
+    character_based = index.character_based
+    system_hash = SegmentRandom.system_hash(rng_seed, sys_id)
+    bad_docs: Dict[str, List[Tuple[int, str]]] = OrderedDict()
+    for doc_id, doc in docs.items():
+        bad_docs[doc_id] = []
+        for seg_id, seg_text in doc:
+            rng = SegmentRandom(system_hash, doc_id, seg_id)
+            seg_data = _tokenize(seg_text, character_based)
+            bad_len = bad_phrase_length(len(seg_data), character_based)
+
+            # Bad reference id may not be identical to current id.
+            ref_data = index.candidate(rng, bad_len, f'{doc_id}_{seg_id}')
+            bad_data = create_bad_ref(seg_data, ref_data, bad_len, rng)
+            bad_docs[doc_id].append((seg_id, _detokenize(bad_data, character_based)))
+
+    return bad_docs
+
+
+# Phrase index of the current worker process, see _init_worker()
+_WORKER_INDEX = None
+
+
+def _init_worker(index):
+    global _WORKER_INDEX  # pylint: disable=global-statement
+    _WORKER_INDEX = index
+
+
+def _create_worker_bad_refs(args):
+    docs, sys_id, rng_seed = args
+    return create_bad_refs(docs, _WORKER_INDEX, sys_id, rng_seed)
+
+
+def create_all_bad_refs(
+    sys_docs: Dict[str, Dict[str, List[Tuple[int, str]]]],
+    refs: Dict[str, List[Tuple[int, str]]],
+    rng_seed: int,
+    character_based: bool = False,
+    processes: int = 1,
+) -> Dict[str, Dict[str, List[Tuple[int, str]]]]:
+    """
+    Creates bad references for all systems, using up to processes workers.
+
+    Systems are processed in sorted order and the result does not depend
+    on the number of processes.
+    """
+    started = perf_counter()
+    index = PhraseIndex(refs, character_based=character_based)
+    sys_ids = sorted(sys_docs.keys())
+    jobs = [(sys_docs[sys_id], sys_id, rng_seed) for sys_id in sys_ids]
+
+    if processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(jobs)),
+            initializer=_init_worker,
+            initargs=(index,),
+        ) as executor:
+            results = list(executor.map(_create_worker_bad_refs, jobs))
+    else:
+        _init_worker(index)
+        results = [_create_worker_bad_refs(job) for job in jobs]
+
+    bad_docs = OrderedDict(zip(sys_ids, results))
+    seg_count = sum(len(doc) for docs in sys_docs.values() for doc in docs.values())
+    elapsed = perf_counter() - started
+    print(
+        f'Generated {seg_count} bad references for {len(sys_ids)} systems '
+        f'in {elapsed:.2f}s',
+        file=sys.stderr,
+    )
+    return bad_docs
@@ -0,0 +1,680 @@
+# pylint: disable=C0103,C0111,C0330,E1101
+"""
+Streaming batch builder for document-level WMT evaluation campaigns.
+
+Shared by the create_*_tasks.py scripts. Batches are built by a pipeline
+of stages, most of which are generators:
+
+    load_documents()     XML test set => documents, chopped or selected
+    create_all_bad_refs  documents => BAD references, see bad_refs.py
+    iter_doc_stats()     documents => (doc_len, doc_id, sys_id) tuples
+    pack_tasks()         tuples => tasks, see packing.py
+    pad_tasks()          tasks => tasks padded with control documents
+    iter_batches()       padded tasks => batch dictionaries
+    write_batches()      batch dictionaries => JSON or NDJSON file
+
+Batches are written one at a time as they are generated, so memory does
+not grow with the number of batches. build_all() builds batches for many
+language pairs at once, one language pair per process.
+"""
+import sys
+from collections import namedtuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from json import dumps as json_dumps
+from os.path import basename
+from random import Random
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Text
+from typing import Tuple
+
+from bad_refs import create_all_bad_refs
+from packing import pack_tasks
+from wmt_xml import unwrap_xml
+
+MAX_TASK_SIZE = 100  # No support for tasks over 100 items
+MAX_DOC_LENGTH = 70  # We do not support documents longer than 70 segments
+
+# If False, documents with control items will be very last ones in each batch
+SHUFFLE_DOCS_WITH_CONTROL_ITEMS = True
+# If True, add references as additional system outputs
+INCLUDE_REFERENCES_AS_SYSTEMS = True
+# If True, documents may be oversampled to form the last batch
+USE_ALL_DOCUMENTS_AND_ALL_SYSTEMS = True
+REFERENCE_AS_SYSTEM_PREFIX = 'translator-'
+
+OUTPUT_FORMATS = ('json', 'ndjson')
+
+BatchConfig = namedtuple(
+    'BatchConfig',
+    (
+        'xml_file',
+        'output_prefix',
+        'src_lang',
+        'tgt_lang',
+        'char_based',
+        'controls',
+        'max_tasks',
+        'max_segs',
+        'rng_seed',
+        'processes',
+        'selected_docs',
+        'static_context',
+        'even',
+        'output_format',
+    ),
+    defaults=(
+        False,
+        True,
+        100,
+        MAX_DOC_LENGTH,
+        123456,
+        1,
+        None,
+        MAX_DOC_LENGTH,
+        False,
+        'json',
+    ),
+)
+
+Documents = namedtuple(
+    'Documents',
+    (
+        'src_docs',
+        'ref_docs',
+        'sys_docs',
+        'src_prev',
+        'src_next',
+        'sys_prev',
+        'sys_next',
+        'ref_id',
+    ),
+)
+
+BuildSummary = namedtuple(
+    'BuildSummary', ('output_prefix', 'tasks', 'batches', 'docs', 'systems')
+)
+
+
+def _split_list(list_a, chunk_size):
+    for i in range(0, len(list_a), chunk_size):
+        prev_context = list_a[0:i]
+        next_context = list_a[i + chunk_size :]
+        yield list_a[i : i + chunk_size], prev_context, next_context
+
+
+def chop_docs(orig_src_docs, orig_ref_docs, orig_hyp_docs, max_length=10):
+    """
+    Split documents into chunks of max_length size.
+    """
+    src_docs = OrderedDict()
+    src_prev = OrderedDict()
+    src_next = OrderedDict()
+    for doc_id, segs in orig_src_docs.items():
+        for chunk_id, (chunk, prev_ctx, next_ctx) in enumerate(
+            _split_list(segs, max_length)
+        ):
+            src_docs[f"{doc_id}.{chunk_id}"] = list(chunk)
+            src_prev[f"{doc_id}.{chunk_id}"] = list(prev_ctx)
+            src_next[f"{doc_id}.{chunk_id}"] = list(next_ctx)
+
+    ref_docs = OrderedDict()
+    hyp_prev = OrderedDict()
+    hyp_next = OrderedDict()
+    for translator in orig_ref_docs:
+        ref_docs[translator] = OrderedDict()
+        hyp_prev[REFERENCE_AS_SYSTEM_PREFIX + translator] = OrderedDict()
+        hyp_next[REFERENCE_AS_SYSTEM_PREFIX + translator] = OrderedDict()
+        for doc_id, segs in orig_ref_docs[translator].items():
+            for chunk_id, (chunk, prev_ctx, next_ctx) in enumerate(
+                _split_list(segs, max_length)
+            ):
+                ref_docs[translator][f"{doc_id}.{chunk_id}"] = list(chunk)
+                hyp_prev[REFERENCE_AS_SYSTEM_PREFIX + translator][
+                    f"{doc_id}.{chunk_id}"
+                ] = list(prev_ctx)
+                hyp_next[REFERENCE_AS_SYSTEM_PREFIX + translator][
+                    f"{doc_id}.{chunk_id}"
+                ] = list(next_ctx)
+
+    hyp_docs = OrderedDict()
+    for system in orig_hyp_docs:
+        hyp_docs[system] = OrderedDict()
+        hyp_prev[system] = OrderedDict()
+        hyp_next[system] = OrderedDict()
+        for doc_id, segs in orig_hyp_docs[system].items():
+            for chunk_id, (chunk, prev_ctx, next_ctx) in enumerate(
+                _split_list(segs, max_length)
+            ):
+                hyp_docs[system][f"{doc_id}.{chunk_id}"] = list(chunk)
+                hyp_prev[system][f"{doc_id}.{chunk_id}"] = list(prev_ctx)
+                hyp_next[system][f"{doc_id}.{chunk_id}"] = list(next_ctx)
+
+    return src_docs, ref_docs, hyp_docs, src_prev, src_next, hyp_prev, hyp_next
+
+
+def select_docs(orig_src_docs, orig_ref_docs, orig_hyp_docs, tsv_file):
+    """
+    Extract preselected segments from given documents and corresponding contexts.
+    """
+    selected_docs = []
+    print("Selecting the following documents only:")
+    with open(tsv_file, "r", encoding="utf8") as tsv:
+        for line in tsv:
+            _docid, _segid_first, _segid_last = line.strip().split("\t")
+            selected_docs.append((_docid, int(_segid_first), int(_segid_last)))
+            print(f"  {selected_docs[-1]}")
+
+    src_docs = OrderedDict()
+    src_prev = OrderedDict()
+    src_next = OrderedDict()
+    for doc_id, seg_id_1, seg_id_2 in selected_docs:
+        if doc_id not in orig_src_docs:
+            print(
+                f"Error: the selected document {doc_id} not found in the XML file/src"
+            )
+            exit()
+        segs = orig_src_docs[doc_id]
+        chunk = segs[seg_id_1 - 1 : seg_id_2]
+        prev_ctx = segs[0 : seg_id_1 - 1]
+        next_ctx = segs[seg_id_2:]
+        chunk_id = f"#{seg_id_1}-{seg_id_2}"
+
+        src_docs[f"{doc_id}{chunk_id}"] = chunk
+        src_prev[f"{doc_id}{chunk_id}"] = prev_ctx
+        src_next[f"{doc_id}{chunk_id}"] = next_ctx
+
+    ref_docs = OrderedDict()
+    hyp_prev = OrderedDict()
+    hyp_next = OrderedDict()
+    for translator in orig_ref_docs:
+        ref_docs[translator] = OrderedDict()
+        hyp_prev[REFERENCE_AS_SYSTEM_PREFIX + translator] = OrderedDict()
+        hyp_next[REFERENCE_AS_SYSTEM_PREFIX + translator] = OrderedDict()
+
+        for doc_id, seg_id_1, seg_id_2 in selected_docs:
+            if doc_id not in orig_ref_docs[translator]:
+                print(
+                    f"Error: the selected document {doc_id} not found in the XML file/ref"
+                )
+                exit()
+
+            segs = orig_ref_docs[translator][doc_id]
+            chunk = segs[seg_id_1 - 1 : seg_id_2]
+            prev_ctx = segs[0 : seg_id_1 - 1]
+            next_ctx = segs[seg_id_2:]
+            chunk_id = f"#{seg_id_1}-{seg_id_2}"
+
+            ref_docs[translator][f"{doc_id}{chunk_id}"] = chunk
+            hyp_prev[REFERENCE_AS_SYSTEM_PREFIX + translator][
+                f"{doc_id}{chunk_id}"
+            ] = prev_ctx
+            hyp_next[REFERENCE_AS_SYSTEM_PREFIX + translator][
+                f"{doc_id}{chunk_id}"
+            ] = next_ctx
+
+    hyp_docs = OrderedDict()
+    for system in orig_hyp_docs:
+        hyp_docs[system] = OrderedDict()
+        hyp_prev[system] = OrderedDict()
+        hyp_next[system] = OrderedDict()
+
+        for doc_id, seg_id_1, seg_id_2 in selected_docs:
+            if doc_id not in orig_hyp_docs[system]:
+                print(
+                    f"Error: the selected document {doc_id} not found in the XML file/hyp"
+                )
+                exit()
+
+            segs = orig_hyp_docs[system][doc_id]
+            chunk = segs[seg_id_1 - 1 : seg_id_2]
+            prev_ctx = segs[0 : seg_id_1 - 1]
+            next_ctx = segs[seg_id_2:]
+            chunk_id = f"#{seg_id_1}-{seg_id_2}"
+
+            hyp_docs[system][f"{doc_id}{chunk_id}"] = chunk
+            hyp_prev[system][f"{doc_id}{chunk_id}"] = prev_ctx
+            hyp_next[system][f"{doc_id}{chunk_id}"] = next_ctx
+
+    return src_docs, ref_docs, hyp_docs, src_prev, src_next, hyp_prev, hyp_next
+
+
+def load_documents(config: BatchConfig) -> Documents:
+    """
+    Loads test set, chops or selects documents, adds references as systems.
+    """
+    print(f'Loading docs from {config.xml_file}')
+    _, src_docs, _, ref_docs, _, sys_docs = unwrap_xml(
+        config.xml_file, encoding='utf-8'
+    )
+
+    if config.selected_docs:
+        docs_tuple = select_docs(src_docs, ref_docs, sys_docs, config.selected_docs)
+    else:
+        docs_tuple = chop_docs(src_docs, ref_docs, sys_docs, config.max_segs)
+
+    src_docs, ref_docs, sys_docs, src_prev, src_next, sys_prev, sys_next = docs_tuple
+
+    # This reference will be used for generating BAD items
+    ref_id = sorted(list(ref_docs.keys()))[0]
+    print(f'Using reference "{ref_id}"')
+
+    # Add references as additional system outputs
+    if INCLUDE_REFERENCES_AS_SYSTEMS:
+        for translator in sorted(list(ref_docs.keys())):
+            sys_id = REFERENCE_AS_SYSTEM_PREFIX + translator
+            print(f'Adding reference "{translator}" as system output "{sys_id}"')
+            sys_docs[sys_id] = ref_docs[translator]
+
+    return Documents(
+        src_docs, ref_docs, sys_docs, src_prev, src_next, sys_prev, sys_next, ref_id
+    )
+
+
+def iter_doc_stats(
+    sys_docs: Dict[str, Dict[str, List[Tuple[int, str]]]]
+) -> Iterator[Tuple[int, str, str]]:
+    """
+    Yields (doc_len, doc_id, sys_id) for all documents, in sorted system order.
+    """
+    for sys_id in sorted(sys_docs.keys()):
+        for doc_id, doc in sys_docs[sys_id].items():
+            # We do not support documents longer than 70 segments.
+            if len(doc) > MAX_DOC_LENGTH:
+                print("!!! DOCUMENT TOO LONG:", doc_id)
+                continue
+
+            yield len(doc), doc_id, sys_id
+
+
+def pad_tasks(
+    tasks: Iterable[Tuple[Tuple[int, str, str], ...]]
+) -> Iterator[Tuple[Tuple[Any, ...], ...]]:
+    """
+    Yields tasks padded to MAX_TASK_SIZE segments with control documents.
+
+    Control documents are copies of the task's documents, marked with a
+    trailing True, and the last one is shortened to fit.
+    """
+    for tid, task in enumerate(tasks):
+        task_docs = len(task)
+        task_len = sum([x[0] for x in task])
+        if task_len > MAX_TASK_SIZE:
+            raise NotImplementedError(
+                'No support for tasks >{0} items!'.format(MAX_TASK_SIZE)
+            )
+
+        elif task_len < MAX_TASK_SIZE:
+            pad_size = MAX_TASK_SIZE - task_len
+            pad_data: List[Tuple[Any, ...]] = list(task)
+            pad_pos = 0
+            while pad_size > 0:
+                pad_data.append(tuple(list(pad_data[pad_pos]) + [True]))
+                pad_size -= pad_data[-1][0]
+                pad_pos = (pad_pos + 1) % task_docs
+            if pad_size < 0:
+                last_doc = pad_data[-1]
+                pad_data[-1] = (last_doc[0] + pad_size, *last_doc[1:])
+            yield tuple(pad_data)
+
+        else:
+            print(f'WARNING: no control items in task no. {tid}')
+            yield tuple(task)
+
+
+def iter_csv_lines(tasks: Iterable[Tuple[Tuple[Any, ...], ...]]) -> Iterator[str]:
+    """
+    Yields CSV lines task_id,doc_len,doc_id,sys_id,isControl for all documents.
+
+    Also prints task lengths and documents, prefixed with >>>, which the
+    createtasks regression tests compare against expected logs.
+    """
+    for task_id, task in enumerate(tasks, start=1):
+        task_len = sum([x[0] for x in task])
+        print(f'>>> task_len: {task_len}')
+
+        for _doc in task:
+            _data = [str(task_id)] + [str(x) for x in _doc]
+            if _data[-1] != 'True':
+                _data.append('False')  # isControl=False
+            print('>>> ', ' '.join(_data))
+            yield ','.join(_data)
+
+
+def _index_segments(doc_id, segments):
+    return OrderedDict((f'{doc_id}_{item_id}', text) for item_id, text in segments)
+
+
+def iter_batches(
+    tasks: Iterable[Tuple[Tuple[Any, ...], ...]],
+    docs: Documents,
+    bad_docs: Dict[str, Dict[str, List[Tuple[int, str]]]],
+    config: BatchConfig,
+    rng: Random,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one batch dictionary with task metadata and items per task.
+    """
+    source_id = basename(config.xml_file)
+    ctx_size = config.static_context
+
+    for batch_id, task in enumerate(tasks):
+        # Remember, batch numbers are one-based
+        task_data = OrderedDict(
+            {
+                'batchNo': batch_id + 1,
+                'batchSize': 100,
+                'sourceLanguage': config.src_lang,
+                'targetLanguage': config.tgt_lang,
+                'requiredAnnotations': 1,
+                'randomSeed': config.rng_seed,
+            }
+        )
+
+        items_data: List[List[Dict[str, Any]]] = []  # Keeps items grouped into document
+        _item = 0
+        for doc_data in task:
+            items_data.append([])  # Add a new bucket for items from this documents
+            has_control_item = False
+
+            doc_len, doc_id, sys_id, *rest = doc_data
+            isControl = rest is not None and rest
+            target_id = sys_id
+
+            _src = _index_segments(doc_id, docs.src_docs[doc_id])
+            _bad = _index_segments(doc_id, bad_docs[sys_id][doc_id])
+            _tgt = _index_segments(doc_id, docs.sys_docs[sys_id][doc_id])
+            # The full document item uses the last segment ID of the document
+            item_id = docs.sys_docs[sys_id][doc_id][-1][0]
+
+            seg_counter = 0
+            context_src: List[Text] = []
+            context_tgt: List[Text] = []
+            for seg_id in _src:
+                if seg_counter >= doc_len:  # Padding tasks are shorter!
+                    break
+                item_src = _src[seg_id]
+                item_bad = _bad[seg_id]
+                item_tgt = _tgt[seg_id]
+
+                target_text = item_tgt
+                target_type = 'TGT'
+
+                # Do not generate any BAD items if QC is disabled
+                if config.controls and isControl:
+                    randomCoinFlip = rng.choice(
+                        [False, False, True, True, True]  # 60:40 chance
+                    )
+                    if randomCoinFlip:
+                        target_text = item_bad
+                        target_type = 'BAD'
+                        has_control_item = True
+
+                src_ctx = []
+                tgt_ctx = []
+                if seg_counter == 0:
+                    src_ctx = [txt for _, txt in docs.src_prev[doc_id]][-ctx_size:]
+                    tgt_ctx = [txt for _, txt in docs.sys_prev[sys_id][doc_id]][
+                        -ctx_size:
+                    ]
+
+                obj: Dict[str, Any] = OrderedDict()
+                obj['_item'] = _item
+                obj['_block'] = -1
+                obj['sourceID'] = source_id
+                obj['sourceContextLeft'] = '\n'.join(src_ctx)
+                obj['sourceText'] = item_src
+                obj['targetID'] = target_id
+                obj['targetContextLeft'] = '\n'.join(tgt_ctx)
+                obj['targetText'] = target_text
+                obj['itemID'] = seg_counter
+                obj['itemType'] = target_type
+                obj['documentID'] = doc_id
+                obj['isCompleteDocument'] = False
+
+                context_src.append(item_src)
+                context_tgt.append(target_text)
+
+                items_data[-1].append(obj)
+                _item += 1
+                seg_counter += 1
+
+            src_ctx = [txt for _, txt in docs.src_next[doc_id]][:ctx_size]
+            tgt_ctx = [txt for _, txt in docs.sys_next[sys_id][doc_id]][:ctx_size]
+
+            obj = OrderedDict()
+            obj['_item'] = _item
+            obj['_block'] = -1
+            obj['sourceContextLeft'] = '\n'.join(src_ctx)
+            obj['sourceID'] = source_id
+            obj['sourceText'] = ' '.join(context_src)  # full document
+            obj['targetContextLeft'] = '\n'.join(tgt_ctx)
+            obj['targetID'] = target_id
+            obj['targetText'] = ' '.join(context_tgt)  # full document
+            obj['itemID'] = item_id
+            obj['itemType'] = 'BAD' if has_control_item else 'TGT'
+            obj['documentID'] = doc_id
+            obj['isCompleteDocument'] = True
+            items_data[-1].append(obj)
+
+            if has_control_item and SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
+                # Move the document with control items to a random position so
+                # that they are not accumulated as very last documents
+                _bad_doc = items_data.pop()
+                _pos = rng.randint(0, len(items_data) - 1)
+                items_data.insert(_pos, _bad_doc)
+
+        # Extract items from documents
+        _items_data = [item for doc_items in items_data for item in doc_items]
+        # Re-assign _item numbers
+        if SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
+            _item = 0
+            for item in _items_data:
+                item['_item'] = _item
+                if not item['isCompleteDocument']:
+                    _item += 1
+
+        yield OrderedDict({'task': task_data, 'items': _items_data})
+
+
+class BatchWriter:
+    """
+    Writes batches to an open file one at a time.
+
+    JSON output is identical to json.dumps(batches, indent=2,
+    sort_keys=True) and complete once close() is called. NDJSON output
+    has one batch per line.
+    """
+
+    def __init__(self, out_file, output_format='json'):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'Unknown output format {output_format!r}')
+        self.out_file = out_file
+        self.output_format = output_format
+        self.count = 0
+
+    def write(self, batch: Dict[str, Any]):
+        if self.output_format == 'ndjson':
+            self.out_file.write(json_dumps(batch, sort_keys=True))
+            self.out_file.write('\n')
+
+        else:
+            self.out_file.write('[\n' if self.count == 0 else ',\n')
+            json_text = json_dumps(batch, indent=2, sort_keys=True)
+            self.out_file.write('  ' + json_text.replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        if self.output_format == 'json':
+            self.out_file.write('\n]' if self.count else '[]')
+
+
+def write_batches(batches: Iterable[Dict[str, Any]], out_file, output_format='json'):
+    """
+    Writes batches to out_file one at a time, returns number of batches.
+    """
+    writer = BatchWriter(out_file, output_format)
+    for batch in batches:
+        writer.write(batch)
+    writer.close()
+    return writer.count
+
+
+def build_batches(config: BatchConfig) -> BuildSummary:
+    """
+    Builds and writes batches for one language pair.
+
+    Writes {output_prefix}.csv with the documents of all tasks and
+    {output_prefix}.json or .ndjson with up to max_tasks batches.
+    """
+    print(f'Character based={config.char_based}')
+    rng = Random(config.rng_seed)
+
+    print(f'Quality control={config.controls}')
+    # No BAD refs if the target side has videos
+    if not config.controls or config.tgt_lang == 'sgg':
+        required_segs = 100
+    else:
+        required_segs = 80
+    print(f'Setting REQUIRED_SEGS={required_segs}')
+
+    docs = load_documents(config)
+    print("SYS IDS size:", len(docs.sys_docs))
+
+    print(f'Generating bad references using {config.processes} process(es)')
+    bad_docs = create_all_bad_refs(
+        docs.sys_docs,
+        docs.ref_docs[docs.ref_id],
+        config.rng_seed,
+        character_based=config.char_based,
+        processes=config.processes,
+    )
+
+    # pylint: disable-msg=invalid-name
+    sys_ids = sorted(list(docs.sys_docs.keys()))
+    some_sys_id = rng.choice(sys_ids)
+    some_doc_id = rng.choice(sorted(list(docs.sys_docs[some_sys_id].keys())))
+    print("Example:", some_sys_id, some_doc_id)
+    for _s, _b in zip(
+        docs.sys_docs[some_sys_id][some_doc_id], bad_docs[some_sys_id][some_doc_id]
+    ):
+        print(_s)
+        print(_b)
+        print('---')
+
+    doc_stats = list(iter_doc_stats(docs.sys_docs))
+    systems = sorted({x[2] for x in doc_stats})
+    print("total docs:", len(doc_stats))
+    print("total sys:", systems)
+
+    sampled_tasks, packing = pack_tasks(
+        doc_stats,
+        required_segs,
+        Random(config.rng_seed),
+        oversample=USE_ALL_DOCUMENTS_AND_ALL_SYSTEMS,
+    )
+    print(
+        f'Packed {packing.tasks} tasks, {packing.exact_tasks} filled exactly, '
+        f'{packing.oversampled_segments} oversampled and '
+        f'{packing.missing_segments} missing segments'
+    )
+
+    # Shuffle order of tasks
+    rng.shuffle(sampled_tasks)
+    print("Total number of tasks:", len(sampled_tasks))
+    padded_tasks = list(pad_tasks(sampled_tasks))
+
+    if config.even and len(padded_tasks) % 2 == 1:
+        print('Duplicating one batch to keep the number of tasks even')
+        padded_tasks.append(padded_tasks[0])
+        print(f'Number of tasks now is {len(padded_tasks)}')
+
+    with open(f'{config.output_prefix}.csv', mode='w') as _file:
+        for csv_line in iter_csv_lines(padded_tasks):
+            _file.write(csv_line)
+            _file.write('\n')
+
+    batches = iter_batches(
+        padded_tasks[: config.max_tasks], docs, bad_docs, config, rng
+    )
+    out_name = f'{config.output_prefix}.{config.output_format}'
+    with open(out_name, mode='w', encoding='utf8') as out_file:
+        batch_count = write_batches(batches, out_file, config.output_format)
+    print(f'Created {out_name} with {batch_count} batches')
+
+    print(f'Total tasks: {len(sampled_tasks)}')
+    print(f'Total docs:  {len(doc_stats)}')
+    print(f'Total sys:   {len(systems)} {systems}')
+    return BuildSummary(
+        config.output_prefix,
+        len(padded_tasks),
+        batch_count,
+        len(doc_stats),
+        len(systems),
+    )
+
+
+def build_all(configs: List[BatchConfig], processes: int = 1) -> List[BuildSummary]:
+    """
+    Builds batches for several language pairs, using up to processes workers.
+
+    Each language pair is built in a single process, so BAD references of
+    a language pair are then generated sequentially.
+    """
+    if processes > 1 and len(configs) > 1:
+        configs = [config._replace(processes=1) for config in configs]
+        with ProcessPoolExecutor(max_workers=min(processes, len(configs))) as executor:
+            return list(executor.map(build_batches, configs))
+
+    return [build_batches(config) for config in configs]
+
+
+def read_manifest(manifest_file, defaults: BatchConfig) -> List[BatchConfig]:
+    """
+    Reads one config per line of a TSV manifest file.
+
+    Columns are xml_file, output_prefix, src_lang, tgt_lang and, optionally,
+    char_based (1/true/yes). Other settings are taken from defaults. Empty
+    lines and lines starting with # are ignored.
+    """
+    configs = []
+    with open(manifest_file, encoding='utf8') as tsv:
+        for line_no, line in enumerate(tsv, start=1):
+            if not line.strip() or line.startswith('#'):
+                continue
+
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) not in (4, 5):
+                raise ValueError(
+                    f'{manifest_file}:{line_no}: expected 4 or 5 tab-separated '
+                    f'fields, got {len(fields)}'
+                )
+
+            xml_file, output_prefix, src_lang, tgt_lang = fields[:4]
+            char_based = defaults.char_based
+            if len(fields) == 5:
+                char_based = fields[4].strip().lower() in ('1', 'true', 'yes')
+
+            configs.append(
+                defaults._replace(
+                    xml_file=xml_file,
+                    output_prefix=output_prefix,
+                    src_lang=src_lang,
+                    tgt_lang=tgt_lang,
+                    char_based=char_based,
+                )
+            )
+    return configs
+
+
+def print_summaries(summaries: List[BuildSummary]):
+    for summary in summaries:
+        print(
+            f'{summary.output_prefix}: {summary.batches} batches from '
+            f'{summary.tasks} tasks, {summary.docs} docs, {summary.systems} systems',
+            file=sys.stderr,
+        )
@@ -3,7 +3,6 @@ import sys
 from collections import defaultdict
 from collections import OrderedDict
 from glob import iglob
-from json import dumps as json_dumps
 from os.path import basename
 from os.path import join
 from random import choice
@@ -17,6 +16,8 @@ from typing import Tuple
 
 from bs4 import BeautifulSoup  # type: ignore
 
+from batch_builder import BatchWriter
+
 
 MAX_TASK_SIZE = 100  # No support for tasks over 100 items
 MAX_DOC_LENGTH = 70  # We do not support documents longer than 70 segments
@@ -410,136 +411,133 @@ if __name__ == "__main__":
             _file.write(csv_line)
             _file.write('\n')
 
-    json_data = []
     batch_id = 0
-    for task in padded_tasks[:TASK_MAX]:
-        # Remember, batch numbers are one-based
-        task_data = OrderedDict(
-            {
-                'batchNo': batch_id + 1,
-                'batchSize': 100,
-                'sourceLanguage': SRC_LANG,
-                'targetLanguage': TGT_LANG,
-                'requiredAnnotations': 1,
-                'randomSeed': RND_SEED,
-            }
-        )
-
-        source_id = basename(SRC_SGML)
-
-        items_data = []
-        _item = 0
-        for doc_data in task:
-            doc_len, doc_id, sys_id, *rest = doc_data  # type: ignore
-
-            isControl = rest is not None and rest
-
-            target_id = sys_id
-
-            _src = {}
-            _ref = {}
-            _bad = {}
-            _tgt = {}
-
-            for item_id, item_src in SRC_DOCS[doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _src[seg_id] = item_src
-
-            for item_id, item_ref in REF_DOCS[doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _ref[seg_id] = item_ref
-
-            for item_id, item_bad in BAD_DOCS[sys_id][doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _bad[seg_id] = item_bad
-
-            for item_id, item_tgt in SYS_DOCS[sys_id][doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _tgt[seg_id] = item_tgt
-
-            seg_counter = 0
-            context_src: List[Text] = []
-            context_ref: List[Text] = []
-            context_bad: List[Text] = []
-            context_tgt: List[Text] = []
-            for seg_id in _src:
-                if seg_counter >= doc_len:  # Padding tasks are shorter!
-                    break
-                item_src = _src[seg_id]
-                item_ref = _ref[seg_id]
-                item_bad = _bad[seg_id]
-                item_tgt = _tgt[seg_id]
-
-                target_text = item_tgt
-                target_type = 'TGT'
-                if (
-                    CONTROLS and isControl
-                ):  # Do not generate any BAD items if QC is disabled
-                    randomCoinFlip = choice(
-                        [False, False, True, True, True]
-                    )  # 60:40 chance
-                    if randomCoinFlip:
-                        target_text = item_bad
-                        target_type = 'BAD'
-
-                obj: Dict[str, Any] = OrderedDict()
+    json_file_name = f'{OUT_NAME}.json'
+    with open(json_file_name, mode='w', encoding='utf8') as out_file:
+        writer = BatchWriter(out_file)
+        for task in padded_tasks[:TASK_MAX]:
+            # Remember, batch numbers are one-based
+            task_data = OrderedDict(
+                {
+                    'batchNo': batch_id + 1,
+                    'batchSize': 100,
+                    'sourceLanguage': SRC_LANG,
+                    'targetLanguage': TGT_LANG,
+                    'requiredAnnotations': 1,
+                    'randomSeed': RND_SEED,
+                }
+            )
+
+            source_id = basename(SRC_SGML)
+
+            items_data = []
+            _item = 0
+            for doc_data in task:
+                doc_len, doc_id, sys_id, *rest = doc_data  # type: ignore
+
+                isControl = rest is not None and rest
+
+                target_id = sys_id
+
+                _src = {}
+                _ref = {}
+                _bad = {}
+                _tgt = {}
+
+                for item_id, item_src in SRC_DOCS[doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _src[seg_id] = item_src
+
+                for item_id, item_ref in REF_DOCS[doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _ref[seg_id] = item_ref
+
+                for item_id, item_bad in BAD_DOCS[sys_id][doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _bad[seg_id] = item_bad
+
+                for item_id, item_tgt in SYS_DOCS[sys_id][doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _tgt[seg_id] = item_tgt
+
+                seg_counter = 0
+                context_src: List[Text] = []
+                context_ref: List[Text] = []
+                context_bad: List[Text] = []
+                context_tgt: List[Text] = []
+                for seg_id in _src:
+                    if seg_counter >= doc_len:  # Padding tasks are shorter!
+                        break
+                    item_src = _src[seg_id]
+                    item_ref = _ref[seg_id]
+                    item_bad = _bad[seg_id]
+                    item_tgt = _tgt[seg_id]
+
+                    target_text = item_tgt
+                    target_type = 'TGT'
+                    if (
+                        CONTROLS and isControl
+                    ):  # Do not generate any BAD items if QC is disabled
+                        randomCoinFlip = choice(
+                            [False, False, True, True, True]
+                        )  # 60:40 chance
+                        if randomCoinFlip:
+                            target_text = item_bad
+                            target_type = 'BAD'
+
+                    obj: Dict[str, Any] = OrderedDict()
+                    obj['_item'] = _item
+                    obj['_block'] = -1
+                    obj['sourceID'] = source_id
+                    obj['sourceContextLeft'] = ' '.join(context_src)
+                    obj['sourceText'] = item_src
+                    obj['targetID'] = target_id
+                    obj['targetContextLeft'] = ' '.join(context_tgt)
+                    obj['targetText'] = target_text
+                    obj['itemID'] = seg_counter
+                    obj['itemType'] = target_type
+                    obj['documentID'] = doc_id
+                    obj['isCompleteDocument'] = False
+
+                    print(seg_id)
+                    print(' '.join(context_src))
+                    print(item_src)
+                    print('...')
+                    print(' '.join(context_tgt))
+                    print(item_tgt.encode('utf-8'))
+                    print('---')
+
+                    context_src.append(item_src)
+                    context_ref.append(item_ref)
+                    context_bad.append(item_bad)
+                    context_tgt.append(target_text)
+
+                    items_data.append(obj)
+                    _item += 1
+                    seg_counter += 1
+
+                obj = OrderedDict()
                 obj['_item'] = _item
                 obj['_block'] = -1
                 obj['sourceID'] = source_id
-                obj['sourceContextLeft'] = ' '.join(context_src)
-                obj['sourceText'] = item_src
+                obj['sourceText'] = ' '.join(context_src)  # full document
                 obj['targetID'] = target_id
-                obj['targetContextLeft'] = ' '.join(context_tgt)
-                obj['targetText'] = target_text
-                obj['itemID'] = seg_counter
-                obj['itemType'] = target_type
+                obj['targetText'] = ' '.join(context_tgt)  # full document
+                obj['itemID'] = item_id
+                obj['itemType'] = 'TGT'
                 obj['documentID'] = doc_id
-                obj['isCompleteDocument'] = False
-
-                print(seg_id)
-                print(' '.join(context_src))
-                print(item_src)
-                print('...')
-                print(' '.join(context_tgt))
-                print(item_tgt.encode('utf-8'))
-                print('---')
+                obj['isCompleteDocument'] = True
+                items_data.append(obj)
 
-                context_src.append(item_src)
-                context_ref.append(item_ref)
-                context_bad.append(item_bad)
-                context_tgt.append(target_text)
+            output_data = OrderedDict({'task': task_data, 'items': items_data})
 
-                items_data.append(obj)
-                _item += 1
-                seg_counter += 1
-
-            obj = OrderedDict()
-            obj['_item'] = _item
-            obj['_block'] = -1
-            obj['sourceID'] = source_id
-            obj['sourceText'] = ' '.join(context_src)  # full document
-            obj['targetID'] = target_id
-            obj['targetText'] = ' '.join(context_tgt)  # full document
-            obj['itemID'] = item_id
-            obj['itemType'] = 'TGT'
-            obj['documentID'] = doc_id
-            obj['isCompleteDocument'] = True
-            items_data.append(obj)
-
-        output_data = OrderedDict({'task': task_data, 'items': items_data})
-
-        json_data.append(output_data)
-
-        # write out JSON
-        json_text = json_dumps(json_data, indent=2, sort_keys=True)
-
-        json_file_name = f'{OUT_NAME}.json'
-        with open(json_file_name, mode='w', encoding='utf8') as out_file:
+            # write out JSON
             sys.stdout.write('Creating {0} ... '.format(json_file_name, ending=''))  # type: ignore
-            out_file.write(str(json_text))
+            writer.write(output_data)
             sys.stdout.write('OK\n')
 
-        batch_id += 1
+            batch_id += 1
+        writer.close()
 
     print(f'Total tasks: {len(sampled_tasks)}')
     print(f'Total docs:  {total_docs}')
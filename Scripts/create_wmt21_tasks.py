@@ -3,7 +3,6 @@ import sys
 from collections import defaultdict
 from collections import OrderedDict
 from glob import iglob
-from json import dumps as json_dumps
 from os.path import basename
 from os.path import join
 from random import choice
@@ -16,14 +15,13 @@ from typing import List
 from typing import Text
 from typing import Tuple
 
-from lxml import etree
+from batch_builder import BatchWriter
+from wmt_xml import unwrap_xml
 
 
 MAX_TASK_SIZE = 100  # No support for tasks over 100 items
 MAX_DOC_LENGTH = 70  # We do not support documents longer than 70 segments
 
-MISSING_TRANSLATION_MESSAGE = ("NO TRANSLATION AVAILABLE",)
-DEFAULT_TRANSLATOR = "DEFAULT"
 # If False, documents with control items will be very last ones in each batch
 SHUFFLE_DOCS_WITH_CONTROL_ITEMS = True
 # If True, add references as additional system outputs
@@ -31,170 +29,6 @@ INCLUDE_REFERENCES_AS_SYSTEMS = True
 REFERENCE_AS_SYSTEM_PREFIX = 'translator-'
 
 
-def unwrap_xml(
-    xml_file,
-    missing_message=MISSING_TRANSLATION_MESSAGE,
-    encoding='utf-8',
-):
-    """
-    Unwraps an xml file in WMT format, producing source and (if present) reference files
-
-    :param xml_file: The xml file (or fd)
-    :param missing_message: The message to insert when no reference
-
-    :returns: src_lang, src_lines, ref_lang, ref_lines, hyp_lang, hyp_lines
-
-    ref_lines maps translator to document to tuples of segment id and line text
-    hyp_lines maps system to document to tuples of segment id and line text
-
-    ref_lang and hyp_lang may be None, and then their lines are empty
-    note: a single language is assumed for each of sources, refs and hyps
-
-    This function has been extracted from
-    https://github.com/wmt-conference/wmt-format-tools/wmtformat/unwrap.py with
-    some modifications
-    """
-    tree = etree.parse(xml_file)
-
-    # Find and check  the documents (src, ref, hyp)
-    src_langs, ref_langs, hyp_langs, translators, systems = (
-        set(),
-        set(),
-        set(),
-        set(),
-        set(),
-    )
-
-    for src_doc in tree.getroot().findall(".//src"):
-        src_langs.add(src_doc.get("lang"))
-
-    for ref_doc in tree.getroot().findall(".//ref"):
-        ref_langs.add(ref_doc.get("lang"))
-        translator = ref_doc.get("translator")
-        if translator:
-            translators.add(translator)
-
-    for hyp_doc in tree.getroot().findall(".//hyp"):
-        hyp_langs.add(hyp_doc.get("lang"))
-        systems.add(hyp_doc.get("system"))
-
-    if len(src_langs) > 1:
-        raise RuntimeError("Multiple source languages found")
-
-    if len(src_langs) == 0:
-        raise RuntimeError("No source languages found")
-
-    src_lang = src_langs.pop()
-    src_docs = OrderedDict()
-
-    if len(ref_langs) > 1:
-        raise RuntimeError("Multiple reference languages found")
-
-    translators = list(translators)
-    if len(ref_langs) > 0:
-        if len(translators) == 0:
-            print("No translator identifiers found")
-            translators.append(DEFAULT_TRANSLATOR)
-        ref_lang = ref_langs.pop()
-        ref_docs = OrderedDict(
-            (translator, OrderedDict()) for translator in translators
-        )
-    else:
-        print("No references found")
-        ref_lang = None
-        ref_docs = OrderedDict()
-
-    if len(hyp_langs) > 1:
-        raise RuntimeError("Multiple hypothesis languages found")
-
-    systems = list(systems)
-    if len(hyp_langs) > 0:
-        hyp_docs = OrderedDict((system, OrderedDict()) for system in systems)
-        hyp_lang = hyp_langs.pop()
-    else:
-        hyp_docs = OrderedDict()
-        hyp_lang = None
-
-    # Extract text
-    src_sent_count, doc_count = 0, 0
-    for doc in tree.getroot().findall(".//doc"):
-        doc_id = doc.get("id")
-        src = []
-        if "testsuite" in doc.attrib:
-            continue
-        doc_count += 1
-        src_sents = {int(seg.get("id")): seg.text for seg in doc.findall(".//src//seg")}
-
-        def get_sents(doc):
-            return {
-                int(seg.get("id")): seg.text if seg.text else ""
-                for seg in doc.findall(f".//seg")
-            }
-
-        if ref_lang:
-            _ref_docs = doc.findall(".//ref")
-            trans_to_ref = {}
-
-            # If no translator identifiers, we just read one reference (if any)
-            # If there are translator identifiers, we add a reference for each translator
-            if len(translators) == 1 and DEFAULT_TRANSLATOR in translators:
-                if len(_ref_docs):
-                    trans_to_ref[DEFAULT_TRANSLATOR] = get_ref_sents(_ref_docs[0])
-                else:
-                    trans_to_ref[DEFAULT_TRANSLATOR] = {}
-            else:
-                trans_to_ref = {
-                    ref_doc.get("translator"): get_sents(ref_doc)
-                    for ref_doc in _ref_docs
-                }
-
-        if hyp_lang:
-            _hyp_docs = doc.findall(".//hyp")
-            system_to_ref = {
-                hyp_doc.get("system"): get_sents(hyp_doc) for hyp_doc in _hyp_docs
-            }
-
-        for seg_id in sorted(src_sents.keys()):
-            src.append([seg_id, src_sents[seg_id]])
-            src_sent_count += 1
-            if ref_lang:
-                for translator in translators:
-                    if doc_id not in ref_docs[translator]:
-                        ref_docs[translator][doc_id] = []
-
-                    # _ref_text = trans_to_ref.get(translator, {translator: {}}).get(
-                    _ref_text = trans_to_ref[translator].get(seg_id, missing_message)
-                    ref_docs[translator][doc_id].append((seg_id, _ref_text))
-
-                    if _ref_text == MISSING_TRANSLATION_MESSAGE:
-                        print(
-                            f'Warning: missing reference for translator {translator}, '
-                            f'document {doc_id}, segment {seg_id}'
-                        )
-            if hyp_lang:
-                for system in systems:
-                    if doc_id not in hyp_docs[system]:
-                        hyp_docs[system][doc_id] = []
-
-                    # _hyp_text = system_to_ref.get(system, {system: {}}).get(
-                    _hyp_text = system_to_ref[system].get(seg_id, missing_message)
-                    hyp_docs[system][doc_id].append((seg_id, _hyp_text))
-
-                    if _hyp_text == MISSING_TRANSLATION_MESSAGE:
-                        print(
-                            f'Warning: missing translation from {system}, '
-                            f'document {doc_id}, segment {seg_id}'
-                        )
-
-        src_docs[doc_id] = src
-
-    print(
-        f"Extracted {doc_count} document(s) containing {src_sent_count} sentences in {src_lang}"
-    )
-
-    return src_lang, src_docs, ref_lang, ref_docs, hyp_lang, hyp_docs
-
-
 def _create_bad_ref(seg_text: str, ref_text: str, character_based: bool = False) -> str:
     """
     Creates bad reference for given text.
@@ -548,161 +382,158 @@ if __name__ == "__main__":
             _file.write(csv_line)
             _file.write('\n')
 
-    json_data = []
     batch_id = 0
-    for task in padded_tasks[:TASK_MAX]:
-        # Remember, batch numbers are one-based
-        task_data = OrderedDict(
-            {
-                'batchNo': batch_id + 1,
-                'batchSize': 100,
-                'sourceLanguage': SRC_LANG,
-                'targetLanguage': TGT_LANG,
-                'requiredAnnotations': 1,
-                'randomSeed': RND_SEED,
-            }
-        )
+    json_file_name = f'{OUT_NAME}.json'
+    with open(json_file_name, mode='w', encoding='utf8') as out_file:
+        writer = BatchWriter(out_file)
+        for task in padded_tasks[:TASK_MAX]:
+            # Remember, batch numbers are one-based
+            task_data = OrderedDict(
+                {
+                    'batchNo': batch_id + 1,
+                    'batchSize': 100,
+                    'sourceLanguage': SRC_LANG,
+                    'targetLanguage': TGT_LANG,
+                    'requiredAnnotations': 1,
+                    'randomSeed': RND_SEED,
+                }
+            )
+
+            source_id = basename(XML_FILE)
 
-        source_id = basename(XML_FILE)
-
-        items_data: List[List[Dict[str, Any]]] = []  # Keeps items grouped into document
-        _item = 0
-        doc_counter = 0
-        for doc_data in task:
-            items_data.append([])  # Add a new bucket for items from this documents
-            has_control_item = False
-
-            doc_len, doc_id, sys_id, *rest = doc_data  # type: ignore
-
-            isControl = rest is not None and rest
-
-            target_id = sys_id
-
-            _src = {}
-            _ref = {}
-            _bad = {}
-            _tgt = {}
-
-            for item_id, item_src in SRC_DOCS[doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _src[seg_id] = item_src
-
-            for item_id, item_ref in REF_DOCS[REF_ID][doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _ref[seg_id] = item_ref
-
-            for item_id, item_bad in BAD_DOCS[sys_id][doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _bad[seg_id] = item_bad
-
-            for item_id, item_tgt in SYS_DOCS[sys_id][doc_id]:
-                seg_id = f'{doc_id}_{item_id}'
-                _tgt[seg_id] = item_tgt
-
-            seg_counter = 0
-            context_src: List[Text] = []
-            context_ref: List[Text] = []
-            context_bad: List[Text] = []
-            context_tgt: List[Text] = []
-            for seg_id in _src:
-                if seg_counter >= doc_len:  # Padding tasks are shorter!
-                    break
-                item_src = _src[seg_id]
-                item_ref = _ref[seg_id]
-                item_bad = _bad[seg_id]
-                item_tgt = _tgt[seg_id]
-
-                target_text = item_tgt
-                target_type = 'TGT'
-
-                # Do not generate any BAD items if QC is disabled
-                if CONTROLS and isControl:
-                    randomCoinFlip = choice(
-                        [False, False, True, True, True]  # 60:40 chance
-                    )
-                    if randomCoinFlip:
-                        target_text = item_bad
-                        target_type = 'BAD'
-                        has_control_item = True
-
-                obj: Dict[str, Any] = OrderedDict()
+            items_data: List[List[Dict[str, Any]]] = []  # Keeps items grouped into document
+            _item = 0
+            doc_counter = 0
+            for doc_data in task:
+                items_data.append([])  # Add a new bucket for items from this documents
+                has_control_item = False
+
+                doc_len, doc_id, sys_id, *rest = doc_data  # type: ignore
+
+                isControl = rest is not None and rest
+
+                target_id = sys_id
+
+                _src = {}
+                _ref = {}
+                _bad = {}
+                _tgt = {}
+
+                for item_id, item_src in SRC_DOCS[doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _src[seg_id] = item_src
+
+                for item_id, item_ref in REF_DOCS[REF_ID][doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _ref[seg_id] = item_ref
+
+                for item_id, item_bad in BAD_DOCS[sys_id][doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _bad[seg_id] = item_bad
+
+                for item_id, item_tgt in SYS_DOCS[sys_id][doc_id]:
+                    seg_id = f'{doc_id}_{item_id}'
+                    _tgt[seg_id] = item_tgt
+
+                seg_counter = 0
+                context_src: List[Text] = []
+                context_ref: List[Text] = []
+                context_bad: List[Text] = []
+                context_tgt: List[Text] = []
+                for seg_id in _src:
+                    if seg_counter >= doc_len:  # Padding tasks are shorter!
+                        break
+                    item_src = _src[seg_id]
+                    item_ref = _ref[seg_id]
+                    item_bad = _bad[seg_id]
+                    item_tgt = _tgt[seg_id]
+
+                    target_text = item_tgt
+                    target_type = 'TGT'
+
+                    # Do not generate any BAD items if QC is disabled
+                    if CONTROLS and isControl:
+                        randomCoinFlip = choice(
+                            [False, False, True, True, True]  # 60:40 chance
+                        )
+                        if randomCoinFlip:
+                            target_text = item_bad
+                            target_type = 'BAD'
+                            has_control_item = True
+
+                    obj: Dict[str, Any] = OrderedDict()
+                    obj['_item'] = _item
+                    obj['_block'] = -1
+                    obj['sourceID'] = source_id
+                    obj['sourceContextLeft'] = ' '.join(context_src)
+                    obj['sourceText'] = item_src
+                    obj['targetID'] = target_id
+                    obj['targetContextLeft'] = ' '.join(context_tgt)
+                    obj['targetText'] = target_text
+                    obj['itemID'] = seg_counter
+                    obj['itemType'] = target_type
+                    obj['documentID'] = doc_id
+                    obj['isCompleteDocument'] = False
+
+                    # print(seg_id)
+                    # print(' '.join(context_src))
+                    # print(item_src)
+                    # print('...')
+                    # print(' '.join(context_tgt))
+                    # print(item_tgt.encode('utf-8'))
+                    # print('---')
+
+                    context_src.append(item_src)
+                    context_ref.append(item_ref)
+                    context_bad.append(item_bad)
+                    context_tgt.append(target_text)
+
+                    items_data[-1].append(obj)
+                    _item += 1
+                    seg_counter += 1
+
+                obj = OrderedDict()
                 obj['_item'] = _item
                 obj['_block'] = -1
                 obj['sourceID'] = source_id
-                obj['sourceContextLeft'] = ' '.join(context_src)
-                obj['sourceText'] = item_src
+                obj['sourceText'] = ' '.join(context_src)  # full document
                 obj['targetID'] = target_id
-                obj['targetContextLeft'] = ' '.join(context_tgt)
-                obj['targetText'] = target_text
-                obj['itemID'] = seg_counter
-                obj['itemType'] = target_type
+                obj['targetText'] = ' '.join(context_tgt)  # full document
+                obj['itemID'] = item_id
+                obj['itemType'] = 'TGT'
                 obj['documentID'] = doc_id
-                obj['isCompleteDocument'] = False
-
-                # print(seg_id)
-                # print(' '.join(context_src))
-                # print(item_src)
-                # print('...')
-                # print(' '.join(context_tgt))
-                # print(item_tgt.encode('utf-8'))
-                # print('---')
-
-                context_src.append(item_src)
-                context_ref.append(item_ref)
-                context_bad.append(item_bad)
-                context_tgt.append(target_text)
-
+                obj['isCompleteDocument'] = True
                 items_data[-1].append(obj)
-                _item += 1
-                seg_counter += 1
-
-            obj = OrderedDict()
-            obj['_item'] = _item
-            obj['_block'] = -1
-            obj['sourceID'] = source_id
-            obj['sourceText'] = ' '.join(context_src)  # full document
-            obj['targetID'] = target_id
-            obj['targetText'] = ' '.join(context_tgt)  # full document
-            obj['itemID'] = item_id
-            obj['itemType'] = 'TGT'
-            obj['documentID'] = doc_id
-            obj['isCompleteDocument'] = True
-            items_data[-1].append(obj)
-
-            if has_control_item and SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
-                # Move the document with control items to a random position so
-                # that they are not accumulated as very last documents
-                _bad_doc = items_data.pop()
-                _pos = randint(0, len(items_data) - 1)
-                print(f'  Moving the last QC document to position {_pos}')
-                items_data.insert(_pos, _bad_doc)
-
-        # Extract items from documents
-        _items_data = [item for doc_items in items_data for item in doc_items]
-        # Re-assign _item numbers
-        if SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
-            _item = 0
-            for i in range(len(_items_data)):
-                _items_data[i]['_item'] = _item
-                if _items_data[i]['isCompleteDocument'] == False:
-                    _item += 1
-
-        output_data = OrderedDict({'task': task_data, 'items': _items_data})
-
-        json_data.append(output_data)
-
-        # write out JSON
-        json_text = json_dumps(json_data, indent=2, sort_keys=True)
 
-        json_file_name = f'{OUT_NAME}.json'
-        with open(json_file_name, mode='w', encoding='utf8') as out_file:
+                if has_control_item and SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
+                    # Move the document with control items to a random position so
+                    # that they are not accumulated as very last documents
+                    _bad_doc = items_data.pop()
+                    _pos = randint(0, len(items_data) - 1)
+                    print(f'  Moving the last QC document to position {_pos}')
+                    items_data.insert(_pos, _bad_doc)
+
+            # Extract items from documents
+            _items_data = [item for doc_items in items_data for item in doc_items]
+            # Re-assign _item numbers
+            if SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
+                _item = 0
+                for i in range(len(_items_data)):
+                    _items_data[i]['_item'] = _item
+                    if _items_data[i]['isCompleteDocument'] == False:
+                        _item += 1
+
+            output_data = OrderedDict({'task': task_data, 'items': _items_data})
+
+            # write out JSON
             sys.stdout.write(
                 'Creating {0}, batch no. {1} ... '.format(json_file_name, batch_id + 1),
             )
-            out_file.write(str(json_text))
+            writer.write(output_data)
             sys.stdout.write('OK\n')
 
-        batch_id += 1
+            batch_id += 1
+        writer.close()
 
     print(f'Total tasks: {len(sampled_tasks)}')
     print(f'Total docs:  {total_docs}')
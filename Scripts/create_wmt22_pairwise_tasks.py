@@ -5,7 +5,6 @@ from collections import OrderedDict
 from collections import defaultdict
 from copy import deepcopy
 from glob import iglob
-from json import dumps as json_dumps
 from os.path import basename
 from os.path import join
 from random import choice
@@ -18,14 +17,16 @@ from typing import List
 from typing import Text
 from typing import Tuple
 
-from lxml import etree
+from bad_refs import create_all_bad_refs
+from batch_builder import BatchWriter
+from batch_builder import select_docs
+from wmt_xml import MISSING_TRANSLATION_MESSAGE
+from wmt_xml import unwrap_xml
 
 
 MAX_TASK_SIZE = 100  # No support for tasks over 100 items
 MAX_DOC_LENGTH = 100  # We do not support documents longer than 70 segments
 
-MISSING_TRANSLATION_MESSAGE = ("NO TRANSLATION AVAILABLE",)
-DEFAULT_TRANSLATOR = "DEFAULT"
 # If False, documents with control items will be very last ones in each batch
 SHUFFLE_DOCS_WITH_CONTROL_ITEMS = True
 # If True, add references as additional system outputs
@@ -35,170 +36,6 @@ USE_ALL_DOCUMENTS_AND_ALL_SYSTEMS = True
 REFERENCE_AS_SYSTEM_PREFIX = 'translator-'
 
 
-def unwrap_xml(
-    xml_file,
-    missing_message=MISSING_TRANSLATION_MESSAGE,
-    encoding='utf-8',
-):
-    """
-    Unwraps an xml file in WMT format, producing source and (if present) reference files
-
-    :param xml_file: The xml file (or fd)
-    :param missing_message: The message to insert when no reference
-
-    :returns: src_lang, src_lines, ref_lang, ref_lines, hyp_lang, hyp_lines
-
-    ref_lines maps translator to document to tuples of segment id and line text
-    hyp_lines maps system to document to tuples of segment id and line text
-
-    ref_lang and hyp_lang may be None, and then their lines are empty
-    note: a single language is assumed for each of sources, refs and hyps
-
-    This function has been extracted from
-    https://github.com/wmt-conference/wmt-format-tools/wmtformat/unwrap.py with
-    some modifications
-    """
-    tree = etree.parse(xml_file)
-
-    # Find and check  the documents (src, ref, hyp)
-    src_langs, ref_langs, hyp_langs, translators, systems = (
-        set(),
-        set(),
-        set(),
-        set(),
-        set(),
-    )
-
-    for src_doc in tree.getroot().findall(".//src"):
-        src_langs.add(src_doc.get("lang"))
-
-    for ref_doc in tree.getroot().findall(".//ref"):
-        ref_langs.add(ref_doc.get("lang"))
-        translator = ref_doc.get("translator")
-        if translator:
-            translators.add(translator)
-
-    for hyp_doc in tree.getroot().findall(".//hyp"):
-        hyp_langs.add(hyp_doc.get("lang"))
-        systems.add(hyp_doc.get("system"))
-
-    if len(src_langs) > 1:
-        raise RuntimeError("Multiple source languages found")
-
-    if len(src_langs) == 0:
-        raise RuntimeError("No source languages found")
-
-    src_lang = src_langs.pop()
-    src_docs = OrderedDict()
-
-    if len(ref_langs) > 1:
-        raise RuntimeError("Multiple reference languages found")
-
-    translators = list(translators)
-    if len(ref_langs) > 0:
-        if len(translators) == 0:
-            print("No translator identifiers found")
-            translators.append(DEFAULT_TRANSLATOR)
-        ref_lang = ref_langs.pop()
-        ref_docs = OrderedDict(
-            (translator, OrderedDict()) for translator in translators
-        )
-    else:
-        print("No references found")
-        ref_lang = None
-        ref_docs = OrderedDict()
-
-    if len(hyp_langs) > 1:
-        raise RuntimeError(f"Multiple hypothesis languages found: {hyp_langs}")
-
-    systems = list(systems)
-    if len(hyp_langs) > 0:
-        hyp_docs = OrderedDict((system, OrderedDict()) for system in systems)
-        hyp_lang = hyp_langs.pop()
-    else:
-        hyp_docs = OrderedDict()
-        hyp_lang = None
-
-    # Extract text
-    src_sent_count, doc_count = 0, 0
-    for doc in tree.getroot().findall(".//doc"):
-        doc_id = doc.get("id")
-        src = []
-        if "testsuite" in doc.attrib:
-            continue
-        doc_count += 1
-        src_sents = {int(seg.get("id")): seg.text for seg in doc.findall(".//src//seg")}
-
-        def get_sents(doc):
-            return {
-                int(seg.get("id")): seg.text if seg.text else ""
-                for seg in doc.findall(f".//seg")
-            }
-
-        if ref_lang:
-            _ref_docs = doc.findall(".//ref")
-            trans_to_ref = {}
-
-            # If no translator identifiers, we just read one reference (if any)
-            # If there are translator identifiers, we add a reference for each translator
-            if len(translators) == 1 and DEFAULT_TRANSLATOR in translators:
-                if len(_ref_docs):
-                    trans_to_ref[DEFAULT_TRANSLATOR] = get_ref_sents(_ref_docs[0])
-                else:
-                    trans_to_ref[DEFAULT_TRANSLATOR] = {}
-            else:
-                trans_to_ref = {
-                    ref_doc.get("translator"): get_sents(ref_doc)
-                    for ref_doc in _ref_docs
-                }
-
-        if hyp_lang:
-            _hyp_docs = doc.findall(".//hyp")
-            system_to_ref = {
-                hyp_doc.get("system"): get_sents(hyp_doc) for hyp_doc in _hyp_docs
-            }
-
-        for seg_id in sorted(src_sents.keys()):
-            src.append([seg_id, src_sents[seg_id]])
-            src_sent_count += 1
-            if ref_lang:
-                for translator in translators:
-                    if doc_id not in ref_docs[translator]:
-                        ref_docs[translator][doc_id] = []
-
-                    # _ref_text = trans_to_ref.get(translator, {translator: {}}).get(
-                    _ref_text = trans_to_ref[translator].get(seg_id, missing_message)
-                    ref_docs[translator][doc_id].append((seg_id, _ref_text))
-
-                    if _ref_text == MISSING_TRANSLATION_MESSAGE:
-                        print(
-                            f'Warning: missing reference for translator {translator}, '
-                            f'document {doc_id}, segment {seg_id}'
-                        )
-            if hyp_lang:
-                for system in systems:
-                    if doc_id not in hyp_docs[system]:
-                        hyp_docs[system][doc_id] = []
-
-                    # _hyp_text = system_to_ref.get(system, {system: {}}).get(
-                    _hyp_text = system_to_ref[system].get(seg_id, missing_message)
-                    hyp_docs[system][doc_id].append((seg_id, _hyp_text))
-
-                    if _hyp_text == MISSING_TRANSLATION_MESSAGE:
-                        print(
-                            f'Warning: missing translation from {system}, '
-                            f'document {doc_id}, segment {seg_id}'
-                        )
-
-        src_docs[doc_id] = src
-
-    print(
-        f"Extracted {doc_count} document(s) containing {src_sent_count} sentences in {src_lang}"
-    )
-
-    return src_lang, src_docs, ref_lang, ref_docs, hyp_lang, hyp_docs
-
-
 def unwrap_tsv(
     tsv_file,
     missing_message=MISSING_TRANSLATION_MESSAGE,
@@ -291,92 +128,6 @@ def chop_docs(orig_src_docs, orig_ref_docs, orig_hyp_docs, max_length=10):
     return src_docs, ref_docs, hyp_docs, src_prev, src_next, hyp_prev, hyp_next
 
 
-def select_docs(orig_src_docs, orig_ref_docs, orig_hyp_docs, tsv_file):
-    """
-    Extract preselected segments from given documents and corresponding contexts.
-    """
-    selected_docs = []
-    print("Selecting the following documents only:")
-    with open(tsv_file, "r", encoding="utf8") as tsv:
-        for line in tsv:
-            _docid, _segid_first, _segid_last = line.strip().split("\t")
-            selected_docs.append((_docid, int(_segid_first), int(_segid_last)))
-            print(f"  {selected_docs[-1]}")
-
-    src_docs = OrderedDict()
-    src_prev = OrderedDict()
-    src_next = OrderedDict()
-    for doc_id, seg_id_1, seg_id_2 in selected_docs:
-        if doc_id not in orig_src_docs:
-            print(
-                f"Error: the selected document {doc_id} not found in the XML file/src"
-            )
-            exit()
-        segs = orig_src_docs[doc_id]
-        chunk = segs[seg_id_1 - 1 : seg_id_2]
-        prev_ctx = segs[0 : seg_id_1 - 1]
-        next_ctx = segs[seg_id_2:]
-        chunk_id = f"#{seg_id_1}-{seg_id_2}"
-
-        src_docs[f"{doc_id}{chunk_id}"] = chunk
-        src_prev[f"{doc_id}{chunk_id}"] = prev_ctx
-        src_next[f"{doc_id}{chunk_id}"] = next_ctx
-
-    ref_docs = OrderedDict()
-    hyp_prev = OrderedDict()
-    hyp_next = OrderedDict()
-    for translator in orig_ref_docs:
-        ref_docs[translator] = OrderedDict()
-        hyp_prev[REFERENCE_AS_SYSTEM_PREFIX + translator] = OrderedDict()
-        hyp_next[REFERENCE_AS_SYSTEM_PREFIX + translator] = OrderedDict()
-
-        for doc_id, seg_id_1, seg_id_2 in selected_docs:
-            if doc_id not in orig_ref_docs[translator]:
-                print(
-                    f"Error: the selected document {doc_id} not found in the XML file/ref"
-                )
-                exit()
-
-            segs = orig_ref_docs[translator][doc_id]
-            chunk = segs[seg_id_1 - 1 : seg_id_2]
-            prev_ctx = segs[0 : seg_id_1 - 1]
-            next_ctx = segs[seg_id_2:]
-            chunk_id = f"#{seg_id_1}-{seg_id_2}"
-
-            ref_docs[translator][f"{doc_id}{chunk_id}"] = chunk
-            hyp_prev[REFERENCE_AS_SYSTEM_PREFIX + translator][
-                f"{doc_id}{chunk_id}"
-            ] = prev_ctx
-            hyp_next[REFERENCE_AS_SYSTEM_PREFIX + translator][
-                f"{doc_id}{chunk_id}"
-            ] = next_ctx
-
-    hyp_docs = OrderedDict()
-    for system in orig_hyp_docs:
-        hyp_docs[system] = OrderedDict()
-        hyp_prev[system] = OrderedDict()
-        hyp_next[system] = OrderedDict()
-
-        for doc_id, seg_id_1, seg_id_2 in selected_docs:
-            if doc_id not in orig_hyp_docs[system]:
-                print(
-                    f"Error: the selected document {doc_id} not found in the XML file/hyp"
-                )
-                exit()
-
-            segs = orig_hyp_docs[system][doc_id]
-            chunk = segs[seg_id_1 - 1 : seg_id_2]
-            prev_ctx = segs[0 : seg_id_1 - 1]
-            next_ctx = segs[seg_id_2:]
-            chunk_id = f"#{seg_id_1}-{seg_id_2}"
-
-            hyp_docs[system][f"{doc_id}{chunk_id}"] = chunk
-            hyp_prev[system][f"{doc_id}{chunk_id}"] = prev_ctx
-            hyp_next[system][f"{doc_id}{chunk_id}"] = next_ctx
-
-    return src_docs, ref_docs, hyp_docs, src_prev, src_next, hyp_prev, hyp_next
-
-
 def _split_list(list_a, chunk_size):
     for i in range(0, len(list_a), chunk_size):
         prev_context = list_a[0:i]
@@ -386,155 +137,6 @@ def _split_list(list_a, chunk_size):
         yield list_a[i : i + chunk_size], prev_context, next_context, chunk_id
 
 
-def _create_bad_ref(seg_text: str, ref_text: str, character_based: bool = False) -> str:
-    """
-    Creates bad reference for given text.
-
-    Segment length (a, b] to phrase length (excluding a, including b)
-    mapping defined as follows:
-        ( 0,   1] : 1
-        ( 1,   5] : 2
-        ( 5,   8] : 3
-        ( 8,  15] : 4
-        (15,  20] : 5
-        (20, max] : 6
-
-    For character-based languages, which do not support tokenisation
-    by whitespace, the resulting phrase length will be doubled, and
-    is interpreted as a character length.
-    """
-    seg_data = seg_text.split(' ')
-    ref_data = ref_text.split(' ')
-
-    if character_based:
-        seg_data = [x for x in seg_text]
-        ref_data = [x for x in ref_text]
-
-    seg_len = len(seg_data)
-    ref_len = len(ref_data)
-
-    # Determine length of bad phrase, relative to segment length.
-    _seg_to_bad_mapping = {
-        (None, 1): 2,
-        (1, 5): 2,
-        (5, 8): 3,
-        (8, 15): 4,
-        (15, 20): 5,
-        (20, None): 6,
-    }
-
-    bad_len = 0
-    for seg_pair in _seg_to_bad_mapping:
-        left, right = seg_pair
-
-        # seg_len == right; left edge case
-        if not left:
-            if seg_len == right:
-                bad_len = _seg_to_bad_mapping[seg_pair]
-                break
-
-        # left < seg_len; right edge case
-        elif not right:
-            if left < seg_len:
-                bad_len = _seg_to_bad_mapping[seg_pair]
-                break
-
-        # left < seg_len <= right; middle cases
-        elif left < seg_len <= right:
-            bad_len = _seg_to_bad_mapping[seg_pair]
-            break
-
-    # Double length of bad phrase for character-based languages.
-    if character_based:
-        bad_len = 2 * bad_len
-
-    # Determine random replacement position. For segments longer than
-    # (bad_len + 1), we enforce that this cannot be sentence initial
-    # or final, so positions 0 and (seg_len - bad_len -1) are invalid
-    # and we use an embedded bad_pos in [1, (seg_len - bad_len - 1)].
-    # This happens for all seg_len > 3.
-    bad_pos = 0
-    if seg_len - bad_len > 0:
-        bad_pos = choice(range(seg_len - bad_len))
-
-    elif seg_len > 3:
-        _xs = max(1, seg_len - bad_len - 1)
-        bad_pos = choice([x + 1 for x in range(_xs)])
-
-    ref_pos = 0
-    if ref_len - bad_len > 0:
-        ref_pos = choice(range(ref_len - bad_len))
-
-    bad_data = (
-        seg_data[:bad_pos]
-        + ref_data[ref_pos : ref_pos + bad_len]
-        + seg_data[bad_pos + bad_len :]
-    )
-    bad_text = ' '.join(bad_data)
-    if character_based:
-        bad_text = ''.join(bad_data)
-
-    # print(seg_text)
-    # print(bad_text)
-    # print('------------')
-    return bad_text
-
-
-def create_bad_refs(
-    docs: Dict[str, List[Tuple[str, str]]],
-    refs: Dict[str, List[Tuple[str, str]]],
-    character_based: bool = False,
-) -> Dict[str, List[Tuple[str, str]]]:
-    """
-    Creates bad references for given documents.
-
-    For each segment in the given documents, this creates a so-called
-    ``bad reference'' which is constructed by replacing an embedded
-    phrase p with a randomly placed phrase p' of the same length,
-    taken from a different segment contained in refs. The length of
-    the phrase is relative to the full segment length.
-
-    See _create_bad_ref() definition for length mapping details.
-    """
-    # Create mapping from f'{doc_id}_{seg_id}' to reference text.
-    all_refs = {}
-    for curr_doc_id, curr_doc in refs.items():
-        for curr_seg_id, curr_ref_text in curr_doc:
-            all_refs[f'{curr_doc_id}_{curr_seg_id}'] = curr_ref_text
-
-    # Create list of f'{doc_id}_{seg_id}' ids, to be used for random
-    # choice later when we want to identify a reference to work with.
-    all_keys = list(all_refs.keys())
-
-    # Iterate through documents and create bad references.
-    bad_docs: Dict[str, List[Tuple[str, str]]] = OrderedDict()
-    for curr_doc_id, curr_doc in docs.items():
-        if not curr_doc_id in bad_docs:
-            bad_docs[curr_doc_id] = []
-
-        print(f'doc_id: {curr_doc_id},\tdoc_len: {len(curr_doc)}')
-        for curr_seg in curr_doc:
-            curr_seg_id, curr_seg_text = curr_seg
-
-            # Bad reference id may not be identical to current id.
-            bad_id = choice(all_keys)
-            while bad_id == f'{curr_doc_id}_{curr_seg_id}':
-                bad_id = choice(all_keys)
-
-            curr_bad_text = _create_bad_ref(
-                curr_seg_text,
-                all_refs[bad_id],
-                character_based=character_based,
-            )
-
-            # Ensure that keys can be reused.
-            all_keys.append(bad_id)
-
-            bad_docs[curr_doc_id].append((curr_seg_id, curr_bad_text))
-
-    return bad_docs
-
-
 def parse_cmd_args():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -607,6 +209,12 @@ def parse_cmd_args():
         type=int,
         default=123456,
     )
+    parser.add_argument(
+        "--processes",
+        help="number of processes for generating BAD references, default: 1",
+        type=int,
+        default=1,
+    )
     parser.add_argument(
         "--selected-docs",
         help="path to a file with preselected documents; format: docid segid1 segid2",
@@ -633,6 +241,7 @@ def parse_cmd_args():
         args.max_tasks,
         args.max_segs,
         args.rng_seed,
+        args.processes,
         args.selected_docs,
         args.static_context,
         args.even,
@@ -659,6 +268,7 @@ if __name__ == "__main__":
         TASK_MAX,
         MAX_SEGS,
         RND_SEED,
+        PROCESSES,
         SELECTED,
         CTX_SIZE,
         EVEN_NUM,
@@ -680,7 +290,6 @@ if __name__ == "__main__":
 
     #################################################################
     SYS_DOCS: Dict[str, Dict[str, List[Tuple[str, str]]]] = OrderedDict()
-    BAD_DOCS: Dict[str, Dict[str, List[Tuple[str, str]]]] = OrderedDict()
     print(f'Loading docs from {XML_FILE}')
 
     if TSV_FILE:
@@ -745,11 +354,14 @@ if __name__ == "__main__":
     SYS_IDS = sorted(list(SYS_DOCS.keys()))
     print("SYS IDS size:", len(SYS_IDS))
 
-    for sys_id in SYS_IDS:
-        print(f'Generating bad references for {sys_id}')
-        BAD_DOCS[sys_id] = create_bad_refs(
-            SYS_DOCS[sys_id], REF_DOCS[REF_ID], character_based=CHARLANG
-        )
+    print(f'Generating bad references using {PROCESSES} process(es)')
+    BAD_DOCS = create_all_bad_refs(
+        SYS_DOCS,
+        REF_DOCS[REF_ID],
+        RND_SEED,
+        character_based=CHARLANG,
+        processes=PROCESSES,
+    )
 
     #################################################################
     # pylint: disable-msg=invalid-name
@@ -917,202 +529,199 @@ if __name__ == "__main__":
             _file.write('\n')
 
     #################################################################
-    json_data = []
     batch_id = 0
     _itemAll = 0
-    for task in padded_tasks[:TASK_MAX]:
-        # Remember, batch numbers are one-based
-        task_data = OrderedDict(
-            {
-                'batchNo': batch_id + 1,
-                'batchSize': 100,
-                'sourceLanguage': SRC_LANG,
-                'targetLanguage': TGT_LANG,
-                'requiredAnnotations': 1,
-                'randomSeed': RND_SEED,
-            }
-        )
-
-        source_id = basename(XML_FILE)
-
-        items_data: List[List[Dict[str, Any]]] = []  # Keeps items grouped into document
-        _item = 0
-        doc_counter = 0
-        for doc_data in task:
-            items_data.append([])  # Add a new bucket for items from this documents
-            has_control_item = False
-            print(doc_data)
-            doc_len, doc_id, isControl = doc_data  # type: ignore
-
-            # different order of systems per document only
-            # hiba removed the following 2 lines
-            #_shuffled_sys_ids = SYS_IDS.copy()
-            #shuffle(_shuffled_sys_ids)
-
-            # and added these 2 lines
-            for sys_A, sys_B in system_pairs:
-                _shuffled_sys_ids = [sys_A, sys_B]
-
-                _src = {}
-                _ref = {}
-                _bads = {}
-                _tgts = {}
-
-                for item_id, item_src in SRC_DOCS[doc_id]:
-                    seg_id = f'{doc_id}::{item_id}'
-                    _src[seg_id] = item_src
-
-                for item_id, item_ref in REF_DOCS[REF_ID][doc_id]:
-                    seg_id = f'{doc_id}::{item_id}'
-                    _ref[seg_id] = item_ref
+    json_file_name = f'{OUT_NAME}.json'
+    with open(json_file_name, mode='w', encoding='utf8') as out_file:
+        writer = BatchWriter(out_file)
+        for task in padded_tasks[:TASK_MAX]:
+            # Remember, batch numbers are one-based
+            task_data = OrderedDict(
+                {
+                    'batchNo': batch_id + 1,
+                    'batchSize': 100,
+                    'sourceLanguage': SRC_LANG,
+                    'targetLanguage': TGT_LANG,
+                    'requiredAnnotations': 1,
+                    'randomSeed': RND_SEED,
+                }
+            )
 
-                for sys_id in SYS_IDS:
-                    _bads[sys_id] = {}
-                    _tgts[sys_id] = {}
+            source_id = basename(XML_FILE)
 
-                    for item_id, item_bad in BAD_DOCS[sys_id][doc_id]:
+            items_data: List[List[Dict[str, Any]]] = []  # Keeps items grouped into document
+            _item = 0
+            doc_counter = 0
+            for doc_data in task:
+                items_data.append([])  # Add a new bucket for items from this documents
+                has_control_item = False
+                print(doc_data)
+                doc_len, doc_id, isControl = doc_data  # type: ignore
+
+                # different order of systems per document only
+                # hiba removed the following 2 lines
+                #_shuffled_sys_ids = SYS_IDS.copy()
+                #shuffle(_shuffled_sys_ids)
+
+                # and added these 2 lines
+                for sys_A, sys_B in system_pairs:
+                    _shuffled_sys_ids = [sys_A, sys_B]
+
+                    _src = {}
+                    _ref = {}
+                    _bads = {}
+                    _tgts = {}
+
+                    for item_id, item_src in SRC_DOCS[doc_id]:
                         seg_id = f'{doc_id}::{item_id}'
-                        _bads[sys_id][seg_id] = item_bad
+                        _src[seg_id] = item_src
 
-                    for item_id, item_tgt in SYS_DOCS[sys_id][doc_id]:
+                    for item_id, item_ref in REF_DOCS[REF_ID][doc_id]:
                         seg_id = f'{doc_id}::{item_id}'
-                        _tgts[sys_id][seg_id] = item_tgt
-
-                seg_counter = 0
-                context_src: List[Text] = []
-                context_ref: List[Text] = []
-                context_bads: Dict[str, List[Text]] = defaultdict(list)
-                context_tgts: Dict[str, List[Text]] = defaultdict(list)
-                for seg_id in _src:
-                    if seg_counter >= doc_len:  # Padding tasks are shorter!
-                        break
-                    item_src = _src[seg_id]
-                    item_ref = _ref[seg_id]
-
-                    item_bads = { sys_id: _bads[sys_id][seg_id] for sys_id in SYS_IDS }
-                    item_tgts = { sys_id: _tgts[sys_id][seg_id] for sys_id in SYS_IDS }
-                    item_type = 'TGT'
-
-                    # Do not generate any BAD items if QC is disabled
-                    if CONTROLS and isControl:
-                        randomCoinFlip = choice(
-                            [False, False, True, True, True]  # 60:40 chance
-                        )
-                        if randomCoinFlip:
-                            item_tgts = item_bads
-                            item_type = 'BAD'
-                            has_control_item = True
+                        _ref[seg_id] = item_ref
+
+                    for sys_id in SYS_IDS:
+                        _bads[sys_id] = {}
+                        _tgts[sys_id] = {}
+
+                        for item_id, item_bad in BAD_DOCS[sys_id][doc_id]:
+                            seg_id = f'{doc_id}::{item_id}'
+                            _bads[sys_id][seg_id] = item_bad
+
+                        for item_id, item_tgt in SYS_DOCS[sys_id][doc_id]:
+                            seg_id = f'{doc_id}::{item_id}'
+                            _tgts[sys_id][seg_id] = item_tgt
+
+                    seg_counter = 0
+                    context_src: List[Text] = []
+                    context_ref: List[Text] = []
+                    context_bads: Dict[str, List[Text]] = defaultdict(list)
+                    context_tgts: Dict[str, List[Text]] = defaultdict(list)
+                    for seg_id in _src:
+                        if seg_counter >= doc_len:  # Padding tasks are shorter!
+                            break
+                        item_src = _src[seg_id]
+                        item_ref = _ref[seg_id]
+
+                        item_bads = { sys_id: _bads[sys_id][seg_id] for sys_id in SYS_IDS }
+                        item_tgts = { sys_id: _tgts[sys_id][seg_id] for sys_id in SYS_IDS }
+                        item_type = 'TGT'
+
+                        # Do not generate any BAD items if QC is disabled
+                        if CONTROLS and isControl:
+                            randomCoinFlip = choice(
+                                [False, False, True, True, True]  # 60:40 chance
+                            )
+                            if randomCoinFlip:
+                                item_tgts = item_bads
+                                item_type = 'BAD'
+                                has_control_item = True
+
+                        src_ctx = []
+                        if seg_counter == 0:
+                            src_ctx = [txt for _, txt in SRC_PREV[doc_id]][-CTX_SIZE:]
+
+                        obj: Dict[str, Any] = OrderedDict()
+                        obj['_item'] = _item
+                        obj['_block'] = -1
+                        obj['segmentID'] = f'{source_id}::{seg_id}'
+                        obj['segmentContextLeft'] = '\n'.join(src_ctx)
+                        obj['segmentText'] = item_src
+                        obj['itemID'] = seg_counter
+                        obj['itemType'] = item_type
+                        obj['documentID'] = doc_id
+                        obj['isCompleteDocument'] = False
+                        obj['targets'] = []
+                        obj['targetsSize'] = 0
+
+                        for tgt_idx, sys_id in enumerate(_shuffled_sys_ids):
+                            tgt_ctx = []
+                            if seg_counter == 0:
+                                tgt_ctx = [txt for _, txt in SYS_PREV[sys_id][doc_id]][-CTX_SIZE:]
+
+                            tobj = OrderedDict()
+                            tobj['_itemAll'] = _itemAll
+                            tobj['_target'] = tgt_idx
+                            tobj['targetID'] = sys_id
+                            tobj['targetContextLeft'] = '\n'.join(tgt_ctx)
+                            tobj['targetText'] = item_tgts[sys_id]
+
+                            obj['targets'].append(tobj)
+                            obj['targetsSize'] += 1
+                            _itemAll += 1
+
+                        context_src.append(item_src)
+                        context_ref.append(item_ref)
+                        for sys_id in SYS_IDS:
+                            context_bads[sys_id].append(item_bads[sys_id])
+                            context_tgts[sys_id].append(item_tgts[sys_id])
+
+                        items_data[-1].append(obj)
+                        _item += 1
+                        seg_counter += 1
 
                     src_ctx = []
-                    if seg_counter == 0:
-                        src_ctx = [txt for _, txt in SRC_PREV[doc_id]][-CTX_SIZE:]
+                    src_ctx = [txt for _, txt in SRC_NEXT[doc_id]][:CTX_SIZE]
 
-                    obj: Dict[str, Any] = OrderedDict()
+                    obj = OrderedDict()
                     obj['_item'] = _item
                     obj['_block'] = -1
                     obj['segmentID'] = f'{source_id}::{seg_id}'
                     obj['segmentContextLeft'] = '\n'.join(src_ctx)
-                    obj['segmentText'] = item_src
-                    obj['itemID'] = seg_counter
-                    obj['itemType'] = item_type
+                    obj['segmentText'] = ' '.join(context_src)  # full document
+                    obj['itemID'] = item_id
+                    obj['itemType'] = 'BAD' if has_control_item else 'TGT'
                     obj['documentID'] = doc_id
-                    obj['isCompleteDocument'] = False
+                    obj['isCompleteDocument'] = True
                     obj['targets'] = []
                     obj['targetsSize'] = 0
 
                     for tgt_idx, sys_id in enumerate(_shuffled_sys_ids):
                         tgt_ctx = []
-                        if seg_counter == 0:
-                            tgt_ctx = [txt for _, txt in SYS_PREV[sys_id][doc_id]][-CTX_SIZE:]
+                        tgt_ctx = [txt for _, txt in SYS_NEXT[sys_id][doc_id]][:CTX_SIZE]
 
                         tobj = OrderedDict()
                         tobj['_itemAll'] = _itemAll
                         tobj['_target'] = tgt_idx
-                        tobj['targetID'] = sys_id
                         tobj['targetContextLeft'] = '\n'.join(tgt_ctx)
-                        tobj['targetText'] = item_tgts[sys_id]
+                        tobj['targetID'] = sys_id
+                        tobj['targetText'] = ' '.join(context_tgts[sys_id])  # full document
 
                         obj['targets'].append(tobj)
                         obj['targetsSize'] += 1
                         _itemAll += 1
 
-                    context_src.append(item_src)
-                    context_ref.append(item_ref)
-                    for sys_id in SYS_IDS:
-                        context_bads[sys_id].append(item_bads[sys_id])
-                        context_tgts[sys_id].append(item_tgts[sys_id])
-
                     items_data[-1].append(obj)
-                    _item += 1
-                    seg_counter += 1
-
-                src_ctx = []
-                src_ctx = [txt for _, txt in SRC_NEXT[doc_id]][:CTX_SIZE]
-
-                obj = OrderedDict()
-                obj['_item'] = _item
-                obj['_block'] = -1
-                obj['segmentID'] = f'{source_id}::{seg_id}'
-                obj['segmentContextLeft'] = '\n'.join(src_ctx)
-                obj['segmentText'] = ' '.join(context_src)  # full document
-                obj['itemID'] = item_id
-                obj['itemType'] = 'BAD' if has_control_item else 'TGT'
-                obj['documentID'] = doc_id
-                obj['isCompleteDocument'] = True
-                obj['targets'] = []
-                obj['targetsSize'] = 0
-
-                for tgt_idx, sys_id in enumerate(_shuffled_sys_ids):
-                    tgt_ctx = []
-                    tgt_ctx = [txt for _, txt in SYS_NEXT[sys_id][doc_id]][:CTX_SIZE]
-
-                    tobj = OrderedDict()
-                    tobj['_itemAll'] = _itemAll
-                    tobj['_target'] = tgt_idx
-                    tobj['targetContextLeft'] = '\n'.join(tgt_ctx)
-                    tobj['targetID'] = sys_id
-                    tobj['targetText'] = ' '.join(context_tgts[sys_id])  # full document
-
-                    obj['targets'].append(tobj)
-                    obj['targetsSize'] += 1
-                    _itemAll += 1
-
-                items_data[-1].append(obj)
-
-                if has_control_item and SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
-                    # Move the document with control items to a random position so
-                    # that they are not accumulated as very last documents
-                    _bad_doc = items_data.pop()
-                    _pos = randint(0, len(items_data) - 1)
-                    print(f'  Moving the last QC document to position {_pos}')
-                    items_data.insert(_pos, _bad_doc)
-
-        # Extract items from documents
-        _items_data = [item for doc_items in items_data for item in doc_items]
-        # Re-assign _item numbers
-        if SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
-            _item = 0
-            for i in range(len(_items_data)):
-                _items_data[i]['_item'] = _item
-                if _items_data[i]['isCompleteDocument'] == False:
-                    _item += 1
-
-        output_data = OrderedDict({'task': task_data, 'items': _items_data})
-
-        json_data.append(output_data)
-
-        # write out JSON
-        json_text = json_dumps(json_data, indent=2, sort_keys=True)
 
-        json_file_name = f'{OUT_NAME}.json'
-        with open(json_file_name, mode='w', encoding='utf8') as out_file:
+                    if has_control_item and SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
+                        # Move the document with control items to a random position so
+                        # that they are not accumulated as very last documents
+                        _bad_doc = items_data.pop()
+                        _pos = randint(0, len(items_data) - 1)
+                        print(f'  Moving the last QC document to position {_pos}')
+                        items_data.insert(_pos, _bad_doc)
+
+            # Extract items from documents
+            _items_data = [item for doc_items in items_data for item in doc_items]
+            # Re-assign _item numbers
+            if SHUFFLE_DOCS_WITH_CONTROL_ITEMS:
+                _item = 0
+                for i in range(len(_items_data)):
+                    _items_data[i]['_item'] = _item
+                    if _items_data[i]['isCompleteDocument'] == False:
+                        _item += 1
+
+            output_data = OrderedDict({'task': task_data, 'items': _items_data})
+
+            # write out JSON
             sys.stdout.write(
                 'Creating {0}, batch no. {1} ... '.format(json_file_name, batch_id + 1),
             )
-            out_file.write(str(json_text))
+            writer.write(output_data)
             sys.stdout.write('OK\n')
 
-        batch_id += 1
+            batch_id += 1
+        writer.close()
 
     print(f'Total tasks: {len(sampled_tasks)}')
     print(f'Total docs:  {total_docs} x {len(SYS_IDS)}')
@@ -0,0 +1,241 @@
+# pylint: disable=C0103,C0111,C0330,E1101
+"""
+Packing of system output documents into annotation tasks.
+
+Shared by the create_*_tasks.py scripts. Each task should contain exactly
+task_size segments. Documents are (doc_len, doc_id, sys_id) tuples and
+are packed with a bounded subset-sum DP over document lengths: tasks are
+filled exactly while possible, preferring the lengths with the most
+documents left, so that the remaining lengths stay mixed enough to fill
+later tasks exactly. The remaining documents are packed into as full
+tasks as possible and, optionally, topped up with oversampled documents,
+such that they are filled exactly, too.
+
+Which system's document is taken for a given length is balanced: systems
+not yet in the task and with the fewest documents so far come first, ties
+are broken by a seeded system order. Given the same random.Random state,
+packing is deterministic.
+
+The DP uses Python integers as bitsets, so each task costs O(task_size x
+distinct lengths) bit operations and packing is linear in the number of
+tasks.
+"""
+from collections import namedtuple
+from collections import OrderedDict
+from random import Random
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+Doc = Tuple[int, str, str]
+
+PackingSummary = namedtuple(
+    'PackingSummary',
+    ('tasks', 'exact_tasks', 'oversampled_segments', 'missing_segments'),
+)
+
+
+def _reachable_layers(
+    lengths: List[int], counts: Dict[int, int], capacity: int
+) -> List[int]:
+    """
+    Returns bitsets of sums reachable with the first i lengths, for all i.
+
+    Bit s of layers[i] is set if s <= capacity can be written as a sum of
+    lengths[:i], using each length at most counts[length] times.
+    """
+    mask = (1 << (capacity + 1)) - 1
+    layers = [1]
+    for length in lengths:
+        previous = layers[-1]
+        reachable = previous
+        for _ in range(min(counts[length], capacity // length)):
+            previous = (previous << length) & mask
+            if not previous:
+                break
+            reachable |= previous
+        layers.append(reachable)
+    return layers
+
+
+def _best_sum(reachable: int, capacity: int) -> int:
+    """
+    Returns largest reachable sum not exceeding capacity.
+    """
+    return (reachable & ((1 << (capacity + 1)) - 1)).bit_length() - 1
+
+
+def _reconstruct(
+    layers: List[int], lengths: List[int], counts: Dict[int, int], total: int
+) -> List[int]:
+    """
+    Returns document lengths summing to total.
+
+    Lengths are taken in reverse order, as many as possible of each.
+    """
+    chosen = []
+    for i in range(len(lengths), 0, -1):
+        length = lengths[i - 1]
+        for k in range(min(counts[length], total // length), -1, -1):
+            if (layers[i - 1] >> (total - k * length)) & 1:
+                chosen.extend([length] * k)
+                total -= k * length
+                break
+    assert total == 0, 'sum is not reachable'
+    return chosen
+
+
+class DocumentPool:
+    """
+    Documents bucketed by length and system, with per-system usage counts.
+
+    Documents of each (length, system) bucket are taken in seeded random
+    order. With reuse set, taken documents are appended again, so that
+    buckets cycle through their documents for oversampling.
+    """
+
+    def __init__(self, docs: List[Doc], rng: Random, reuse: bool = False):
+        self.buckets: Dict[int, Dict[str, List[Doc]]] = {}
+        for doc in docs:
+            systems = self.buckets.setdefault(doc[0], OrderedDict())
+            systems.setdefault(doc[2], []).append(doc)
+
+        for systems in self.buckets.values():
+            for sys_docs in systems.values():
+                rng.shuffle(sys_docs)
+
+        sys_ids = sorted({doc[2] for doc in docs})
+        rng.shuffle(sys_ids)
+        self.rank = {sys_id: rank for rank, sys_id in enumerate(sys_ids)}
+        self.usage = {sys_id: 0 for sys_id in sys_ids}
+        self.sizes = {
+            length: sum(len(x) for x in systems.values())
+            for length, systems in self.buckets.items()
+        }
+        self.reuse = reuse
+
+    def counts(self, exclude: List[Doc] = ()) -> Dict[int, int]:
+        """
+        Returns number of documents per length, excluding given documents.
+        """
+        counts = dict(self.sizes)
+        for doc in exclude:
+            if doc in self.buckets.get(doc[0], {}).get(doc[2], ()):
+                counts[doc[0]] -= 1
+        return {length: count for length, count in counts.items() if count > 0}
+
+    def take(self, length: int, task: List[Doc]) -> Doc:
+        """
+        Takes document of given length for task, balancing systems.
+        """
+        task_systems = {doc[2] for doc in task}
+        systems = self.buckets[length]
+        sys_id = min(
+            (
+                sys_id
+                for sys_id, sys_docs in systems.items()
+                if not self.reuse or any(doc not in task for doc in sys_docs)
+            ),
+            key=lambda x: (x in task_systems, self.usage[x], self.rank[x]),
+        )
+        sys_docs = systems[sys_id]
+        pos = next(i for i, doc in enumerate(sys_docs) if doc not in task)
+        doc = sys_docs.pop(pos)
+
+        if self.reuse:
+            sys_docs.append(doc)
+        else:
+            self.sizes[length] -= 1
+            if not sys_docs:
+                del systems[sys_id]
+            if not systems:
+                del self.buckets[length]
+                del self.sizes[length]
+
+        self.usage[sys_id] += 1
+        return doc
+
+
+def _fill(
+    pool: DocumentPool,
+    task: List[Doc],
+    capacity: int,
+    complement: Optional[DocumentPool] = None,
+) -> int:
+    """
+    Adds documents from pool with up to capacity segments to task.
+
+    Returns number of added segments, which is as close to capacity as
+    the documents in the pool allow. If capacity cannot be filled exactly
+    and a complement pool is given, fewer segments may be added, so that
+    the rest can be filled exactly from the complement pool.
+    """
+    # Lengths with most documents last, so they are preferred by _reconstruct()
+    counts = pool.counts(exclude=task)
+    lengths = sorted(
+        (length for length in counts if length <= capacity),
+        key=lambda x: (counts[x], x),
+    )
+    if not lengths:
+        return 0
+
+    layers = _reachable_layers(lengths, counts, capacity)
+    total = _best_sum(layers[-1], capacity)
+
+    if complement is not None and total < capacity:
+        other_counts = complement.counts()
+        other_lengths = sorted(x for x in other_counts if x <= capacity)
+        other = _reachable_layers(other_lengths, other_counts, capacity)[-1]
+        for candidate in range(total, 0, -1):
+            if (layers[-1] >> candidate) & 1 and (other >> capacity - candidate) & 1:
+                total = candidate
+                break
+
+    for length in _reconstruct(layers, lengths, counts, total):
+        task.append(pool.take(length, task))
+    return total
+
+
+def pack_tasks(
+    docs: List[Doc], task_size: int, rng: Random, oversample: bool = True
+) -> Tuple[List[Tuple[Doc, ...]], PackingSummary]:
+    """
+    Packs documents into tasks with task_size segments each.
+
+    Every document is used once. Tasks which cannot be filled exactly are
+    topped up with documents used in other tasks if oversample is set.
+    Raises ValueError for documents longer than task_size.
+
+    Returns list of tasks and PackingSummary.
+    """
+    for doc in docs:
+        if not 0 < doc[0] <= task_size:
+            raise ValueError(
+                'Document {0} has {1} segments, expected 1 to {2}'.format(
+                    doc[1], doc[0], task_size
+                )
+            )
+
+    pool = DocumentPool(docs, rng)
+    oversampling_pool = DocumentPool(docs, rng, reuse=True) if oversample else None
+
+    tasks: List[Tuple[Doc, ...]] = []
+    exact_tasks = oversampled = missing = 0
+    while pool.buckets:
+        task: List[Doc] = []
+        task_len = _fill(pool, task, task_size, complement=oversampling_pool)
+        if task_len == task_size:
+            exact_tasks += 1
+
+        elif oversampling_pool is not None:
+            added = _fill(oversampling_pool, task, task_size - task_len)
+            oversampled += added
+            task_len += added
+
+        missing += task_size - task_len
+        rng.shuffle(task)
+        tasks.append(tuple(task))
+
+    return tasks, PackingSummary(len(tasks), exact_tasks, oversampled, missing)
+
@@ -0,0 +1,215 @@
+# pylint: disable=C0103,C0111,C0330,E1101
+"""
+Streaming loader for test sets in WMT XML format.
+
+Shared by the create_*_tasks.py scripts. Documents are parsed one at a
+time with lxml.etree.iterparse() and cleared once extracted, so memory
+for the XML tree stays proportional to one document, independent of the
+size of the test set and the number of systems.
+"""
+import sys
+from collections import OrderedDict
+from time import perf_counter
+
+from lxml import etree
+
+MISSING_TRANSLATION_MESSAGE = ("NO TRANSLATION AVAILABLE",)
+DEFAULT_TRANSLATOR = "DEFAULT"
+
+
+def _get_sents(doc, missing_text=""):
+    """Returns segment ID => text for all segments below doc."""
+    return {
+        int(seg.get("id")): seg.text if seg.text else missing_text
+        for seg in doc.iter("seg")
+    }
+
+
+def iter_docs(xml_file):
+    """
+    Yields one (doc ID, attributes, src, refs, hyps) tuple per document.
+
+    src is a tuple of (lang, segment ID => text), refs and hyps are lists
+    of (lang, translator or system, segment ID => text). Source texts of
+    empty segments are None, reference and hypothesis texts are "".
+    Processed elements are cleared, so that the tree never holds more
+    than the current document.
+    """
+    context = etree.iterparse(xml_file, events=("end",), tag="doc")
+    for _, doc in context:
+        src = None
+        refs, hyps = [], []
+        for child in doc.iterchildren("src", "ref", "hyp"):
+            lang = child.get("lang")
+            if child.tag == "src":
+                src = (lang, _get_sents(child, missing_text=None))
+            elif child.tag == "ref":
+                refs.append((lang, child.get("translator"), _get_sents(child)))
+            else:
+                hyps.append((lang, child.get("system"), _get_sents(child)))
+
+        yield doc.get("id"), dict(doc.attrib), src, refs, hyps
+
+        # Free the document and any preceding siblings kept by lxml
+        doc.clear(keep_tail=False)
+        while doc.getprevious() is not None:
+            del doc.getparent()[0]
+
+    del context
+
+
+def unwrap_xml(
+    xml_file,
+    missing_message=MISSING_TRANSLATION_MESSAGE,
+    encoding='utf-8',
+):
+    """
+    Unwraps an xml file in WMT format, producing source and (if present) reference files
+
+    :param xml_file: The xml file (or fd)
+    :param missing_message: The message to insert when no reference
+
+    :returns: src_lang, src_lines, ref_lang, ref_lines, hyp_lang, hyp_lines
+
+    ref_lines maps translator to document to tuples of segment id and line text
+    hyp_lines maps system to document to tuples of segment id and line text
+
+    ref_lang and hyp_lang may be None, and then their lines are empty
+    note: a single language is assumed for each of sources, refs and hyps
+
+    The file is read in a single streaming pass. Translators and systems
+    are ordered by first occurrence, so results do not depend on hash
+    seeds. Documents which lack a translator's reference or a system's
+    output get missing_message for those segments.
+
+    This function has been extracted from
+    https://github.com/wmt-conference/wmt-format-tools/wmtformat/unwrap.py with
+    some modifications
+    """
+    started = perf_counter()
+
+    # Languages are checked across all documents, including test suites
+    src_langs, ref_langs, hyp_langs = set(), set(), set()
+    translators, systems = OrderedDict(), OrderedDict()
+
+    # Documents which are not test suites: doc ID, src, refs, hyps
+    docs = []
+    doc_count = 0
+    for doc_id, attrib, src, refs, hyps in iter_docs(xml_file):
+        doc_count += 1
+        if src is not None:
+            src_langs.add(src[0])
+        for lang, translator, _ in refs:
+            ref_langs.add(lang)
+            if translator:
+                translators[translator] = True
+        for lang, system, _ in hyps:
+            hyp_langs.add(lang)
+            systems[system] = True
+
+        if "testsuite" in attrib:
+            continue
+
+        src_sents = src[1] if src is not None else {}
+        docs.append((doc_id, src_sents, refs, hyps))
+
+    if len(src_langs) > 1:
+        raise RuntimeError("Multiple source languages found")
+
+    if len(src_langs) == 0:
+        raise RuntimeError("No source languages found")
+
+    src_lang = src_langs.pop()
+    src_docs = OrderedDict()
+
+    if len(ref_langs) > 1:
+        raise RuntimeError("Multiple reference languages found")
+
+    translators = list(translators)
+    if len(ref_langs) > 0:
+        if len(translators) == 0:
+            print("No translator identifiers found")
+            translators.append(DEFAULT_TRANSLATOR)
+        ref_lang = ref_langs.pop()
+        ref_docs = OrderedDict(
+            (translator, OrderedDict()) for translator in translators
+        )
+    else:
+        print("No references found")
+        ref_lang = None
+        ref_docs = OrderedDict()
+
+    if len(hyp_langs) > 1:
+        raise RuntimeError(f"Multiple hypothesis languages found: {hyp_langs}")
+
+    systems = list(systems)
+    if len(hyp_langs) > 0:
+        hyp_docs = OrderedDict((system, OrderedDict()) for system in systems)
+        hyp_lang = hyp_langs.pop()
+    else:
+        hyp_docs = OrderedDict()
+        hyp_lang = None
+
+    # Extract text
+    src_sent_count = 0
+    for doc_id, src_sents, refs, hyps in docs:
+        src = []
+
+        if ref_lang:
+            # If no translator identifiers, we just read one reference (if any)
+            # If there are translator identifiers, we add a reference for each translator
+            if len(translators) == 1 and DEFAULT_TRANSLATOR in translators:
+                trans_to_ref = {DEFAULT_TRANSLATOR: refs[0][2] if refs else {}}
+            else:
+                trans_to_ref = {translator: sents for _, translator, sents in refs}
+
+        if hyp_lang:
+            system_to_ref = {system: sents for _, system, sents in hyps}
+
+        for seg_id in sorted(src_sents.keys()):
+            src.append([seg_id, src_sents[seg_id]])
+            src_sent_count += 1
+            if ref_lang:
+                for translator in translators:
+                    if doc_id not in ref_docs[translator]:
+                        ref_docs[translator][doc_id] = []
+
+                    _ref_text = trans_to_ref.get(translator, {}).get(
+                        seg_id, missing_message
+                    )
+                    ref_docs[translator][doc_id].append((seg_id, _ref_text))
+
+                    if _ref_text == MISSING_TRANSLATION_MESSAGE:
+                        print(
+                            f'Warning: missing reference for translator {translator}, '
+                            f'document {doc_id}, segment {seg_id}'
+                        )
+            if hyp_lang:
+                for system in systems:
+                    if doc_id not in hyp_docs[system]:
+                        hyp_docs[system][doc_id] = []
+
+                    _hyp_text = system_to_ref.get(system, {}).get(
+                        seg_id, missing_message
+                    )
+                    hyp_docs[system][doc_id].append((seg_id, _hyp_text))
+
+                    if _hyp_text == MISSING_TRANSLATION_MESSAGE:
+                        print(
+                            f'Warning: missing translation from {system}, '
+                            f'document {doc_id}, segment {seg_id}'
+                        )
+
+        src_docs[doc_id] = src
+
+    elapsed = perf_counter() - started
+    print(
+        f"Extracted {len(docs)} document(s) containing {src_sent_count} sentences in {src_lang}"
+    )
+    print(
+        f"Parsed {doc_count} document(s) in {elapsed:.2f}s "
+        f"({doc_count / max(elapsed, 1e-9):.1f} docs/s)",
+        file=sys.stderr,
+    )
+
+    return src_lang, src_docs, ref_lang, ref_docs, hyp_lang, hyp_docs
@@ -0,0 +1 @@
+../Scripts/bad_refs.py
\ No newline at end of file
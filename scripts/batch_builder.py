@@ -0,0 +1 @@
+../Scripts/batch_builder.py
\ No newline at end of file
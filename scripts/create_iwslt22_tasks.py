@@ -0,0 +1 @@
+../Scripts/create_iwslt22_tasks.py
\ No newline at end of file
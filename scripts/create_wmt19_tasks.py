@@ -0,0 +1 @@
+../Scripts/create_wmt19_tasks.py
\ No newline at end of file
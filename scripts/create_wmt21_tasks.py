@@ -0,0 +1 @@
+../Scripts/create_wmt21_tasks.py
\ No newline at end of file
@@ -0,0 +1 @@
+../Scripts/packing.py
\ No newline at end of file
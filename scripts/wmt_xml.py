@@ -0,0 +1 @@
+../Scripts/wmt_xml.py
\ No newline at end of file